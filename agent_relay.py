@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent Relay - Débat / relais entre agents sur N tours, sans interface
+
+Deux agents ou plus (profils, éventuellement le même profil avec des rôles
+différents) se répondent à tour de rôle:
+- debate: chaque agent reçoit toutes les interventions des autres depuis son dernier tour
+- relay:  chaque agent ne reçoit que la réponse de l'agent précédent
+
+Chaque agent a son propre ConversationManager (seuils de synthèse du profil,
+surchargeables par agent). La réponse d'un agent est transmise au suivant dès
+la fin de son flux, dans le même processus; le ChatService partagé garde
+profils, templates et gestionnaire natif chargés pendant toute la session.
+
+La transcription est écrite au fil de l'eau en JSONL dans conversations/
+(une ligne d'en-tête, puis une ligne par intervention).
+
+Usage:
+    python agent_relay.py --agents Gemini Claude --rounds 5 --topic "Faut-il tout mettre en cache ?"
+    python agent_relay.py --config debat.json --rounds 50
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from tracing import set_attribute, span
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS_DIR = "conversations"
+MODES = ("debate", "relay")
+DEFAULT_INSTRUCTIONS = {
+    "debate": "Tu participes à un débat avec d'autres agents. Réponds à leurs arguments de façon concise.",
+    "relay": "Tu reçois le travail de l'agent précédent. Améliore-le ou poursuis-le de façon concise.",
+}
+
+
+class RelayAgent:
+    """Participant: profil effectif, historique propre et messages reçus en attente"""
+
+    def __init__(self, service, spec: Dict[str, Any]):
+        self.profile_name = spec['profile']
+        self.name = spec.get('name') or self.profile_name
+        profile = copy.deepcopy(service.load_profile(self.profile_name))
+        values = profile.setdefault('chat', {}).setdefault('values', {})
+        for key in ('role', 'behavior', 'llm_model'):
+            if key in spec:
+                values[key] = spec[key]
+        if spec.get('conversation_management'):
+            management = dict(profile.get('conversation_management') or {})
+            management.update(spec['conversation_management'])
+            profile['conversation_management'] = management
+        self.profile = profile
+        self.conversation = service.new_conversation(profile)
+        self.pending: List[Dict[str, str]] = []
+        self.turns = 0
+
+    def describe(self) -> Dict[str, Any]:
+        values = self.profile.get('chat', {}).get('values', {})
+        return {
+            'name': self.name,
+            'profile': self.profile_name,
+            'llm_model': values.get('llm_model', ''),
+            'role': values.get('role', ''),
+            'behavior': values.get('behavior', ''),
+        }
+
+
+class TranscriptWriter:
+    """Transcription JSONL écrite et vidée à chaque intervention"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class RelaySession:
+    """Session de débat ou de relais entre agents"""
+
+    def __init__(self, service, agents: List[Dict[str, Any]], mode: str = "debate",
+                 instructions: Optional[str] = None, transcript_path: Optional[str] = None):
+        if mode not in MODES:
+            raise ValueError(f"Mode inconnu: {mode} (attendu: {', '.join(MODES)})")
+        if len(agents) < 2:
+            raise ValueError("Au moins deux agents sont nécessaires")
+        self.service = service
+        self.mode = mode
+        self.instructions = DEFAULT_INSTRUCTIONS[mode] if instructions is None else instructions
+        self.agents = [RelayAgent(service, spec) for spec in agents]
+        names = [agent.name for agent in self.agents]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Noms d'agents en double: {names} (utilisez 'name' pour les distinguer)")
+        if transcript_path is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            transcript_path = os.path.join(CONVERSATIONS_DIR, f"relay_{mode}_{timestamp}.jsonl")
+        self.transcript_path = transcript_path
+        self.stop_requested = threading.Event()
+
+    def _question(self, agent: RelayAgent, topic: str) -> str:
+        parts = []
+        if agent.turns == 0:
+            parts.append(f"{self.instructions}\nTu es {agent.name}.\nSujet: {topic}")
+        for message in agent.pending:
+            parts.append(f"{message['agent']}: {message['text']}")
+        agent.pending = []
+        return "\n\n".join(parts)
+
+    def _distribute(self, speaker_index: int, text: str) -> None:
+        speaker = self.agents[speaker_index]
+        message = {'agent': speaker.name, 'text': text}
+        if self.mode == "relay":
+            following = self.agents[(speaker_index + 1) % len(self.agents)]
+            following.pending = [message]
+        else:
+            for agent in self.agents:
+                if agent is not speaker:
+                    agent.pending.append(message)
+
+    def run(self, topic: str, rounds: int,
+            on_turn: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Exécute jusqu'à `rounds` tours (chaque agent parle une fois par tour)
+
+        Returns:
+            Dict {status, turns, rounds_completed, transcript, error, total_seconds}
+        """
+        writer = TranscriptWriter(self.transcript_path)
+        start = time.perf_counter()
+        turn_count = 0
+        rounds_completed = 0
+        status, error = "success", None
+        writer.write({
+            'type': 'session', 'mode': self.mode, 'topic': topic, 'rounds': rounds,
+            'started_at': datetime.now().isoformat(), 'agents': [a.describe() for a in self.agents],
+        })
+        try:
+            with span("relay.session", mode=self.mode, agents=len(self.agents), rounds=rounds):
+                for round_index in range(1, rounds + 1):
+                    for index, agent in enumerate(self.agents):
+                        if self.stop_requested.is_set():
+                            status = "stopped"
+                            break
+                        with span("relay.turn", agent=agent.name, round=round_index):
+                            details = self.service.chat_turn(agent.profile, agent.conversation,
+                                                             self._question(agent, topic))
+                            set_attribute("success", details['success'])
+                        agent.turns += 1
+                        turn_count += 1
+                        record = {
+                            'type': 'turn', 'round': round_index, 'agent': agent.name,
+                            'profile': agent.profile_name, 'success': details['success'],
+                            'text': details['text'], 'usage': details['usage'],
+                            'latency_ms': round(details.get('latency_seconds', 0.0) * 1000, 1),
+                            'summarized': details.get('summarized', False),
+                            'timestamp': datetime.now().isoformat(),
+                        }
+                        if not details['success']:
+                            record['error'] = details['error'] or details['json_error']
+                        writer.write(record)
+                        if on_turn:
+                            on_turn(record)
+                        if not details['success']:
+                            status, error = "failed", f"{agent.name}: {record['error']}"
+                            break
+                        self._distribute(index, details['text'])
+                    if status != "success":
+                        break
+                    rounds_completed = round_index
+        except KeyboardInterrupt:
+            status = "stopped"
+            raise
+        except Exception as e:
+            # Erreur de transport (ChatServiceError, délai): la transcription reste valide
+            logger.warning(f"[Relay] Session interrompue: {e}")
+            status, error = "failed", str(e)
+        finally:
+            summary = {
+                'type': 'end', 'status': status, 'error': error, 'turns': turn_count,
+                'rounds_completed': rounds_completed, 'total_seconds': round(time.perf_counter() - start, 3),
+            }
+            writer.write(summary)
+            writer.close()
+        return dict(summary, transcript=self.transcript_path)
+
+
+def _load_config(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Débat / relais entre agents Rob-1")
+    parser.add_argument("--agents", nargs="+", metavar="PROFIL", help="Profils participants (dans l'ordre de parole)")
+    parser.add_argument("--config", help="JSON {agents: [{name, profile, role, behavior, ...}], mode, topic, instructions}")
+    parser.add_argument("--topic", help="Sujet ou message d'ouverture")
+    parser.add_argument("--rounds", type=int, default=3, help="Nombre de tours (défaut: 3)")
+    parser.add_argument("--mode", choices=MODES, help="debate (défaut) ou relay")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Délai par appel (s)")
+    parser.add_argument("-o", "--output", help="Chemin de la transcription JSONL")
+    arguments = parser.parse_args(argv)
+
+    config = _load_config(arguments.config) if arguments.config else {}
+    agents = config.get('agents') or [{'profile': name} for name in (arguments.agents or [])]
+    topic = arguments.topic or config.get('topic')
+    if not agents or not topic:
+        parser.error("--agents (ou --config) et --topic sont requis")
+
+    from chat_service import ChatService
+    service = ChatService(timeout=arguments.timeout)
+    try:
+        session = RelaySession(service, agents, mode=arguments.mode or config.get('mode', 'debate'),
+                               instructions=config.get('instructions'), transcript_path=arguments.output)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0] if e.args else e}")
+        return 2
+
+    def afficher(record: Dict[str, Any]) -> None:
+        if record['success']:
+            print(f"\n[{record['round']}] {record['agent']} ({record['latency_ms']:.0f} ms):\n{record['text']}")
+        else:
+            print(f"\n[{record['round']}] ❌ {record['agent']}: {record.get('error')}")
+
+    print(f"🎙️ {session.mode}: {', '.join(a.name for a in session.agents)} - transcription {session.transcript_path}")
+    try:
+        result = session.run(topic, arguments.rounds, on_turn=afficher)
+    except KeyboardInterrupt:
+        print(f"\n⏹️ Session interrompue - transcription {session.transcript_path}")
+        return 130
+    print(f"\n[Relay] {result['status']}: {result['turns']} intervention(s) en {result['total_seconds']:.1f} s")
+    return 0 if result['status'] == 'success' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,194 +2,460 @@
 # -*- coding: utf-8 -*-
 """
 Architecture Évolutive - Système de parseurs de réponse multi-API
+
+Registre de parseurs indexé par provider (nom du profil):
+- Dispatch O(1) par dictionnaire, sans détection heuristique
+- Couverture des dix providers: Gemini, OpenAI, Claude, Qwen, Mistral, Grok,
+  DeepSeek, Kimi, Perplexity, LMStudio
+- Extraction uniforme du texte, de l'usage tokens et de la raison de fin
 """
 
 import json
 import logging
-from typing import Dict, Any, Tuple, Optional, Callable
+from typing import Dict, Any, Tuple, Optional, Callable, List, Union
+
+from response_parser import (
+    compile_response_path, loads_json, extract_error, extract_usage,
+    extract_finish_reason, _MISSING
+)
+from stream_parser import StreamingJSONExtractor, decode_output
+
+# Normalisation des raisons de fin propres à chaque provider
+FINISH_REASON_MAP = {
+    "stop": "stop", "STOP": "stop", "end_turn": "stop", "stop_sequence": "stop",
+    "completed": "stop", "eos": "stop",
+    "length": "length", "max_tokens": "length", "MAX_TOKENS": "length",
+    "max_output_tokens": "length", "model_length": "length",
+    "content_filter": "content_filter", "SAFETY": "content_filter",
+    "RECITATION": "content_filter", "BLOCKLIST": "content_filter",
+    "PROHIBITED_CONTENT": "content_filter", "refusal": "content_filter",
+    "tool_calls": "tool_calls", "tool_use": "tool_calls", "function_call": "tool_calls",
+    "error": "error", "failed": "error",
+}
+
+# Alias de noms de profils vers la clé du registre
+PROVIDER_ALIASES = {
+    "anthropic": "claude",
+    "google": "gemini",
+    "xai": "grok",
+    "moonshot": "kimi",
+    "lm studio": "lmstudio",
+}
+
+# Chemins communs aux APIs compatibles OpenAI Chat Completions
+_CHAT_COMPLETIONS_TEXT = [["choices", 0, "message", "content"], ["choices", 0, "text"]]
+_CHAT_COMPLETIONS_USAGE = {
+    "input_tokens": [["usage", "prompt_tokens"]],
+    "output_tokens": [["usage", "completion_tokens"]],
+    "total_tokens": [["usage", "total_tokens"]],
+}
+_CHAT_COMPLETIONS_FINISH = [["choices", 0, "finish_reason"]]
+
+
+def normalize_finish_reason(raw_reason: Optional[str]) -> Optional[str]:
+    """Ramène une raison de fin provider à stop/length/content_filter/tool_calls/error"""
+    if raw_reason is None:
+        return None
+    return FINISH_REASON_MAP.get(raw_reason, FINISH_REASON_MAP.get(str(raw_reason).lower(), str(raw_reason).lower()))
+
+
+def _openai_responses_text(response_json: Dict[str, Any]) -> Any:
+    """Texte de l'API OpenAI Responses: premier bloc output_text d'un item message"""
+    if isinstance(response_json.get("output_text"), str):
+        return response_json["output_text"]
+    output = response_json.get("output")
+    if not isinstance(output, list):
+        return _MISSING
+    for item in output:
+        if isinstance(item, dict) and item.get("type") == "message":
+            for part in item.get("content") or []:
+                if isinstance(part, dict) and isinstance(part.get("text"), str):
+                    return part["text"]
+    return _MISSING
+
+
+class ProviderParser:
+    """
+    Parseur déclaratif d'un provider
+    Les chemins sont compilés une seule fois à la construction
+    """
+
+    def __init__(self, name: str, label: str,
+                 text_paths: List[List[Union[str, int]]],
+                 usage_paths: Dict[str, List[List[Union[str, int]]]],
+                 finish_paths: List[List[Union[str, int]]],
+                 text_extractors: Optional[List[Callable[[Dict[str, Any]], Any]]] = None,
+                 stream_text_paths: Optional[List[List[Union[str, int]]]] = None):
+        """
+        Args:
+            name: Clé du registre (nom du profil en minuscules)
+            label: Nom affiché dans les messages d'erreur
+            text_paths: Chemins alternatifs vers le texte (variantes de format du provider)
+            usage_paths: Chemins par compteur (input_tokens, output_tokens, total_tokens)
+            finish_paths: Chemins alternatifs vers la raison de fin
+            text_extractors: Extracteurs spécifiques essayés après les chemins
+            stream_text_paths: Chemins supplémentaires pour l'extraction streamée
+                               (formats couverts par text_extractors)
+        """
+        self.name = name
+        self.label = label
+        self.stream_paths = [list(p) for p in text_paths] + [list(p) for p in (stream_text_paths or [])]
+        self._text_accessors = [compile_response_path(p) for p in text_paths] + list(text_extractors or [])
+        self._usage_accessors = {
+            field: [compile_response_path(p) for p in paths] for field, paths in usage_paths.items()
+        }
+        self._finish_accessors = [compile_response_path(p) for p in finish_paths]
+
+    @staticmethod
+    def _first(accessors: List[Callable[[Any], Any]], data: Any) -> Any:
+        for accessor in accessors:
+            value = accessor(data)
+            if value is not _MISSING and value is not None:
+                return value
+        return _MISSING
+
+    def extract_text(self, response_json: Any, response_path: Optional[List[Union[str, int]]] = None) -> Optional[str]:
+        """Texte de la réponse: response_path du profil en priorité, puis chemins du provider"""
+        if response_path:
+            value = compile_response_path(response_path)(response_json)
+            if type(value) is str:
+                return value
+        if not isinstance(response_json, dict):
+            return None
+        value = self._first(self._text_accessors, response_json)
+        return value if type(value) is str else None
+
+    def extract_usage(self, response_json: Any) -> Optional[Dict[str, int]]:
+        """Compteurs de tokens normalisés {input_tokens, output_tokens, total_tokens}"""
+        usage = {}
+        for field, accessors in self._usage_accessors.items():
+            value = self._first(accessors, response_json)
+            if isinstance(value, int):
+                usage[field] = value
+        if not usage:
+            return None
+        usage.setdefault("input_tokens", 0)
+        usage.setdefault("output_tokens", 0)
+        usage.setdefault("total_tokens", usage["input_tokens"] + usage["output_tokens"])
+        return usage
+
+    def extract_finish_reason(self, response_json: Any) -> Optional[str]:
+        """Raison de fin brute telle que renvoyée par le provider"""
+        value = self._first(self._finish_accessors, response_json)
+        return value if isinstance(value, str) else None
+
+    def parse(self, response_json: Any, response_path: Optional[List[Union[str, int]]] = None) -> Dict[str, Any]:
+        """
+        Parse une réponse décodée
+
+        Returns:
+            dict: {success, text, usage, finish_reason, raw_finish_reason, error, provider}
+            error ne concerne que les erreurs renvoyées par le provider; un format
+            non reconnu donne success=False et error=None
+        """
+        result = {
+            "success": False,
+            "text": None,
+            "usage": None,
+            "finish_reason": None,
+            "raw_finish_reason": None,
+            "error": None,
+            "provider": self.name
+        }
+
+        provider_error = extract_error(response_json)
+        text = self.extract_text(response_json, response_path) if provider_error is None else None
+
+        if text is not None:
+            result["success"] = True
+            result["text"] = text
+        elif provider_error is not None:
+            result["error"] = f"Erreur API {self.label}: {provider_error}"
+
+        if isinstance(response_json, dict):
+            result["usage"] = self.extract_usage(response_json)
+            result["raw_finish_reason"] = self.extract_finish_reason(response_json)
+            result["finish_reason"] = normalize_finish_reason(result["raw_finish_reason"])
+        return result
+
+
+class GenericParser(ProviderParser):
+    """
+    Parseur pour provider non enregistré: seul le response_path du profil est utilisé,
+    usage et raison de fin via les extracteurs génériques (aucune détection de provider)
+    """
+
+    def __init__(self, name: str = "generic"):
+        super().__init__(name, name.title(), [], {}, [])
+
+    def extract_usage(self, response_json: Any) -> Optional[Dict[str, int]]:
+        return extract_usage(response_json)
+
+    def extract_finish_reason(self, response_json: Any) -> Optional[str]:
+        value = extract_finish_reason(response_json)
+        return value if isinstance(value, str) else None
+
+
+def _build_default_parsers() -> Dict[str, ProviderParser]:
+    """Construit le registre des dix providers livrés dans templates/chat"""
+    parsers = [
+        ProviderParser(
+            "gemini", "Gemini",
+            text_paths=[["candidates", 0, "content", "parts", 0, "text"]],
+            usage_paths={
+                "input_tokens": [["usageMetadata", "promptTokenCount"]],
+                "output_tokens": [["usageMetadata", "candidatesTokenCount"]],
+                "total_tokens": [["usageMetadata", "totalTokenCount"]],
+            },
+            finish_paths=[["candidates", 0, "finishReason"]]
+        ),
+        ProviderParser(
+            "openai", "OpenAI",
+            # Chat Completions, Completion legacy puis API Responses (template curl.txt)
+            text_paths=_CHAT_COMPLETIONS_TEXT,
+            usage_paths={
+                "input_tokens": [["usage", "prompt_tokens"], ["usage", "input_tokens"]],
+                "output_tokens": [["usage", "completion_tokens"], ["usage", "output_tokens"]],
+                "total_tokens": [["usage", "total_tokens"]],
+            },
+            finish_paths=_CHAT_COMPLETIONS_FINISH + [["incomplete_details", "reason"], ["status"]],
+            text_extractors=[_openai_responses_text],
+            # API Responses: item message seul ou précédé d'un item reasoning
+            stream_text_paths=[["output_text"], ["output", 0, "content", 0, "text"],
+                               ["output", 1, "content", 0, "text"]]
+        ),
+        ProviderParser(
+            "claude", "Claude",
+            text_paths=[["content", 0, "text"], ["text"]],
+            usage_paths={
+                "input_tokens": [["usage", "input_tokens"]],
+                "output_tokens": [["usage", "output_tokens"]],
+            },
+            finish_paths=[["stop_reason"]]
+        ),
+        ProviderParser(
+            "qwen", "Qwen",
+            # OpenRouter (compatible OpenAI) puis DashScope natif
+            text_paths=_CHAT_COMPLETIONS_TEXT + [["output", "text"], ["output", "choices", 0, "message", "content"]],
+            usage_paths={
+                "input_tokens": [["usage", "prompt_tokens"], ["usage", "input_tokens"]],
+                "output_tokens": [["usage", "completion_tokens"], ["usage", "output_tokens"]],
+                "total_tokens": [["usage", "total_tokens"]],
+            },
+            finish_paths=_CHAT_COMPLETIONS_FINISH + [["output", "finish_reason"]]
+        ),
+    ]
+
+    # Providers compatibles OpenAI Chat Completions
+    for name, label in [("mistral", "Mistral"), ("grok", "Grok"), ("deepseek", "DeepSeek"),
+                        ("kimi", "Kimi"), ("perplexity", "Perplexity"), ("lmstudio", "LMStudio")]:
+        parsers.append(ProviderParser(
+            name, label,
+            text_paths=_CHAT_COMPLETIONS_TEXT,
+            usage_paths=_CHAT_COMPLETIONS_USAGE,
+            finish_paths=_CHAT_COMPLETIONS_FINISH
+        ))
+
+    return {parser.name: parser for parser in parsers}
+
+
+def provider_from_profile(profile: Optional[Dict[str, Any]]) -> str:
+    """
+    Clé de registre à partir du profil, alias résolus
+
+    Le template_id ("openai_chat" -> "openai") prime: un profil renommé
+    ("OpenAI-pro", "Mon GPT") garde son parseur. Le nom du profil ne sert
+    qu'en l'absence de template_id.
+    """
+    if not profile:
+        return "generic"
+    template_id = str(profile.get('template_id') or profile.get('chat', {}).get('template_id') or '').strip().lower()
+    if template_id:
+        name = template_id.split('_chat')[0] if '_chat' in template_id else template_id.split('_')[0]
+    else:
+        name = str(profile.get('name', '')).strip().lower()
+    return PROVIDER_ALIASES.get(name, name) or "generic"
+
 
 class APIResponseParser:
     """
     Gestionnaire centralisé pour parser les réponses de différentes APIs
     Architecture évolutive permettant d'ajouter facilement de nouvelles APIs
     """
-    
+
     def __init__(self):
-        # Registre des parseurs par type d'API
-        self._parsers: Dict[str, Callable] = {
-            'gemini': self._parse_gemini_response,
-            'openai': self._parse_openai_response,
-            'claude': self._parse_claude_response,
-            'qwen': self._parse_qwen_response,
-            'auto': self._auto_detect_and_parse
-        }
-    
+        # Registre des parseurs par provider
+        self._providers: Dict[str, ProviderParser] = _build_default_parsers()
+        # Parseurs personnalisés historiques: (response_json) -> (success, text, api_type)
+        self._custom_parsers: Dict[str, Callable] = {}
+        self._generic = GenericParser()
+
+    def get_parser(self, provider: str) -> ProviderParser:
+        """Retourne le parseur du provider (générique si non enregistré)"""
+        key = (provider or "").lower()
+        key = PROVIDER_ALIASES.get(key, key)
+        return self._providers.get(key, self._generic)
+
+    def describe_failure(self, result: Dict[str, Any]) -> str:
+        """Message d'échec lisible pour un résultat non réussi"""
+        if result.get("error"):
+            return result["error"]
+        if result.get("json_error"):
+            return f"Erreur de parsing JSON: {result['json_error']}"
+        label = self.get_parser(result.get("provider", "")).label
+        data = result.get("data")
+        structure = list(data.keys()) if isinstance(data, dict) else type(data).__name__
+        return f"Format {label} non reconnu: {structure}"
+
+    def parse(self, response: Union[str, bytes, Dict[str, Any]], provider: str,
+              response_path: Optional[List[Union[str, int]]] = None) -> Dict[str, Any]:
+        """
+        Parse une réponse API (brute ou décodée) avec le parseur du provider
+
+        Args:
+            response: Sortie brute (str/bytes) ou JSON décodé
+            provider: Clé du provider (voir provider_from_profile)
+            response_path: response_path du profil, prioritaire sur les chemins du provider
+
+        Returns:
+            dict: {success, text, usage, finish_reason, raw_finish_reason, error,
+                   provider, json_error, data}
+        """
+        if isinstance(response, (str, bytes)):
+            try:
+                data = loads_json(response)
+            except json.JSONDecodeError as e:
+                return {
+                    "success": False, "text": None, "usage": None, "finish_reason": None,
+                    "raw_finish_reason": None, "error": None, "provider": provider,
+                    "json_error": str(e), "data": None
+                }
+        else:
+            data = response
+
+        result = self.get_parser(provider).parse(data, response_path)
+        result["json_error"] = None
+        result["data"] = data
+        return result
+
+    def create_stream_extractor(self, provider: str, response_path: Optional[List[Union[str, int]]] = None,
+                                on_text: Optional[Callable[[str], None]] = None) -> StreamingJSONExtractor:
+        """
+        Crée un extracteur incrémental ciblant le texte du provider
+
+        Args:
+            provider: Clé du provider
+            response_path: response_path du profil, prioritaire
+            on_text: Callback recevant les fragments de texte au fil de l'eau
+
+        Returns:
+            StreamingJSONExtractor: À alimenter avec la sortie brute puis à passer à parse_stream
+        """
+        parser = self.get_parser(provider)
+        target_paths = ([list(response_path)] if response_path else []) + parser.stream_paths
+        return StreamingJSONExtractor(target_paths, on_text=on_text)
+
+    def parse_stream(self, extractor: StreamingJSONExtractor, provider: str,
+                     response_path: Optional[List[Union[str, int]]] = None) -> Dict[str, Any]:
+        """
+        Résultat structuré d'une extraction streamée (même format que parse)
+
+        Le corps complet est reparsé uniquement si le texte n'a pas été trouvé en flux
+        et que la réponse est restée sous la limite de conservation de l'extracteur.
+        Pour les réponses volumineuses, data contient le document minimal reconstruit.
+        """
+        if not extractor.text_complete:
+            raw = extractor.raw_bytes()
+            if raw is not None:
+                return self.parse(decode_output(raw).strip(), provider, response_path)
+
+        skeleton = extractor.skeleton()
+        result = self.get_parser(provider).parse(skeleton, response_path)
+        if extractor.text_complete:
+            result["success"] = True
+            result["text"] = extractor.text
+            result["error"] = None
+        result["json_error"] = extractor.error
+        result["data"] = skeleton
+        return result
+
     def parse_response(self, response_json: Dict[str, Any], api_type: str = 'auto') -> Tuple[bool, str, str]:
         """
-        Parse une réponse API selon le type spécifié
-        
+        Parse une réponse API selon le type spécifié (interface historique)
+
         Args:
             response_json: La réponse JSON de l'API
-            api_type: Type d'API ('gemini', 'openai', 'claude', 'auto')
-            
+            api_type: Provider ('gemini', 'openai', 'claude', ...) ou 'auto' (déprécié)
+
         Returns:
             Tuple (success, text_content, api_detected)
         """
         try:
-            if api_type in self._parsers:
-                return self._parsers[api_type](response_json)
-            else:
+            if api_type in self._custom_parsers:
+                return self._custom_parsers[api_type](response_json)
+            if api_type == 'auto':
+                return self._auto_detect_and_parse(response_json)
+
+            key = PROVIDER_ALIASES.get(api_type, api_type)
+            if key not in self._providers:
                 return False, f"Type d'API non supporté: {api_type}", "unknown"
-                
+
+            result = self._providers[key].parse(response_json)
+            result["data"] = response_json
+            return result["success"], result["text"] if result["success"] else self.describe_failure(result), key
+
         except Exception as e:
             logging.error(f"Erreur lors du parsing de la réponse: {e}")
             return False, f"Erreur de parsing: {e}", "error"
-    
+
     def _auto_detect_and_parse(self, response_json: Dict[str, Any]) -> Tuple[bool, str, str]:
         """
-        Détection automatique du type d'API et parsing approprié
+        Détection par clés de premier niveau - DÉPRÉCIÉ
+        Conservé pour compatibilité; utiliser parse() avec le provider du profil
         """
-        # D'abord vérifier les erreurs pour identifier l'API même en cas d'échec
-        if "error" in response_json:
-            error_obj = response_json["error"]
-            
-            # Identifier l'API par les caractéristiques de l'erreur
-            if isinstance(error_obj, dict):
-                # OpenAI: structure {"error": {"message": "...", "type": "...", "code": "..."}}
-                if "type" in error_obj or "code" in error_obj:
-                    success, text, _ = self._parsers['openai'](response_json)
-                    return success, text, "openai"
-                
-                # Gemini: structure différente
-                elif "status" in error_obj or "code" in str(error_obj):
-                    success, text, _ = self._parsers['gemini'](response_json)
-                    return success, text, "gemini"
-                
-                # Claude: structure {"error": {"message": "...", "type": "..."}}
-                else:
-                    success, text, _ = self._parsers['claude'](response_json)
-                    return success, text, "claude"
-        
-        # Détection par présence de clés spécifiques pour les réponses de succès
         detection_rules = [
             ('candidates', 'gemini'),
+            ('usageMetadata', 'gemini'),
             ('choices', 'openai'),
             ('content', 'claude'),
             ('output', 'qwen')
         ]
-        
+
         for key, api_type in detection_rules:
             if key in response_json:
-                success, text, _ = self._parsers[api_type](response_json)
-                return success, text, api_type
-        
-        # Si aucune structure connue détectée
+                result = self._providers[api_type].parse(response_json)
+                result["data"] = response_json
+                return result["success"], result["text"] if result["success"] else self.describe_failure(result), api_type
+
+        if "error" in response_json:
+            return False, f"Erreur API: {extract_error(response_json)}", "unknown"
+
         return False, f"Structure de réponse non reconnue: {list(response_json.keys())}", "unknown"
-    
-    def _parse_gemini_response(self, response_json: Dict[str, Any]) -> Tuple[bool, str, str]:
-        """Parse une réponse Gemini"""
-        try:
-            if "error" in response_json:
-                error_msg = response_json["error"].get("message", "Erreur inconnue")
-                return False, f"Erreur API Gemini: {error_msg}", "gemini"
-            
-            text = response_json["candidates"][0]["content"]["parts"][0]["text"]
-            return True, text, "gemini"
-            
-        except (KeyError, IndexError, TypeError) as e:
-            return False, f"Structure Gemini invalide: {e}", "gemini"
-    
-    def _parse_openai_response(self, response_json: Dict[str, Any]) -> Tuple[bool, str, str]:
-        """Parse une réponse OpenAI (Chat Completion ou Completion)"""
-        try:
-            if "error" in response_json:
-                error_obj = response_json["error"]
-                if isinstance(error_obj, dict):
-                    error_msg = error_obj.get("message", "Erreur inconnue")
-                    error_type = error_obj.get("type", "")
-                    error_code = error_obj.get("code", "")
-                    full_error = f"Erreur API OpenAI: {error_msg}"
-                    if error_type:
-                        full_error += f" (Type: {error_type})"
-                    if error_code:
-                        full_error += f" (Code: {error_code})"
-                    return False, full_error, "openai"
-                else:
-                    return False, f"Erreur API OpenAI: {error_obj}", "openai"
-            
-            choice = response_json["choices"][0]
-            
-            # Chat Completion format (gpt-4, gpt-3.5-turbo)
-            if "message" in choice:
-                text = choice["message"]["content"]
-                return True, text, "openai"
-            
-            # Legacy Completion format (text-davinci-003)
-            elif "text" in choice:
-                text = choice["text"]
-                return True, text, "openai"
-            
-            else:
-                return False, "Format OpenAI non reconnu", "openai"
-                
-        except (KeyError, IndexError, TypeError) as e:
-            return False, f"Structure OpenAI invalide: {e}", "openai"
-    
-    def _parse_claude_response(self, response_json: Dict[str, Any]) -> Tuple[bool, str, str]:
-        """Parse une réponse Claude/Anthropic"""
-        try:
-            if "error" in response_json:
-                error_msg = response_json["error"].get("message", "Erreur inconnue")
-                return False, f"Erreur API Claude: {error_msg}", "claude"
-            
-            # Format standard Claude
-            if isinstance(response_json.get("content"), list):
-                text = response_json["content"][0]["text"]
-                return True, text, "claude"
-            
-            # Format alternatif
-            elif "text" in response_json:
-                text = response_json["text"]
-                return True, text, "claude"
-            
-            else:
-                return False, "Format Claude non reconnu", "claude"
-                
-        except (KeyError, IndexError, TypeError) as e:
-            return False, f"Structure Claude invalide: {e}", "claude"
-    
-    def _parse_qwen_response(self, response_json: Dict[str, Any]) -> Tuple[bool, str, str]:
-        """Parse une réponse Qwen/Alibaba"""
-        try:
-            if "error" in response_json:
-                error_msg = response_json["error"].get("message", "Erreur inconnue")
-                return False, f"Erreur API Qwen: {error_msg}", "qwen"
-            
-            # Format standard Qwen
-            if "output" in response_json and "text" in response_json["output"]:
-                text = response_json["output"]["text"]
-                return True, text, "qwen"
-            
-            else:
-                return False, "Format Qwen non reconnu", "qwen"
-                
-        except (KeyError, IndexError, TypeError) as e:
-            return False, f"Structure Qwen invalide: {e}", "qwen"
-    
+
+    def register_provider(self, parser: ProviderParser):
+        """
+        Enregistre (ou remplace) le parseur déclaratif d'un provider
+
+        Args:
+            parser: Instance de ProviderParser
+        """
+        self._providers[parser.name] = parser
+        logging.info(f"Parseur provider enregistré pour {parser.name}")
+
     def register_custom_parser(self, api_name: str, parser_function: Callable):
         """
         Enregistre un parseur personnalisé pour une nouvelle API
-        
+
         Args:
             api_name: Nom de l'API
             parser_function: Fonction de parsing (response_json) -> (success, text, api_type)
         """
-        self._parsers[api_name] = parser_function
+        self._custom_parsers[api_name] = parser_function
         logging.info(f"Parseur personnalisé enregistré pour {api_name}")
-    
+
     def get_supported_apis(self) -> list:
         """Retourne la liste des APIs supportées"""
-        return [api for api in self._parsers.keys() if api != 'auto']
+        return sorted(set(self._providers) | set(self._custom_parsers))
 
 
 # Instance globale du parseur
@@ -201,6 +467,39 @@ def get_response_parser() -> APIResponseParser:
     return response_parser
 
 
+def parse_profile_response(response: Union[str, bytes, Dict[str, Any]], profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse une réponse avec le parseur du provider du profil et son response_path
+
+    Args:
+        response: Sortie brute ou JSON décodé
+        profile: Profil API (structure V2, fallback ancien format)
+
+    Returns:
+        dict: Résultat structuré (voir APIResponseParser.parse)
+    """
+    return response_parser.parse(response, provider_from_profile(profile), _profile_response_path(profile))
+
+
+def create_profile_stream_extractor(profile: Dict[str, Any],
+                                    on_text: Optional[Callable[[str], None]] = None) -> StreamingJSONExtractor:
+    """Extracteur incrémental pour le provider et le response_path du profil"""
+    return response_parser.create_stream_extractor(provider_from_profile(profile),
+                                                   _profile_response_path(profile), on_text)
+
+
+def parse_profile_stream(extractor: StreamingJSONExtractor, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Résultat structuré d'une extraction streamée (voir APIResponseParser.parse_stream)"""
+    return response_parser.parse_stream(extractor, provider_from_profile(profile), _profile_response_path(profile))
+
+
+def _profile_response_path(profile: Optional[Dict[str, Any]]) -> List[Union[str, int]]:
+    """response_path du profil (structure V2, fallback ancien format)"""
+    if not profile:
+        return []
+    return profile.get('chat', {}).get('response_path', profile.get('response_path', []))
+
+
 # Fonctions utilitaires pour compatibilité avec le code existant
 def extract_text_from_api_response(response_json: Dict[str, Any], api_type: str = 'auto') -> Tuple[bool, str]:
     """
@@ -213,7 +512,7 @@ def extract_text_from_api_response(response_json: Dict[str, Any], api_type: str
 
 def get_api_type_from_response(response_json: Dict[str, Any]) -> str:
     """
-    Détecte automatiquement le type d'API depuis la réponse
+    Détecte automatiquement le type d'API depuis la réponse (déprécié)
     """
     _, _, api_type = response_parser.parse_response(response_json, 'auto')
     return api_type
@@ -223,37 +522,31 @@ if __name__ == "__main__":
     # Tests unitaires
     print("🧪 TEST DU SYSTÈME DE PARSEURS")
     print("=" * 50)
-    
-    # Test Gemini
-    gemini_response = {
-        "candidates": [{"content": {"parts": [{"text": "Réponse Gemini test"}]}}]
-    }
-    success, text, api = response_parser.parse_response(gemini_response)
-    print(f"✅ Gemini: {success} | '{text}' | API: {api}")
-    
-    # Test OpenAI Chat
-    openai_chat_response = {
-        "choices": [{"message": {"content": "Réponse OpenAI Chat test"}}]
-    }
-    success, text, api = response_parser.parse_response(openai_chat_response)
-    print(f"✅ OpenAI Chat: {success} | '{text}' | API: {api}")
-    
-    # Test OpenAI Completion
-    openai_completion_response = {
-        "choices": [{"text": "Réponse OpenAI Completion test"}]
-    }
-    success, text, api = response_parser.parse_response(openai_completion_response)
-    print(f"✅ OpenAI Completion: {success} | '{text}' | API: {api}")
-    
-    # Test Claude
-    claude_response = {
-        "content": [{"text": "Réponse Claude test"}]
+
+    samples = {
+        "gemini": {
+            "candidates": [{"content": {"parts": [{"text": "Réponse Gemini test"}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 4, "totalTokenCount": 9}
+        },
+        "openai": {
+            "output": [{"type": "reasoning"}, {"type": "message", "content": [{"type": "output_text", "text": "Réponse OpenAI Responses"}]}],
+            "status": "completed",
+            "usage": {"input_tokens": 8, "output_tokens": 3, "total_tokens": 11}
+        },
+        "claude": {
+            "content": [{"text": "Réponse Claude test"}],
+            "stop_reason": "max_tokens",
+            "usage": {"input_tokens": 10, "output_tokens": 20}
+        },
+        "mistral": {
+            "choices": [{"message": {"content": "Réponse Mistral test"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 7, "completion_tokens": 2, "total_tokens": 9}
+        },
     }
-    success, text, api = response_parser.parse_response(claude_response)
-    print(f"✅ Claude: {success} | '{text}' | API: {api}")
-    
-    # Test Auto-détection
-    success, text, api = response_parser.parse_response(gemini_response, 'auto')
-    print(f"✅ Auto-détection: {success} | API détectée: {api}")
-    
+
+    for provider, sample in samples.items():
+        result = response_parser.parse(sample, provider)
+        print(f"✅ {provider}: {result['success']} | '{result['text']}' | "
+              f"usage={result['usage']} | fin={result['finish_reason']}")
+
     print(f"\n📋 APIs supportées: {response_parser.get_supported_apis()}")
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Générateur de charge de bout en bout sur le chemin réel des requêtes
+
+Usage:
+    python benchmarks/load_test.py run --mode closed --users 8 --duration 30 [-o run.json]
+    python benchmarks/load_test.py run --mode open --rate 20 --duration 30 [--arrival poisson]
+    python benchmarks/load_test.py run --prompts conversations/export.jsonl.gz   # rejoue une archive
+    python benchmarks/load_test.py compare reference.json nouveau.json [--threshold 0.10]
+
+Chaque requête suit le même chemin que soumettreQuestionAPI:
+ConversationManager (historique, synthèse au seuil) -> rendu du template (APIManager)
+-> payload (PayloadManager) -> curl streamé ou worker natif -> parsing provider -> historique.
+
+Les questions sont générées (generate_text) ou, avec --prompts, lues en flux dans une
+archive de conversations (conversation_archive, messages 'user', rejouées en boucle).
+
+Par défaut un serveur mock local (mock_llm_server) est démarré dans le processus et le profil
+est redirigé vers lui (chat.base_url); --base-url cible un serveur déjà lancé.
+
+Modes:
+- closed: N utilisateurs virtuels enchaînent leurs requêtes (débit limité par la latence)
+- open: arrivées à débit fixe (régulières ou poisson), latence mesurée depuis l'instant
+  d'arrivée prévu (pas d'omission coordonnée quand le système sature)
+
+Rapport: débit, p50/p95/p99/max, taux d'erreur par type, CPU (processus + curl) et RSS.
+Le mode compare signale une baisse de débit ou une hausse de p95/p99 au-delà du seuil.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import math
+import os
+import platform
+import queue
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from run_benchmarks import REPO_ROOT, Workspace, _git_commit, generate_text
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_THRESHOLD = 0.10
+PERCENTILES = (50, 95, 99)
+
+
+# ---------------------------------------------------------------- Ressources
+
+def _read_rss() -> Optional[int]:
+    """RSS courant du processus en octets (psutil, sinon /proc)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _cpu_times() -> Tuple[float, float]:
+    """(CPU processus, CPU des enfants terminés: curl et workers natifs) en secondes"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+class ResourceSampler:
+    """Échantillonne le RSS pendant le run; CPU calculé par différence de getrusage"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="load-resource-sampler", daemon=True)
+
+    def __enter__(self) -> "ResourceSampler":
+        self._cpu_start = _cpu_times()
+        self._wall_start = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._cpu_end = _cpu_times()
+        self._wall_end = time.perf_counter()
+
+    def _loop(self) -> None:
+        while True:
+            rss = _read_rss()
+            if rss is not None:
+                self.samples.append(rss)
+            if self._stop.wait(self.interval):
+                break
+
+    def report(self) -> Dict[str, Any]:
+        wall = self._wall_end - self._wall_start
+        own = self._cpu_end[0] - self._cpu_start[0]
+        children = self._cpu_end[1] - self._cpu_start[1]
+        return {
+            "cpu_seconds": own,
+            "cpu_children_seconds": children,
+            "cpu_percent": 100.0 * own / wall if wall else 0.0,
+            "cpu_children_percent": 100.0 * children / wall if wall else 0.0,
+            "rss_mean_mb": (sum(self.samples) / len(self.samples) / 2 ** 20) if self.samples else None,
+            "rss_max_mb": (max(self.samples) / 2 ** 20) if self.samples else None,
+        }
+
+
+# ---------------------------------------------------------------- Chemin de requête
+
+class RequestPipeline:
+    """Chemin de soumettreQuestionAPI sans l'interface Tk (via chat_service.ChatService)"""
+
+    def __init__(self, profile: Dict[str, Any], method: str, timeout: float):
+        from chat_service import ChatService
+
+        self.profile = profile
+        self.profile.setdefault('chat', {})['method'] = method
+        self.service = ChatService(timeout=timeout)
+
+    def new_conversation(self):
+        return self.service.new_conversation(self.profile)
+
+    def turn(self, conversation, question: str) -> Dict[str, Any]:
+        """Un tour de conversation complet (synthèse éventuelle incluse)"""
+        return self.service.chat_turn(self.profile, conversation, question)
+
+
+# ---------------------------------------------------------------- Exécution
+
+class LoadRecorder:
+    """Collecte thread-safe des latences et des erreurs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.completed = 0
+
+    def record(self, latency: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.completed += 1
+            if error is None:
+                self.latencies.append(latency)
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+
+def _classify(details: Dict[str, Any]) -> Optional[str]:
+    if details['success']:
+        return None
+    if details['error']:
+        error = details['error']
+        for status in ("429", "500", "502", "503", "529"):
+            if status in error:
+                return f"http_{status}"
+        return "api_error"
+    return "parse_error"
+
+
+def _execute(pipeline: RequestPipeline, recorder: LoadRecorder, conversation, question: str,
+             start: float) -> None:
+    from chat_service import ChatTimeoutError
+
+    try:
+        error = _classify(pipeline.turn(conversation, question))
+    except ChatTimeoutError:
+        error = "timeout"
+    except Exception as e:
+        error = f"exception:{type(e).__name__}"
+    recorder.record(time.perf_counter() - start, error)
+
+
+def _questions(seed: int, archive: Optional[str] = None) -> Callable[[], str]:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    if archive:
+        from conversation_archive import iter_prompts
+
+        prompts = iter_prompts(archive)
+
+        def next_archived() -> str:
+            # Lecture en flux, archive rouverte quand elle est épuisée
+            nonlocal prompts
+            with lock:
+                for _ in range(2):
+                    question = next(prompts, None)
+                    if question is not None:
+                        return question
+                    prompts = iter_prompts(archive)
+                raise ValueError(f"Aucun message 'user' dans {archive}")
+        return next_archived
+
+    def next_question() -> str:
+        with lock:
+            size = rng.choice((80, 200, 600))
+            return generate_text(size, seed=rng.randrange(1 << 30))
+    return next_question
+
+
+def run_closed(pipeline: RequestPipeline, recorder: LoadRecorder, users: int, duration: float,
+               seed: int, prompts: Optional[str] = None) -> None:
+    """N utilisateurs virtuels, chacun avec sa conversation, sans temps de réflexion"""
+    deadline = time.perf_counter() + duration
+    next_question = _questions(seed, prompts)
+
+    def user_loop() -> None:
+        conversation = pipeline.new_conversation()
+        while time.perf_counter() < deadline:
+            _execute(pipeline, recorder, conversation, next_question(), time.perf_counter())
+
+    threads = [threading.Thread(target=user_loop, name=f"load-user-{i}", daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open(pipeline: RequestPipeline, recorder: LoadRecorder, rate: float, duration: float,
+             arrival: str, max_inflight: int, seed: int, prompts: Optional[str] = None) -> int:
+    """Arrivées à débit fixe; retourne le nombre d'arrivées rejetées (file saturée)"""
+    rng = random.Random(seed)
+    next_question = _questions(seed + 1, prompts)
+    idle_conversations: "queue.SimpleQueue" = queue.SimpleQueue()
+    slots = threading.BoundedSemaphore(max_inflight)
+    dropped = 0
+
+    def handle(scheduled: float) -> None:
+        try:
+            conversation = idle_conversations.get_nowait()
+        except queue.Empty:
+            conversation = pipeline.new_conversation()
+        try:
+            _execute(pipeline, recorder, conversation, next_question(), scheduled)
+        finally:
+            idle_conversations.put(conversation)
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="load-open") as executor:
+        start = time.perf_counter()
+        scheduled = start
+        while scheduled < start + duration:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if slots.acquire(blocking=False):
+                executor.submit(handle, scheduled)
+            else:
+                dropped += 1
+            scheduled += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+    return dropped
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Percentile au rang le plus proche"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_report(args: argparse.Namespace, recorder: LoadRecorder, wall: float, dropped: int,
+                 resources: Dict[str, Any]) -> Dict[str, Any]:
+    latencies = sorted(recorder.latencies)
+    errors = sum(recorder.errors.values()) + dropped
+    total = recorder.completed + dropped
+    latency = {f"p{p}": _percentile(latencies, p) for p in PERCENTILES}
+    latency.update({"mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                    "max": latencies[-1] if latencies else 0.0,
+                    "min": latencies[0] if latencies else 0.0})
+    if dropped:
+        recorder.errors["dropped"] = dropped
+    return {
+        "metadata": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "mode": args.mode,
+            "users": args.users if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None,
+            "arrival": args.arrival if args.mode == "open" else None,
+            "duration": args.duration,
+            "profile": args.profile,
+            "method": args.method,
+            "prompts": os.path.basename(args.prompts) if args.prompts else "generate_text",
+            "target": args.base_url or f"mock ({args.latency}, erreurs {args.errors or 'aucune'})",
+        },
+        "results": {
+            "requests": total,
+            "successes": len(latencies),
+            "throughput_rps": len(latencies) / wall if wall else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "errors": dict(sorted(recorder.errors.items())),
+            "latency_seconds": latency,
+            "wall_seconds": wall,
+            **resources,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    meta, results = report["metadata"], report["results"]
+    load = f"{meta['users']} utilisateurs" if meta["mode"] == "closed" else f"{meta['rate']} req/s ({meta['arrival']})"
+    latency = results["latency_seconds"]
+    print(f"\n📈 {meta['profile']} / {meta['method']} - mode {meta['mode']}, {load}, {meta['duration']}s")
+    print(f"  Requêtes:   {results['requests']} ({results['successes']} succès)")
+    print(f"  Débit:      {results['throughput_rps']:.2f} req/s")
+    print(f"  Latence:    p50 {latency['p50'] * 1000:.1f} ms | p95 {latency['p95'] * 1000:.1f} ms | "
+          f"p99 {latency['p99'] * 1000:.1f} ms | max {latency['max'] * 1000:.1f} ms")
+    print(f"  Erreurs:    {results['error_rate']:.2%} {results['errors'] or ''}")
+    print(f"  CPU:        {results['cpu_percent']:.0f}% processus + {results['cpu_children_percent']:.0f}% "
+          f"enfants (curl/workers)")
+    if results["rss_max_mb"] is not None:
+        print(f"  RSS:        moyenne {results['rss_mean_mb']:.1f} Mo, max {results['rss_max_mb']:.1f} Mo")
+
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    from mock_llm_server import parse_errors, start_mock_server
+
+    server = None
+    with Workspace() as workspace:
+        profile = workspace.profile(args.profile)
+        chat = profile.setdefault('chat', {})
+        chat['method'] = args.method
+        chat.setdefault('values', {})['api_key'] = chat.get('values', {}).get('api_key') or "load-test-key"
+        if args.base_url:
+            chat['base_url'] = args.base_url
+        else:
+            server = start_mock_server(latency=args.latency, token_delay_ms=args.token_delay,
+                                       errors=parse_errors(args.errors), seed=args.seed)
+            chat['base_url'] = server.base_url
+
+        recorder = LoadRecorder()
+        dropped = 0
+        try:
+            # Les print() des modules traversés (APIManager, PayloadManager...) sont neutralisés
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                pipeline = RequestPipeline(profile, args.method, args.timeout)
+                with ResourceSampler() as sampler:
+                    start = time.perf_counter()
+                    if args.mode == "closed":
+                        run_closed(pipeline, recorder, args.users, args.duration, args.seed, args.prompts)
+                    else:
+                        dropped = run_open(pipeline, recorder, args.rate, args.duration, args.arrival,
+                                           args.max_inflight, args.seed, args.prompts)
+                    wall = time.perf_counter() - start
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    return build_report(args, recorder, wall, dropped, sampler.report())
+
+
+def compare(reference: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float]]:
+    """Affiche la comparaison et retourne les régressions (indicateur, ratio) au-delà du seuil"""
+    before, after = reference["results"], current["results"]
+    rows = [("throughput_rps", before["throughput_rps"], after["throughput_rps"], False)]
+    for key in ("p50", "p95", "p99", "max"):
+        rows.append((f"latency_{key}", before["latency_seconds"][key], after["latency_seconds"][key], True))
+    rows.append(("error_rate", before["error_rate"], after["error_rate"], True))
+    rows.append(("cpu_percent", before["cpu_percent"], after["cpu_percent"], True))
+    if before.get("rss_max_mb") and after.get("rss_max_mb"):
+        rows.append(("rss_max_mb", before["rss_max_mb"], after["rss_max_mb"], True))
+
+    for label, meta in (("Référence", reference["metadata"]), ("Actuel", current["metadata"])):
+        load = meta["users"] if meta["mode"] == "closed" else meta["rate"]
+        print(f"{label}: {meta['date']} {meta.get('commit') or ''} - {meta['mode']} {load}, {meta['profile']}")
+
+    # Seuls débit et latences p95/p99 comptent comme régressions (max et CPU sont trop bruités)
+    gating = {"throughput_rps", "latency_p95", "latency_p99"}
+    regressions = []
+    print(f"\n{'Indicateur':<20} {'Référence':>12} {'Actuel':>12} {'Ratio':>8}")
+    for name, old, new, lower_is_better in rows:
+        ratio = new / old if old else (1.0 if new == old else float("inf"))
+        worse = ratio > 1 + threshold if lower_is_better else ratio < 1 - threshold
+        flag = ""
+        if worse and name in gating:
+            regressions.append((name, ratio))
+            flag = "  ❌ régression"
+        elif worse:
+            flag = "  ⚠️"
+        print(f"{name:<20} {old:>12.4f} {new:>12.4f} {ratio:>7.2f}x{flag}")
+    if reference["metadata"]["mode"] != current["metadata"]["mode"]:
+        print("⚠️ Modes différents: comparaison indicative")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge Rob-1 (chemin de requête complet)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Exécute un run de charge")
+    run_parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    run_parser.add_argument("--users", type=int, default=4, help="Utilisateurs concurrents (mode closed)")
+    run_parser.add_argument("--rate", type=float, default=10.0, help="Arrivées par seconde (mode open)")
+    run_parser.add_argument("--arrival", choices=("constant", "poisson"), default="constant")
+    run_parser.add_argument("--max-inflight", type=int, default=256,
+                            help="Requêtes simultanées max en mode open (au-delà: arrivées rejetées)")
+    run_parser.add_argument("--duration", type=float, default=20.0, help="Durée du run (s)")
+    run_parser.add_argument("--profile", default="Gemini", help="Profil de profiles/*.json.template")
+    run_parser.add_argument("--method", choices=("curl", "native"), default="curl")
+    run_parser.add_argument("--timeout", type=float, default=60.0, help="Timeout par requête (s)")
+    run_parser.add_argument("--base-url", default="", help="Serveur cible existant (sinon mock interne)")
+    run_parser.add_argument("--latency", default="lognormal:200,0.4", help="Latence du mock interne")
+    run_parser.add_argument("--token-delay", type=float, default=0.0, help="Délai entre tokens du mock (ms)")
+    run_parser.add_argument("--errors", default="", help="Erreurs injectées par le mock, ex: 429=0.02")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--prompts", help="Archive de conversations rejouée (.jsonl, .jsonl.gz, .jsonl.zst)")
+    run_parser.add_argument("-o", "--output", help="Fichier JSON du run")
+
+    compare_parser = commands.add_parser("compare", help="Compare deux runs")
+    compare_parser.add_argument("reference")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Seuil relatif sur débit et p95/p99 (défaut 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        regressions = compare(reference, current, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+            return 1
+        print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}")
+        return 0
+
+    if not os.path.exists(os.path.join(REPO_ROOT, "profiles", f"{args.profile}.json.template")):
+        parser.error(f"Profil inconnu: {args.profile}")
+    if args.prompts:
+        # Chemin absolu: le run s'exécute dans un Workspace temporaire
+        args.prompts = os.path.abspath(args.prompts)
+        if not os.path.isfile(args.prompts):
+            parser.error(f"Archive introuvable: {args.prompts}")
+
+    logging.disable(logging.CRITICAL)
+    load = f"{args.users} utilisateurs" if args.mode == "closed" else f"{args.rate} req/s"
+    print(f"🏁 Charge {args.mode} ({load}) pendant {args.duration}s sur {args.profile}/{args.method}...")
+    try:
+        report = run_load(args)
+    except ImportError as e:
+        print(f"❌ Dépendance manquante pour le chemin de requête: {e}")
+        return 2
+    print_report(report)
+
+    output = args.output or f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📁 Run: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
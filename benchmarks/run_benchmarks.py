@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite de microbenchmarks des chemins critiques texte/template
+
+Usage:
+    python benchmarks/run_benchmarks.py run [-o resultats.json] [--filter escape] [--sizes 1KB,1MB] [--quick]
+    python benchmarks/run_benchmarks.py compare reference.json nouveau.json [--threshold 0.10]
+
+Méthode (style pyperf, sans dépendance):
+- Entrées réalistes et déterministes (texte français accentué, guillemets, retours ligne, emojis)
+  de 1 Ko à 1 Mo
+- Nombre de boucles calibré pour qu'un échantillon dure au moins --min-time secondes
+- Un échantillon de chauffe ignoré, puis --samples échantillons: moyenne, médiane, écart-type, min
+- Exécution dans un espace de travail temporaire (copie de profiles/ et templates/):
+  aucun fichier du dépôt n'est modifié
+
+Le mode compare signale les régressions de médiane au-delà du seuil et retourne le code 1.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+SIZES = {"1KB": 1024, "10KB": 10 * 1024, "100KB": 100 * 1024, "1MB": 1024 * 1024}
+DEFAULT_THRESHOLD = 0.10
+
+_WORDS = (
+    "le modèle répond à la question avec précision et donne des exemples concrets "
+    "l'utilisateur demande une synthèse détaillée du document fourni en pièce jointe "
+    "voici une fonction Python qui calcule la moyenne pondérée d'une liste de valeurs "
+    "café crème élève à où déjà être garçon Noël naïve façade "
+    "\"citation\" C:\\chemin\\fichier réponse: 42; total=3.14 🚀 ✅"
+).split()
+
+
+def generate_text(size: int, seed: int = 42) -> str:
+    """Texte conversationnel réaliste d'environ `size` caractères"""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    sentence = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        sentence += 1
+        if sentence > rng.randint(8, 20):
+            word += rng.choice([".", "!", "?", ".\n", ".\n\n", ":\n\t-"])
+            sentence = 0
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+# ---------------------------------------------------------------- Espace de travail
+
+class Workspace:
+    """Copie temporaire des profils et templates; devient le répertoire courant"""
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix="rob1_bench_")
+        self._previous_cwd = os.getcwd()
+
+    def __enter__(self) -> "Workspace":
+        shutil.copytree(os.path.join(REPO_ROOT, "templates"), os.path.join(self.path, "templates"))
+        os.makedirs(os.path.join(self.path, "profiles"))
+        for name in os.listdir(os.path.join(REPO_ROOT, "profiles")):
+            source = os.path.join(REPO_ROOT, "profiles", name)
+            if os.path.isfile(source):
+                shutil.copy(source, os.path.join(self.path, "profiles", name))
+                if name.endswith(".json.template"):
+                    shutil.copy(source, os.path.join(self.path, "profiles", name[:-len(".template")]))
+        os.chdir(self.path)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        os.chdir(self._previous_cwd)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def profile(self, name: str = "Gemini") -> Dict[str, Any]:
+        with open(os.path.join(self.path, "profiles", f"{name}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+
+# ---------------------------------------------------------------- Benchmarks
+# Chaque fabrique reçoit (workspace, texte) et retourne la fonction mesurée (sans argument).
+# Une ImportError pendant la préparation marque le benchmark comme ignoré.
+
+def bench_escape_for_json(ws: Workspace, text: str) -> Callable[[], Any]:
+    from conversation_manager import ConversationManager
+    manager = ConversationManager()
+    return lambda: manager.escape_for_json(text)
+
+
+def bench_add_message(ws: Workspace, text: str) -> Callable[[], Any]:
+    from conversation_manager import ConversationManager
+    manager = ConversationManager()
+
+    def run():
+        manager.add_message('user', text)
+        manager.conversation_history.clear()
+    return run
+
+
+def bench_get_stats(ws: Workspace, text: str) -> Callable[[], Any]:
+    from conversation_manager import ConversationManager
+    manager = ConversationManager()
+    chunk = max(len(text) // 20, 1)
+    for i in range(0, len(text), chunk):
+        manager.add_message('user' if (i // chunk) % 2 == 0 else 'model', text[i:i + chunk])
+    return manager.get_stats
+
+
+def bench_replace_placeholders(ws: Workspace, text: str) -> Callable[[], Any]:
+    from core.api_manager import APIManager
+    manager = APIManager()
+    with open(os.path.join("templates", "chat", "gemini", "curl_basic.txt"), encoding="utf-8") as f:
+        template = f.read()
+    profile = ws.profile("Gemini")
+    profile['chat']['values']['api_key'] = "bench-key"
+    return lambda: manager._replace_placeholders(template, profile, text)
+
+
+def bench_prepare_template(ws: Workspace, text: str) -> Callable[[], Any]:
+    from native_manager import NativeManager
+    manager = NativeManager()
+    with open(os.path.join("templates", "chat", "gemini", "native_basic.py"), encoding="utf-8") as f:
+        template = f.read()
+    # Le prompt arrive échappé (historique ConversationManager) comme dans soumettreQuestionAPI
+    variables = {
+        'USER_PROMPT': json.dumps(text, ensure_ascii=False)[1:-1],
+        'LLM_MODEL': 'gemini-2.0-flash', 'API_KEY': 'bench-key',
+        'SYSTEM_PROMPT_ROLE': 'assistant', 'SYSTEM_PROMPT_BEHAVIOR': 'précis'
+    }
+    return lambda: manager._prepare_template(template, variables, "gemini")
+
+
+def bench_extract_json_from_curl(ws: Workspace, text: str) -> Callable[[], Any]:
+    from payload_manager import extract_json_from_curl
+    payload = json.dumps({"contents": [{"role": "user", "parts": [{"text": text}]}]}, ensure_ascii=False)
+    command = ("curl -s \"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+               "?key=bench-key\" \\\n  -H 'Content-Type: application/json' \\\n  -X POST \\\n"
+               f"  -d '{payload}'")
+    return lambda: extract_json_from_curl(command)
+
+
+def bench_parse_response(ws: Workspace, text: str) -> Callable[[], Any]:
+    from response_parser import parse_response
+    response = json.dumps({
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": len(text) // 4}
+    }, ensure_ascii=False)
+    path = ["candidates", 0, "content", "parts", 0, "text"]
+    return lambda: parse_response(response, path)
+
+
+def bench_stream_extract(ws: Workspace, text: str) -> Callable[[], Any]:
+    from stream_parser import StreamingJSONExtractor
+    body = json.dumps({
+        "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+        "usageMetadata": {"promptTokenCount": 12, "candidatesTokenCount": len(text) // 4}
+    }, ensure_ascii=False).encode("utf-8")
+    chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+    path = ["candidates", 0, "content", "parts", 0, "text"]
+
+    def run():
+        extractor = StreamingJSONExtractor([path])
+        for chunk in chunks:
+            extractor.feed(chunk)
+        extractor.close()
+        return extractor.text
+    return run
+
+
+def bench_load_profile(ws: Workspace, text: str) -> Callable[[], Any]:
+    from config_manager import ConfigManager
+    manager = ConfigManager(".")
+    profile = ws.profile("Gemini")
+    profile['chat']['values']['behavior'] = text
+    with open(os.path.join("profiles", "BenchProfile.json"), "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return lambda: manager.load_profile("BenchProfile")
+
+
+BENCHMARKS: Dict[str, Callable[[Workspace, str], Callable[[], Any]]] = {
+    "conversation.escape_for_json": bench_escape_for_json,
+    "conversation.add_message": bench_add_message,
+    "conversation.get_stats": bench_get_stats,
+    "api_manager.replace_placeholders": bench_replace_placeholders,
+    "native_manager.prepare_template": bench_prepare_template,
+    "payload.extract_json_from_curl": bench_extract_json_from_curl,
+    "response_parser.parse_response": bench_parse_response,
+    "stream_parser.extract": bench_stream_extract,
+    "config_manager.load_profile": bench_load_profile,
+}
+
+
+# ---------------------------------------------------------------- Mesure
+
+def measure(func: Callable[[], Any], samples: int, min_time: float) -> Dict[str, Any]:
+    """Calibre le nombre de boucles puis mesure `samples` échantillons (secondes par appel)"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    values = []
+    for _ in range(samples + 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        values.append((time.perf_counter() - start) / loops)
+    values = values[1:]  # échantillon de chauffe
+
+    return {
+        "loops": loops,
+        "samples": values,
+        "mean": statistics.fmean(values),
+        "median": statistics.median(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": min(values),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def run_suite(names: List[str], sizes: List[str], samples: int, min_time: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+
+    with Workspace() as workspace:
+        for name in names:
+            for size_label in sizes:
+                key = f"{name}[{size_label}]"
+                text = generate_text(SIZES[size_label])
+                try:
+                    # Les print() des modules mesurés (PayloadManager...) sont neutralisés
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        func = BENCHMARKS[name](workspace, text)
+                        result = measure(func, samples, min_time)
+                except ImportError as e:
+                    skipped[name] = f"dépendance manquante: {e}"
+                    print(f"⏭️  {name}: ignoré ({e})")
+                    break
+                except Exception as e:
+                    skipped[key] = f"erreur: {type(e).__name__}: {e}"
+                    print(f"❌ {key}: {type(e).__name__}: {e}")
+                    continue
+                result["input_bytes"] = len(text.encode("utf-8"))
+                results[key] = result
+                print(f"  {key:<48} {_format_time(result['median']):>12} "
+                      f"± {_format_time(result['stdev']):>10}  ({result['loops']} boucles)")
+
+    return {
+        "metadata": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "samples": samples,
+            "min_time": min_time,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(reference: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float]]:
+    """Affiche le tableau comparatif et retourne les régressions (clé, ratio) au-delà du seuil"""
+    regressions = []
+    print(f"{'Benchmark':<48} {'Référence':>12} {'Actuel':>12} {'Ratio':>8}")
+    for key in sorted(set(reference["results"]) & set(current["results"])):
+        before = reference["results"][key]["median"]
+        after = current["results"][key]["median"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+            flag = "  ❌ régression"
+        elif ratio < 1 - threshold:
+            flag = "  ✅ amélioration"
+        print(f"{key:<48} {_format_time(before):>12} {_format_time(after):>12} {ratio:>7.2f}x{flag}")
+
+    missing = set(reference["results"]) - set(current["results"])
+    if missing:
+        print(f"({len(missing)} benchmark(s) de la référence absents du nouveau résultat)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks Rob-1")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Exécute la suite")
+    run_parser.add_argument("-o", "--output", help="Fichier JSON de résultats")
+    run_parser.add_argument("--filter", default="", help="Sous-chaîne du nom des benchmarks à exécuter")
+    run_parser.add_argument("--sizes", default=",".join(SIZES), help="Tailles d'entrée (ex: 1KB,1MB)")
+    run_parser.add_argument("--samples", type=int, default=7)
+    run_parser.add_argument("--min-time", type=float, default=0.05, help="Durée minimale d'un échantillon (s)")
+    run_parser.add_argument("--quick", action="store_true", help="3 échantillons de 10 ms")
+
+    compare_parser = commands.add_parser("compare", help="Compare deux fichiers de résultats")
+    compare_parser.add_argument("reference")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Seuil de régression relatif sur la médiane (défaut 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        regressions = compare(reference, current, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+            return 1
+        print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}")
+        return 0
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"Tailles inconnues: {unknown} (disponibles: {', '.join(SIZES)})")
+    names = [name for name in BENCHMARKS if args.filter in name]
+    samples, min_time = (3, 0.01) if args.quick else (args.samples, args.min_time)
+
+    # Les logs DEBUG des modules mesurés fausseraient les temps
+    logging.disable(logging.CRITICAL)
+    print(f"🏁 {len(names)} benchmark(s) x {len(sizes)} taille(s)")
+    report = run_suite(names, sizes, samples, min_time)
+
+    output = args.output or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📁 Résultats: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
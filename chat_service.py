@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ChatService - Pipeline de requête sans interface graphique
+
+Même chemin que soumettreQuestionAPI (gui.py) mais sans état global:
+chaque appel reçoit son profil explicitement et chaque conversation est un
+ConversationManager distinct. Utilisé par le mode serveur (main.py --serve)
+et par le test de charge (benchmarks/load_test.py).
+
+    service = ChatService()
+    profil = service.load_profile("Gemini")
+    details = service.ask(profil, "Bonjour")             # appel unique
+    conversation = service.new_conversation(profil)
+    details = service.chat_turn(profil, conversation, "Bonjour")  # avec historique
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from api_response_parser import (
+    create_profile_stream_extractor, parse_profile_response, parse_profile_stream, provider_from_profile
+)
+from config_watcher import add_config_listener, get_active_watcher
+from conversation_manager import ConversationManager
+from core.endpoints import get_base_url
+from metrics import REQUESTS, observe_stage, profile_labels, record_cost, record_stream, record_tokens, stage_timer
+from model_catalog import get_model_catalog
+from payload_manager import PayloadManager, attach_payload_file, extract_json_from_curl
+from stream_parser import stream_process_output
+from tracing import set_attribute, span
+
+
+class ChatServiceError(Exception):
+    """Échec d'un appel API (transport, template introuvable, sortie native en erreur)"""
+
+
+class ChatTimeoutError(ChatServiceError):
+    """Délai de requête dépassé (processus curl interrompu)"""
+
+
+class ChatService:
+    """Exécution des requêtes chat pour un profil donné (thread-safe)"""
+
+    def __init__(self, api_manager=None, timeout: float = 120.0):
+        if api_manager is None:
+            from core.api_manager import APIManager
+            api_manager = APIManager()
+        self.api_manager = api_manager
+        self.timeout = timeout
+        self._native_templates: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        add_config_listener(self._on_config_event, weak=True)
+        # Échappement JSON des prompts hors conversation (même règle que l'historique)
+        self._escaper = ConversationManager()
+
+    # ------------------------------------------------------------ Profils
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Résumé V2 des profils (sans clé API)"""
+        summaries = []
+        for name in self.api_manager.list_available_profiles():
+            profile = self.api_manager.load_profile(name)
+            if not profile:
+                continue
+            chat = profile.get('chat', {})
+            values = chat.get('values', {})
+            summaries.append({
+                'name': name,
+                'provider': provider_from_profile(profile),
+                'method': chat.get('method', 'curl'),
+                'llm_model': values.get('llm_model', ''),
+                'has_api_key': bool(values.get('api_key')),
+                'default': bool(profile.get('default', False)),
+            })
+        return summaries
+
+    def load_profile(self, name: str) -> Dict[str, Any]:
+        profile = self.api_manager.load_profile(name)
+        if not profile:
+            raise KeyError(f"Profil introuvable: {name}")
+        return profile
+
+    # ------------------------------------------------------------ Appels
+
+    def ask(self, profile: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Appel unique sans historique (texte brut, échappé ici)"""
+        return self.call(profile, self._escaper.escape_for_json(text))
+
+    def call(self, profile: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """
+        Un appel API complet (prompt déjà échappé pour JSON)
+
+        Returns:
+            Dict de parse_profile_stream/parse_profile_response complété de 'latency_seconds'
+        Raises:
+            ChatServiceError: échec de transport ou d'exécution native
+        """
+        provider, model = profile_labels(profile)
+        method = profile.get('chat', {}).get('method', 'curl')
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with span("chat_service.call", provider=provider, model=model, method=method):
+                if method == 'native':
+                    details = self._call_native(profile, prompt, provider, model)
+                else:
+                    details = self._call_curl(profile, prompt, provider, model)
+                record_tokens(details['usage'], provider, model)
+                if details['success']:
+                    status = "success"
+                set_attribute("status", status)
+            details['latency_seconds'] = time.perf_counter() - start
+            catalog = get_model_catalog()
+            details['cost_usd'] = catalog.estimate_cost(provider, model, details['usage'])
+            record_cost(details['cost_usd'], provider, model)
+            if details['success']:
+                catalog.record_latency(provider, model, details['latency_seconds'])
+            return details
+        finally:
+            REQUESTS.inc(provider=provider, model=model, method=method, status=status)
+
+    def _call_curl(self, profile: Dict[str, Any], prompt: str, provider: str, model: str) -> Dict[str, Any]:
+        template_id = f"{provider_from_profile(profile)}_chat"
+        with stage_timer("template_render", provider, model):
+            curl_command = self.api_manager.get_processed_template(template_id, profile, prompt)
+        if not curl_command:
+            raise ChatServiceError(f"Template {template_id} introuvable")
+
+        debut_payload = time.perf_counter()
+        base_command, json_payload = extract_json_from_curl(curl_command)
+        payload_file = None
+        if json_payload is not None:
+            payload_file = PayloadManager(api_profile=profile.get('name', 'default')).create_payload_file(
+                json_payload, prefix="request")
+            curl_command = attach_payload_file(base_command, payload_file)
+        observe_stage("payload_build", time.perf_counter() - debut_payload, provider, model)
+
+        extractor = create_profile_stream_extractor(profile)
+        try:
+            result = stream_process_output(curl_command, extractor, shell=True, timeout=self.timeout)
+        finally:
+            if payload_file and os.path.exists(payload_file):
+                os.remove(payload_file)
+        record_stream(result, provider, model)
+        observe_stage("request", result.total_seconds, provider, model)
+
+        if result.timed_out:
+            raise ChatTimeoutError(f"Délai dépassé ({self.timeout:.0f}s)")
+        if result.returncode != 0:
+            raise ChatServiceError(f"curl code {result.returncode}: {result.stderr.strip()[:500]}")
+        with stage_timer("parse", provider, model):
+            return parse_profile_stream(extractor, profile)
+
+    def _on_config_event(self, event: Dict[str, Any]) -> None:
+        if event['kind'] == 'template':
+            with self._lock:
+                self._native_templates.pop(event['name'], None)
+
+    def _native_template(self, provider_name: str) -> str:
+        watcher = get_active_watcher()
+        if watcher:
+            template = watcher.get_template(provider_name, "native_basic.py")
+            if template is None:
+                raise ChatServiceError(f"Template Python non trouvé: templates/chat/{provider_name}/native_basic.py")
+            return template
+        with self._lock:
+            template = self._native_templates.get(provider_name)
+        if template is None:
+            path = os.path.join("templates", "chat", provider_name, "native_basic.py")
+            if not os.path.exists(path):
+                raise ChatServiceError(f"Template Python non trouvé: {path}")
+            with open(path, 'r', encoding='utf-8') as f:
+                template = f.read()
+            with self._lock:
+                self._native_templates[provider_name] = template
+        return template
+
+    def _call_native(self, profile: Dict[str, Any], prompt: str, provider: str, model: str) -> Dict[str, Any]:
+        from native_manager import get_native_manager
+
+        provider_name = provider_from_profile(profile)
+        values = profile.get('chat', {}).get('values', {})
+        variables = {
+            'USER_PROMPT': prompt,
+            'LLM_MODEL': values.get('llm_model', ''),
+            'API_KEY': values.get('api_key', ''),
+            'SYSTEM_PROMPT_ROLE': values.get('role', ''),
+            'SYSTEM_PROMPT_BEHAVIOR': values.get('behavior', ''),
+            'BASE_URL': get_base_url(profile),
+        }
+        result = get_native_manager().execute_native_request(
+            self._native_template(provider_name), variables, provider_name,
+            stream_extractor=create_profile_stream_extractor(profile))
+        if result.get('status') != 'success':
+            raise ChatServiceError(f"Erreur native: {str(result.get('errors'))[:500]}")
+
+        extractor = result.get('extractor')
+        with stage_timer("parse", provider, model):
+            if extractor is not None:
+                details = parse_profile_stream(extractor, profile)
+            else:
+                details = parse_profile_response(result.get('output', ''), profile)
+        output = (result.get('output') or '').strip()
+        if not details['success'] and not details['error'] and output and (
+                details['json_error'] or not isinstance(details['data'], (dict, list))):
+            # Sortie native non JSON (ex: Mistral) - texte brut utilisé directement, comme dans gui.py
+            details.update(success=True, text=output)
+        return details
+
+    # ------------------------------------------------------------ Conversations
+
+    def new_conversation(self, profile: Dict[str, Any]) -> ConversationManager:
+        return ConversationManager(profile_config=profile.get('conversation_management') or None,
+                                   api_type=provider_from_profile(profile))
+
+    def summarize(self, profile: Dict[str, Any], conversation: ConversationManager) -> bool:
+        """Remplace l'historique par un résumé généré avec le profil"""
+        provider, model = profile_labels(profile)
+
+        def summary_call(prompt_text: str) -> str:
+            details = self.call(profile, prompt_text)
+            return details['text'] if details['success'] else ""
+
+        with stage_timer("summarization", provider, model):
+            return conversation.summarize_history(summary_call)
+
+    def chat_turn(self, profile: Dict[str, Any], conversation: ConversationManager, question: str) -> Dict[str, Any]:
+        """Un tour de conversation: synthèse au seuil, question, appel, réponse ajoutée à l'historique"""
+        summarized = False
+        if conversation.should_summarize():
+            summarized = self.summarize(profile, conversation)
+        conversation.add_message('user', question)
+
+        details = self.call(profile, conversation.build_prompt())
+        if details['success']:
+            conversation.add_message('model', details['text'], usage=details['usage'],
+                                     latency_ms=details['latency_seconds'] * 1000)
+        details['summarized'] = summarized
+        return details
+
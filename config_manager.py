@@ -3,13 +3,21 @@ Configuration Manager - Gestionnaire centralisé pour les configurations JSON
 Remplace la gestion YAML par du JSON avec validation et séparation des templates
 """
 
+import copy
 import json
 import os
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-import jsonschema
-from jsonschema import validate, ValidationError
+
+from config_watcher import add_config_listener, get_active_watcher, notify_written
+from logging_setup import register_secret
+from startup import lazy_import
+
+# jsonschema (~60 ms d'import) n'est chargé qu'à la première validation de profil
+jsonschema = lazy_import("jsonschema")
+if jsonschema is None:
+    raise ImportError("No module named 'jsonschema'")
 
 # Schémas JSON pour validation
 PROFILE_SCHEMA = {
@@ -61,7 +69,8 @@ PROFILE_SCHEMA = {
                 "response_path": {
                     "type": "array",
                     "items": {"type": ["string", "integer"]}
-                }
+                },
+                "base_url": {"type": "string"}
             }
         },
         "file_generation": {
@@ -142,6 +151,7 @@ SYSTEM_PROFILE_SCHEMA = {
     "type": "object",
     "properties": {
         "generated_at": {"type": "string"},
+        "fingerprint": {"type": "string"},
         "os_info": {
             "type": "object",
             "properties": {
@@ -180,6 +190,16 @@ SYSTEM_PROFILE_SCHEMA = {
 class ConfigManager:
     """Gestionnaire centralisé des configurations JSON"""
     
+    # (dossier profils, nom) -> version du watcher déjà validée par le schéma
+    _validated_versions: Dict[Any, int] = {}
+
+    @classmethod
+    def _on_config_event(cls, event: Dict[str, Any]) -> None:
+        """Profil modifié ou supprimé sur disque: sa validation est à refaire"""
+        if event['kind'] == 'profile':
+            for key in [k for k in cls._validated_versions if k[1] == event['name']]:
+                cls._validated_versions.pop(key, None)
+
     def __init__(self, base_dir: str = "."):
         self.base_dir = base_dir
         self.profiles_dir = os.path.join(base_dir, "profiles")
@@ -210,9 +230,9 @@ class ConfigManager:
     def validate_profile(self, profile_data: Dict[str, Any]) -> bool:
         """Valide un profil selon le schéma JSON"""
         try:
-            validate(instance=profile_data, schema=PROFILE_SCHEMA)
+            jsonschema.validate(instance=profile_data, schema=PROFILE_SCHEMA)
             return True
-        except ValidationError as e:
+        except jsonschema.ValidationError as e:
             self.logger.error(f"Erreur validation profil : {e.message}")
             return False
     
@@ -231,6 +251,7 @@ class ConfigManager:
             file_path = os.path.join(self.profiles_dir, f"{profile_name}.json")
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            notify_written(file_path)
             
             self.logger.info(f"Profil {profile_name} sauvegardé avec succès")
             return True
@@ -265,7 +286,21 @@ class ConfigManager:
             self.logger.error(f"Erreur lors de la gestion exclusive du profil par défaut : {e}")
     
     def load_profile(self, profile_name: str) -> Optional[Dict[str, Any]]:
-        """Charge un profil JSON"""
+        """Charge un profil JSON (depuis le modèle en mémoire si le watcher tourne)"""
+        watcher = get_active_watcher(self.base_dir)
+        entry = watcher.profile_entry(profile_name) if watcher else None
+        if watcher and entry is None:
+            return None
+        if entry is not None and entry[1] is not None:
+            version, profile_data = entry
+            key = (self.profiles_dir, profile_name)
+            if self._validated_versions.get(key) != version:
+                if not self.validate_profile(profile_data):
+                    self.logger.warning(f"Profil {profile_name} invalide")
+                    return None
+                register_secret(profile_data.get('chat', {}).get('values', {}).get('api_key'))
+                self._validated_versions[key] = version
+            return copy.deepcopy(profile_data)
         try:
             file_path = os.path.join(self.profiles_dir, f"{profile_name}.json")
             if not os.path.exists(file_path):
@@ -275,6 +310,8 @@ class ConfigManager:
                 profile_data = json.load(f)
             
             if self.validate_profile(profile_data):
+                # Clé masquée dans tous les journaux dès le chargement du profil
+                register_secret(profile_data.get('chat', {}).get('values', {}).get('api_key'))
                 return profile_data
             else:
                 self.logger.warning(f"Profil {profile_name} invalide")
@@ -319,6 +356,7 @@ class ConfigManager:
                         profile_path = os.path.join(self.profiles_dir, f"{profile_name}.json")
                         with open(profile_path, 'w', encoding='utf-8') as f:
                             json.dump(profile, f, indent=2, ensure_ascii=False)
+                        notify_written(profile_path)
                         
                         self.logger.info(f"   ✅ Profil {profile_name}.json auto-corrigé et sauvegardé")
                         return profile
@@ -338,6 +376,7 @@ class ConfigManager:
                 profile_path = os.path.join(self.profiles_dir, f"{profile_name}.json")
                 with open(profile_path, 'w', encoding='utf-8') as f:
                     json.dump(profile, f, indent=2, ensure_ascii=False)
+                notify_written(profile_path)
                 self.logger.info(f"   ✅ Profil {profile_name}.json sauvegardé avec response_path par défaut")
             except Exception as e:
                 self.logger.error(f"   ❌ Erreur sauvegarde response_path par défaut: {e}")
@@ -368,6 +407,9 @@ class ConfigManager:
     
     def list_profiles(self) -> List[str]:
         """Liste tous les profils disponibles"""
+        watcher = get_active_watcher(self.base_dir)
+        if watcher:
+            return watcher.profile_names()
         try:
             profiles = []
             for filename in os.listdir(self.profiles_dir):
@@ -404,6 +446,7 @@ class ConfigManager:
                 
                 with open(v2_path, 'w', encoding='utf-8') as f:
                     f.write(template_content)
+                notify_written(v2_path)
                 
                 self.logger.info(f"Template V2 sauvegardé: {v2_path}")
             
@@ -422,7 +465,12 @@ class ConfigManager:
             if '_chat' in template_id:
                 provider = template_id.replace('_chat', '')
                 v2_path = os.path.join(self.templates_dir, "chat", provider, "curl.txt")
-                if os.path.exists(v2_path):
+                watcher = get_active_watcher(self.base_dir)
+                if watcher:
+                    content = watcher.get_template(provider, "curl.txt")
+                    if content is not None:
+                        return content
+                elif os.path.exists(v2_path):
                     with open(v2_path, 'r', encoding='utf-8') as f:
                         content = f.read()
                     self.logger.info(f"Template V2 chargé: {v2_path}")
@@ -444,6 +492,7 @@ class ConfigManager:
             
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(template_content)
+            notify_written(file_path)
             
             self.logger.info(f"Template typé {provider}/{template_type}/{method} sauvegardé")
             return True
@@ -456,6 +505,9 @@ class ConfigManager:
         try:
             # Essayer d'abord la nouvelle structure
             file_path = os.path.join(self.templates_dir, template_type, provider, f"{method}_basic.txt")
+            watcher = get_active_watcher(self.base_dir) if template_type == "chat" else None
+            if watcher:
+                return watcher.get_template(provider, f"{method}_basic.txt")
             if os.path.exists(file_path):
                 with open(file_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -826,3 +878,7 @@ class ConfigManager:
         except Exception as e:
             self.logger.error(f"Erreur validation conversation config: {e}")
             return False
+
+
+# Validation refaite dès qu'un profil change sur disque (watcher actif)
+add_config_listener(ConfigManager._on_config_event)
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Config Watcher - Rechargement à chaud des profils et templates
+
+Modèle en mémoire de profiles/*.json, des templates de templates/chat/<provider>/
+(*.txt, native*.py) et des modeles.json, tenu à jour par un thread de surveillance:
+- Linux: inotify (ctypes), seuls les fichiers signalés sont relus
+- Ailleurs (ou inotify indisponible): scan par stat toutes les POLL_INTERVAL secondes
+
+Les lectures (ConfigManager, APIManager, ChatService, GUI) ne touchent plus le
+disque tant que le watcher tourne. Chaque modification produit un événement
+{kind, name, file, action} poussé aux écouteurs (add_config_listener) et au
+registre des providers. Les écritures faites par le processus lui-même sont
+prises en compte immédiatement via notify_written(path).
+
+    watcher = start_config_watcher(".")
+    watcher.get_profile("Gemini")            # copie du JSON, sans lecture disque
+    watcher.get_models("openai")["models"]
+"""
+
+import copy
+import ctypes
+import ctypes.util
+import itertools
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    POLL_INTERVAL = float(os.environ.get("ROB1_WATCH_POLL", 1.0))
+except ValueError:
+    POLL_INTERVAL = 1.0
+# Regroupe les rafales d'événements (éditeur qui écrit puis renomme)
+DEBOUNCE_SECONDS = 0.05
+# Scan complet de sécurité même avec inotify (montage réseau, watch perdu)
+SAFETY_SCAN_INTERVAL = 30.0
+# Intervalle du stat du registre des providers quand le watcher le tient à jour
+REGISTRY_CHECK_INTERVAL = 60.0
+MODELS_FILE = "modeles.json"
+
+# Constantes inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+Signature = Tuple[int, int]
+ConfigEvent = Dict[str, Any]
+
+_versions = itertools.count(1)
+
+
+def _is_tracked_template(filename: str) -> bool:
+    return (filename.endswith(".txt") or filename == MODELS_FILE
+            or (filename.startswith("native") and filename.endswith(".py")))
+
+
+def _stat_signature(path: str) -> Optional[Signature]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class InotifyBackend:
+    """Accès minimal à inotify via la libc (Linux uniquement)"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify indisponible hors Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches: Dict[int, str] = {}
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> bool:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            logger.debug(f"[ConfigWatcher] inotify_add_watch {path}: {os.strerror(ctypes.get_errno())}")
+            return False
+        self.watches[wd] = path
+        return True
+
+    def is_watched(self, path: str) -> bool:
+        return path in self.watches.values()
+
+    def read_events(self, timeout: float) -> List[Tuple[str, str, int]]:
+        """(dossier, nom, masque) des événements disponibles dans le délai"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].split(b"\0", 1)[0].decode("utf-8", "replace")
+            offset += length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            events.append((self.watches.get(wd, ""), name, mask))
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+        self.watches.clear()
+
+
+class ConfigWatcher:
+    """Modèle en mémoire des profils, templates et modeles.json, tenu à jour en arrière-plan"""
+
+    def __init__(self, base_dir: str = ".", poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        self.base_dir = base_dir
+        self.profiles_dir = os.path.join(base_dir, "profiles")
+        self.templates_dir = os.path.join(base_dir, "templates", "chat")
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend_name = "aucun"
+        self._lock = threading.RLock()
+        # nom -> {data, signature, version}; data None si le JSON est illisible
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        # provider -> fichier -> {text, signature, version}
+        self._templates: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # provider -> contenu parsé de modeles.json
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Any] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backend: Optional[InotifyBackend] = None
+        self._scan_all()
+
+    # ------------------------------------------------------------ Lecture
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def profile_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._profiles)
+
+    def profile_entry(self, name: str) -> Optional[Tuple[int, Optional[Dict[str, Any]]]]:
+        """(version, données partagées à ne pas modifier) ou None si le profil n'existe pas"""
+        with self._lock:
+            entry = self._profiles.get(name)
+            return (entry["version"], entry["data"]) if entry else None
+
+    def get_profile(self, name: str) -> Optional[Dict[str, Any]]:
+        """Copie du profil (None si absent ou illisible)"""
+        entry = self.profile_entry(name)
+        if entry is None or entry[1] is None:
+            return None
+        return copy.deepcopy(entry[1])
+
+    def get_template(self, provider: str, filename: str) -> Optional[str]:
+        with self._lock:
+            entry = self._templates.get(provider.lower(), {}).get(filename)
+            return entry["text"] if entry else None
+
+    def get_models(self, provider: str) -> Optional[Dict[str, Any]]:
+        """Contenu de modeles.json du provider (copie) ou None"""
+        with self._lock:
+            models = self._models.get(provider.lower())
+            return copy.deepcopy(models) if models is not None else None
+
+    def providers(self) -> List[str]:
+        with self._lock:
+            return sorted(self._templates)
+
+    def covers(self, path: str) -> bool:
+        """Le chemin relève-t-il d'un dossier surveillé ?"""
+        directory = os.path.abspath(os.path.dirname(path))
+        return (directory == os.path.abspath(self.profiles_dir)
+                or os.path.dirname(directory) == os.path.abspath(self.templates_dir))
+
+    # ------------------------------------------------------------ Écouteurs
+
+    def add_listener(self, callback: Callable[[ConfigEvent], None], weak: bool = False) -> None:
+        """callback(event); weak=True pour une méthode liée (désinscrite avec son objet)"""
+        reference = weakref.WeakMethod(callback) if weak else (lambda cb=callback: cb)
+        with self._lock:
+            self._listeners.append(reference)
+
+    def _emit(self, events: List[ConfigEvent]) -> None:
+        if not events:
+            return
+        logger.info(f"[ConfigWatcher] {len(events)} modification(s): "
+                    + ", ".join(f"{e['kind']} {e['name']}{'/' + e['file'] if e['file'] else ''} ({e['action']})"
+                                for e in events))
+        providers = {e["name"] for e in events if e["kind"] == "template"}
+        if providers:
+            from provider_registry import get_provider_registry
+            registry = get_provider_registry(self.templates_dir)
+            for provider in providers:
+                registry.invalidate(provider)
+            registry.refresh()
+
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+            listeners = [ref() for ref in self._listeners]
+        listeners.extend(_global_listeners())
+        for event in events:
+            for callback in listeners:
+                if callback is None:
+                    continue
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.warning(f"[ConfigWatcher] Écouteur en échec ({event['kind']} {event['name']}): {e}")
+
+    # ------------------------------------------------------------ Synchronisation
+
+    def _sync_profile(self, name: str) -> List[ConfigEvent]:
+        path = os.path.join(self.profiles_dir, f"{name}.json")
+        signature = _stat_signature(path)
+        with self._lock:
+            entry = self._profiles.get(name)
+            if signature is None:
+                if entry is None:
+                    return []
+                del self._profiles[name]
+                return [{"kind": "profile", "name": name, "file": None, "action": "removed"}]
+            if entry is not None and entry["signature"] == signature:
+                return []
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[ConfigWatcher] Profil {name} illisible: {e}")
+                data = None
+            self._profiles[name] = {"data": data, "signature": signature, "version": next(_versions)}
+            return [{"kind": "profile", "name": name, "file": None,
+                     "action": "changed" if entry is not None else "added"}]
+
+    def _sync_template_file(self, provider: str, filename: str) -> List[ConfigEvent]:
+        path = os.path.join(self.templates_dir, provider, filename)
+        signature = _stat_signature(path)
+        kind = "models" if filename == MODELS_FILE else "template"
+        with self._lock:
+            files = self._templates.setdefault(provider, {})
+            entry = files.get(filename)
+            if signature is None:
+                if entry is None:
+                    return []
+                del files[filename]
+                if kind == "models":
+                    self._models.pop(provider, None)
+                return [{"kind": kind, "name": provider, "file": filename, "action": "removed"}]
+            if entry is not None and entry["signature"] == signature:
+                return []
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"[ConfigWatcher] Lecture {provider}/{filename} impossible: {e}")
+                return []
+            files[filename] = {"text": text, "signature": signature, "version": next(_versions)}
+            if kind == "models":
+                try:
+                    self._models[provider] = json.loads(text)
+                except ValueError as e:
+                    logger.warning(f"[ConfigWatcher] {provider}/{MODELS_FILE} invalide: {e}")
+                    self._models.pop(provider, None)
+            return [{"kind": kind, "name": provider, "file": filename,
+                     "action": "changed" if entry is not None else "added"}]
+
+    def _sync_provider(self, provider: str) -> List[ConfigEvent]:
+        provider_dir = os.path.join(self.templates_dir, provider)
+        try:
+            present = {name for name in os.listdir(provider_dir) if _is_tracked_template(name)}
+        except OSError:
+            present = set()
+        with self._lock:
+            known = set(self._templates.get(provider, {}))
+        events: List[ConfigEvent] = []
+        for filename in sorted(present | known):
+            events.extend(self._sync_template_file(provider, filename))
+        if not present:
+            with self._lock:
+                if not self._templates.get(provider):
+                    self._templates.pop(provider, None)
+        return events
+
+    def _scan_all(self) -> List[ConfigEvent]:
+        """Compare tout le modèle au disque (stat) et relit ce qui a changé"""
+        try:
+            profiles = {f[:-5] for f in os.listdir(self.profiles_dir) if f.endswith(".json")}
+        except OSError:
+            profiles = set()
+        try:
+            providers = {n for n in os.listdir(self.templates_dir)
+                         if os.path.isdir(os.path.join(self.templates_dir, n))}
+        except OSError:
+            providers = set()
+        with self._lock:
+            profiles |= set(self._profiles)
+            providers |= set(self._templates)
+        events: List[ConfigEvent] = []
+        for name in sorted(profiles):
+            events.extend(self._sync_profile(name))
+        for provider in sorted(providers):
+            events.extend(self._sync_provider(provider))
+        return events
+
+    def sync_path(self, path: str) -> List[ConfigEvent]:
+        """Relit immédiatement un fichier surveillé et notifie (écriture par ce processus)"""
+        directory, filename = os.path.split(os.path.abspath(path))
+        if directory == os.path.abspath(self.profiles_dir):
+            events = self._sync_profile(filename[:-5]) if filename.endswith(".json") else []
+        elif os.path.dirname(directory) == os.path.abspath(self.templates_dir) and _is_tracked_template(filename):
+            events = self._sync_template_file(os.path.basename(directory), filename)
+        else:
+            events = []
+        self._emit(events)
+        return events
+
+    def sync(self) -> List[ConfigEvent]:
+        """Scan complet immédiat (utilisé par le mode polling)"""
+        events = self._scan_all()
+        self._emit(events)
+        return events
+
+    # ------------------------------------------------------------ Thread de surveillance
+
+    def start(self) -> "ConfigWatcher":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._backend = None
+        if self.use_inotify:
+            try:
+                self._backend = InotifyBackend()
+            except (OSError, AttributeError) as e:
+                logger.info(f"[ConfigWatcher] inotify indisponible ({e}), scan toutes les {self.poll_interval:.1f} s")
+        self.backend_name = "inotify" if self._backend else "polling"
+        if self._backend:
+            self._add_inotify_watches()
+            # inotify tient le registre à jour: son propre stat devient un filet de sécurité
+            from provider_registry import get_provider_registry
+            get_provider_registry(self.templates_dir).check_interval = REGISTRY_CHECK_INTERVAL
+        # Modifications survenues entre la construction et la pose des watches
+        self.sync()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"[ConfigWatcher] Surveillance active ({self.backend_name}): "
+                    f"{len(self._profiles)} profil(s), {len(self._templates)} provider(s)")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+            from provider_registry import CHECK_INTERVAL, get_provider_registry
+            get_provider_registry(self.templates_dir).check_interval = CHECK_INTERVAL
+
+    def _add_inotify_watches(self) -> None:
+        backend = self._backend
+        for directory in (self.profiles_dir, self.templates_dir):
+            if os.path.isdir(directory) and not backend.is_watched(directory):
+                backend.add_watch(directory)
+        try:
+            names = os.listdir(self.templates_dir)
+        except OSError:
+            names = []
+        for name in names:
+            provider_dir = os.path.join(self.templates_dir, name)
+            if os.path.isdir(provider_dir) and not backend.is_watched(provider_dir):
+                backend.add_watch(provider_dir)
+
+    def _run(self) -> None:
+        last_full_scan = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if self._backend is None:
+                    self._stop.wait(self.poll_interval)
+                    if not self._stop.is_set():
+                        self.sync()
+                    continue
+
+                events = self._backend.read_events(min(1.0, SAFETY_SCAN_INTERVAL))
+                if events:
+                    # Laisser finir la rafale (écriture + renommage, plusieurs fichiers)
+                    deadline = time.monotonic() + DEBOUNCE_SECONDS
+                    while time.monotonic() < deadline:
+                        events.extend(self._backend.read_events(max(0.0, deadline - time.monotonic())))
+                    self._handle_inotify(events)
+                if time.monotonic() - last_full_scan >= SAFETY_SCAN_INTERVAL:
+                    last_full_scan = time.monotonic()
+                    self._add_inotify_watches()
+                    self.sync()
+            except Exception as e:
+                logger.error(f"[ConfigWatcher] Erreur de surveillance: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _handle_inotify(self, raw_events: List[Tuple[str, str, int]]) -> None:
+        profiles_dir = self.profiles_dir
+        templates_dir = self.templates_dir
+        profiles: Set[str] = set()
+        providers: Set[str] = set()
+        full_scan = False
+        for directory, name, mask in raw_events:
+            if mask & IN_Q_OVERFLOW or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                full_scan = True
+            elif directory == profiles_dir:
+                if name.endswith(".json"):
+                    profiles.add(name[:-5])
+            elif directory == templates_dir:
+                if name:
+                    providers.add(name)
+            elif os.path.dirname(directory) == templates_dir:
+                if _is_tracked_template(name):
+                    providers.add(os.path.basename(directory))
+
+        if full_scan:
+            self._add_inotify_watches()
+            self.sync()
+            return
+        if providers:
+            self._add_inotify_watches()
+        events: List[ConfigEvent] = []
+        for name in sorted(profiles):
+            events.extend(self._sync_profile(name))
+        for provider in sorted(providers):
+            events.extend(self._sync_provider(provider))
+        self._emit(events)
+
+
+# ---------------------------------------------------------------- Accès partagé
+
+_watchers: Dict[str, ConfigWatcher] = {}
+_watchers_lock = threading.Lock()
+_listener_refs: List[Any] = []
+
+
+def add_config_listener(callback: Callable[[ConfigEvent], None], weak: bool = False) -> None:
+    """Écouteur de tous les watchers, présents et futurs (weak=True pour une méthode liée)"""
+    reference = weakref.WeakMethod(callback) if weak else (lambda cb=callback: cb)
+    with _watchers_lock:
+        _listener_refs.append(reference)
+
+
+def _global_listeners() -> List[Callable[[ConfigEvent], None]]:
+    with _watchers_lock:
+        _listener_refs[:] = [ref for ref in _listener_refs if ref() is not None]
+        return [ref() for ref in _listener_refs]
+
+
+def get_config_watcher(base_dir: str = ".") -> ConfigWatcher:
+    """Watcher partagé par tout le processus (un par dossier de base), non démarré"""
+    key = os.path.abspath(base_dir)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = ConfigWatcher(base_dir)
+            _watchers[key] = watcher
+        return watcher
+
+
+def start_config_watcher(base_dir: str = ".") -> ConfigWatcher:
+    """Démarre (une fois) la surveillance du dossier de base"""
+    return get_config_watcher(base_dir).start()
+
+
+def get_active_watcher(base_dir: str = ".") -> Optional[ConfigWatcher]:
+    """Watcher en cours d'exécution pour ce dossier, sinon None (lecture disque classique)"""
+    watcher = _watchers.get(os.path.abspath(base_dir))
+    return watcher if watcher is not None and watcher.running else None
+
+
+def notify_written(path: str) -> None:
+    """À appeler après une écriture de profil/template: le modèle est mis à jour sans attendre l'événement"""
+    for watcher in list(_watchers.values()):
+        if watcher.running and watcher.covers(path):
+            watcher.sync_path(path)
+
+
+def stop_config_watchers() -> None:
+    with _watchers_lock:
+        watchers = list(_watchers.values())
+    for watcher in watchers:
+        watcher.stop()
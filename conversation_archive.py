@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversation Archive - Export et import des sessions en JSONL compressé
+
+Une archive est une suite d'enregistrements JSON compacts, un par ligne:
+    {"type":"session","version":1,"session_id":"...","profile":"Gemini","provider":"gemini",...}
+    {"type":"summary","session_id":"...","count":2,"text":"..."}          # résumé courant
+    {"type":"message","session_id":"...","seq":0,"role":"user","content":"...",
+     "timestamp":"...","word_count":12,"sentence_count":1,"tokens":{...},"latency_ms":812.4}
+    {"type":"end","session_id":"...","messages":42}
+
+Compression selon l'extension: .gz (gzip), .zst (zstd si le module zstandard est
+installé), sinon JSONL brut. La lecture est un flux ligne à ligne: une archive de
+millions de messages se parcourt, se filtre ou se réimporte en mémoire constante
+(une seule session reconstruite à la fois).
+
+    with ArchiveWriter("conversations/export.jsonl.gz") as archive:
+        archive.write_session(conversation, profile="Gemini", provider="gemini")
+    for record in iter_records("export.jsonl.gz", types=("message",), role="user"):
+        ...
+    for header, conversation in import_sessions("export.jsonl.gz"):
+        ...
+
+CLI:
+    python conversation_archive.py stats export.jsonl.gz
+    python conversation_archive.py cat export.jsonl.gz --type message --role user --grep cache
+    python conversation_archive.py copy export.jsonl.gz extrait.jsonl.zst --session abc123
+"""
+
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from response_parser import loads_json
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_VERSION = 1
+RECORD_TYPES = ("session", "summary", "message", "end")
+# Champs d'un message d'historique conservés dans l'archive
+MESSAGE_FIELDS = ("role", "content", "timestamp", "word_count", "sentence_count", "tokens", "latency_ms")
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def open_archive(path: str, mode: str = "r"):
+    """Ouvre une archive en texte UTF-8 ('r', 'w' ou 'a'), compression déduite de l'extension"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Archive .zst: module zstandard non installé (pip install zstandard)")
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(open(path, mode + "b"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class ArchiveWriter:
+    """Écriture séquentielle d'une archive (context manager)"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open_archive(path, "a" if append else "w")
+        self.sessions = 0
+        self.messages = 0
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        if record.get("type") not in RECORD_TYPES:
+            raise ValueError(f"Type d'enregistrement inconnu: {record.get('type')}")
+        self._file.write(_dumps(record))
+        self._file.write("\n")
+
+    def write_session(self, conversation, session_id: Optional[str] = None, **metadata: Any) -> str:
+        """
+        Écrit une session complète depuis un ConversationManager
+
+        Args:
+            conversation: ConversationManager (historique, résumé courant)
+            session_id: Identifiant (généré si absent)
+            **metadata: Champs libres de l'en-tête (profile, provider, model...)
+
+        Returns:
+            Identifiant de la session écrite
+        """
+        messages = conversation.conversation_history
+        session_id = session_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.sessions}"
+        header = {"type": "session", "version": ARCHIVE_VERSION, "session_id": session_id,
+                  "api_type": conversation.api_type,
+                  "created_at": messages[0]['timestamp'] if messages else datetime.now().isoformat()}
+        header.update({k: v for k, v in metadata.items() if v is not None})
+        self.write_record(header)
+        if conversation.current_summary:
+            self.write_record({"type": "summary", "session_id": session_id,
+                               "count": conversation.summary_count, "text": conversation.current_summary})
+        count = 0
+        for count, message in enumerate(messages, 1):
+            record = {"type": "message", "session_id": session_id, "seq": count - 1}
+            record.update({k: message[k] for k in MESSAGE_FIELDS if message.get(k) is not None})
+            self.write_record(record)
+        self.write_record({"type": "end", "session_id": session_id, "messages": count})
+        self.sessions += 1
+        self.messages += count
+        return session_id
+
+
+def export_conversations(path: str, sessions: Iterable[Tuple[Any, Dict[str, Any]]], append: bool = False) -> Dict[str, int]:
+    """
+    Exporte plusieurs sessions: itérable de (ConversationManager, métadonnées de l'en-tête)
+
+    Returns:
+        Dict {sessions, messages}
+    """
+    with ArchiveWriter(path, append=append) as archive:
+        for conversation, metadata in sessions:
+            archive.write_session(conversation, **dict(metadata or {}))
+    logger.info(f"[Archive] {archive.sessions} session(s), {archive.messages} message(s) -> {path}")
+    return {"sessions": archive.sessions, "messages": archive.messages}
+
+
+def iter_records(path: str, types: Optional[Iterable[str]] = None, session_id: Optional[str] = None,
+                 role: Optional[str] = None, contains: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt l'archive enregistrement par enregistrement (mémoire constante)
+
+    Args:
+        types: Types retenus (session, summary, message, end), tous par défaut
+        session_id: Limite à une session
+        role: Limite les messages à un rôle (les autres types sont conservés)
+        contains: Sous-chaîne recherchée dans le contenu stocké (échappé) des messages et résumés
+    """
+    types = set(types) if types else None
+    # Filtres appliqués au texte brut avant décodage (la plupart des lignes sont écartées
+    # sans json.loads), seulement si la valeur s'écrit à l'identique une fois encodée
+    raw_filters = [value for value in (session_id, contains)
+                   if value is not None and _dumps(value)[1:-1] == value]
+    with open_archive(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            if raw_filters and not all(value in line for value in raw_filters):
+                continue
+            try:
+                record = loads_json(line)
+            except ValueError:
+                if line.strip():
+                    logger.warning(f"[Archive] {path}:{number} ligne illisible ignorée")
+                continue
+            kind = record.get("type")
+            if types is not None and kind not in types:
+                continue
+            if session_id is not None and record.get("session_id") != session_id:
+                continue
+            if role is not None and kind == "message" and record.get("role") != role:
+                continue
+            if contains is not None and contains not in record.get("content", record.get("text", "")):
+                continue
+            yield record
+
+
+def iter_sessions(path: str, session_id: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]]:
+    """
+    Regroupe le flux par session: (en-tête, itérateur des résumés et messages)
+
+    L'itérateur d'une session doit être consommé avant de passer à la suivante
+    (il est vidé automatiquement sinon); rien n'est gardé en mémoire.
+    """
+    records = iter_records(path, session_id=session_id)
+    pending: Optional[Dict[str, Any]] = None
+
+    def body(current_id: str) -> Iterator[Dict[str, Any]]:
+        nonlocal pending
+        for record in records:
+            if record["type"] == "session":
+                pending = record
+                return
+            if record["type"] == "end":
+                return
+            if record.get("session_id") == current_id:
+                yield record
+
+    while True:
+        header = pending
+        pending = None
+        if header is None:
+            header = next((r for r in records if r["type"] == "session"), None)
+            if header is None:
+                return
+        content = body(header["session_id"])
+        yield header, content
+        for _ in content:
+            pass
+
+
+def restore_conversation(header: Dict[str, Any], records: Iterable[Dict[str, Any]],
+                         factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+    """Reconstruit un ConversationManager depuis l'en-tête et les enregistrements d'une session"""
+    if factory is None:
+        from conversation_manager import ConversationManager
+        conversation = ConversationManager(api_type=header.get("api_type") or header.get("provider"))
+    else:
+        conversation = factory(header)
+    for record in records:
+        if record["type"] == "message":
+            conversation.restore_message(record)
+        elif record["type"] == "summary":
+            conversation.current_summary = record.get("text") or None
+            conversation.summary_count = record.get("count", 1)
+    return conversation
+
+
+def import_sessions(path: str, factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                    session_id: Optional[str] = None) -> Iterator[Tuple[Dict[str, Any], Any]]:
+    """
+    Réimporte les sessions une à une: (en-tête, ConversationManager)
+
+    Args:
+        factory: Crée le ConversationManager à partir de l'en-tête (profil, provider...);
+                 par défaut ConversationManager(api_type=...) sans configuration
+    """
+    for header, records in iter_sessions(path, session_id=session_id):
+        yield header, restore_conversation(header, records, factory)
+
+
+def unescape_content(content: str) -> str:
+    """Texte d'origine d'un contenu d'historique (échappé par escape_for_json)"""
+    try:
+        return json.loads(f'"{content}"')
+    except ValueError:
+        return content
+
+
+def iter_prompts(path: str, role: str = "user") -> Iterator[str]:
+    """Messages d'un rôle, désséchappés, dans l'ordre de l'archive (rejeu par lots)"""
+    for record in iter_records(path, types=("message",), role=role):
+        content = record.get("content")
+        if content:
+            yield unescape_content(content)
+
+
+def archive_stats(path: str) -> Dict[str, Any]:
+    """Comptes par type et par rôle, tokens et latence moyenne, en une passe"""
+    stats = {"sessions": 0, "summaries": 0, "messages": 0, "roles": {},
+             "input_tokens": 0, "output_tokens": 0, "latency_ms_mean": None}
+    latency_total = 0.0
+    latency_count = 0
+    for record in iter_records(path):
+        kind = record["type"]
+        if kind == "session":
+            stats["sessions"] += 1
+        elif kind == "summary":
+            stats["summaries"] += 1
+        elif kind == "message":
+            stats["messages"] += 1
+            stats["roles"][record.get("role")] = stats["roles"].get(record.get("role"), 0) + 1
+            tokens = record.get("tokens") or {}
+            stats["input_tokens"] += tokens.get("input_tokens", 0)
+            stats["output_tokens"] += tokens.get("output_tokens", 0)
+            if record.get("latency_ms") is not None:
+                latency_total += record["latency_ms"]
+                latency_count += 1
+    if latency_count:
+        stats["latency_ms_mean"] = round(latency_total / latency_count, 1)
+    return stats
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Archives de conversations Rob-1 (JSONL compressé)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats_parser = commands.add_parser("stats", help="Comptes, tokens et latence moyenne")
+    stats_parser.add_argument("archive")
+
+    for name, help_text in (("cat", "Affiche les enregistrements filtrés (JSONL)"),
+                            ("copy", "Copie les enregistrements filtrés vers une autre archive")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("archive")
+        if name == "copy":
+            command.add_argument("destination")
+        command.add_argument("--type", action="append", choices=RECORD_TYPES, help="Type retenu (répétable)")
+        command.add_argument("--session", help="Identifiant de session")
+        command.add_argument("--role", choices=("user", "model"))
+        command.add_argument("--grep", help="Sous-chaîne recherchée dans les contenus")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "stats":
+            print(json.dumps(archive_stats(args.archive), ensure_ascii=False, indent=2))
+            return 0
+        records = iter_records(args.archive, types=args.type, session_id=args.session,
+                               role=args.role, contains=args.grep)
+        if args.command == "cat":
+            for record in records:
+                sys.stdout.write(_dumps(record) + "\n")
+            return 0
+        count = 0
+        with ArchiveWriter(args.destination) as archive:
+            for count, record in enumerate(records, 1):
+                archive.write_record(record)
+        print(f"{count} enregistrement(s) -> {args.destination}")
+        return 0
+    except BrokenPipeError:
+        return 0
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,11 +12,13 @@ import unicodedata
 from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 
-try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
-except ImportError:
-    TIKTOKEN_AVAILABLE = False
+from startup import lazy_import
+from history_store import HistoryStore, PAGE_SIZE
+
+# tiktoken n'est chargé qu'à la création du premier encodeur (import coûteux)
+tiktoken = lazy_import("tiktoken")
+TIKTOKEN_AVAILABLE = tiktoken is not None
+if not TIKTOKEN_AVAILABLE:
     logging.warning("tiktoken non disponible - comptage tokens désactivé")
 
 class ConversationManager:
@@ -132,7 +134,8 @@ class ConversationManager:
         self.token_encoder = self._get_token_encoder()
         
         # État de la conversation
-        self.conversation_history: List[Dict[str, str]] = []
+        # Fenêtre récente en mémoire, messages plus anciens paginés sur disque
+        self.conversation_history = HistoryStore()
         self.current_summary: Optional[str] = None
         self.summary_count = 0
         self.logger = logging.getLogger(__name__)
@@ -270,13 +273,16 @@ class ConversationManager:
         # Utiliser la logique d'échappement existante
         return self.escape_for_json(text)
     
-    def add_message(self, role: str, content: str) -> None:
+    def add_message(self, role: str, content: str, usage: Optional[Dict[str, int]] = None,
+                    latency_ms: Optional[float] = None) -> None:
         """
         Ajoute un nouveau message à l'historique avec échappement JSON automatique.
         
         Args:
             role: 'user' ou 'model'
             content: Contenu du message (sera automatiquement échappé)
+            usage: Tokens de l'appel {input_tokens, output_tokens} (réponse du modèle)
+            latency_ms: Durée de l'appel ayant produit le message
         """
         if role not in ['user', 'model']:
             raise ValueError("Le rôle doit être 'user' ou 'model'")
@@ -291,6 +297,10 @@ class ConversationManager:
             'word_count': len(escaped_content.split()),
             'sentence_count': len(re.split(r'[.!?]+', escaped_content.strip()))
         }
+        if usage:
+            message['tokens'] = {k: v for k, v in usage.items() if k in ('input_tokens', 'output_tokens') and v}
+        if latency_ms is not None:
+            message['latency_ms'] = round(latency_ms, 1)
         
         self.conversation_history.append(message)
         self.logger.debug(f"Message ajouté: {role} - {message['word_count']} mots, {message['sentence_count']} phrases")
@@ -300,6 +310,49 @@ class ConversationManager:
         if original_clean != escaped_content:
             self.logger.info("Contenu nettoyé pour éviter les problèmes d'échappement JSON")
     
+    def restore_message(self, message: Dict[str, Any]) -> None:
+        """
+        Réinsère un message déjà enregistré (import d'archive): contenu conservé tel quel
+        """
+        if message.get('role') not in ['user', 'model']:
+            raise ValueError("Le rôle doit être 'user' ou 'model'")
+        content = message.get('content', '')
+        restored = {
+            'role': message['role'],
+            'content': content,
+            'timestamp': message.get('timestamp') or datetime.now().isoformat(),
+            'word_count': message.get('word_count', len(content.split())),
+            'sentence_count': message.get('sentence_count', len(re.split(r'[.!?]+', content.strip()))),
+        }
+        for key in ('tokens', 'latency_ms'):
+            if message.get(key) is not None:
+                restored[key] = message[key]
+        self.conversation_history.append(restored)
+    
+    def iter_history(self, page_size: int = PAGE_SIZE):
+        """
+        Parcourt l'historique message par message, les pages sur disque étant relues une à une
+        """
+        for page in self.conversation_history.iter_pages(page_size):
+            yield from page
+    
+    def iter_history_pages(self, page_size: int = PAGE_SIZE):
+        """
+        Pages de messages (listes), de la plus ancienne à la plus récente
+        """
+        return self.conversation_history.iter_pages(page_size)
+    
+    def search_history(self, text: str, role: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche dans tout l'historique (y compris les pages sur disque)
+        
+        Returns:
+            List[Dict]: {index, message} des messages contenant le texte (insensible à la casse)
+        """
+        needle = self.escape_for_json(text) or text
+        return [{'index': index, 'message': message}
+                for index, message in self.conversation_history.search(needle, role=role, limit=limit)]
+    
     def get_current_history_word_count(self) -> int:
         """
         Calcule le nombre total de mots dans l'historique actuel
@@ -310,9 +363,8 @@ class ConversationManager:
         if self.current_summary:
             total_words += len(self.current_summary.split())
         
-        # Compter les mots de tous les messages de l'historique
-        for message in self.conversation_history:
-            total_words += message.get('word_count', len(message['content'].split()))
+        # Total tenu à jour par l'historique à chaque ajout (aucune relecture des pages sur disque)
+        total_words += self.conversation_history.total_words
         
         return total_words
     
@@ -326,9 +378,7 @@ class ConversationManager:
         if self.current_summary:
             total_sentences += len(re.split(r'[.!?]+', self.current_summary.strip()))
         
-        # Compter les phrases de tous les messages de l'historique
-        for message in self.conversation_history:
-            total_sentences += message.get('sentence_count', len(re.split(r'[.!?]+', message['content'].strip())))
+        total_sentences += self.conversation_history.total_sentences
         
         return total_sentences
     
@@ -431,12 +481,14 @@ RÉSUMÉ CONTEXTUEL :"""
             cleaned_summary = self._clean_text_for_api(self.current_summary)
             full_history += f"[Contexte précédent]\n{cleaned_summary}\n\n[Conversation récente]\n"
         
-        # Ajouter tous les messages de l'historique
-        for message in self.conversation_history:
+        # Ajouter tous les messages de l'historique (lus page par page)
+        lines = []
+        for message in self.iter_history():
             role_label = "Utilisateur" if message['role'] == 'user' else "Assistant"
             # Le contenu est déjà nettoyé lors de l'ajout, mais on s'assure
             cleaned_content = self._clean_text_for_api(message['content'])
-            full_history += f"{role_label}: {cleaned_content}\n"
+            lines.append(f"{role_label}: {cleaned_content}\n")
+        full_history += "".join(lines)
         
         # Charger le template et remplacer le placeholder
         template = self._load_summary_template()
@@ -525,6 +577,26 @@ RÉSUMÉ CONTEXTUEL :"""
         
         return api_messages
     
+    def build_prompt(self) -> str:
+        """
+        Prompt final envoyé au provider: résumé puis historique
+
+        Le contenu des messages est déjà échappé par escape_for_json() lors de l'ajout:
+        aucun échappement supplémentaire n'est nécessaire.
+        """
+        prompt_parts = []
+        
+        # Inclure le résumé s'il existe
+        if self.current_summary:
+            prompt_parts.append(f"[Contexte de conversation]\\n{self.current_summary}")
+        
+        # Ajouter tous les messages de l'historique
+        for message in self.iter_history():
+            role_label = "Utilisateur" if message['role'] == 'user' else "Assistant"
+            prompt_parts.append(f"{role_label}: {message['content']}")
+        
+        return "\\n".join(prompt_parts)
+    
     def get_display_history(self) -> str:
         """
         Retourne l'historique formaté pour l'affichage dans l'interface
@@ -533,15 +605,30 @@ RÉSUMÉ CONTEXTUEL :"""
         
         # Afficher le résumé s'il existe
         if self.current_summary:
-            display_lines.append(f"[📋 Résumé de conversation #{self.summary_count}]\n{self.current_summary}\n")
+            display_lines.append(self.format_display_summary())
         
         # Afficher les messages actuels
-        for message in self.conversation_history:
-            role_label = "Question" if message['role'] == 'user' else "Réponse"
-            display_lines.append(f"{role_label} : {message['content']}")
+        for message in self.iter_history():
+            display_lines.append(self.format_display_message(message))
         
         return "\n".join(display_lines)
     
+    def format_display_summary(self) -> str:
+        """
+        Bloc d'affichage du résumé courant (vide sans résumé)
+        """
+        if not self.current_summary:
+            return ""
+        return f"[📋 Résumé de conversation #{self.summary_count}]\n{self.current_summary}\n"
+    
+    @staticmethod
+    def format_display_message(message: Dict[str, Any]) -> str:
+        """
+        Ligne d'affichage d'un message de l'historique
+        """
+        role_label = "Question" if message['role'] == 'user' else "Réponse"
+        return f"{role_label} : {message['content']}"
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Retourne les statistiques détaillées de la conversation
@@ -562,6 +649,7 @@ RÉSUMÉ CONTEXTUEL :"""
             'tokens_enabled': getattr(self, 'tokens_enabled', False),
             'summary_count': self.summary_count,
             'messages_count': len(self.conversation_history),
+            'messages_on_disk': self.conversation_history.stats()['spilled'],
             'has_summary': self.current_summary is not None,
             'intelligent_management': getattr(self, 'intelligent_management', True),
             'show_indicators': self.show_indicators
@@ -619,7 +707,7 @@ RÉSUMÉ CONTEXTUEL :"""
             total_tokens += self._count_tokens(self.current_summary)
         
         # Compter les tokens de chaque message
-        for message in self.conversation_history:
+        for message in self.iter_history():
             for part in message.get('parts', []):
                 total_tokens += self._count_tokens(part.get('text', ''))
         
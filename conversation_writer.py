@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conversation Writer - Écriture des conversations et fichiers générés en arrière-plan
+
+Un thread unique reçoit les écritures par file d'attente; l'appelant (thread Tk)
+ne touche jamais le disque:
+- append(): tours ajoutés au fichier de la session (conversations/<base>_<session>.txt),
+  regroupés et vidés une fois par lot
+- write(): fichier complet (un fichier par tour, mode développement)
+- Rotation du fichier de session par taille (ROB1_CONV_MAX_BYTES, 5 Mo par défaut)
+  ou au changement de jour; le segment fermé est compressé (ROB1_CONV_COMPRESSION:
+  gzip par défaut, zstd si le module zstandard est installé, none)
+
+    writer = get_conversation_writer()
+    writer.append("conversation", "Question: ...\\n\\nRéponse: ...\\n")
+    writer.write("development/script.py", code)
+    writer.flush()                     # attendre les écritures en attente (tests, sortie)
+"""
+
+import atexit
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONVERSATIONS_DIR = "conversations"
+try:
+    MAX_BYTES = int(os.environ.get("ROB1_CONV_MAX_BYTES", 5 * 1024 * 1024))
+except ValueError:
+    MAX_BYTES = 5 * 1024 * 1024
+COMPRESSION = os.environ.get("ROB1_CONV_COMPRESSION", "gzip").lower()
+# Délai laissé aux écritures suivantes pour rejoindre le lot avant le flush
+BATCH_WINDOW = 0.2
+BATCH_MAX = 256
+SESSION_HEADER = "=== CONVERSATION ===\nSession: {session}\nDébut: {date}\n\n"
+
+
+class SessionFile:
+    """Fichier de session ouvert en ajout: taille et jour courants pour la rotation"""
+
+    def __init__(self, path: str, session_id: str):
+        self.path = path
+        self.session_id = session_id
+        self.handle = None
+        self.size = 0
+        self.day = ""
+        self.segment = 0
+        # Au moins un tour écrit dans le segment (un en-tête seul n'est jamais archivé)
+        self.has_content = False
+
+    def open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.handle = open(self.path, 'a', encoding='utf-8')
+        self.size = self.handle.tell()
+        self.has_content = self.size > 0
+        try:
+            self.day = datetime.fromtimestamp(os.path.getmtime(self.path)).strftime("%Y%m%d") if self.size else ""
+        except OSError:
+            self.day = ""
+        if not self.size:
+            self.write(SESSION_HEADER.format(session=self.session_id,
+                                              date=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+
+    def write(self, text: str) -> None:
+        self.handle.write(text)
+        self.size += len(text.encode('utf-8'))
+        if not self.day:
+            self.day = datetime.now().strftime("%Y%m%d")
+
+    def close(self) -> None:
+        if self.handle is not None and not self.handle.closed:
+            self.handle.close()
+        self.handle = None
+
+
+class ConversationFileWriter:
+    """Écrivain asynchrone: ajout par session, fichiers complets, rotation et compression"""
+
+    def __init__(self, directory: str = CONVERSATIONS_DIR, max_bytes: int = MAX_BYTES,
+                 compression: str = COMPRESSION, session_id: Optional[str] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        if compression == "zstd" and zstandard is None:
+            logger.info("[ConversationWriter] zstandard absent, compression gzip")
+            compression = "gzip"
+        self.compression = compression if compression in ("gzip", "zstd") else "none"
+        self.session_id = session_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._queue: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue()
+        self._files: Dict[str, SessionFile] = {}
+        self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    # ------------------------------------------------------------ API (non bloquante)
+
+    def session_path(self, base_filename: str = "conversation") -> str:
+        return os.path.join(self.directory, f"{base_filename}_{self.session_id}.txt")
+
+    def append(self, base_filename: str, text: str) -> None:
+        """Ajoute du texte au fichier de session <base_filename>_<session>.txt"""
+        self._queue.put(("append", base_filename or "conversation", text))
+
+    def write(self, path: str, content: str) -> None:
+        """Écrit (ou remplace) un fichier complet"""
+        self._queue.put(("write", path, content))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Attend que toutes les écritures en attente soient sur disque"""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done, None))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Vide la file, ferme les fichiers et arrête le thread"""
+        if self._closed:
+            return
+        self._queue.put(("stop", None, None))
+        self._thread.join(timeout)
+        self._closed = True
+
+    # ------------------------------------------------------------ Thread d'écriture
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Les tours arrivant juste après rejoignent le même lot (un seul flush)
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < BATCH_MAX and batch[-1][0] not in ("flush", "stop"):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            dirty = set()
+            for kind, target, payload in batch:
+                try:
+                    if kind == "append":
+                        dirty.add(self._append(target, payload))
+                    elif kind == "write":
+                        self._write_file(target, payload)
+                except Exception as e:
+                    logger.error(f"[ConversationWriter] Écriture {target} impossible: {e}")
+            for session_file in dirty:
+                if session_file.handle is not None:
+                    session_file.handle.flush()
+
+            for kind, target, _payload in batch:
+                if kind == "flush":
+                    target.set()
+                elif kind == "stop":
+                    for session_file in self._files.values():
+                        session_file.close()
+                    self._files.clear()
+                    return
+
+    def _append(self, base_filename: str, text: str) -> SessionFile:
+        session_file = self._files.get(base_filename)
+        if session_file is None:
+            session_file = SessionFile(self.session_path(base_filename), self.session_id)
+            self._files[base_filename] = session_file
+        if session_file.handle is None:
+            session_file.open()
+        today = datetime.now().strftime("%Y%m%d")
+        if session_file.has_content and (session_file.size + len(text) > self.max_bytes or session_file.day != today):
+            self._rotate(session_file)
+            session_file.open()
+        session_file.write(text)
+        session_file.has_content = True
+        return session_file
+
+    def _rotate(self, session_file: SessionFile) -> None:
+        """Ferme le segment courant, le renomme puis le compresse"""
+        session_file.close()
+        root, extension = os.path.splitext(session_file.path)
+        while True:
+            session_file.segment += 1
+            segment_path = f"{root}.{session_file.day}.{session_file.segment:03d}{extension}"
+            if not any(os.path.exists(segment_path + suffix) for suffix in ("", ".gz", ".zst")):
+                break
+        os.replace(session_file.path, segment_path)
+        session_file.day = ""
+        compressed = self._compress(segment_path)
+        logger.info(f"[ConversationWriter] Rotation: {compressed}")
+
+    def _compress(self, path: str) -> str:
+        if self.compression == "none":
+            return path
+        try:
+            if self.compression == "zstd":
+                target = path + ".zst"
+                with open(path, 'rb') as source, open(target, 'wb') as destination:
+                    zstandard.ZstdCompressor(level=10).copy_stream(source, destination)
+            else:
+                target = path + ".gz"
+                with open(path, 'rb') as source, gzip.open(target, 'wb', compresslevel=6) as destination:
+                    shutil.copyfileobj(source, destination, 1024 * 1024)
+            os.remove(path)
+            return target
+        except OSError as e:
+            logger.warning(f"[ConversationWriter] Compression de {path} impossible: {e}")
+            return path
+
+    def _write_file(self, path: str, content: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        logger.info(f"[ConversationWriter] Fichier sauvegardé: {path}")
+
+
+_writer: Optional[ConversationFileWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_conversation_writer() -> ConversationFileWriter:
+    """Écrivain partagé par le processus (fermé proprement à la sortie)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ConversationFileWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -21,10 +21,15 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
 import os
 import json
+import logging
 from pathlib import Path
 
 # Import du ConfigManager existant
 from config_manager import ConfigManager
+from config_watcher import add_config_listener, get_active_watcher
+from core.endpoints import get_base_url, apply_base_url
+
+logger = logging.getLogger(__name__)
 
 
 class IProfileManager(ABC):
@@ -94,7 +99,14 @@ class APIManager(IProfileManager):
         self._config_manager = ConfigManager()
         self._profiles_cache = {}
         self._last_used_profile = None
+        # Profil modifié ou supprimé sur disque: l'entrée du cache est retirée
+        add_config_listener(self._on_config_event, weak=True)
         
+    def _on_config_event(self, event: Dict[str, Any]) -> None:
+        if event['kind'] == 'profile':
+            self._profiles_cache.pop(event['name'], None)
+            logger.debug(f"[APIManager] Profil {event['name']} {event['action']} sur disque")
+
     def load_profile(self, profile_name: str) -> Optional[Dict[str, Any]]:
         """
         Charge un profil par son nom
@@ -308,7 +320,7 @@ class APIManager(IProfileManager):
         try:
             return self._config_manager.load_template(template_id)
         except Exception as e:
-            print(f"[ERREUR] Erreur chargement template {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement template {template_id}: {e}")
             return None
     
     def save_template(self, template_id: str, template_content: str) -> bool:
@@ -325,7 +337,7 @@ class APIManager(IProfileManager):
         try:
             return self._config_manager.save_template(template_id, template_content)
         except Exception as e:
-            print(f"[ERREUR] Erreur sauvegarde template {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur sauvegarde template {template_id}: {e}")
             return False
     
     def list_available_templates(self) -> List[str]:
@@ -349,13 +361,13 @@ class APIManager(IProfileManager):
                         if curl_file.exists():
                             template_id = f"{provider_dir.name}_chat"
                             templates.append(template_id)
-                            print(f"Template V2 trouvé: {template_id} -> {curl_file}")
+                            logger.debug(f"[APIManager] Template V2 trouvé: {template_id} -> {curl_file}")
             else:
-                print(f"[WARNING] Dossier templates/chat non trouvé: {chat_dir}")
+                logger.warning(f"[APIManager] Dossier templates/chat non trouvé: {chat_dir}")
             
             return sorted(templates)
         except Exception as e:
-            print(f"[ERREUR] Erreur listage templates V2: {e}")
+            logger.error(f"[APIManager] Erreur listage templates V2: {e}")
             return []
     
     def validate_template(self, template_content: str, provider: str = "") -> Dict[str, List[str]]:
@@ -372,7 +384,7 @@ class APIManager(IProfileManager):
         try:
             return self._config_manager.validate_template_placeholders(template_content, provider)
         except Exception as e:
-            print(f"[ERREUR] Erreur validation template: {e}")
+            logger.error(f"[APIManager] Erreur validation template: {e}")
             return {"user_placeholders": [], "system_placeholders": [], "errors": [str(e)]}
     
     def ensure_templates_structure(self) -> bool:
@@ -397,12 +409,12 @@ class APIManager(IProfileManager):
             
             for dir_path in templates_dirs:
                 dir_path.mkdir(parents=True, exist_ok=True)
-                print(f"Dossier V2 créé/vérifié: {dir_path}")
+                logger.debug(f"[APIManager] Dossier V2 créé/vérifié: {dir_path}")
             
-            print("[OK] Structure templates V2 vérifiée (SANS api_commands)")
+            logger.debug("[APIManager] Structure templates V2 vérifiée (SANS api_commands)")
             return True
         except Exception as e:
-            print(f"[ERREUR] Erreur création structure V2: {e}")
+            logger.error(f"[APIManager] Erreur création structure V2: {e}")
             return False
     
     def get_template_content(self, template_id: str) -> Optional[str]:
@@ -418,7 +430,7 @@ class APIManager(IProfileManager):
             Contenu du template ou None si non trouvé
         """
         try:
-            print(f"[APIManager] Chargement template: {template_id}")
+            logger.debug(f"[APIManager] Chargement template: {template_id}")
             
             # SOLID: Détection automatique curl vs native
             if template_id.endswith('_native'):
@@ -429,14 +441,14 @@ class APIManager(IProfileManager):
                 content = self.load_template(template_id)
             
             if content:
-                print(f"[APIManager] Template {template_id} chargé avec succès ({len(content)} caractères)")
+                logger.debug(f"[APIManager] Template {template_id} chargé avec succès ({len(content)} caractères)")
                 return content
             else:
-                print(f"[APIManager] Template {template_id} non trouvé")
+                logger.debug(f"[APIManager] Template {template_id} non trouvé")
                 return None
                 
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur chargement template {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement template {template_id}: {e}")
             return None
 
     def _load_native_template(self, template_id: str) -> Optional[str]:
@@ -455,7 +467,7 @@ class APIManager(IProfileManager):
             # Format attendu: provider_templatetype_native
             parts = template_id.split('_')
             if len(parts) < 3 or parts[-1] != 'native':
-                print(f"[APIManager] Format template_id native invalide: {template_id}")
+                logger.debug(f"[APIManager] Format template_id native invalide: {template_id}")
                 return None
             
             provider = parts[0]
@@ -464,17 +476,20 @@ class APIManager(IProfileManager):
             # Construire le chemin vers native.py
             template_path = f"templates/{template_type}/{provider}/native.py"
             
+            watcher = get_active_watcher() if template_type == 'chat' else None
+            if watcher:
+                return watcher.get_template(provider, "native.py")
             if os.path.exists(template_path):
                 with open(template_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    print(f"[APIManager] Template native chargé: {template_path}")
+                    logger.debug(f"[APIManager] Template native chargé: {template_path}")
                     return content
             else:
-                print(f"[APIManager] Fichier native non trouvé: {template_path}")
+                logger.debug(f"[APIManager] Fichier native non trouvé: {template_path}")
                 return None
                 
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur chargement template native {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement template native {template_id}: {e}")
             return None
 
     def get_template_basic_content(self, template_id: str) -> Optional[str]:
@@ -489,7 +504,7 @@ class APIManager(IProfileManager):
             Contenu du fichier _basic correspondant ou None si non trouvé
         """
         try:
-            print(f"[APIManager] Chargement template basic: {template_id}")
+            logger.debug(f"[APIManager] Chargement template basic: {template_id}")
             
             # SOLID: Détection automatique curl vs native
             if template_id.endswith('_native'):
@@ -500,14 +515,14 @@ class APIManager(IProfileManager):
                 content = self._load_curl_basic_template(template_id)
             
             if content:
-                print(f"[APIManager] Template basic {template_id} chargé avec succès ({len(content)} caractères)")
+                logger.debug(f"[APIManager] Template basic {template_id} chargé avec succès ({len(content)} caractères)")
                 return content
             else:
-                print(f"[APIManager] Template basic {template_id} non trouvé")
+                logger.debug(f"[APIManager] Template basic {template_id} non trouvé")
                 return None
                 
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur chargement template basic {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement template basic {template_id}: {e}")
             return None
 
     def _load_native_basic_template(self, template_id: str) -> Optional[str]:
@@ -530,14 +545,14 @@ class APIManager(IProfileManager):
             if os.path.exists(template_path):
                 with open(template_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    print(f"[APIManager] Template native_basic chargé: {template_path}")
+                    logger.debug(f"[APIManager] Template native_basic chargé: {template_path}")
                     return content
             else:
-                print(f"[APIManager] Fichier native_basic non trouvé: {template_path}")
+                logger.debug(f"[APIManager] Fichier native_basic non trouvé: {template_path}")
                 return None
                 
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur chargement native_basic {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement native_basic {template_id}: {e}")
             return None
 
     def _load_curl_basic_template(self, template_id: str) -> Optional[str]:
@@ -560,14 +575,14 @@ class APIManager(IProfileManager):
             if os.path.exists(template_path):
                 with open(template_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    print(f"[APIManager] Template curl_basic chargé: {template_path}")
+                    logger.debug(f"[APIManager] Template curl_basic chargé: {template_path}")
                     return content
             else:
-                print(f"[APIManager] Fichier curl_basic non trouvé: {template_path}")
+                logger.debug(f"[APIManager] Fichier curl_basic non trouvé: {template_path}")
                 return None
                 
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur chargement curl_basic {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur chargement curl_basic {template_id}: {e}")
             return None
 
     def get_processed_template(self, template_id: str, profile_data: Dict[str, Any], user_prompt: str = "") -> Optional[str]:
@@ -584,7 +599,7 @@ class APIManager(IProfileManager):
             Template avec placeholders remplacés ou None
         """
         try:
-            print(f"[APIManager] Traitement template avec placeholders: {template_id}")
+            logger.debug(f"[APIManager] Traitement template avec placeholders: {template_id}")
             
             # 1. Charger le template brut selon la méthode
             if '_chat' in template_id:
@@ -607,26 +622,33 @@ class APIManager(IProfileManager):
                     template_filename = "curl_basic.txt"
                 
                 template_path = os.path.join(self._config_manager.templates_dir, "chat", provider, template_filename)
-                print(f"[APIManager] Méthode détectée: {method}, template: {template_filename}")
+                logger.debug(f"[APIManager] Méthode détectée: {method}, template: {template_filename}")
                 
                 if not os.path.exists(template_path):
-                    print(f"[APIManager] Template {template_filename} non trouvé: {template_path}")
+                    logger.debug(f"[APIManager] Template {template_filename} non trouvé: {template_path}")
                     return None
                 
                 with open(template_path, 'r', encoding='utf-8') as f:
                     template_content = f.read()
             else:
-                print(f"[APIManager] Format de template_id non supporté: {template_id}")
+                logger.debug(f"[APIManager] Format de template_id non supporté: {template_id}")
                 return None
             
-            # 2. Remplacer les placeholders
+            # 2. Redirection optionnelle vers un endpoint compatible (chat.base_url), sur le
+            #    template seul: les URLs du prompt et de l'historique ne sont pas réécrites
+            base_url = get_base_url(profile_data)
+            if base_url:
+                template_content = apply_base_url(template_content, base_url)
+                logger.debug(f"[APIManager] URL de base surchargée: {base_url}")
+
+            # 3. Remplacer les placeholders
             processed_content = self._replace_placeholders(template_content, profile_data, user_prompt)
             
-            print(f"[APIManager] Template traité avec succès ({len(processed_content)} caractères)")
+            logger.debug(f"[APIManager] Template traité avec succès ({len(processed_content)} caractères)")
             return processed_content
             
         except Exception as e:
-            print(f"[ERREUR APIManager] Erreur traitement template {template_id}: {e}")
+            logger.error(f"[APIManager] Erreur traitement template {template_id}: {e}")
             return None
 
     def _replace_placeholders(self, template_content: str, profile_data: Dict[str, Any], user_prompt: str = "") -> str:
@@ -682,22 +704,24 @@ class APIManager(IProfileManager):
                 '{{SYSTEM_PROMPT_BEHAVIOR}}': behavior,
             }
             
-            # Effectuer les remplacements
+            # Effectuer les remplacements (seuls les noms sont journalisés: jamais les valeurs)
+            replaced = []
             for placeholder, value in replacements.items():
                 if placeholder in content:
                     content = content.replace(placeholder, str(value))
-                    print(f"[APIManager] Remplacé {placeholder} -> {str(value)[:50]}...")
+                    replaced.append(placeholder)
+            logger.debug(f"[APIManager] Placeholders remplacés: {replaced}")
             
             # Vérifier qu'il ne reste pas de placeholders non remplacés
             import re
             remaining_placeholders = re.findall(r'\{\{([^}]+)\}\}', content)
             if remaining_placeholders:
-                print(f"[ATTENTION] Placeholders non remplacés: {remaining_placeholders}")
+                logger.warning(f"[APIManager] Placeholders non remplacés: {remaining_placeholders}")
             
             return content
             
         except Exception as e:
-            print(f"[ERREUR] Erreur remplacement placeholders: {e}")
+            logger.error(f"[APIManager] Erreur remplacement placeholders: {e}")
             return template_content
 
     def get_template_summary(self, template_id: str) -> Optional[Dict[str, Any]]:
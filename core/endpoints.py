@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Surcharge d'URL de base des providers (champ optionnel chat.base_url du profil)
+
+Permet de rediriger un profil vers un endpoint compatible (serveur mock local,
+proxy, passerelle d'entreprise) sans modifier les templates:
+- curl / code natif: le schéma et l'hôte de chaque URL http(s) du template sont
+  remplacés, le chemin est conservé (https://api.anthropic.com/v1/messages -> {base_url}/v1/messages)
+- SDK natifs: variables d'environnement standard des SDK (OpenAI, Anthropic, Google GenAI)
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+_URL_ORIGIN = re.compile(r'https?://[^/\s"\'\\]+')
+
+
+def get_base_url(profile: Optional[Dict[str, Any]]) -> str:
+    """URL de base surchargée du profil (chaîne vide si absente)"""
+    if not profile:
+        return ""
+    base_url = profile.get('chat', {}).get('base_url') or profile.get('base_url') or ""
+    return str(base_url).strip().rstrip('/')
+
+
+def apply_base_url(content: str, base_url: str) -> str:
+    """
+    Remplace l'origine (schéma + hôte + port) des URLs du template par base_url
+
+    À appliquer au template brut, avant la substitution des placeholders: les
+    URLs présentes dans le prompt ou l'historique ne doivent pas être modifiées.
+
+    Args:
+        content: Template curl ou code Python natif (placeholders non remplacés)
+        base_url: Nouvelle origine, ex: "http://127.0.0.1:8765"
+
+    Returns:
+        str: Contenu avec les URLs redirigées (inchangé si base_url est vide)
+    """
+    if not base_url or not content:
+        return content
+    base_url = base_url.rstrip('/')
+    return _URL_ORIGIN.sub(lambda match: base_url, content)
+
+
+def sdk_base_url_env(base_url: str) -> Dict[str, str]:
+    """Variables d'environnement de redirection pour les SDK des templates natifs"""
+    if not base_url:
+        return {}
+    base_url = base_url.rstrip('/')
+    return {
+        'OPENAI_BASE_URL': f"{base_url}/v1",
+        'ANTHROPIC_BASE_URL': base_url,
+        'GOOGLE_GEMINI_BASE_URL': base_url,
+    }
@@ -4,28 +4,51 @@ import os
 import sys
 import re
 import platform
-import yaml
 import subprocess
+import contextvars
 import json
-import charset_normalizer
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
 
+from startup import lazy_import, LazyInstance, defer, ensure, window_shown, timer as startup_timer
+
+# Modules lourds chargés au premier usage (profils YAML historiques, détection d'encodage)
+yaml = lazy_import("yaml")
+charset_normalizer = lazy_import("charset_normalizer")
+if charset_normalizer is None:
+    raise ImportError("No module named 'charset_normalizer'")
+
 # Importer notre nouveau système de configuration
 from config_manager import ConfigManager
+from config_watcher import add_config_listener, get_active_watcher, notify_written, start_config_watcher
+from model_catalog import get_model_catalog
+from conversation_writer import get_conversation_writer
 from core.api_manager import ProfileManagerFactory
 from conversation_manager import ConversationManager
-from system_profile_generator import generate_system_profile_at_startup
-from payload_manager import PayloadManager, extract_json_from_curl
-from native_manager import NativeManager
-
-# Configure logging to log initialization events
-logging.basicConfig(
-    filename="application.log",
-    level=logging.DEBUG,
-    format="%(asctime)s - %(levelname)s - %(message)s"
+from history_view import get_history_view
+from stream_view import StreamingTextUpdater
+from payload_manager import PayloadManager, extract_json_from_curl, attach_payload_file
+from response_parser import debug_json_structure
+from api_response_parser import (
+    get_response_parser, parse_profile_response, create_profile_stream_extractor, parse_profile_stream
+)
+from stream_parser import stream_process_output
+from core.endpoints import get_base_url
+from tracing import tracer, traced, span, set_attribute
+from profiling import profiled, profiler, set_profiling
+from metrics import (
+    REQUESTS, profile_labels, observe_stage, stage_timer, record_tokens, record_cost, record_stream
 )
 
+from logging_setup import CURL_LOGGER
+
+# Journalisation configurée par main.py (logging_setup): niveau, rotation, masquage des secrets
+logger = logging.getLogger(__name__)
+curl_logger = logging.getLogger(CURL_LOGGER)
+
 logging.info("Application started.")
 logging.info("Initializing new JSON configuration system.")
 
@@ -69,18 +92,19 @@ os.makedirs(PROFILES_DIR, exist_ok=True)
 os.makedirs(CONVERSATIONS_DIR, exist_ok=True)
 os.makedirs(DEVELOPMENT_DIR, exist_ok=True)
 
-# Initialiser le gestionnaire de configuration JSON
-# Initialisation APIManager pour gestion centralisée des profils
-api_manager = ProfileManagerFactory.create_api_manager_with_validation()
-if not api_manager:
-    print("ERREUR: Impossible d'initialiser APIManager")
-    sys.exit(1)
+def _creer_api_manager():
+    """APIManager créé au premier usage, une fois les profils par défaut en place"""
+    ensure("profils_defaut")
+    manager = ProfileManagerFactory.create_api_manager_with_validation()
+    if not manager:
+        logger.error("Impossible d'initialiser APIManager")
+    return manager
 
-# Garder ConfigManager pour les opérations de sauvegarde (temporaire)
-config_manager = ConfigManager(".")
+# Initialisation APIManager pour gestion centralisée des profils (créé au premier accès)
+api_manager = LazyInstance(_creer_api_manager, "APIManager")
 
-# Initialiser le nouveau gestionnaire API (Phase 2 - Refactorisation)
-api_manager = ProfileManagerFactory.create_api_manager_with_validation()
+# Garder ConfigManager pour les opérations de sauvegarde (temporaire)
+config_manager = LazyInstance(lambda: ConfigManager("."), "ConfigManager")
 
 # Initialiser le gestionnaire de conversation (sera configuré via Setup History)
 conversation_manager = None
@@ -116,46 +140,127 @@ def generer_prompt(question, profil):
 
 def generer_fichier_simple(question, reponse, profil):
     """
-    Génère un fichier simple avec la question et la réponse.
+    Enregistre le tour (question/réponse) selon simple_config, sans bloquer l'interface.
+    same_file (défaut): ajout au fichier de la session; sinon un fichier par tour.
     """
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nom_fichier = f"conversation_{timestamp}.txt"
-        chemin_fichier = os.path.join("conversations", nom_fichier)
-        
-        with open(chemin_fichier, 'w', encoding='utf-8') as f:
-            f.write(f"=== CONVERSATION ===\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Profil: {profil.get('name', 'Inconnu') if profil else 'Aucun'}\n")
-            f.write(f"Question: {question}\n\n")
-            f.write(f"Réponse: {reponse}\n")
-        
-        print(f"Fichier sauvegardé: {chemin_fichier}")
-    except Exception as e:
-        print(f"Erreur lors de la sauvegarde: {e}")
+    config = (profil or {}).get('file_generation', {}).get('simple_config', {})
+    base = config.get('base_filename') or "conversation"
+    maintenant = datetime.now()
+    tour = f"--- {maintenant.strftime('%Y-%m-%d %H:%M:%S')} | Profil: {profil.get('name', 'Inconnu') if profil else 'Aucun'} ---\n"
+    if config.get('include_question', True):
+        tour += f"Question: {question}\n\n"
+    if config.get('include_response', True):
+        tour += f"Réponse: {reponse}\n"
+    tour += "\n"
+
+    writer = get_conversation_writer()
+    if config.get('same_file', True):
+        writer.append(base, tour)
+        logger.debug(f"Tour ajouté à {writer.session_path(base)}")
+    else:
+        chemin_fichier = os.path.join(CONVERSATIONS_DIR, f"{base}_{maintenant.strftime('%Y%m%d_%H%M%S_%f')}.txt")
+        writer.write(chemin_fichier, f"=== CONVERSATION ===\n{tour}")
 
 def generer_fichier_development(nom_fichier, extension, contenu):
     """
-    Génère un fichier de développement dans le dossier development.
+    Génère un fichier de développement dans le dossier development (écriture en arrière-plan).
     """
-    try:
-        if not nom_fichier.endswith(f".{extension}"):
-            nom_fichier = f"{nom_fichier}.{extension}"
-        
-        chemin_fichier = os.path.join("development", nom_fichier)
-        
-        with open(chemin_fichier, 'w', encoding='utf-8') as f:
-            f.write(contenu)
-        
-        print(f"Fichier de développement sauvegardé: {chemin_fichier}")
-    except Exception as e:
-        print(f"Erreur lors de la sauvegarde du fichier de développement: {e}")
-
-# Générer le profil système au démarrage
-generate_system_profile_at_startup(".")
+    extension = extension.lstrip('.')
+    if not nom_fichier.endswith(f".{extension}"):
+        nom_fichier = f"{nom_fichier}.{extension}"
+    get_conversation_writer().write(os.path.join(DEVELOPMENT_DIR, nom_fichier), contenu)
+
+def _generer_profil_systeme():
+    # Import local: psutil et les scans disque ne sont payés qu'en arrière-plan
+    from system_profile_generator import generate_system_profile_at_startup
+    generate_system_profile_at_startup(".")
+
+def _precharger_modules():
+    """Charge en arrière-plan les modules différés pour que la première requête ne les paie pas"""
+    for nom in ("jsonschema", "native_manager", "tiktoken"):
+        try:
+            with startup_timer.measure(f"import {nom}"):
+                module = __import__(nom)
+                getattr(module, "__dict__")  # déclenche le chargement d'un module paresseux
+        except ImportError:
+            pass
 
-# Assurer que les profils par défaut existent
-config_manager.create_default_profiles()
+def _preflight_dependances_natives():
+    """Installe en arrière-plan les packages des profils natifs: la requête ne lance jamais pip"""
+    from native_manager import native_profile_providers, preflight_native_dependencies
+    providers = native_profile_providers(api_manager)
+    if providers:
+        preflight_native_dependencies(providers)
+
+# Initialisation différée: exécutée en arrière-plan une fois la fenêtre affichée
+# (ou à la demande via ensure(), ex: APIManager attend les profils par défaut)
+defer("profils_defaut", lambda: config_manager.create_default_profiles())
+defer("api_manager", api_manager.get)
+defer("modules", _precharger_modules)
+defer("profil_systeme", _generer_profil_systeme)
+defer("dependances_natives", _preflight_dependances_natives)
+defer("surveillance_config", lambda: start_config_watcher("."))
+
+# Rechargement à chaud: les événements du watcher (thread de surveillance) sont
+# relayés dans le thread Tk aux fenêtres ouvertes qui s'y sont abonnées
+INTERVALLE_EVENEMENTS_CONFIG_MS = 250
+_evenements_config = queue.SimpleQueue()
+_abonnes_config = []
+add_config_listener(_evenements_config.put)
+
+def abonner_config(fenetre, callback):
+    """callback(evenement) appelé dans le thread Tk tant que la fenêtre existe"""
+    _abonnes_config.append((fenetre, callback))
+
+def _relayer_evenements_config():
+    evenements = []
+    while True:
+        try:
+            evenements.append(_evenements_config.get_nowait())
+        except queue.Empty:
+            break
+    if evenements:
+        _abonnes_config[:] = [(f, c) for f, c in _abonnes_config if f.winfo_exists()]
+        for fenetre, callback in list(_abonnes_config):
+            for evenement in evenements:
+                try:
+                    callback(evenement)
+                except Exception as e:
+                    logger.warning(f"Rafraîchissement de {fenetre.title()} impossible: {e}")
+    root.after(INTERVALLE_EVENEMENTS_CONFIG_MS, _relayer_evenements_config)
+
+# Appels API hors du thread Tk: la boucle d'événements continue pendant l'attente
+# (affichage streamé par root.after, fenêtre réactive)
+INTERVALLE_ATTENTE_REQUETE_S = 0.01
+requete_en_cours = False
+
+def attendre_hors_thread_tk(widget, fonction):
+    """Exécute fonction() dans un thread de travail et retourne son résultat (ou relève son exception)"""
+    termine = threading.Event()
+    issue = {}
+    # Les spans créés dans le thread restent rattachés à la trace du tour en cours,
+    # et son profil cProfile à celui du tour (si le profilage est actif)
+    contexte = contextvars.copy_context()
+    fonction = profiler.for_worker(fonction)
+
+    def travail():
+        try:
+            issue['resultat'] = contexte.run(fonction)
+        except BaseException as e:
+            issue['erreur'] = e
+        finally:
+            termine.set()
+
+    threading.Thread(target=travail, name="requete-api", daemon=True).start()
+    while not termine.wait(INTERVALLE_ATTENTE_REQUETE_S):
+        try:
+            widget.update()
+        except tk.TclError:
+            # Fenêtre fermée pendant l'appel: simple attente de la fin du thread
+            termine.wait()
+    if 'erreur' in issue:
+        raise issue['erreur']
+    return issue['resultat']
 
 def get_resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -308,6 +413,7 @@ def selectionProfilDefaut():
 
 # Correction pour s'assurer que GEMINI_API_KEY est remplacé correctement
 
+@traced("preparer_requete_curl")
 def preparer_requete_curl(final_prompt):
     """
     Phase 1 - Nouvelle implémentation avec fichier JSON temporaire
@@ -326,23 +432,28 @@ def preparer_requete_curl(final_prompt):
         template_id = f"{provider}_{template_type}"
     
     try:
+        provider_label, model_label = profile_labels(profilAPIActuel)
+
         # Étape 1: Obtenir la commande curl avec template APIManager
-        curl_command = api_manager.get_processed_template(template_id, profilAPIActuel, final_prompt)
+        with stage_timer("template_render", provider_label, model_label):
+            curl_command = api_manager.get_processed_template(template_id, profilAPIActuel, final_prompt)
         
         if not curl_command:
-            print(f"[ERROR] Aucun template trouvé pour {template_id}")
+            logger.error(f"Aucun template trouvé pour {template_id}")
             return None
         
         # Étape 2: Extraire le JSON du template curl
+        debut_payload = time.perf_counter()
         base_command, json_payload = extract_json_from_curl(curl_command)
         
         if json_payload is None:
-            print(f"[ERROR] Impossible d'extraire le JSON du template")
+            logger.error("Impossible d'extraire le JSON du template")
             return curl_command  # Fallback vers ancien système
         
         # Étape 3: Créer le fichier payload temporaire
         payload_manager = PayloadManager(api_profile=provider)
         payload_file = payload_manager.create_payload_file(json_payload, prefix="request")
+        observe_stage("payload_build", time.perf_counter() - debut_payload, provider_label, model_label)
         
         # Étape 4: Construire la nouvelle commande curl avec -d @fichier
         # Normaliser pour Windows PowerShell
@@ -359,12 +470,12 @@ def preparer_requete_curl(final_prompt):
                                              '-H "Content-Type: application/json"')
         
         # Construire la commande finale avec référence au fichier
-        final_command = f'{base_command} -d @"{payload_file}"'
+        final_command = attach_payload_file(base_command, payload_file)
         
         return final_command, payload_file  # Retourner aussi le chemin pour nettoyage
         
     except Exception as e:
-        print(f"[ERROR] Erreur dans preparer_requete_curl Phase 1: {e}")
+        logger.error(f"Erreur dans preparer_requete_curl Phase 1: {e}")
         # Fallback vers ancien système en cas d'erreur
         return api_manager.get_processed_template(template_id, profilAPIActuel, final_prompt), None
 
@@ -380,15 +491,29 @@ def corriger_commande_curl(commande):
     return corrected
 
 
-def executer_commande_curl(requete_curl, payload_file=None):
+@traced("executer_commande_curl")
+def executer_commande_curl(requete_curl, payload_file=None, extracteur=None):
     """
     Phase 1 - Exécute la commande curl et nettoie le fichier payload
     Gestion automatique du nettoyage des fichiers temporaires
+
+    Avec un extracteur (stream_parser), la sortie est consommée par blocs au fil
+    de la réception: le texte est extrait sans bufferiser le corps complet
     """
     # Nettoyer et normaliser la commande curl
     requete_curl = requete_curl.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
 
     try:
+        if extracteur is not None:
+            resultat_stream = stream_process_output(requete_curl, extracteur, shell=True)
+            if curl_logger.isEnabledFor(logging.DEBUG):
+                curl_logger.debug(f"Return code: {resultat_stream.returncode} - Stdout (streamé): "
+                                  f"{extracteur.bytes_received} octets, texte extrait: {extracteur.text_complete}"
+                                  + (f" - Stream: {extracteur.error}" if extracteur.error else "")
+                                  + (f" - Stderr: {resultat_stream.stderr}" if resultat_stream.stderr else ""))
+            logger.debug(f"Curl exécuté (streamé) - Code retour: {resultat_stream.returncode}")
+            return resultat_stream
+
         # Exécuter la commande sans forcer l'encodage UTF-8
         resultat = subprocess.run(requete_curl, shell=True, capture_output=True, text=False)
         
@@ -424,18 +549,17 @@ def executer_commande_curl(requete_curl, payload_file=None):
         resultat_decode = ResultatDecode(resultat.returncode, stdout_decoded, stderr_decoded)
         
         # Loguer le résultat
-        with open("debug_curl.log", "a", encoding="utf-8") as log_file:
-            log_file.write(f"Return code: {resultat_decode.returncode}\n")
-            log_file.write(f"Stdout: {resultat_decode.stdout[:500]}...\n" if len(resultat_decode.stdout) > 500 else f"Stdout: {resultat_decode.stdout}\n")
-            if resultat_decode.stderr:
-                log_file.write(f"Stderr: {resultat_decode.stderr}\n")
+        if curl_logger.isEnabledFor(logging.DEBUG):
+            stdout_extrait = resultat_decode.stdout[:500] + ("..." if len(resultat_decode.stdout) > 500 else "")
+            curl_logger.debug(f"Return code: {resultat_decode.returncode} - Stdout: {stdout_extrait}"
+                              + (f" - Stderr: {resultat_decode.stderr}" if resultat_decode.stderr else ""))
         
-        print(f"Curl exécuté - Code retour: {resultat_decode.returncode}")
+        logger.debug(f"Curl exécuté - Code retour: {resultat_decode.returncode}")
         
         return resultat_decode
     
     except Exception as e:
-        print(f"[ERROR] Erreur exécution curl: {e}")
+        logger.error(f"Erreur exécution curl: {e}")
         # Créer un résultat d'erreur
         class ResultatErreur:
             def __init__(self):
@@ -451,104 +575,60 @@ def executer_commande_curl(requete_curl, payload_file=None):
             try:
                 os.remove(payload_file)
             except Exception as e:
-                print(f"[WARNING] Impossible de nettoyer {payload_file}: {e}")
+                logger.warning(f"Impossible de nettoyer {payload_file}: {e}")
 
 def afficher_resultat(resultat, requete_curl, champ_r, champ_q):
     """
     Affiche le résultat de la commande curl dans le champ R.
     Gère les erreurs et affiche des messages clairs en cas de problème.
-    VERSION ÉVOLUTIVE: Support multi-API (Gemini, OpenAI, Claude)
+    VERSION ÉVOLUTIVE: Registre de parseurs par provider (dix providers)
     """
-    # Import du parseur évolutif
-    try:
-        from api_response_parser import get_response_parser
-        parser = get_response_parser()
-    except ImportError:
-        # Fallback si le module n'est pas disponible
-        parser = None
-    
     champ_r.delete('1.0', tk.END)  # Nettoyer le champ avant d'affichage
 
     if resultat.returncode == 0:
         try:
-            reponse_json = json.loads(resultat.stdout)
+            # === REGISTRE DES PARSEURS PAR PROVIDER ===
+            profil = charger_profil_api()
+            details = parse_profile_response(resultat.stdout, profil)
 
-            if parser:
-                # === NOUVEAU SYSTÈME ÉVOLUTIF ===
-                # PHASE 3: Récupérer le provider correctement depuis le template_id ou name
-                profil = charger_profil_api()
-                
-                # Essayer d'abord avec template_id (ex: "gemini_chat" -> "gemini")
-                template_id = profil.get('template_id', '')
-                if template_id and '_' in template_id:
-                    provider = template_id.split('_')[0].lower()
-                else:
-                    # Fallback sur name en minuscules
-                    provider = profil.get('name', '').lower() if profil else 'auto'
-                
-                print(f"Provider détecté: {provider} (template_id: {template_id})")
-                
-                success, texte_cible, api_detectee = parser.parse_response(reponse_json, provider)
-                
-                if not success and provider != 'auto':
-                    # Fallback vers auto si le provider spécifique échoue
-                    print(f"Parsing {provider} échoué, essai avec auto...")
-                    success, texte_cible, api_detectee = parser.parse_response(reponse_json, 'auto')
-                
-                if success:
-                    print(f"Parsing réussi avec provider: {api_detectee}")
-                    print(f"🎯 API détectée: {api_detectee}")
-                    print(f"📝 Texte extrait: {texte_cible[:100]}...")
-                    
-                    # Corriger l'encodage du texte
-                    texte_cible_corrige = texte_cible.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                    
-                    # Afficher le texte corrigé dans le champ R
-                    champ_r.insert(tk.END, texte_cible_corrige)
-                    
-                    # Génération de fichier si activée
-                    question_originale = champ_q.get('1.0', tk.END).strip()
-                    generer_fichier_simple(question_originale, texte_cible_corrige, profil)
-                    
-                    # Supprimer le contenu du prompteur Q
-                    champ_q.delete('1.0', tk.END)
-                    
-                else:
-                    champ_r.insert(tk.END, f"Erreur API ({api_detectee}): {texte_cible}")
-                    
+            if details['json_error']:
+                champ_r.insert(tk.END, f"Erreur de parsing JSON: {details['json_error']}\n\nRéponse brute:\n{resultat.stdout}")
+
+            elif details['success']:
+                # Corriger l'encodage du texte
+                texte_cible_corrige = details['text'].encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+
+                # Afficher le texte corrigé dans le champ R
+                champ_r.insert(tk.END, texte_cible_corrige)
+
+                # Génération de fichier si activée
+                question_originale = champ_q.get('1.0', tk.END).strip()
+                generer_fichier_simple(question_originale, texte_cible_corrige, profil)
+
+                # Supprimer le contenu du prompteur Q
+                champ_q.delete('1.0', tk.END)
             else:
-                # === FALLBACK ANCIEN SYSTÈME (Gemini seulement) ===
-                if "error" in reponse_json:
-                    erreur_message = reponse_json["error"].get("message", "Erreur inconnue")
-                    champ_r.insert(tk.END, f"Erreur API : {erreur_message}\n")
-                    return
+                message = get_response_parser().describe_failure(details)
+                champ_r.insert(tk.END, f"Erreur API ({details['provider']}): {message}")
 
-                # Extraire le texte cible si disponible (Gemini uniquement)
-                if "candidates" in reponse_json:
-                    texte_cible = reponse_json["candidates"][0]["content"]["parts"][0]["text"]
-                    texte_cible_corrige = texte_cible.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                    champ_r.insert(tk.END, texte_cible_corrige)
-                    
-                    question_originale = champ_q.get('1.0', tk.END).strip()
-                    profil = charger_profil_api()
-                    generer_fichier_simple(question_originale, texte_cible_corrige, profil)
-                    champ_q.delete('1.0', tk.END)
-                else:
-                    champ_r.insert(tk.END, "La réponse ne contient pas de candidats valides.\n")
-                    
-        except json.JSONDecodeError as e:
-            champ_r.insert(tk.END, f"Erreur de parsing JSON: {e}\n\nRéponse brute:\n{resultat.stdout}")
         except Exception as e:
             champ_r.insert(tk.END, f"Erreur lors de l'analyse de la réponse : {e}\n{resultat.stdout}")
     else:
         champ_r.insert(tk.END, f"Erreur lors de l'exécution :\n{resultat.stderr}\n")
 
 # Nouvelle logique avec ConversationManager
+@profiled("soumettreQuestionAPI")
+@traced("soumettreQuestionAPI")
 def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=None, status_label=None):
     """
     Version améliorée avec gestion intelligente de l'historique via ConversationManager
     Support pour méthodes curl et native (V2)
     """
+    global requete_en_cours
+    # La boucle Tk tourne pendant l'appel: un second envoi attend la fin du premier
+    if requete_en_cours:
+        champ_r.bell()
+        return
     question = champ_q.get('1.0', tk.END).strip()
     
     champ_r.config(state="normal")
@@ -560,7 +640,15 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
         return
 
     # Récupérer la méthode depuis le profil chargé - Mapping V2
-    profil = charger_profil_api()
+    debut_chargement = time.perf_counter()
+    with span("profile_load"):
+        profil = charger_profil_api()
+    provider_label, model_label = profile_labels(profil)
+    observe_stage("profile_load", time.perf_counter() - debut_chargement, provider_label, model_label)
+    set_attribute("provider", provider_label)
+    set_attribute("model", model_label)
+    statut_requete = "error"
+    flux = None
     if profil:
         chat_config = profil.get('chat', {})
         method = chat_config.get('method', 'curl')
@@ -572,11 +660,18 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
     champ_r.insert(tk.END, f"{method_indicator} Traitement ({method})...\n")
     champ_r.update_idletasks()
 
+    def effacer_flux():
+        # Texte streamé retiré avant d'afficher la réponse finale ou une erreur
+        if flux is not None:
+            flux.finish()
+            flux.clear()
+
+    requete_en_cours = True
     try:
         # 1. Vérifier si un résumé est nécessaire AVANT d'ajouter la nouvelle question
         if conversation_manager:
             if conversation_manager.should_summarize():
-                print("🔄 Seuil atteint - Génération du résumé...")
+                logger.info("🔄 Seuil atteint - Génération du résumé...")
                 champ_r.insert(tk.END, "🔄 Génération du résumé contextuel...\n")
                 champ_r.update_idletasks()
                 
@@ -588,7 +683,9 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
                 from synthesis_manager import api_summary_call
                 
                 # Générer le résumé sur l'historique existant
-                success = conversation_manager.summarize_history(api_summary_call)
+                with stage_timer("summarization", provider_label, model_label):
+                    success = attendre_hors_thread_tk(
+                        champ_r, lambda: conversation_manager.summarize_history(api_summary_call))
                 
                 # Désactiver l'indicateur de synthèse en cours (retour couleur normale)
                 if 'synthesis_control' in globals():
@@ -596,33 +693,19 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
                 
                 if success:
                     stats = conversation_manager.get_stats()
-                    print(f"✅ Résumé #{stats['summary_count']} généré")
+                    logger.info(f"✅ Résumé #{stats['summary_count']} généré")
                     champ_r.delete('1.0', tk.END)  # Nettoyer le message de progression
                 else:
-                    print("❌ Échec du résumé - continue avec l'historique complet")
+                    logger.warning("❌ Échec du résumé - continue avec l'historique complet")
                     champ_r.insert(tk.END, "⚠️ Échec du résumé - conversation continue\n")
             
             # 2. MAINTENANT ajouter la nouvelle question à l'historique (après résumé)
             conversation_manager.add_message('user', question)
             
-            # 3. Construire le prompt final avec l'historique déjà échappé
-            # Le ConversationManager fournit déjà un contenu échappé et sécurisé
-            prompt_parts = []
-            
-            # Inclure le résumé s'il existe
-            if conversation_manager.current_summary:
-                prompt_parts.append(f"[Contexte de conversation]\\n{conversation_manager.current_summary}")
-            
-            # Ajouter tous les messages de l'historique
-            for message in conversation_manager.conversation_history:
-                role_label = "Utilisateur" if message['role'] == 'user' else "Assistant"
-                # Le contenu est déjà échappé par escape_for_json() lors de l'ajout
-                prompt_parts.append(f"{role_label}: {message['content']}")
-            
-            # Construire le prompt final - PAS d'échappement supplémentaire nécessaire
-            question_finale = "\\n".join(prompt_parts)
+            # 3. Construire le prompt final (résumé + historique déjà échappé)
+            question_finale = conversation_manager.build_prompt()
             
-            print(f"Prompt construit avec historique sécurisé ({len(question_finale)} chars)")
+            logger.debug(f"Prompt construit avec historique sécurisé ({len(question_finale)} chars)")
         else:
             # Fallback vers l'ancienne méthode si pas de ConversationManager
             historique = champ_history.get('1.0', tk.END).strip()
@@ -633,183 +716,158 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
 
         # 5. Exécuter l'appel API principal
         profil = charger_profil_api()
+        # Fragments streamés affichés au fil de l'eau, regroupés par image
+        flux = StreamingTextUpdater(champ_r).start()
         
-        # DÉCISION: Méthode curl ou native
-        if method == 'native':
-            # ===== MODE NATIVE =====
-            print("=== UTILISATION MODE NATIVE ===")
-            
-            # Initialiser le NativeManager
-            native_manager = NativeManager()
-            
-            # Préparer les variables pour le template - Mapping V2
-            chat_config = profil.get('chat', {})
-            values_config = chat_config.get('values', {})
-            
-            variables = {
-                'USER_PROMPT': question_finale,
-                'LLM_MODEL': values_config.get('llm_model', ''),
-                'API_KEY': values_config.get('api_key', ''),
-                'SYSTEM_PROMPT_ROLE': values_config.get('role', ''),
-                'SYSTEM_PROMPT_BEHAVIOR': values_config.get('behavior', '')
-            }
-            
-            print(f"Variables V2 natives: {variables}")
-            
-            # Construire le chemin du template native selon la structure V2
-            provider_name = profil.get('name', '').lower()
-            template_path = f"templates/chat/{provider_name}/native_basic.py"  # Utiliser native_basic.py avec placeholders
-            
-            if not os.path.exists(template_path):
-                raise FileNotFoundError(f"Template Python non trouvé: {template_path}")
-            
-            print(f"Template native: {template_path}")
-            
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_string = f.read()
-            
-            # Exécuter en mode native
-            resultat_native = native_manager.execute_native_request(
-                template_string, variables, provider_name
-            )
-            
-            # Adapter le format de retour pour compatibilité avec le reste du code
-            class NativeResult:
-                def __init__(self, native_result):
-                    if native_result['status'] == 'success':
-                        self.returncode = 0
-                        self.stdout = native_result['output']
-                        self.stderr = ""
-                    else:
-                        self.returncode = 1
-                        self.stdout = ""
-                        self.stderr = native_result['errors']
-            
-            resultat = NativeResult(resultat_native)
-            
-        else:
-            # ===== MODE CURL (par défaut) =====
-            print("=== UTILISATION PHASE 1 - PAYLOAD MANAGER ===")
-            resultat_preparation = preparer_requete_curl(question_finale)
-            
-            # Vérifier si on a un fichier payload ou ancien système
-            if isinstance(resultat_preparation, tuple) and len(resultat_preparation) == 2:
-                # Nouveau système Phase 1 avec fichier payload
-                requete_curl, payload_file = resultat_preparation
-                print(f"Phase 1 - Fichier payload: {payload_file}")
+        def executer_requete():
+            # Thread de travail: aucun appel Tk, les fragments passent par flux.push()
+            # DÉCISION: Méthode curl ou native
+            if method == 'native':
+                # ===== MODE NATIVE =====
+                logger.debug("Requête en mode natif")
+                
+                # NativeManager partagé (import différé au premier appel natif)
+                from native_manager import get_native_manager
+                native_manager = get_native_manager()
+                
+                # Préparer les variables pour le template - Mapping V2
+                chat_config = profil.get('chat', {})
+                values_config = chat_config.get('values', {})
+                
+                variables = {
+                    'USER_PROMPT': question_finale,
+                    'LLM_MODEL': values_config.get('llm_model', ''),
+                    'API_KEY': values_config.get('api_key', ''),
+                    'SYSTEM_PROMPT_ROLE': values_config.get('role', ''),
+                    'SYSTEM_PROMPT_BEHAVIOR': values_config.get('behavior', ''),
+                    'BASE_URL': get_base_url(profil)
+                }
+                
+                logger.debug(f"Variables V2 natives: {sorted(variables)}")
+                
+                # Construire le chemin du template native selon la structure V2
+                provider_name = profil.get('name', '').lower()
+                template_path = f"templates/chat/{provider_name}/native_basic.py"  # Utiliser native_basic.py avec placeholders
+                
+                watcher = get_active_watcher()
+                if watcher:
+                    template_string = watcher.get_template(provider_name, "native_basic.py")
+                    if template_string is None:
+                        raise FileNotFoundError(f"Template Python non trouvé: {template_path}")
+                else:
+                    if not os.path.exists(template_path):
+                        raise FileNotFoundError(f"Template Python non trouvé: {template_path}")
+                    with open(template_path, 'r', encoding='utf-8') as f:
+                        template_string = f.read()
+                
+                logger.debug(f"Template native: {template_path}")
+                
+                # Exécuter en mode native (sortie consommée en flux)
+                resultat_native = native_manager.execute_native_request(
+                    template_string, variables, provider_name,
+                    stream_extractor=create_profile_stream_extractor(profil, on_text=flux.push)
+                )
+                
+                # Adapter le format de retour pour compatibilité avec le reste du code
+                class NativeResult:
+                    def __init__(self, native_result):
+                        # Durées du processus natif (catalogue de latences, latency_ms de la conversation)
+                        streamed = native_result.get('streamed')
+                        self.total_seconds = getattr(streamed, 'total_seconds', None)
+                        self.ttfb_seconds = getattr(streamed, 'ttfb_seconds', None)
+                        if native_result['status'] == 'success':
+                            self.returncode = 0
+                            self.stdout = native_result['output']
+                            self.stderr = ""
+                            self.extractor = native_result.get('extractor')
+                        else:
+                            self.returncode = 1
+                            self.stdout = ""
+                            self.stderr = native_result['errors']
+                            self.extractor = None
+                
+                resultat = NativeResult(resultat_native)
+                
             else:
-                # Ancien système fallback
-                requete_curl = resultat_preparation
-                payload_file = None
-            
-            # Exécuter avec le nouveau système qui gère automatiquement le nettoyage
-            resultat = executer_commande_curl(requete_curl, payload_file)
+                # ===== MODE CURL (par défaut) =====
+                logger.debug("Requête curl via PayloadManager")
+                resultat_preparation = preparer_requete_curl(question_finale)
+                
+                # Vérifier si on a un fichier payload ou ancien système
+                if isinstance(resultat_preparation, tuple) and len(resultat_preparation) == 2:
+                    # Nouveau système Phase 1 avec fichier payload
+                    requete_curl, payload_file = resultat_preparation
+                    logger.debug(f"Phase 1 - Fichier payload: {payload_file}")
+                else:
+                    # Ancien système fallback
+                    requete_curl = resultat_preparation
+                    payload_file = None
+                
+                # Exécuter avec le nouveau système qui gère automatiquement le nettoyage
+                resultat = executer_commande_curl(requete_curl, payload_file,
+                                                  extracteur=create_profile_stream_extractor(profil, on_text=flux.push))
+                record_stream(resultat, provider_label, model_label)
+                if getattr(resultat, 'total_seconds', None) is not None:
+                    observe_stage("request", resultat.total_seconds, provider_label, model_label)
+                
+            return resultat
+        
+        resultat = attendre_hors_thread_tk(champ_r, executer_requete)
         
         # 6. Traiter la réponse
         if resultat.returncode == 0:
-            # Gestion spéciale pour le mode natif
-            if method == 'native':
-                # Mode natif: détecter automatiquement le format (JSON ou texte brut)
-                stdout = resultat.stdout.strip()
-
-                # Essayer de détecter si c'est du JSON
-                try:
-                    reponse_json = json.loads(stdout)
-                    print(f"Format détecté: JSON pour {profil.get('name', 'unknown')}")
-
-                    # C'est du JSON - utiliser response_parser pour extraire le texte
-                    try:
-                        from response_parser import parse_response
-
-                        # Utiliser le response_path du profil
-                        chat_config = profil.get('chat', {})
-                        response_path = chat_config.get('response_path', profil.get('response_path', []))
-                        provider = profil.get('name', 'unknown')
-
-                        print(f"Parsing JSON avec provider: {provider}")
-                        print(f"Response path: {response_path}")
-
-                        # Extraire le texte du JSON
-                        texte_reponse = parse_response(reponse_json, response_path)
-
-                        if not texte_reponse:
-                            # Fallback: afficher une erreur mais pas le JSON brut
-                            texte_reponse = f"❌ Erreur extraction texte pour {provider}"
-                            print(f"❌ Extraction texte échouée pour {provider}")
-
-                        print(f"✅ Mode natif JSON: texte extrait ({len(texte_reponse)} chars)")
-
-                    except ImportError as e:
-                        print(f"Fallback parsing JSON: {e}")
-                        # Fallback basique pour les providers connus
-                        try:
-                            if provider == 'Gemini':
-                                texte_reponse = reponse_json["candidates"][0]["content"]["parts"][0]["text"]
-                            else:
-                                texte_reponse = f"❌ Provider {provider} non supporté en fallback JSON"
-                        except Exception as e2:
-                            texte_reponse = f"❌ Erreur parsing JSON fallback: {e2}"
-
-                    except Exception as e:
-                        texte_reponse = f"❌ Erreur parsing JSON: {e}"
-                        print(f"❌ Erreur parsing JSON: {e}")
+            # Extraction structurée unique (curl et native) via le registre de parseurs provider
+            chat_config = profil.get('chat', {})
+            response_path = chat_config.get('response_path', profil.get('response_path', []))
+            provider = profil.get('name', 'unknown')
+            stdout = resultat.stdout.strip()
+
+            extracteur = getattr(resultat, 'extractor', None)
+            with stage_timer("parse", provider_label, model_label):
+                if extracteur is not None:
+                    details = parse_profile_stream(extracteur, profil)
+                else:
+                    details = parse_profile_response(stdout, profil)
+            record_tokens(details['usage'], provider_label, model_label)
+            catalogue = get_model_catalog()
+            record_cost(catalogue.estimate_cost(provider_label, model_label, details['usage']), provider_label, model_label)
+            if details['success'] and getattr(resultat, 'total_seconds', None) is not None:
+                catalogue.record_latency(provider_label, model_label, resultat.total_seconds,
+                                         getattr(resultat, 'ttfb_seconds', None))
+
+            if details['success']:
+                texte_reponse = details['text']
+            elif details['error']:
+                effacer_flux()
+                champ_r.insert('1.0', f"❌ {details['error']}")
+                return
+            elif method == 'native' and stdout and (details['json_error'] or not isinstance(details['data'], (dict, list))):
+                # Sortie native non JSON (ex: Mistral) - texte brut utilisé directement
+                texte_reponse = stdout
+            elif details['json_error']:
+                effacer_flux()
+                champ_r.insert('1.0', f"Erreur de parsing JSON: {details['json_error']}")
+                return
+            else:
+                structure = debug_json_structure(details['data'], max_depth=2)
+                effacer_flux()
+                champ_r.insert('1.0', f"❌ Erreur parsing {provider} avec path {response_path}\\n"
+                                   f"Structure JSON: {structure}\\n")
+                return
 
-                except json.JSONDecodeError:
-                    # Ce n'est pas du JSON - c'est du texte brut (comme Mistral)
-                    print(f"Format détecté: TEXTE BRUT pour {profil.get('name', 'unknown')}")
-                    texte_reponse = stdout  # Utiliser directement la sortie
-                    print(f"✅ Mode natif texte brut: réponse directe ({len(texte_reponse)} chars)")
+            logger.debug(f"Réponse {provider} extraite: {len(texte_reponse)} chars, "
+                          f"usage={details['usage']}, fin={details['finish_reason']}")
+            statut_requete = "success"
 
-                except Exception as e:
-                    texte_reponse = f"❌ Erreur traitement natif: {e}"
-                    print(f"❌ Erreur traitement natif: {e}")
-            else:
-                # Mode curl: parser le JSON de l'API
-                reponse_json = json.loads(resultat.stdout)
-                
-                # PHASE 2: Utiliser le nouveau système response_parser générique
-                try:
-                    from response_parser import parse_response
-                    
-                    # Lire le response_path depuis le profil - Mapping V2
-                    chat_config = profil.get('chat', {})
-                    response_path = chat_config.get('response_path', profil.get('response_path', []))
-                    provider = profil.get('name', 'unknown')
-                    
-                    print(f"Parsing Phase 2 avec provider: {provider}")
-                    print(f"Response path: {response_path}")
-                    
-                    # Extraction générique avec le nouveau parser
-                    texte_reponse = parse_response(reponse_json, response_path)
-                    
-                    if not texte_reponse:
-                        # Si le parsing échoue, afficher l'erreur avec structure
-                        from response_parser import debug_json_structure
-                        structure = debug_json_structure(reponse_json, max_depth=2)
-                        champ_r.insert('1.0', f"❌ Erreur parsing {provider} avec path {response_path}\\n"
-                                           f"Structure JSON: {structure}\\n")
-                        return
-                        
-                    print(f"✅ Parsing Phase 2 réussi avec {provider}: {len(texte_reponse)} chars")
-                    
-                except ImportError:
-                    # Fallback vers l'ancien système hardcodé (Gemini seulement)
-                    print("Fallback vers ancien parsing Gemini")
-                    texte_reponse = reponse_json["candidates"][0]["content"]["parts"][0]["text"]
-                    
-                except json.JSONDecodeError as e:
-                    champ_r.insert('1.0', f"Erreur de parsing JSON: {e}")
-                    print(f"❌ Erreur JSON: {e}")
-                    return
-            
             # 7. Ajouter la réponse au ConversationManager (pour les deux modes)
             if conversation_manager:
-                conversation_manager.add_message('model', texte_reponse)
+                duree = getattr(resultat, 'total_seconds', None)
+                conversation_manager.add_message('model', texte_reponse, usage=details['usage'],
+                                                 latency_ms=duree * 1000 if duree is not None else None)
                 
-                # 8. Mettre à jour l'affichage de l'historique
-                nouvel_historique = conversation_manager.get_display_history()
-                champ_history.delete('1.0', tk.END)
-                champ_history.insert(tk.END, nouvel_historique)
+                # 8. Mettre à jour l'affichage de l'historique (nouveaux messages seulement,
+                #    remplacement complet après une synthèse)
+                get_history_view(champ_history, conversation_manager).refresh()
                 
                 # 9. Mettre à jour l'indicateur de statut
                 if status_label:
@@ -818,9 +876,9 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
                     
                     # 10. Logging des statistiques
                     stats = conversation_manager.get_stats()
-                    print(f"📊 Stats: {stats['total_words']} mots, {stats['total_sentences']} phrases")
+                    logger.info(f"📊 Stats: {stats['total_words']} mots, {stats['total_sentences']} phrases")
                     if stats['next_summary_needed']:
-                        print("⚠️ Prochain message déclenchera un résumé")
+                        logger.warning("⚠️ Prochain message déclenchera un résumé")
                 
                 else:
                     # Fallback vers l'ancienne méthode d'historique
@@ -829,7 +887,8 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
                     champ_history.delete('1.0', tk.END)
                     champ_history.insert(tk.END, f"{historique}\n{nouveau_historique}".strip())
                 
-                # Afficher la réponse
+                # Afficher la réponse (remplace le texte streamé)
+                effacer_flux()
                 champ_r.insert('1.0', texte_reponse)
                 
                 # 11. GÉNÉRATION DE FICHIERS (restauré)
@@ -839,29 +898,37 @@ def soumettreQuestionAPI(champ_q, champ_r, champ_history, conversation_manager=N
                         mode = profil.get('file_generation', {}).get('mode', 'simple')
                         if mode == 'simple':
                             generer_fichier_simple(question, texte_reponse, profil)
-                            print("📁 Fichier simple généré")
+                            logger.info("📁 Fichier simple généré")
                         elif mode == 'development':
                             config_dev = profil.get('file_generation', {}).get('dev_config', {})
                             extension = config_dev.get('extension', '.py')
                             nom_fichier = f"dev_output_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                             generer_fichier_development(nom_fichier, extension, texte_reponse)
-                            print(f"📁 Fichier development généré: {nom_fichier}{extension}")
+                            logger.info(f"📁 Fichier development généré: {nom_fichier}{extension}")
                     except Exception as e:
-                        print(f"⚠️ Erreur génération fichier: {e}")
+                        logger.warning(f"⚠️ Erreur génération fichier: {e}")
                 
                 # Supprimer le contenu du champ question
                 champ_q.delete('1.0', tk.END)
                 
         else:
+            effacer_flux()
             champ_r.insert('1.0', f"Erreur API: {resultat.stderr}")
-            print(f"❌ Erreur API: {resultat.stderr}")
+            logger.error(f"❌ Erreur API: {resultat.stderr}")
             
     except Exception as e:
+        effacer_flux()
         champ_r.insert('1.0', f"Erreur système: {e}")
-        print(f"❌ Erreur système: {e}")
+        logger.error(f"❌ Erreur système: {e}")
     
     finally:
+        requete_en_cours = False
+        if flux is not None:
+            flux.finish()
         champ_r.config(state="disabled")
+        REQUESTS.inc(provider=provider_label, model=model_label, method=method, status=statut_requete)
+        set_attribute("method", method)
+        set_attribute("status", statut_requete)
 
 # Modification pour rendre le champ historique caché tout en conservant sa fonctionnalité
 def copier_au_presse_papier(champ_r):
@@ -886,13 +953,13 @@ def ouvrir_fenetre_apitest():
     fenetre.title("APItest")
     fenetre.geometry("800x600")  # Augmentation de la taille pour plus d'espace
 
-    print("Ouverture de la fenêtre APItest")
+    logger.info("Ouverture de la fenêtre APItest")
 
     def on_close():
-        print("Fermeture de la fenêtre APItest")
+        logger.info("Fermeture de la fenêtre APItest")
         fenetre.destroy()
         if not root.winfo_children():  # Si aucune autre fenêtre n'est ouverte
-            print("Aucune autre fenêtre ouverte, fermeture de l'application principale")
+            logger.info("Aucune autre fenêtre ouverte, fermeture de l'application principale")
             root.quit()  # Quitte proprement l'application
 
     fenetre.protocol("WM_DELETE_WINDOW", on_close)
@@ -938,19 +1005,20 @@ def ouvrir_fenetre_apitest():
                     profile_data["conversation_management"] = conversation_config
                     with open(profile_main_path, 'w', encoding='utf-8') as f:
                         json.dump(profile_data, f, indent=2, ensure_ascii=False)
+                    notify_written(profile_main_path)
                     
-                    print(f"✅ Configuration conversation_management ajoutée à {profile_main_path}")
+                    logger.info(f"✅ Configuration conversation_management ajoutée à {profile_main_path}")
                 
                 # Initialiser ConversationManager avec la vraie configuration
                 conversation_manager = ConversationManager(
                     config_manager=config_manager,
                     profile_config=conversation_config
                 )
-                print(f"✅ ConversationManager initialisé depuis profil principal: {profile_main_path}")
-                print(f"   Seuils: {conversation_config.get('word_threshold', 300)}mots, {conversation_config.get('sentence_threshold', 15)}phrases, {conversation_config.get('token_threshold', 1000)}tokens")
+                logger.info(f"✅ ConversationManager initialisé depuis profil principal: {profile_main_path}")
+                logger.info(f"   Seuils: {conversation_config.get('word_threshold', 300)}mots, {conversation_config.get('sentence_threshold', 15)}phrases, {conversation_config.get('token_threshold', 1000)}tokens")
                 
             else:
-                print(f"❌ Profil principal {profile_main_path} non trouvé")
+                logger.error(f"❌ Profil principal {profile_main_path} non trouvé")
                 conversation_manager = None
             
         except Exception as e:
@@ -960,7 +1028,7 @@ def ouvrir_fenetre_apitest():
             fenetre.destroy()
             return
     else:
-        print("ℹ️  Historique désactivé - ConversationManager non initialisé")
+        logger.info("ℹ️  Historique désactivé - ConversationManager non initialisé")
 
     # Création de la commande API (champ caché) - Compatible V2
     def creerCommandeAPI(profil):
@@ -988,10 +1056,10 @@ def ouvrir_fenetre_apitest():
                     template_content = api_manager.get_processed_template(template_id, profil, "Test API message")
             
             if template_content:
-                print(f"Template traité avec placeholders: {template_content[:200]}...")
+                logger.debug(f"Template traité avec placeholders ({len(template_content)} caractères)")
                 return template_content
             else:
-                print(f"Aucun template trouvé pour {template_id}")
+                logger.debug(f"Aucun template trouvé pour {template_id}")
                 return ""
                 
         elif method == 'native':
@@ -1063,7 +1131,7 @@ def ouvrir_fenetre_apitest():
                 resume_part = f"📋 Résumé: {template_display}"
                 
             except Exception as e:
-                print(f"Erreur récupération profil résumé: {e}")
+                logger.error(f"Erreur récupération profil résumé: {e}")
                 resume_part = "📋 Résumé: défaut"
         else:
             resume_part = "📋 Résumé: défaut"
@@ -1132,6 +1200,21 @@ def ouvrir_fenetre_apitest():
     
     # Créer l'infobulle
     ToolTip(method_info_label, tooltip_text)
+
+    def on_profil_modifie(evenement):
+        """Profil chargé modifié sur disque: la prochaine requête et l'en-tête utilisent la nouvelle version"""
+        nom = nom_profil_charge.split('.')[0]
+        if evenement['kind'] != 'profile' or evenement['action'] == 'removed' or evenement['name'].lower() != nom.lower():
+            return
+        profil = api_manager.load_profile(evenement['name'])
+        if profil:
+            profilAPIActuel.clear()
+            profilAPIActuel.update(profil)
+            fenetre.cmd_api = creerCommandeAPI(profilAPIActuel)
+            method_info_label.config(text=get_method_info())
+            logger.info(f"Profil {evenement['name']} rechargé dans Test API")
+
+    abonner_config(fenetre, on_profil_modifie)
     
     # === INDICATEUR DE STATUT CONVERSATION ===
     if conversation_manager and conversation_manager.show_indicators:
@@ -1210,13 +1293,40 @@ def ouvrir_fenetre_apitest():
     if conversation_manager:
         def reset_conversation():
             conversation_manager.reset_conversation()
-            champ_history.delete('1.0', tk.END)
+            get_history_view(champ_history, conversation_manager).refresh()
             if status_label:
                 status_label.config(text=conversation_manager.get_status_indicator())
-            print("🔄 Conversation réinitialisée")
+            logger.info("🔄 Conversation réinitialisée")
         
         bouton_reset = ttk.Button(frame_boutons, text="Nouvelle conversation", command=reset_conversation)
         bouton_reset.pack(side="left", padx=10)
+
+        def exporter_conversation():
+            # Instantané pris dans le thread Tk, écriture compressée en arrière-plan
+            if not conversation_manager.conversation_history and not conversation_manager.current_summary:
+                messagebox.showinfo("Export", "Aucun message à exporter")
+                return
+            instantane = ConversationManager(api_type=conversation_manager.api_type)
+            instantane.conversation_history = conversation_manager.conversation_history.snapshot()
+            instantane.current_summary = conversation_manager.current_summary
+            instantane.summary_count = conversation_manager.summary_count
+            chemin = os.path.join(CONVERSATIONS_DIR, f"archive_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+            chat = profilAPIActuel.get('chat', {})
+
+            def ecrire():
+                from conversation_archive import export_conversations
+                try:
+                    export_conversations(chemin, [(instantane, {
+                        'profile': profilAPIActuel.get('name'),
+                        'model': chat.get('values', {}).get('llm_model') or profilAPIActuel.get('llm_model'),
+                    })])
+                    logger.info(f"📦 Conversation exportée: {chemin}")
+                except OSError as e:
+                    logger.error(f"[Archive] Export impossible: {e}")
+            threading.Thread(target=ecrire, name="export-conversation", daemon=True).start()
+
+        bouton_exporter = ttk.Button(frame_boutons, text="Exporter", command=exporter_conversation)
+        bouton_exporter.pack(side="left", padx=10)
     
     # Bouton enregistrer fichier (mode développement uniquement)
     if generation_active and mode_development:
@@ -1411,7 +1521,7 @@ def open_setup_menu():
                     continue
             
             # Si tout échoue, retourner des valeurs par défaut pour éviter l'erreur
-            print(f"Profil {profil} non trouvé, utilisation des valeurs par défaut")
+            logger.warning(f"Profil {profil} non trouvé, utilisation des valeurs par défaut")
             return {
                 "api_key": "",
                 "role": "",
@@ -1423,7 +1533,7 @@ def open_setup_menu():
             }
             
         except Exception as e:
-            print(f"Erreur lors du chargement du profil {profil}: {e}")
+            logger.error(f"Erreur lors du chargement du profil {profil}: {e}")
             # Retourner des valeurs par défaut au lieu d'afficher une popup d'erreur
             return {
                 "api_key": "",
@@ -1438,16 +1548,16 @@ def open_setup_menu():
     # Fonction helper pour charger les données avec le nouveau mapping
     def charger_donnees_avec_nouveau_mapping(donnees_profil):
         """Helper pour charger les données depuis la nouvelle structure chat.values/placeholders"""
-        print(f"charger_donnees_avec_nouveau_mapping appelé avec: {type(donnees_profil)}")
-        print(f"Clés disponibles: {list(donnees_profil.keys()) if isinstance(donnees_profil, dict) else 'Pas un dict'}")
+        logger.debug(f"charger_donnees_avec_nouveau_mapping appelé avec: {type(donnees_profil)}")
+        logger.debug(f"Clés disponibles: {list(donnees_profil.keys()) if isinstance(donnees_profil, dict) else 'Pas un dict'}")
         
         chat_data = donnees_profil.get("chat", {})
         values_data = chat_data.get("values", {})
         placeholders_data = chat_data.get("placeholders", {})
         
-        print(f"chat_data trouvé: {bool(chat_data)}")
-        print(f"values_data: {values_data}")
-        print(f"placeholders_data: {placeholders_data}")
+        logger.debug(f"chat_data trouvé: {bool(chat_data)}")
+        logger.debug(f"values_data: clés {sorted(values_data)}")
+        logger.debug(f"placeholders_data: clés {sorted(placeholders_data)}")
         
         # 1. VALEURS UTILISATEUR (depuis chat.values)
         api_key_var.set(values_data.get("api_key", ""))
@@ -1468,15 +1578,15 @@ def open_setup_menu():
         response_path = chat_data.get("response_path", ["candidates", 0, "content", "parts", 0, "text"])
         set_response_path_text(response_path)
         
-        print(f"Placeholders chargés:")
-        print(f"  - placeholder_model_var: {placeholder_model_var.get()}")
-        print(f"  - placeholder_role_var: {placeholder_role_var.get()}")
-        print(f"  - user_prompt_var: {user_prompt_var.get()}")
-        print(f"  - replace_apikey_var: {replace_apikey_var.get()}")
+        logger.debug("Placeholders chargés:")
+        logger.debug(f"  - placeholder_model_var: {placeholder_model_var.get()}")
+        logger.debug(f"  - placeholder_role_var: {placeholder_role_var.get()}")
+        logger.debug(f"  - user_prompt_var: {user_prompt_var.get()}")
+        logger.debug(f"  - replace_apikey_var: {replace_apikey_var.get()}")
         
         # 4. FALLBACK: Support ancien format pour compatibilité
         if not chat_data:
-            print(f"Ancien format détecté, utilisation format legacy")
+            logger.debug("Ancien format détecté, utilisation format legacy")
             api_key_var.set(donnees_profil.get("api_key", ""))
             role_var.set(donnees_profil.get("role", ""))
             set_default_behavior_text(donnees_profil.get("behavior", ""))  # Utiliser la fonction pour Text widget
@@ -1492,18 +1602,18 @@ def open_setup_menu():
     # Fonction pour mettre à jour les champs du formulaire en fonction du profil sélectionné
     def mettre_a_jour_champs(event):
         profil_selectionne = selected_model.get()
-        print(f"mettre_a_jour_champs appelé pour profil: {profil_selectionne}")
+        logger.debug(f"mettre_a_jour_champs appelé pour profil: {profil_selectionne}")
         
         donnees_profil = charger_donnees_profil(profil_selectionne)
-        print(f"Données profil chargées: {type(donnees_profil)}")
+        logger.debug(f"Données profil chargées: {type(donnees_profil)}")
         if isinstance(donnees_profil, dict):
-            print(f"Clés du profil: {list(donnees_profil.keys())}")
+            logger.debug(f"Clés du profil: {list(donnees_profil.keys())}")
 
-        print(f"Changement de profil vers: {profil_selectionne}")
+        logger.debug(f"Changement de profil vers: {profil_selectionne}")
         
         # Utiliser la fonction helper pour le mapping
         chat_data = charger_donnees_avec_nouveau_mapping(donnees_profil)
-        print(f"chat_data retourné: {bool(chat_data)}")
+        logger.debug(f"chat_data retourné: {bool(chat_data)}")
         
         # NOUVELLE LOGIQUE: Chargement commande selon méthode du profil
         if chat_data:
@@ -1511,8 +1621,8 @@ def open_setup_menu():
             llm_name = profil_selectionne.lower()
             template_type = "chat"  # Par défaut pour Setup API
             
-            print(f"Chargement template: {llm_name}/{template_type}/{method}")
-            print(f"Path recherché: templates/{template_type}/{llm_name}/{method}.txt ou {method}.py")
+            logger.debug(f"Chargement template: {llm_name}/{template_type}/{method}")
+            logger.debug(f"Path recherché: templates/{template_type}/{llm_name}/{method}.txt ou {method}.py")
             
             # SOLID V2: Charger le template via APIManager
             if method == 'native':
@@ -1576,22 +1686,22 @@ def open_setup_menu():
                         chat_data = profile_data.get('chat', {})
                         if chat_data:
                             method = chat_data.get('method', 'curl')
-                            print(f"load_smart_template: méthode détectée depuis chat.method {provider}: {method}")
+                            logger.debug(f"load_smart_template: méthode détectée depuis chat.method {provider}: {method}")
                         else:
                             # Fallback vers l'ancien format
                             method = profile_data.get('method', 'curl')
-                            print(f"load_smart_template: méthode détectée depuis profil legacy {provider}: {method}")
+                            logger.debug(f"load_smart_template: méthode détectée depuis profil legacy {provider}: {method}")
                     else:
                         method = selected_method.get()
-                        print(f"load_smart_template: profil {provider} non trouvé, utilisation selected_method: {method}")
+                        logger.warning(f"load_smart_template: profil {provider} non trouvé, utilisation selected_method: {method}")
                 except Exception as e:
                     method = selected_method.get()
-                    print(f"load_smart_template: erreur détection profil {provider}, utilisation selected_method: {method} (erreur: {e})")
+                    logger.warning(f"load_smart_template: erreur détection profil {provider}, utilisation selected_method: {method} (erreur: {e})")
             else:
                 method = 'curl'
-                print(f"load_smart_template: provider différent, utilisation curl par défaut")
+                logger.debug("load_smart_template: provider différent, utilisation curl par défaut")
         
-        print(f"load_smart_template: {provider} {template_type} {method} (display={for_display})")
+        logger.debug(f"load_smart_template: {provider} {template_type} {method} (display={for_display})")
         
         # Charger le template principal selon la méthode
         if method == 'native':
@@ -1600,13 +1710,13 @@ def open_setup_menu():
                 native_template_path = f"templates/{template_type}/{provider}/native.py"
                 with open(native_template_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    print(f"Template native.py chargé: {len(content)} caractères")
+                    logger.debug(f"Template native.py chargé: {len(content)} caractères")
                     return content
             except FileNotFoundError:
-                print(f"Template native introuvable: {native_template_path}")
+                logger.warning(f"Template native introuvable: {native_template_path}")
                 return f"# Template Python pour {provider} non trouvé"
             except Exception as e:
-                print(f"Erreur lecture template native: {e}")
+                logger.error(f"Erreur lecture template native: {e}")
                 return f"# Erreur chargement template Python pour {provider}"
         
         else:
@@ -1614,10 +1724,10 @@ def open_setup_menu():
             template_id = f"{provider}_{template_type}"
             try:
                 content = api_manager.get_template_content(template_id)
-                print(f"Template curl chargé via APIManager: {template_id}")
+                logger.debug(f"Template curl chargé via APIManager: {template_id}")
                 return content
             except Exception as e:
-                print(f"Erreur APIManager pour {template_id}: {e}")
+                logger.error(f"Erreur APIManager pour {template_id}: {e}")
                 return f"# Template curl pour {provider} non trouvé"
 
     def load_basic_template(provider, template_type="chat", method=None):
@@ -1643,22 +1753,22 @@ def open_setup_menu():
                         chat_data = profile_data.get('chat', {})
                         if chat_data:
                             method = chat_data.get('method', 'curl')
-                            print(f"load_basic_template: méthode détectée depuis chat.method {provider}: {method}")
+                            logger.debug(f"load_basic_template: méthode détectée depuis chat.method {provider}: {method}")
                         else:
                             # Fallback vers l'ancien format
                             method = profile_data.get('method', 'curl')
-                            print(f"load_basic_template: méthode détectée depuis profil legacy {provider}: {method}")
+                            logger.debug(f"load_basic_template: méthode détectée depuis profil legacy {provider}: {method}")
                     else:
                         method = selected_method.get()
-                        print(f"load_basic_template: profil {provider} non trouvé, utilisation selected_method: {method}")
+                        logger.warning(f"load_basic_template: profil {provider} non trouvé, utilisation selected_method: {method}")
                 except Exception as e:
                     method = selected_method.get()
-                    print(f"load_basic_template: erreur détection profil {provider}, utilisation selected_method: {method} (erreur: {e})")
+                    logger.warning(f"load_basic_template: erreur détection profil {provider}, utilisation selected_method: {method} (erreur: {e})")
             else:
                 method = 'curl'
-                print(f"load_basic_template: provider différent, utilisation curl par défaut")
+                logger.debug("load_basic_template: provider différent, utilisation curl par défaut")
         
-        print(f"load_basic_template: {provider} {template_type} {method}")
+        logger.debug(f"load_basic_template: {provider} {template_type} {method}")
         
         # Déterminer le fichier basic à charger selon la méthode
         if method == 'native':
@@ -1669,13 +1779,13 @@ def open_setup_menu():
         try:
             with open(basic_file, 'r', encoding='utf-8') as f:
                 content = f.read()
-                print(f"Fichier basic chargé: {basic_file} ({len(content)} caractères)")
+                logger.debug(f"Fichier basic chargé: {basic_file} ({len(content)} caractères)")
                 return content
         except FileNotFoundError:
-            print(f"Fichier basic introuvable: {basic_file}")
+            logger.warning(f"Fichier basic introuvable: {basic_file}")
             return f"# Fichier basic pour {provider} ({method}) non trouvé"
         except Exception as e:
-            print(f"Erreur lecture fichier basic: {e}")
+            logger.error(f"Erreur lecture fichier basic: {e}")
             return f"# Erreur chargement fichier basic pour {provider}"
         
         if method == "native":
@@ -1686,10 +1796,10 @@ def open_setup_menu():
                     try:
                         with open(native_template_path, 'r', encoding='utf-8') as f:
                             content = f.read()
-                        print(f"Template native chargé: {native_template_path}")
+                        logger.debug(f"Template native chargé: {native_template_path}")
                         return content
                     except Exception as e:
-                        print(f"Erreur lecture native: {e}")
+                        logger.error(f"Erreur lecture native: {e}")
                         return f"# Erreur lecture template native {native_template_path}\n# {e}"
                 else:
                     # Template par défaut
@@ -1713,7 +1823,7 @@ system_behavior = "{{{{SYSTEM_PROMPT_BEHAVIOR}}}}"
 # TODO: Implémenter l'appel API pour {provider}
 print("Template native à implémenter pour {provider}")
 """
-                    print(f"Template native par défaut généré pour {provider}")
+                    logger.debug(f"Template native par défaut généré pour {provider}")
                     return default_template
             else:
                 # Pour exécution : charger native_basic.py
@@ -1722,23 +1832,23 @@ print("Template native à implémenter pour {provider}")
                     try:
                         with open(native_basic_path, 'r', encoding='utf-8') as f:
                             content = f.read()
-                        print(f"Template native_basic chargé: {native_basic_path}")
+                        logger.debug(f"Template native_basic chargé: {native_basic_path}")
                         return content
                     except Exception as e:
-                        print(f"Erreur lecture native_basic: {e}")
+                        logger.error(f"Erreur lecture native_basic: {e}")
                         return f"# Erreur lecture template native_basic {native_basic_path}\n# {e}"
                 else:
-                    print(f"Template native_basic non trouvé: {native_basic_path}")
+                    logger.warning(f"Template native_basic non trouvé: {native_basic_path}")
                     return f"# Template native_basic non trouvé pour {provider}"
         else:
             # Mode curl : utiliser APIManager
             template_id = f"{provider}_{template_type}"
             template_content = api_manager.get_template_content(template_id)
             if template_content:
-                print(f"Template curl chargé via APIManager: {template_id}")
+                logger.debug(f"Template curl chargé via APIManager: {template_id}")
                 return template_content
             else:
-                print(f"Template curl non trouvé: {template_id}")
+                logger.warning(f"Template curl non trouvé: {template_id}")
                 return f"# Template curl non trouvé pour {provider}"
 
     def load_template_by_method(provider, template_type="chat", method=None):
@@ -1772,7 +1882,7 @@ print("Template native à implémenter pour {provider}")
             else:
                 method = 'curl'
         
-        print(f"load_template_by_method: {provider} {template_type} {method}")
+        logger.debug(f"load_template_by_method: {provider} {template_type} {method}")
         
         # SOLID: Utiliser APIManager pour tous les templates
         if method == 'native':
@@ -1819,10 +1929,10 @@ print("Template native à implémenter pour {provider}")
         content = api_manager.get_template_basic_content(template_id)
         
         if content:
-            print(f"get_execution_template: template basic chargé pour {template_id}")
+            logger.debug(f"get_execution_template: template basic chargé pour {template_id}")
             return content
         else:
-            print(f"get_execution_template: template basic non trouvé pour {template_id}")
+            logger.warning(f"get_execution_template: template basic non trouvé pour {template_id}")
             return f"# Template basic {template_id} non trouvé"
 
     # Fonction pour définir un seul profil comme défaut
@@ -1847,15 +1957,15 @@ print("Template native à implémenter pour {provider}")
                     values_data = chat_data.get("values", {})
                     
                     if values_data.get("default", False):
-                        print(f"Profil par défaut trouvé: {profil_name}")
+                        logger.debug(f"Profil par défaut trouvé: {profil_name}")
                         return profil_name
                 except Exception as e:
-                    print(f"Erreur lors de la vérification du profil {profil_name}: {e}")
+                    logger.error(f"Erreur lors de la vérification du profil {profil_name}: {e}")
                     continue
             
             # FALLBACK: Si aucun profil avec default=true, prendre le premier disponible
             if profils_disponibles:
-                print(f"Aucun profil par défaut trouvé, utilisation du premier: {profils_disponibles[0]}")
+                logger.debug(f"Aucun profil par défaut trouvé, utilisation du premier: {profils_disponibles[0]}")
                 return profils_disponibles[0]
             
             return "Gemini"  # Fallback final
@@ -1881,10 +1991,10 @@ print("Template native à implémenter pour {provider}")
         method = selected_method.get()
         if method == "curl":
             # Mode curl : les labels seront gérés par creer_champs_dynamiques()
-            print("Mode curl activé")
+            logger.info("Mode curl activé")
         elif method == "native":
             # Mode native : les labels seront gérés par creer_champs_dynamiques()
-            print("Mode native activé")
+            logger.info("Mode native activé")
         
         # Basculer le contenu affiché selon la méthode sélectionnée
         switch_template_content()
@@ -1923,23 +2033,16 @@ print("Template native à implémenter pour {provider}")
         Returns:
             tuple: (liste des modèles, modèle par défaut)
         """
-        import json
-        
         models_file = f"templates/{template_type}/{provider}/modeles.json"
         
-        try:
-            with open(models_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                models = data.get('models', [])
-                default_model = data.get('default', models[0] if models else "")
-                print(f"Modèles chargés depuis {models_file}: {len(models)} modèles")
-                return models, default_model
-        except FileNotFoundError:
-            print(f"Fichier modèles introuvable: {models_file}, utilisation fallback")
-            return get_fallback_models(provider), ""
-        except Exception as e:
-            print(f"Erreur lecture fichier modèles {models_file}: {e}")
-            return get_fallback_models(provider), ""
+        # Catalogue en mémoire: le fichier n'est relu que s'il a changé
+        catalogue = get_model_catalog()
+        if template_type == "chat" and catalogue.has_provider(provider):
+            models, default_model = catalogue.models(provider)
+            logger.debug(f"Modèles du catalogue pour {provider}: {len(models)} modèles")
+            return models, default_model
+        logger.warning(f"Fichier modèles introuvable ou invalide: {models_file}, utilisation fallback")
+        return get_fallback_models(provider), ""
 
     def get_fallback_models(provider):
         """Modèles de fallback si le fichier JSON n'existe pas"""
@@ -1972,12 +2075,24 @@ print("Template native à implémenter pour {provider}")
         
         # IMPORTANT: Charger le template selon le provider et sa méthode
         # Ceci assure que le changement de provider charge le bon template
-        print(f"mettre_a_jour_modeles: provider changed to {provider}")
+        logger.debug(f"mettre_a_jour_modeles: provider changed to {provider}")
         # Note: mettre_a_jour_placeholders() sera appelée après et gérera le profil complet
     
     # Bind pour mise à jour automatique des modèles
     selected_model.trace('w', mettre_a_jour_modeles)
 
+    def on_config_modifiee(evenement):
+        """Listes rafraîchies sans toucher aux champs en cours d'édition"""
+        if evenement['kind'] == 'profile':
+            model_combobox['values'] = charger_profils()
+        elif evenement['kind'] == 'models' and evenement['name'] == selected_model.get().lower():
+            models, default_model = load_models_from_json(evenement['name'], selected_template_type.get())
+            llm_model_combobox['values'] = models
+            if models and selected_llm_model.get() not in models:
+                selected_llm_model.set(default_model if default_model else models[0])
+
+    abonner_config(setup_window, on_config_modifiee)
+
     def mettre_a_jour_placeholders(*args):
         """Met à jour tous les placeholders quand le provider change + charge le profil complet"""
         # Petit délai pour éviter les conflits avec mettre_a_jour_modeles
@@ -1986,7 +2101,7 @@ print("Template native à implémenter pour {provider}")
         
         provider = selected_model.get().lower()
         if provider:
-            print(f"mettre_a_jour_placeholders: Changement de provider vers: {provider}")
+            logger.debug(f"mettre_a_jour_placeholders: Changement de provider vers: {provider}")
             
             # 1. Charger le profil correspondant au nouveau provider
             try:
@@ -1995,15 +2110,15 @@ print("Template native à implémenter pour {provider}")
                 profil_data = charger_donnees_profil(profil_name)
                 
                 if profil_data:
-                    print(f"Profil {profil_name} trouvé, chargement des données...")
+                    logger.debug(f"Profil {profil_name} trouvé, chargement des données...")
                     
                     # 2. Mettre à jour la méthode selon le profil
                     profile_method = profil_data.get('method', 'curl')
-                    print(f"Méthode du profil {profil_name}: {profile_method}")
-                    print(f"selected_method avant: {selected_method.get()}")
+                    logger.debug(f"Méthode du profil {profil_name}: {profile_method}")
+                    logger.debug(f"selected_method avant: {selected_method.get()}")
                     selected_method.set(profile_method)
-                    print(f"selected_method après: {selected_method.get()}")
-                    print(f"Méthode mise à jour: {profile_method}")
+                    logger.debug(f"selected_method après: {selected_method.get()}")
+                    logger.debug(f"Méthode mise à jour: {profile_method}")
                     
                     # 3. Charger les autres données du profil
                     if "placeholder_model" in profil_data:
@@ -2019,14 +2134,14 @@ print("Template native à implémenter pour {provider}")
                     
                     # 4. Charger le template selon la méthode du profil (explicite)
                     load_template_by_method(provider, "chat", method=profile_method)
-                    print(f"Template {profile_method} chargé pour {provider}")
+                    logger.debug(f"Template {profile_method} chargé pour {provider}")
                     
                     # 5. Forcer la mise à jour de l'interface (labels, champs)
                     update_method_fields()
-                    print(f"Interface mise à jour pour méthode {profile_method}")
+                    logger.debug(f"Interface mise à jour pour méthode {profile_method}")
                     
                 else:
-                    print(f"Aucun profil trouvé pour {profil_name}, utilisation des valeurs par défaut")
+                    logger.debug(f"Aucun profil trouvé pour {profil_name}, utilisation des valeurs par défaut")
                     # Fallback vers méthode curl et extraction depuis templates
                     selected_method.set('curl')
                     
@@ -2048,7 +2163,7 @@ print("Template native à implémenter pour {provider}")
                     load_template_by_method(provider, "chat")
                     
             except Exception as e:
-                print(f"Erreur chargement profil {provider}: {e}")
+                logger.error(f"Erreur chargement profil {provider}: {e}")
                 # En cas d'erreur, revenir à curl par défaut
                 selected_method.set('curl')
                 load_template_by_method(provider, "chat")
@@ -2099,7 +2214,7 @@ print("Template native à implémenter pour {provider}")
             # ÉTAPE 1A: Lire curl_basic.txt pour identifier les placeholders
             basic_full_path = os.path.join(".", basic_template_path)
             if not os.path.exists(basic_full_path):
-                print(f"Template basic introuvable : {basic_full_path}")
+                logger.warning(f"Template basic introuvable : {basic_full_path}")
                 return {}
                 
             with open(basic_full_path, 'r', encoding='utf-8') as f:
@@ -2107,12 +2222,12 @@ print("Template native à implémenter pour {provider}")
             
             # Identifier tous les placeholders dans curl_basic.txt
             placeholders_found = re.findall(r'\{\{([^}]+)\}\}', basic_content)
-            print(f"Placeholders trouvés dans {template_id}: {placeholders_found}")
+            logger.debug(f"Placeholders trouvés dans {template_id}: {placeholders_found}")
             
             # ÉTAPE 1B: Lire curl.txt pour extraire les valeurs par défaut
             concrete_full_path = os.path.join(".", concrete_template_path)
             if not os.path.exists(concrete_full_path):
-                print(f"Template concret introuvable : {concrete_full_path}")
+                logger.warning(f"Template concret introuvable : {concrete_full_path}")
                 return {}
                 
             with open(concrete_full_path, 'r', encoding='utf-8') as f:
@@ -2256,11 +2371,11 @@ print("Template native à implémenter pour {provider}")
                     # Géré dans SYSTEM_PROMPT_ROLE si les deux existent
                     pass
             
-            print(f"Valeurs extraites pour {template_id}: {valeurs_defaut}")
+            logger.debug(f"Valeurs extraites pour {template_id}: {sorted(valeurs_defaut)}")
             return valeurs_defaut
             
         except Exception as e:
-            print(f"Erreur lors de l'extraction des valeurs par défaut: {e}")
+            logger.error(f"Erreur lors de l'extraction des valeurs par défaut: {e}")
             return {}
 
     def creer_champs_dynamiques(placeholders_found: list, valeurs_defaut: dict):
@@ -2269,7 +2384,7 @@ print("Template native à implémenter pour {provider}")
         1. VIDER et MASQUER tous les champs
         2. AFFICHER et PRÉREMPLIR seulement les champs nécessaires
         """
-        print(f"Création champs dynamiques pour placeholders: {placeholders_found}")
+        logger.debug(f"Création champs dynamiques pour placeholders: {placeholders_found}")
         
         # Définir les variables globales si elles ne sont pas encore définies
         global placeholder_model_label, placeholder_model_entry, placeholder_model_var
@@ -2343,7 +2458,7 @@ print("Template native à implémenter pour {provider}")
         }
         
         # ÉTAPE 1: VIDER et MASQUER TOUS LES CHAMPS (reset complet)
-        print("ÉTAPE 1: Reset complet de tous les champs")
+        logger.debug("ÉTAPE 1: Reset complet de tous les champs")
         for placeholder, config in champs_mapping.items():
             try:
                 # Vider le champ
@@ -2351,17 +2466,17 @@ print("Template native à implémenter pour {provider}")
                 # Masquer le champ
                 config["label"].grid_remove()
                 config["entry"].grid_remove()
-                print(f"Champ {placeholder} vidé et masqué")
+                logger.debug(f"Champ {placeholder} vidé et masqué")
             except Exception as e:
-                print(f"Erreur reset {placeholder}: {e}")
+                logger.error(f"Erreur reset {placeholder}: {e}")
         
         # ÉTAPE 2: AFFICHER et PRÉREMPLIR seulement les champs nécessaires
-        print(f"ÉTAPE 2: Affichage des champs nécessaires: {placeholders_found}")
+        logger.debug(f"ÉTAPE 2: Affichage des champs nécessaires: {placeholders_found}")
         for placeholder in placeholders_found:
             if placeholder in champs_mapping:
                 config = champs_mapping[placeholder]
                 
-                print(f"Traitement champ {placeholder}")
+                logger.debug(f"Traitement champ {placeholder}")
                 
                 # Afficher le champ
                 config["label"].grid(row=config["row"], column=0, sticky="w", pady=3, padx=(10,5))
@@ -2373,12 +2488,12 @@ print("Template native à implémenter pour {provider}")
                 # Préremplir avec la valeur par défaut (ou vide si pas de valeur)
                 if config["value_key"] in valeurs_defaut:
                     config["var"].set(valeurs_defaut[config["value_key"]])
-                    print(f"Champ {placeholder} prérempli avec: {valeurs_defaut[config['value_key']]}")
+                    logger.debug(f"Champ {placeholder} prérempli ({len(str(valeurs_defaut[config['value_key']]))} caractères)")
                 else:
                     config["var"].set("")  # Assurer que c'est vide
-                    print(f"Champ {placeholder} laissé vide (pas de valeur)")
+                    logger.debug(f"Champ {placeholder} laissé vide (pas de valeur)")
         
-        print(f"Reset et création dynamique terminés")
+        logger.debug("Reset et création dynamique terminés")
 
     def update_form_with_llm_data(template_id: str):
         """
@@ -2388,7 +2503,7 @@ print("Template native à implémenter pour {provider}")
         3. Prérempli les champs avec les valeurs par défaut
         4. Charge le contenu template selon la méthode (curl ou native)
         """
-        print(f"Mise à jour formulaire pour template: {template_id}")
+        logger.debug(f"Mise à jour formulaire pour template: {template_id}")
         
         # Étape 1: Extraction des données
         valeurs_defaut = extraire_valeurs_par_defaut_du_template(template_id)
@@ -2408,7 +2523,7 @@ print("Template native à implémenter pour {provider}")
                 basic_content = f.read()
             placeholders_found = re.findall(r'\{\{([^}]+)\}\}', basic_content)
         
-        print(f"Orchestration: placeholders={placeholders_found}, valeurs={valeurs_defaut}")
+        logger.debug(f"Orchestration: placeholders={placeholders_found}, valeurs={sorted(valeurs_defaut)}")
         
         # Étape 2: Création et configuration dynamique des champs
         creer_champs_dynamiques(placeholders_found, valeurs_defaut)
@@ -2653,11 +2768,11 @@ print("Template native à implémenter pour {provider}")
         # Charger méthode et type template (nouveaux champs V2)
         if chat_data:
             selected_method.set(chat_data.get("method", "curl"))
-            print(f"Méthode chargée depuis chat_data: {chat_data.get('method', 'curl')}")
+            logger.debug(f"Méthode chargée depuis chat_data: {chat_data.get('method', 'curl')}")
         else:
             # Fallback pour ancien format
             selected_method.set(donnees_profil.get("method", "curl"))
-            print(f"Méthode chargée depuis donnees_profil (fallback): {donnees_profil.get('method', 'curl')}")
+            logger.debug(f"Méthode chargée depuis donnees_profil (fallback): {donnees_profil.get('method', 'curl')}")
         
         selected_template_type.set(donnees_profil.get("template_type", "chat"))
         
@@ -2696,13 +2811,13 @@ print("Template native à implémenter pour {provider}")
             try:
                 with open(template_path, 'r', encoding='utf-8') as f:
                     config_data = json.load(f)
-                print(f"✅ Setup API: Template {profil_selectionne} chargé avec {len(config_data)} champs")
+                logger.info(f"✅ Setup API: Template {profil_selectionne} chargé avec {len(config_data)} champs")
             except Exception as e:
-                print(f"❌ Erreur chargement template {template_path}: {e}")
+                logger.error(f"❌ Erreur chargement template {template_path}: {e}")
                 # Fallback vers ancien système si le template est corrompu
                 config_data = {}
         else:
-            print(f"⚠️ Template {template_path} introuvable - création profil minimal")
+            logger.warning(f"⚠️ Template {template_path} introuvable - création profil minimal")
             config_data = {}
 
         # Mettre à jour seulement les champs modifiés par l'utilisateur SELON LA NOUVELLE STRUCTURE V2
@@ -2788,9 +2903,10 @@ print("Template native à implémenter pour {provider}")
                         os.makedirs(os.path.dirname(template_filepath), exist_ok=True)
                         with open(template_filepath, 'w', encoding='utf-8') as f:
                             f.write(template_content)
-                        print(f"✅ Template {method} sauvegardé: {template_filepath} ({len(template_content)} caractères)")
+                        notify_written(template_filepath)
+                        logger.info(f"✅ Template {method} sauvegardé: {template_filepath} ({len(template_content)} caractères)")
                     except Exception as e:
-                        print(f"❌ Erreur sauvegarde template {method}: {e}")
+                        logger.error(f"❌ Erreur sauvegarde template {method}: {e}")
                 
                 # Sauvegarder le template placeholder command si fourni
                 placeholder_command = placeholder_command_text.get("1.0", tk.END).strip()
@@ -2805,9 +2921,10 @@ print("Template native à implémenter pour {provider}")
                         os.makedirs(os.path.dirname(basic_filepath), exist_ok=True)
                         with open(basic_filepath, 'w', encoding='utf-8') as f:
                             f.write(placeholder_command)
-                        print(f"✅ Placeholder command sauvegardé: {basic_filepath} ({len(placeholder_command)} caractères)")
+                        notify_written(basic_filepath)
+                        logger.info(f"✅ Placeholder command sauvegardé: {basic_filepath} ({len(placeholder_command)} caractères)")
                     except Exception as e:
-                        print(f"❌ Erreur sauvegarde placeholder command: {e}")
+                        logger.error(f"❌ Erreur sauvegarde placeholder command: {e}")
                 
                 # Définir comme profil par défaut si nécessaire
                 if default_profile_var.get():
@@ -3143,7 +3260,7 @@ def open_setup_history_menu():
     def on_template_change_setup(*args):
         """Fonction appelée quand le template change dans Setup API - met à jour le formulaire dynamiquement"""
         template_name = template_var.get()
-        print(f"Changement template Setup API: {template_name}")
+        logger.debug(f"Changement template Setup API: {template_name}")
         
         # Extraire le template_id depuis le nom affiché
         if "Template " in template_name:
@@ -3156,16 +3273,16 @@ def open_setup_history_menu():
                 profile_data = api_manager.load_profile(profile_name)
                 if profile_data and 'template_id' in profile_data:
                     template_id = profile_data['template_id']
-                    print(f"Template Setup auto-détecté: {profile_name} -> {template_id}")
+                    logger.debug(f"Template Setup auto-détecté: {profile_name} -> {template_id}")
                 else:
                     # Fallback: construire template_id par convention {provider}_chat
                     template_id = f"{profile_name.lower()}_chat"
-                    print(f"Template Setup fallback: {profile_name} -> {template_id}")
+                    logger.debug(f"Template Setup fallback: {profile_name} -> {template_id}")
             except Exception as e:
-                print(f"Erreur détection template pour {profile_name}: {e}")
+                logger.error(f"Erreur détection template pour {profile_name}: {e}")
                 template_id = "gemini_chat"  # Fallback de sécurité
             
-            print(f"Template détecté pour Setup History: {template_id}")
+            logger.debug(f"Template détecté pour Setup History: {template_id}")
     
     auto_save_var = tk.BooleanVar(value=True)
     
@@ -3229,10 +3346,10 @@ def open_setup_history_menu():
                 if template_name not in templates:
                     templates.append(template_name)
             
-            print(f"📋 Templates disponibles: {templates}")
+            logger.debug(f"📋 Templates disponibles: {templates}")
             
         except Exception as e:
-            print(f"Erreur récupération templates: {e}")
+            logger.error(f"Erreur récupération templates: {e}")
         return templates
     
     template_combo = ttk.Combobox(template_frame, textvariable=template_var, state="readonly", width=40)
@@ -3336,7 +3453,7 @@ def open_setup_history_menu():
                             default_instructions = custom_instructions
                             
                     except Exception as e:
-                        print(f"Erreur chargement instructions {api_name}: {e}")
+                        logger.error(f"Erreur chargement instructions {api_name}: {e}")
                         
             else:
                 # Template non reconnu
@@ -3347,7 +3464,7 @@ def open_setup_history_menu():
             template_preview.insert("1.0", default_instructions)
                 
         except Exception as e:
-            print(f"❌ Erreur lors de la mise à jour du preview: {e}")
+            logger.error(f"❌ Erreur lors de la mise à jour du preview: {e}")
             template_preview.delete("1.0", tk.END)
             template_preview.insert("1.0", "Résume la conversation précédente.")
     
@@ -3375,7 +3492,7 @@ def open_setup_history_menu():
                 # Fallback sur le profil par défaut si template non reconnu
                 profil_actuel = api_manager.get_default_profile()
                 if not profil_actuel:
-                    print("❌ Aucun profil par défaut défini")
+                    logger.error("❌ Aucun profil par défaut défini")
                     return
                 nom_profil = profil_actuel.get('name', 'Gemini')
             
@@ -3413,7 +3530,7 @@ def open_setup_history_menu():
                     else:
                         update_template_preview()
                     
-                    print(f"✅ Configuration chargée depuis {profile_path}")
+                    logger.info(f"✅ Configuration chargée depuis {profile_path}")
                 else:
                     # Créer configuration par défaut
                     default_config = {
@@ -3433,8 +3550,9 @@ def open_setup_history_menu():
                     # Sauvegarder le profil modifié
                     with open(profile_path, 'w', encoding='utf-8') as f:
                         json.dump(profile_data, f, indent=2, ensure_ascii=False)
+                    notify_written(profile_path)
                     
-                    print(f"✅ Configuration par défaut ajoutée à {profile_path}")
+                    logger.info(f"✅ Configuration par défaut ajoutée à {profile_path}")
                     
                     # Charger les valeurs par défaut dans l'interface
                     word_threshold_var.set(default_config["word_threshold"])
@@ -3448,12 +3566,12 @@ def open_setup_history_menu():
                     
                     update_template_preview()
             else:
-                print(f"❌ Profil {profile_path} non trouvé")
+                logger.error(f"❌ Profil {profile_path} non trouvé")
                 update_template_preview()
                 
         except Exception as e:
             messagebox.showwarning("Avertissement", f"Erreur lors du chargement: {e}")
-            print(f"❌ Erreur chargement config: {e}")
+            logger.error(f"❌ Erreur chargement config: {e}")
             update_template_preview()
     
     def save_configuration():
@@ -3498,6 +3616,7 @@ def open_setup_history_menu():
             # 5. Sauvegarder le profil principal modifié
             with open(profile_path, 'w', encoding='utf-8') as f:
                 json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            notify_written(profile_path)
             
             # 6. Mettre à jour le ConversationManager si nécessaire
             if conversation_manager:
@@ -3553,13 +3672,13 @@ def open_setup_history_menu():
                 profile_data = api_manager.load_profile(profile_name)
                 if profile_data and 'template_id' in profile_data:
                     template_id = profile_data['template_id']
-                    print(f"Template History auto-détecté: {profile_name} -> {template_id}")
+                    logger.debug(f"Template History auto-détecté: {profile_name} -> {template_id}")
                 else:
                     # Fallback: construire template_id par convention {provider}_chat
                     template_id = f"{profile_name.lower()}_chat"
-                    print(f"Template History fallback: {profile_name} -> {template_id}")
+                    logger.debug(f"Template History fallback: {profile_name} -> {template_id}")
             except Exception as e:
-                print(f"Erreur détection template pour {profile_name}: {e}")
+                logger.error(f"Erreur détection template pour {profile_name}: {e}")
                 template_id = "gemini_chat"  # Fallback de sécurité
             
             # Pas de mise à jour des placeholders ici - cette fonction concerne l'historique, pas Setup API
@@ -3592,6 +3711,99 @@ def open_setup_history_menu():
     main_canvas.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
 
+def ouvrir_fenetre_traces():
+    """
+    Vue waterfall des dernières traces (tracing.py)
+    Sélection d'une trace à gauche, spans dessinés à droite proportionnellement à leur durée
+    """
+    fenetre = Toplevel(root)
+    fenetre.title("📊 Traces - Waterfall des requêtes")
+    fenetre.geometry("1000x520")
+
+    panneau = ttk.PanedWindow(fenetre, orient=tk.HORIZONTAL)
+    panneau.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    cadre_liste = ttk.Frame(panneau)
+    liste_traces = tk.Listbox(cadre_liste, width=42, exportselection=False)
+    liste_traces.pack(fill=tk.BOTH, expand=True)
+    panneau.add(cadre_liste, weight=1)
+
+    cadre_canvas = ttk.Frame(panneau)
+    canvas = tk.Canvas(cadre_canvas, background="white")
+    defilement = ttk.Scrollbar(cadre_canvas, orient="vertical", command=canvas.yview)
+    canvas.configure(yscrollcommand=defilement.set)
+    defilement.pack(side=tk.RIGHT, fill=tk.Y)
+    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    panneau.add(cadre_canvas, weight=3)
+
+    traces = []
+
+    def dessiner_trace(trace):
+        canvas.delete("all")
+        spans = sorted(trace.spans, key=lambda s: s.start_ns)
+        if not spans:
+            return
+
+        # Profondeur de chaque span pour l'indentation
+        parents = {s.span_id: s.parent_id for s in spans}
+        def profondeur(span_obj):
+            niveau, parent_id = 0, span_obj.parent_id
+            while parent_id in parents:
+                niveau += 1
+                parent_id = parents[parent_id]
+            return niveau
+
+        debut = min(s.start_ns for s in spans)
+        fin = max((s.end_ns or s.start_ns) for s in spans)
+        duree_totale = max(fin - debut, 1)
+
+        largeur = max(canvas.winfo_width(), 600)
+        marge_gauche, marge_droite, hauteur_ligne = 230, 80, 22
+        echelle = (largeur - marge_gauche - marge_droite) / duree_totale
+
+        for index, span_obj in enumerate(spans):
+            y = 10 + index * hauteur_ligne
+            niveau = profondeur(span_obj)
+            x0 = marge_gauche + (span_obj.start_ns - debut) * echelle
+            x1 = max(x0 + 2, marge_gauche + ((span_obj.end_ns or span_obj.start_ns) - debut) * echelle)
+            couleur = "#d9534f" if span_obj.status == 2 else ("#4a90d9", "#5cb85c", "#f0ad4e", "#9b59b6")[niveau % 4]
+
+            canvas.create_text(8 + niveau * 12, y + 8, text=span_obj.name, anchor="w", font=("Arial", 9))
+            canvas.create_rectangle(x0, y + 2, x1, y + 16, fill=couleur, outline="")
+            canvas.create_text(x1 + 4, y + 9, text=f"{span_obj.duration_ms:.1f} ms", anchor="w",
+                               font=("Arial", 8), fill="#555555")
+            if span_obj.status_message:
+                canvas.create_text(x1 + 70, y + 9, text=span_obj.status_message[:80], anchor="w",
+                                   font=("Arial", 8), fill="#d9534f")
+
+        canvas.configure(scrollregion=(0, 0, largeur, 20 + len(spans) * hauteur_ligne))
+
+    def rafraichir():
+        traces[:] = tracer.recent_traces()
+        liste_traces.delete(0, tk.END)
+        for trace in traces:
+            racine = trace.root
+            horodatage = datetime.fromtimestamp(racine.start_ns / 1e9).strftime("%H:%M:%S")
+            provider = racine.attributes.get("provider", "")
+            etat = "❌" if any(s.status == 2 for s in trace.spans) else "✅"
+            liste_traces.insert(tk.END, f"{etat} {horodatage} {racine.name} {provider} {racine.duration_ms:.0f} ms")
+        if traces:
+            liste_traces.selection_set(0)
+            dessiner_trace(traces[0])
+        else:
+            canvas.delete("all")
+            canvas.create_text(20, 20, text="Aucune trace enregistrée", anchor="w")
+
+    def on_selection(event):
+        selection = liste_traces.curselection()
+        if selection:
+            dessiner_trace(traces[selection[0]])
+
+    liste_traces.bind("<<ListboxSelect>>", on_selection)
+    ttk.Button(fenetre, text="🔄 Rafraîchir", command=rafraichir).pack(pady=(0, 5))
+    fenetre.after(50, rafraichir)
+
+
 def creer_interface():
     """Crée l'interface graphique principale avec une barre de menu."""
     global root
@@ -3619,6 +3831,10 @@ def creer_interface():
     menu_api.add_command(label="Set up API", command=open_setup_menu)
     menu_api.add_command(label="Set up File", command=open_setup_file_menu)
     menu_api.add_command(label="Setup History", command=open_setup_history_menu)
+    menu_api.add_command(label="Traces", command=ouvrir_fenetre_traces)
+    profiling_var = tk.BooleanVar(value=profiler.enabled)
+    menu_api.add_checkbutton(label="Profiling (cProfile/tracemalloc)", variable=profiling_var,
+                             command=lambda: set_profiling(profiling_var.get()))
     menu_bar.add_cascade(label="Config", menu=menu_api)
 
     # Configuration de la barre de menu
@@ -3633,10 +3849,19 @@ def creer_interface():
 
     logging.info("GUI application setup complete.")
 
+    # L'initialisation différée (profils, APIManager, profil système) démarre
+    # une fois la fenêtre affichée pour ne pas retarder son apparition
+    def on_map(event):
+        if event.widget is root:
+            root.unbind("<Map>", map_binding)
+            window_shown()
+    map_binding = root.bind("<Map>", on_map, add="+")
+    root.after(INTERVALLE_EVENEMENTS_CONFIG_MS, _relayer_evenements_config)
+
     try:
         root.mainloop()
     except KeyboardInterrupt:
-        print("Application fermée par l'utilisateur")
+        logger.info("Application fermée par l'utilisateur")
         on_closing()
 
 # Fonction main alternative - non utilisée quand appelée depuis main.py
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless Server - API locale HTTP / socket Unix (main.py --serve)
+
+Un processus chaud partagé par plusieurs clients et scripts: profils, templates,
+parseurs et pool de workers restent chargés entre les requêtes.
+
+Chaque requête nomme son profil; seules les conversations (sessions) sont
+conservées côté serveur, un ConversationManager par session.
+
+Routes (JSON):
+    GET    /v1/health
+    GET    /v1/profiles
+    GET    /v1/models[/{provider}]                                   -> contexte, prix, latence observée
+    POST   /v1/sessions            {"profile"}                       -> {"session_id"}
+    GET    /v1/sessions/{id}[?offset=-50&limit=50]                  -> statistiques + historique (paginé)
+    DELETE /v1/sessions/{id}
+    POST   /v1/chat                {"profile", "prompt", "session_id"?}
+    POST   /v1/fanout              {"profiles": [...], "prompt"}     -> réponses en parallèle
+    POST   /v1/summarize           {"profile", "session_id"} ou {"profile", "text"}
+
+Sécurité: écoute sur 127.0.0.1 par défaut (ou socket Unix en mode 0600);
+ROB1_SERVE_TOKEN impose un en-tête "Authorization: Bearer <token>".
+"""
+
+import json
+import logging
+import os
+import secrets
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from chat_service import ChatService, ChatServiceError, ChatTimeoutError
+from model_catalog import get_model_catalog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8780
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+try:
+    SESSION_TTL = int(os.environ.get("ROB1_SESSION_TTL", 3600))
+except ValueError:
+    SESSION_TTL = 3600
+try:
+    SERVE_WORKERS = max(1, int(os.environ.get("ROB1_SERVE_WORKERS", 8)))
+except ValueError:
+    SERVE_WORKERS = 8
+
+
+class HTTPError(Exception):
+    """Erreur renvoyée au client avec son code HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Session:
+    """Conversation côté serveur; les tours d'une même session sont sérialisés"""
+
+    def __init__(self, session_id: str, profile_name: str, conversation):
+        self.session_id = session_id
+        self.profile_name = profile_name
+        self.conversation = conversation
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.turns = 0
+
+    def describe(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Statistiques et historique (tout, ou une page: offset négatif = depuis la fin)"""
+        history = self.conversation.conversation_history
+        stop = None if limit is None else offset + max(limit, 0)
+        if offset < 0 and stop is not None and stop >= 0:
+            stop = None
+        selected = range(len(history))[offset:stop]
+        return {
+            "session_id": self.session_id,
+            "profile": self.profile_name,
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+            "turns": self.turns,
+            "stats": self.conversation.get_stats(),
+            "summary": self.conversation.current_summary,
+            "history_total": len(history),
+            "history_offset": selected.start,
+            "history": history[selected.start:selected.stop],
+        }
+
+
+class SessionStore:
+    """Sessions en mémoire, expirées après SESSION_TTL secondes d'inactivité"""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def create(self, profile_name: str, conversation) -> Session:
+        session = Session(secrets.token_hex(8), profile_name, conversation)
+        with self._lock:
+            self._expire()
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"Session inconnue ou expirée: {session_id}")
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _expire(self) -> None:
+        limit = time.time() - self.ttl
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_used < limit]:
+            del self._sessions[session_id]
+
+
+class RobService:
+    """Logique des routes, indépendante du transport (TCP ou socket Unix)"""
+
+    def __init__(self, service: Optional[ChatService] = None, workers: int = SERVE_WORKERS):
+        self.service = service or ChatService()
+        self.sessions = SessionStore()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="serve-worker")
+        self.started_at = time.time()
+
+    # ------------------------------------------------------------ Utilitaires
+
+    def _profile(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        name = body.get("profile")
+        if not name or not isinstance(name, str):
+            raise HTTPError(400, "Champ 'profile' requis")
+        try:
+            return name, self.service.load_profile(name)
+        except KeyError as e:
+            raise HTTPError(404, str(e.args[0]))
+
+    @staticmethod
+    def _text(body: Dict[str, Any], field: str) -> str:
+        value = body.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPError(400, f"Champ '{field}' requis (texte non vide)")
+        return value
+
+    @staticmethod
+    def _result(details: Dict[str, Any]) -> Dict[str, Any]:
+        """Réponse client à partir du dict de parsing (HTTPError si l'API a échoué)"""
+        if not details['success']:
+            message = details['error'] or details['json_error'] or "Réponse sans texte exploitable"
+            raise HTTPError(502, message)
+        return {
+            "text": details['text'],
+            "usage": details['usage'],
+            "finish_reason": details['finish_reason'],
+            "latency_ms": round(details.get('latency_seconds', 0.0) * 1000, 1),
+            "cost_usd": details.get('cost_usd'),
+        }
+
+    def _run(self, func, *args):
+        """Exécute un appel dans le pool partagé et convertit les erreurs de transport"""
+        try:
+            return self.executor.submit(func, *args).result()
+        except ChatTimeoutError as e:
+            raise HTTPError(504, str(e))
+        except ChatServiceError as e:
+            raise HTTPError(502, str(e))
+
+    # ------------------------------------------------------------ Routes
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 1),
+                "sessions": len(self.sessions)}
+
+    def profiles(self) -> Dict[str, Any]:
+        return {"profiles": self.service.list_profiles()}
+
+    def models(self, provider: Optional[str] = None) -> Dict[str, Any]:
+        return {"models": get_model_catalog().describe(provider)}
+
+    def create_session(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        name, profile = self._profile(body)
+        session = self.sessions.create(name, self.service.new_conversation(profile))
+        return {"session_id": session.session_id, "profile": name}
+
+    def chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        name, profile = self._profile(body)
+        prompt = self._text(body, "prompt")
+        session_id = body.get("session_id")
+        if not session_id:
+            return self._result(self._run(self.service.ask, profile, prompt))
+
+        session = self.sessions.get(session_id)
+        with session.lock:
+            details = self._run(self.service.chat_turn, profile, session.conversation, prompt)
+            session.turns += 1
+            session.last_used = time.time()
+        result = self._result(details)
+        result.update(session_id=session_id, summarized=details.get('summarized', False))
+        return result
+
+    def fanout(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        names = body.get("profiles")
+        if not isinstance(names, list) or not names or not all(isinstance(n, str) for n in names):
+            raise HTTPError(400, "Champ 'profiles' requis (liste de noms)")
+        prompt = self._text(body, "prompt")
+        profiles = {name: self._profile({"profile": name})[1] for name in dict.fromkeys(names)}
+
+        futures = {name: self.executor.submit(self.service.ask, profile, prompt)
+                   for name, profile in profiles.items()}
+        results: Dict[str, Any] = {}
+        for name, future in futures.items():
+            try:
+                results[name] = self._result(future.result())
+            except HTTPError as e:
+                results[name] = {"error": e.message, "status": e.status}
+            except ChatServiceError as e:
+                results[name] = {"error": str(e), "status": 504 if isinstance(e, ChatTimeoutError) else 502}
+        return {"results": results}
+
+    def summarize(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        name, profile = self._profile(body)
+        session_id = body.get("session_id")
+        if session_id:
+            session = self.sessions.get(session_id)
+            with session.lock:
+                success = self._run(self.service.summarize, profile, session.conversation)
+                session.last_used = time.time()
+            conversation = session.conversation
+        else:
+            conversation = self.service.new_conversation(profile)
+            conversation.add_message('user', self._text(body, "text"))
+            success = self._run(self.service.summarize, profile, conversation)
+        if not success:
+            raise HTTPError(502, "Échec de la génération du résumé")
+        return {"summary": conversation.current_summary, "summary_count": conversation.summary_count}
+
+    def dispatch(self, method: str, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if len(parts) < 2 or parts[0] != "v1":
+            raise HTTPError(404, f"Route inconnue: {path}")
+        route = parts[1]
+
+        if method == "GET" and route == "health" and len(parts) == 2:
+            return self.health()
+        if method == "GET" and route == "profiles" and len(parts) == 2:
+            return self.profiles()
+        if method == "GET" and route == "models" and len(parts) in (2, 3):
+            return self.models(parts[2] if len(parts) == 3 else None)
+        if route == "sessions":
+            if method == "POST" and len(parts) == 2:
+                return self.create_session(body)
+            if method == "GET" and len(parts) == 3:
+                query = parse_qs(urlsplit(path).query)
+                try:
+                    offset = int(query.get("offset", ["0"])[0])
+                    limit = int(query["limit"][0]) if "limit" in query else None
+                except ValueError:
+                    raise HTTPError(400, "offset et limit doivent être des entiers")
+                return self.sessions.get(parts[2]).describe(offset, limit)
+            if method == "DELETE" and len(parts) == 3:
+                if not self.sessions.delete(parts[2]):
+                    raise HTTPError(404, f"Session inconnue: {parts[2]}")
+                return {"deleted": parts[2]}
+        if method == "POST" and len(parts) == 2:
+            handler = {"chat": self.chat, "fanout": self.fanout, "summarize": self.summarize}.get(route)
+            if handler:
+                return handler(body)
+        raise HTTPError(404, f"Route inconnue: {method} {path}")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RobRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Rob1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"[Serve] {format % args}")
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str) -> None:
+        start = time.perf_counter()
+        try:
+            token = self.server.token
+            # Comparaison en temps constant (octets: en-tête non ASCII accepté puis refusé)
+            if token and not secrets.compare_digest(self.headers.get("Authorization", "").encode("utf-8"),
+                                                    f"Bearer {token}".encode("utf-8")):
+                raise HTTPError(401, "Jeton d'accès invalide")
+
+            body: Dict[str, Any] = {}
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(413, f"Corps de requête trop volumineux (> {MAX_BODY_BYTES} octets)")
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length).decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise HTTPError(400, f"JSON invalide: {e}")
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Le corps doit être un objet JSON")
+
+            payload = self.server.rob.dispatch(method, self.path, body)
+            self._reply(200, payload)
+        except HTTPError as e:
+            self._reply(e.status, {"error": e.message})
+        except Exception as e:
+            logger.exception(f"[Serve] Erreur interne sur {method} {self.path}")
+            self._reply(500, {"error": f"Erreur interne: {type(e).__name__}: {e}"})
+        finally:
+            logger.info(f"[Serve] {method} {self.path} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class RobHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], rob: RobService, token: str = ""):
+        super().__init__(address, RobRequestHandler)
+        self.rob = rob
+        self.token = token
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class RobUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, rob: RobService, token: str = ""):
+            if os.path.exists(path):
+                os.remove(path)
+            super().__init__(path, RobRequestHandler)
+            self.rob = rob
+            self.token = token
+
+        def server_bind(self):
+            # Socket créé directement en 0600 (umask), sans fenêtre où il serait accessible à tous
+            previous_umask = os.umask(0o177)
+            try:
+                super().server_bind()
+            finally:
+                os.umask(previous_umask)
+
+        def get_request(self):
+            # client_address vide pour un socket Unix: BaseHTTPRequestHandler attend un tuple
+            request, _ = super().get_request()
+            return request, ("unix", 0)
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def create_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT, socket_path: Optional[str] = None,
+                  rob: Optional[RobService] = None):
+    """Serveur prêt à servir (serve_forever), TCP ou socket Unix"""
+    rob = rob or RobService()
+    token = os.environ.get("ROB1_SERVE_TOKEN", "")
+    if socket_path:
+        if not hasattr(socketserver, "UnixStreamServer"):
+            raise OSError("Sockets Unix non disponibles sur cette plateforme")
+        return RobUnixServer(socket_path, rob, token)
+    return RobHTTPServer((host, port), rob, token)
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, socket_path: Optional[str] = None) -> int:
+    """Point d'entrée bloquant de main.py --serve"""
+    server = create_server(host, port, socket_path)
+    where = f"unix:{socket_path}" if socket_path else f"http://{host}:{server.server_address[1]}"
+    print(f"🛰️ Rob-1 en mode serveur sur {where} (Ctrl+C pour arrêter)")
+    logger.info(f"[Serve] Écoute sur {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Arrêt du serveur")
+    finally:
+        server.server_close()
+        server.rob.close()
+    return 0
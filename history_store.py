@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Store - Historique de conversation borné en mémoire, débordement sur disque
+
+Remplace la liste ConversationManager.conversation_history (même interface pour les
+usages existants: itération, len, append, clear, index). Seuls les derniers messages
+restent en mémoire; au-delà de ROB1_HISTORY_WINDOW messages (200 par défaut) ou de
+ROB1_HISTORY_MEMORY_BYTES (2 Mo), les plus anciens sont écrits dans un segment JSONL
+(ROB1_HISTORY_DIR, répertoire temporaire par défaut) puis relus en flux à la demande.
+Les totaux (mots, phrases) sont tenus à jour à l'ajout: les seuils de synthèse ne
+relisent jamais le disque.
+
+    history = HistoryStore()
+    history.append(message)
+    for page in history.iter_pages(100):       # affichage, synthèse: page par page
+        ...
+    for index, message in history.search("cache", role="user"):
+        ...
+
+Les segments sont immuables et supprimés quand plus aucun historique (ou instantané
+pris par snapshot()) ne les référence.
+"""
+
+import bisect
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from response_parser import loads_json
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+WINDOW = _env_int("ROB1_HISTORY_WINDOW", 200)
+MEMORY_BYTES = _env_int("ROB1_HISTORY_MEMORY_BYTES", 2 * 1024 * 1024)
+SPILL_DIR = os.environ.get("ROB1_HISTORY_DIR") or None
+PAGE_SIZE = 100
+# Taille estimée d'un message hors contenu (dict, horodatage, compteurs)
+MESSAGE_OVERHEAD = 400
+
+
+def _message_bytes(message: Dict[str, Any]) -> int:
+    return len(message.get('content', '')) + MESSAGE_OVERHEAD
+
+
+class _SpillDirectory:
+    """Répertoire des segments d'un historique, supprimé avec son dernier segment"""
+
+    def __init__(self, parent: Optional[str]):
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="rob1_history_", dir=parent)
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.path, True)
+
+
+class _Segment:
+    """Messages écrits sur disque (JSONL), fichier supprimé quand le segment est libéré"""
+
+    def __init__(self, directory: _SpillDirectory, number: int, messages: List[Dict[str, Any]]):
+        self.directory = directory
+        self.path = os.path.join(directory.path, f"segment_{number:06d}.jsonl")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for message in messages:
+                f.write(json.dumps(message, ensure_ascii=False, separators=(',', ':')))
+                f.write("\n")
+        self.count = len(messages)
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def read(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in islice(f, start, None):
+                yield loads_json(line)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class HistoryStore:
+    """Liste de messages bornée en mémoire; les messages anciens sont paginés sur disque"""
+
+    def __init__(self, window: int = WINDOW, memory_bytes: int = MEMORY_BYTES,
+                 spill_dir: Optional[str] = SPILL_DIR):
+        self.window = max(window, 1)
+        self.memory_bytes = memory_bytes
+        self.spill_dir = spill_dir
+        self._lock = threading.RLock()
+        self._recent: List[Dict[str, Any]] = []
+        self._recent_bytes = 0
+        self._segments: List[_Segment] = []
+        # Index global du premier message de chaque segment (recherche par bisect)
+        self._starts: List[int] = []
+        self._spilled = 0
+        self._directory: Optional[_SpillDirectory] = None
+        self._segment_number = 0
+        self._spill_failed = False
+        # Incrémenté à chaque clear() (réinitialisation, synthèse): les vues se reconstruisent
+        self.generation = 0
+        self.total_words = 0
+        self.total_sentences = 0
+
+    # ------------------------------------------------------------ Interface liste
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._recent)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page in self.iter_pages():
+            yield from page
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if isinstance(index, slice):
+            selected = range(len(self))[index]
+            if selected.step != 1:
+                return list(self)[index]
+            return list(islice(self.iter_from(selected.start), len(selected)))
+        with self._lock:
+            total = len(self)
+            if index < 0:
+                index += total
+            if not 0 <= index < total:
+                raise IndexError("index d'historique hors limites")
+            if index >= self._spilled:
+                return self._recent[index - self._spilled]
+            position = bisect.bisect_right(self._starts, index) - 1
+            segment, offset = self._segments[position], index - self._starts[position]
+        return next(segment.read(offset))
+
+    def __repr__(self) -> str:
+        return f"HistoryStore({len(self)} messages, {self._spilled} sur disque)"
+
+    def append(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self._recent.append(message)
+            self._recent_bytes += _message_bytes(message)
+            self.total_words += message.get('word_count', 0)
+            self.total_sentences += message.get('sentence_count', 0)
+            if not self._spill_failed and (len(self._recent) > self.window + PAGE_SIZE
+                                           or self._recent_bytes > self.memory_bytes):
+                self._spill()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent = []
+            self._recent_bytes = 0
+            self._segments = []
+            self._starts = []
+            self._spilled = 0
+            self._directory = None
+            self.generation += 1
+            self.total_words = 0
+            self.total_sentences = 0
+
+    # ------------------------------------------------------------ Débordement
+
+    def _spill(self) -> None:
+        """Écrit les plus anciens messages en mémoire dans un nouveau segment"""
+        count = 0
+        remaining_bytes = self._recent_bytes
+        # Retour sous la fenêtre et aux 3/4 du budget mémoire, au moins un message gardé
+        while count < len(self._recent) - 1 and (len(self._recent) - count > self.window
+                                                 or remaining_bytes > self.memory_bytes * 3 // 4):
+            remaining_bytes -= _message_bytes(self._recent[count])
+            count += 1
+        if not count:
+            return
+        try:
+            if self._directory is None:
+                self._directory = _SpillDirectory(self.spill_dir)
+            self._segment_number += 1
+            segment = _Segment(self._directory, self._segment_number, self._recent[:count])
+        except OSError as e:
+            # Disque indisponible: l'historique reste en mémoire plutôt que de perdre des messages
+            logger.warning(f"[HistoryStore] Débordement sur disque impossible, historique gardé en mémoire: {e}")
+            self._spill_failed = True
+            return
+        self._segments.append(segment)
+        self._starts.append(self._spilled)
+        self._spilled += count
+        self._recent = self._recent[count:]
+        self._recent_bytes = remaining_bytes
+        logger.debug(f"[HistoryStore] {count} message(s) écrits dans {segment.path} "
+                     f"({self._spilled} sur disque, {len(self._recent)} en mémoire)")
+
+    # ------------------------------------------------------------ Lecture paginée
+
+    def _view(self) -> Tuple[List[_Segment], List[int], List[Dict[str, Any]]]:
+        """Instantané cohérent (segments immuables + copie de la fenêtre mémoire)"""
+        with self._lock:
+            return list(self._segments), list(self._starts), list(self._recent)
+
+    def iter_pages(self, page_size: int = PAGE_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Messages par pages, du plus ancien au plus récent; un seul segment lu à la fois"""
+        segments, _starts, recent = self._view()
+        for segment in segments:
+            reader = segment.read()
+            while True:
+                page = list(islice(reader, page_size))
+                if not page:
+                    break
+                yield page
+        for start in range(0, len(recent), page_size):
+            yield recent[start:start + page_size]
+
+    def iter_from(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Messages à partir de l'index global start (segments précédents non relus)"""
+        segments, starts, recent = self._view()
+        spilled = starts[-1] + segments[-1].count if segments else 0
+        if start < 0:
+            start = max(spilled + len(recent) + start, 0)
+        for segment, first in zip(segments, starts):
+            if start < first + segment.count:
+                yield from segment.read(max(start - first, 0))
+        yield from recent[max(start - spilled, 0):]
+
+    def recent(self, count: int) -> List[Dict[str, Any]]:
+        """Les count derniers messages (mémoire seule si la fenêtre suffit)"""
+        with self._lock:
+            if count <= len(self._recent):
+                return self._recent[len(self._recent) - count:] if count > 0 else []
+        return list(self.iter_from(-count))
+
+    def search(self, text: str, role: Optional[str] = None,
+               limit: Optional[int] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(index, message) dont le contenu contient text (insensible à la casse), en flux"""
+        needle = text.lower()
+        found = 0
+        for index, message in enumerate(self):
+            if role is not None and message.get('role') != role:
+                continue
+            if needle in message.get('content', '').lower():
+                yield index, message
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def snapshot(self) -> "HistoryStore":
+        """Copie indépendante partageant les segments déjà écrits (aucune relecture)"""
+        copy = HistoryStore(self.window, self.memory_bytes, self.spill_dir)
+        with self._lock:
+            copy._segments = list(self._segments)
+            copy._starts = list(self._starts)
+            copy._spilled = self._spilled
+            copy._recent = list(self._recent)
+            copy._recent_bytes = self._recent_bytes
+            copy.total_words = self.total_words
+            copy.total_sentences = self.total_sentences
+        return copy
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'messages': len(self),
+                'in_memory': len(self._recent),
+                'in_memory_bytes': self._recent_bytes,
+                'spilled': self._spilled,
+                'segments': len(self._segments),
+                'spill_dir': self._directory.path if self._directory else None,
+            }
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History View - Affichage incrémental de l'historique dans un widget Text
+
+Au lieu de reconstruire get_display_history() et de réécrire tout le widget à
+chaque tour, la vue n'insère que les messages ajoutés depuis le dernier rendu.
+Une synthèse ou une réinitialisation (résumé changé, HistoryStore.generation
+incrémentée) provoque un seul remplacement complet.
+
+Mode virtualisé (ROB1_HISTORY_VIEW_MESSAGES, 300 par défaut, 0 = désactivé):
+seuls les derniers messages restent dans le widget, les plus anciens sont
+remplacés par une ligne "[… N message(s) précédent(s) …]". Quand l'utilisateur
+remonte en haut du widget, une page plus ancienne est relue depuis l'historique.
+Le coût par tour reste constant quelle que soit la longueur de la conversation.
+
+    vue = get_history_view(champ_history, conversation_manager)
+    vue.refresh()          # après chaque tour (ajout seul, ou remplacement si synthèse)
+
+Le texte produit est identique à get_display_history() tant qu'aucun message
+n'est masqué.
+"""
+
+import logging
+import os
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    VIEW_MESSAGES = int(os.environ.get("ROB1_HISTORY_VIEW_MESSAGES", 300))
+except ValueError:
+    VIEW_MESSAGES = 300
+# Messages relus d'un coup quand l'utilisateur remonte en haut du widget
+OLDER_PAGE = 100
+# Marge avant de retirer des messages du widget (un retrait groupé plutôt qu'un par tour)
+TRIM_SLACK = 50
+
+
+class HistoryView:
+    """Rendu incrémental et virtualisé d'un ConversationManager dans un widget Text"""
+
+    def __init__(self, widget, conversation, max_messages: int = VIEW_MESSAGES):
+        # Référence faible: la vue est la valeur de _views (clé faible = widget), une référence
+        # forte empêcherait de libérer le widget détruit et sa vue
+        self._widget_ref = weakref.ref(widget)
+        self.conversation = conversation
+        self.max_messages = max_messages if max_messages and max_messages > 0 else None
+        # Index global du prochain message à rendre et du premier message présent dans le widget
+        self._rendered = 0
+        self._first_shown = 0
+        # Nombre de lignes de chaque message présent dans le widget (du plus ancien au plus récent)
+        self._line_counts: Deque[int] = deque()
+        # Lignes avant le premier message (bloc résumé, ligne des messages masqués)
+        self._header_lines = 0
+        self._has_marker = False
+        self._has_content = False
+        self._state_key = None
+        self._hook_scroll()
+
+    @property
+    def widget(self):
+        return self._widget_ref()
+
+    # ------------------------------------------------------------ Rendu
+
+    def _key(self):
+        history = self.conversation.conversation_history
+        return (getattr(history, 'generation', None), self.conversation.summary_count,
+                self.conversation.current_summary)
+
+    def refresh(self) -> None:
+        """Met le widget à jour: ajout des nouveaux messages, ou remplacement après synthèse"""
+        history = self.conversation.conversation_history
+        total = len(history)
+        if self._key() != self._state_key or total < self._rendered:
+            self.rebuild()
+            return
+        if total == self._rendered:
+            return
+        if hasattr(history, 'iter_from'):
+            messages = list(history.iter_from(self._rendered))
+        else:
+            messages = list(history)[self._rendered:]
+        with self._editable():
+            self._append(messages)
+            self._trim()
+
+    def rebuild(self) -> None:
+        """Remplacement complet (un seul insert): résumé, messages masqués, derniers messages"""
+        history = self.conversation.conversation_history
+        total = len(history)
+        first = max(total - self.max_messages, 0) if self.max_messages else 0
+        if hasattr(history, 'iter_from'):
+            messages = list(history.iter_from(first))
+        else:
+            messages = list(history)[first:]
+
+        blocks = []
+        self._header_lines = 0
+        summary = self.conversation.format_display_summary()
+        if summary:
+            blocks.append(summary)
+            self._header_lines += summary.count("\n") + 1
+        self._has_marker = first > 0
+        if self._has_marker:
+            blocks.append(self._marker_text(first))
+            self._header_lines += 1
+        lines = [self.conversation.format_display_message(message) for message in messages]
+        self._line_counts = deque(line.count("\n") + 1 for line in lines)
+        blocks.extend(lines)
+
+        with self._editable():
+            self.widget.delete('1.0', 'end')
+            if blocks:
+                self.widget.insert('end', "\n".join(blocks))
+            self.widget.see('end')
+        self._has_content = bool(blocks)
+        self._first_shown = first
+        self._rendered = first + len(messages)
+        self._state_key = self._key()
+        logger.debug(f"[HistoryView] Rendu complet: {len(messages)} message(s) affiché(s) sur {total}")
+
+    def _append(self, messages: List[Dict[str, Any]]) -> None:
+        lines = [self.conversation.format_display_message(message) for message in messages]
+        text = "\n".join(lines)
+        self.widget.insert('end', ("\n" + text) if self._has_content else text)
+        self._has_content = True
+        self._line_counts.extend(line.count("\n") + 1 for line in lines)
+        self._rendered += len(messages)
+
+    def _trim(self) -> None:
+        """Retire du widget les messages les plus anciens au-delà de la fenêtre"""
+        if not self.max_messages or len(self._line_counts) <= self.max_messages + TRIM_SLACK:
+            return
+        count = len(self._line_counts) - self.max_messages
+        lines = sum(self._line_counts.popleft() for _ in range(count))
+        start = self._header_lines + 1
+        self.widget.delete(f"{start}.0", f"{start + lines}.0")
+        self._first_shown += count
+        self._update_marker()
+
+    # ------------------------------------------------------------ Messages masqués
+
+    @staticmethod
+    def _marker_text(hidden: int) -> str:
+        return f"[… {hidden} message(s) précédent(s) …]"
+
+    def _update_marker(self) -> None:
+        marker_line = self._header_lines if self._has_marker else self._header_lines + 1
+        if self._first_shown and self._has_marker:
+            self.widget.delete(f"{marker_line}.0", f"{marker_line}.end")
+            self.widget.insert(f"{marker_line}.0", self._marker_text(self._first_shown))
+        elif self._first_shown:
+            self.widget.insert(f"{marker_line}.0", self._marker_text(self._first_shown) + "\n")
+            self._has_marker = True
+            self._header_lines += 1
+        elif self._has_marker:
+            self.widget.delete(f"{marker_line}.0", f"{marker_line + 1}.0")
+            self._has_marker = False
+            self._header_lines -= 1
+
+    def show_older(self, count: int = OLDER_PAGE) -> int:
+        """Réinsère une page de messages masqués en haut du widget; retourne le nombre affiché"""
+        if not self._first_shown or self._key() != self._state_key:
+            return 0
+        start = max(self._first_shown - count, 0)
+        messages = self.conversation.conversation_history[start:self._first_shown]
+        if not messages:
+            return 0
+        lines = [self.conversation.format_display_message(message) for message in messages]
+        with self._editable():
+            self.widget.insert(f"{self._header_lines + 1}.0", "\n".join(lines) + "\n")
+            self._line_counts.extendleft(reversed([line.count("\n") + 1 for line in lines]))
+            self._first_shown = start
+            self._update_marker()
+        return len(messages)
+
+    def _hook_scroll(self) -> None:
+        """Intercepte la barre de défilement: page plus ancienne chargée en arrivant en haut"""
+        scrollbar = getattr(self.widget, 'vbar', None)
+        if scrollbar is None or not self.max_messages:
+            return
+        view = weakref.ref(self)
+        previous = [1.0]
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            current = view()
+            # Seulement quand la vue remonte jusqu'en haut (pas après un rendu complet)
+            if current is not None and current._first_shown and float(first) <= 0.0 < previous[0]:
+                current.widget.after_idle(current._load_older_keep_position)
+            previous[0] = float(first)
+
+        self.widget.configure(yscrollcommand=on_scroll)
+
+    def _load_older_keep_position(self) -> None:
+        # Les lignes insérées au-dessus ne doivent pas déplacer la vue de l'utilisateur
+        before = int(self.widget.index("@0,0").split(".")[0])
+        shown = self.show_older()
+        if shown:
+            added = sum(list(self._line_counts)[:shown])
+            self.widget.yview(f"{before + added - (0 if self._has_marker else 1)}.0")
+
+    # ------------------------------------------------------------ Utilitaires
+
+    def _editable(self):
+        return _EditableWidget(self.widget)
+
+
+class _EditableWidget:
+    """Rend le widget modifiable le temps d'une mise à jour (état d'origine restauré)"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.state = None
+
+    def __enter__(self):
+        self.state = str(self.widget.cget('state'))
+        if self.state == 'disabled':
+            self.widget.configure(state='normal')
+        return self.widget
+
+    def __exit__(self, *exc_info):
+        if self.state == 'disabled':
+            self.widget.configure(state='disabled')
+
+
+_views: "weakref.WeakKeyDictionary[Any, HistoryView]" = weakref.WeakKeyDictionary()
+
+
+def get_history_view(widget, conversation, max_messages: Optional[int] = None) -> HistoryView:
+    """Vue attachée au widget (créée au premier appel, recréée si la conversation change)"""
+    view = _views.get(widget)
+    if view is None or view.conversation is not conversation:
+        view = HistoryView(widget, conversation, VIEW_MESSAGES if max_messages is None else max_messages)
+        _views[widget] = view
+    return view
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Logging Setup - Journalisation asynchrone, structurée et filtrée par niveau
+
+- Les appelants ne font qu'empiler l'enregistrement (QueueHandler); un thread
+  QueueListener formate, masque les secrets et écrit sur disque
+- application.log: un objet JSON par ligne (ts, level, logger, thread, message, exc)
+- debug_curl.log: logger "rob1.curl", actif seulement en DEBUG ou avec ROB1_CURL_LOG=1
+- Rotation par taille et par âge (ROB1_LOG_MAX_BYTES, ROB1_LOG_ROTATE_HOURS, ROB1_LOG_BACKUPS)
+- Masquage intégré: clés API connues (register_secret) et motifs usuels
+  (sk-..., AIza..., Bearer ..., x-api-key, "api_key": "...", ?key=...)
+
+Niveau: ROB1_LOG_LEVEL (défaut INFO). En production, WARNING rend les appels
+logger.debug/info quasi gratuits (simple test de niveau, rien n'est mis en file).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Set
+
+APPLICATION_LOG = "application.log"
+CURL_LOG = "debug_curl.log"
+CURL_LOGGER = "rob1.curl"
+
+LOG_LEVEL = os.environ.get("ROB1_LOG_LEVEL", "INFO").upper()
+CURL_LOG_ENABLED = os.environ.get("ROB1_CURL_LOG", "0") not in ("0", "false", "False", "")
+try:
+    MAX_BYTES = int(os.environ.get("ROB1_LOG_MAX_BYTES", 10 * 1024 * 1024))
+    BACKUP_COUNT = int(os.environ.get("ROB1_LOG_BACKUPS", 5))
+    ROTATE_SECONDS = float(os.environ.get("ROB1_LOG_ROTATE_HOURS", 24)) * 3600
+except ValueError:
+    MAX_BYTES, BACKUP_COUNT, ROTATE_SECONDS = 10 * 1024 * 1024, 5, 24 * 3600
+
+REDACTED = "***"
+MIN_SECRET_LENGTH = 8
+SECRET_PATTERNS = [
+    # Clés de fournisseurs (OpenAI/Anthropic/DeepSeek sk-..., Google AIza..., xAI xai-...)
+    (re.compile(r'\b(sk-[A-Za-z0-9_\-]{3})[A-Za-z0-9_\-]{12,}'), r'\1' + REDACTED),
+    (re.compile(r'\b(AIza)[0-9A-Za-z_\-]{20,}'), r'\1' + REDACTED),
+    (re.compile(r'\b(xai-)[A-Za-z0-9]{16,}'), r'\1' + REDACTED),
+    # En-têtes et paramètres d'authentification
+    (re.compile(r'(?i)(authorization:\s*bearer\s+)[^\s"\'\\]+'), r'\1' + REDACTED),
+    (re.compile(r'(?i)((?:x-api-key|x-goog-api-key|api-key):\s*)[^\s"\'\\]+'), r'\1' + REDACTED),
+    (re.compile(r'(?i)([?&](?:key|api_key)=)[^&\s"\']+'), r'\1' + REDACTED),
+    # Champs JSON / Python
+    (re.compile(r'(?i)(["\']?api_?key["\']?\s*[:=]\s*["\'])[^"\']+'), r'\1' + REDACTED),
+]
+
+_secrets: Set[str] = set()
+_secrets_lock = threading.Lock()
+_secrets_pattern: Optional[re.Pattern] = None
+
+
+def register_secret(value: Optional[str]) -> None:
+    """Ajoute une valeur (clé API d'un profil) à masquer dans tous les journaux"""
+    global _secrets_pattern
+    if not value or not isinstance(value, str) or len(value) < MIN_SECRET_LENGTH:
+        return
+    with _secrets_lock:
+        if value in _secrets:
+            return
+        _secrets.add(value)
+        # Les plus longues d'abord: une clé ne masque pas partiellement une autre
+        alternatives = sorted(_secrets, key=len, reverse=True)
+        _secrets_pattern = re.compile("|".join(re.escape(s) for s in alternatives))
+
+
+def redact(text: str) -> str:
+    """Masque les secrets connus et les motifs de clés dans un texte"""
+    pattern = _secrets_pattern
+    if pattern is not None:
+        text = pattern.sub(REDACTED, text)
+    for regex, replacement in SECRET_PATTERNS:
+        text = regex.sub(replacement, text)
+    return text
+
+
+class RedactingFilter(logging.Filter):
+    """Masque les secrets du message (exécuté dans le thread d'écriture)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+class LoggerNameFilter(logging.Filter):
+    """Sélectionne (include=True) ou exclut les enregistrements d'un logger et de ses enfants"""
+
+    def __init__(self, name: str, include: bool):
+        super().__init__()
+        self.prefix = name
+        self.include = include
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        matches = record.name == self.prefix or record.name.startswith(self.prefix + ".")
+        return matches if self.include else not matches
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objet JSON par ligne"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotation dès que le fichier dépasse max_bytes ou que la période est écoulée"""
+
+    def __init__(self, filename: str, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT,
+                 interval_seconds: float = ROTATE_SECONDS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.interval_seconds = interval_seconds
+        try:
+            period_start = os.path.getmtime(filename)
+        except OSError:
+            period_start = time.time()
+        self.next_rollover = period_start + interval_seconds
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval_seconds > 0 and time.time() >= self.next_rollover:
+            return os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.next_rollover = time.time() + self.interval_seconds
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Met en file le message résolu; la trace d'exception reste un champ séparé"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_exception_formatter = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None, log_file: str = APPLICATION_LOG, console: bool = True,
+                  curl_log: Optional[bool] = None) -> logging.handlers.QueueListener:
+    """
+    Configure le logger racine (une seule fois par processus)
+
+    Args:
+        level: Niveau (défaut ROB1_LOG_LEVEL)
+        log_file: Journal applicatif JSON
+        console: Copie lisible sur la sortie d'erreur
+        curl_log: Active debug_curl.log (défaut: niveau DEBUG ou ROB1_CURL_LOG=1)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    numeric_level = logging.getLevelName(level or LOG_LEVEL)
+    if not isinstance(numeric_level, int):
+        numeric_level = logging.INFO
+    if curl_log is None:
+        curl_log = CURL_LOG_ENABLED or numeric_level <= logging.DEBUG
+
+    redacting = RedactingFilter()
+    app_handler = SizeAndTimeRotatingFileHandler(log_file)
+    app_handler.setFormatter(JsonFormatter())
+    app_handler.addFilter(LoggerNameFilter(CURL_LOGGER, include=False))
+    app_handler.addFilter(redacting)
+    handlers = [app_handler]
+
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+        console_handler.addFilter(LoggerNameFilter(CURL_LOGGER, include=False))
+        console_handler.addFilter(redacting)
+        handlers.append(console_handler)
+
+    curl_logger = logging.getLogger(CURL_LOGGER)
+    curl_logger.propagate = True
+    if curl_log:
+        curl_handler = SizeAndTimeRotatingFileHandler(CURL_LOG)
+        curl_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+        curl_handler.addFilter(LoggerNameFilter(CURL_LOGGER, include=True))
+        curl_handler.addFilter(redacting)
+        handlers.append(curl_handler)
+        curl_logger.setLevel(logging.DEBUG)
+    else:
+        # Désactivé: les appels du chemin chaud s'arrêtent au test de niveau
+        curl_logger.setLevel(logging.CRITICAL + 1)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(StructuredQueueHandler(log_queue))
+    root.setLevel(numeric_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Vide la file et ferme les fichiers (appelé automatiquement à la sortie)"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -1,23 +1,22 @@
+# startup en premier: sa référence de temps sert à mesurer le délai d'affichage
+from startup import timer as startup_timer, defer
+import argparse
 import logging
 import os
 import subprocess
-from gui import creer_interface
+import threading
+from logging_setup import setup_logging
+from metrics import start_metrics_endpoint, start_metrics_export
+from profiling import enable_from_environment as activer_profiling, profiler
 
 # Importation pour la création du lanceur OS-spécifique  
 import sys
 import platform
 import stat
 
-# Configuration des logs avec gestion d'erreurs
+# Configuration des logs (écriture asynchrone, JSON, rotation, niveau ROB1_LOG_LEVEL)
 try:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("application.log", encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    setup_logging()
 except Exception as e:
     print(f"Attention: Impossible de configurer les logs - {e}")
 
@@ -232,19 +231,80 @@ def ensure_templates_installed():
         logging.warning(f"⚠️ Erreur vérification templates: {e}")
         return False
 
-def main():
+def parse_arguments(argv=None):
+    """Options de ligne de commande"""
+    parser = argparse.ArgumentParser(description="Rob-1 - agents LLM multi-fournisseurs")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Affiche les temps d'import et d'initialisation du démarrage")
+    serveur = parser.add_argument_group("mode serveur (sans interface)")
+    serveur.add_argument("--serve", action="store_true",
+                         help="Démarre l'API locale HTTP au lieu de l'interface graphique")
+    serveur.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (défaut: 127.0.0.1)")
+    serveur.add_argument("--port", type=int, default=8780, help="Port d'écoute (défaut: 8780)")
+    serveur.add_argument("--socket", metavar="CHEMIN",
+                         help="Écoute sur un socket Unix au lieu de TCP")
+    return parser.parse_args(argv)
+
+def preflight_dependances_natives():
+    """Vérifie et installe les dépendances des templates des profils en mode natif"""
+    try:
+        from core.api_manager import APIManager
+        from native_manager import native_profile_providers, preflight_native_dependencies
+        providers = native_profile_providers(APIManager())
+        if providers:
+            preflight_native_dependencies(providers)
+    except Exception as e:
+        logging.warning(f"⚠️ Preflight des dépendances natives: {e}")
+
+def lancer_serveur(arguments):
+    """Mode --serve: processus chaud sans Tk, partagé par les clients locaux"""
+    # Pas de fenêtre: l'initialisation différée est faite immédiatement
+    initialisation_premier_lancement()
+    verifier_installation_curl()
+    ensure_templates_installed()
+    if start_metrics_endpoint():
+        print("📈 Endpoint métriques actif")
+    if start_metrics_export():
+        print("📈 Export fichier métriques actif")
+    if activer_profiling():
+        print("🔬 Profilage cProfile/tracemalloc actif")
+    
+    # Packages des profils natifs installés en arrière-plan, hors du chemin des requêtes
+    threading.Thread(target=preflight_dependances_natives, name="deps-preflight", daemon=True).start()
+    
+    # Profils et templates servis depuis la mémoire, modifications prises à chaud
+    from config_watcher import start_config_watcher
+    watcher = start_config_watcher(".")
+    print(f"👁️ Surveillance des profils et templates ({watcher.backend_name})")
+    
+    from headless_server import serve
+    try:
+        return serve(arguments.host, arguments.port, arguments.socket)
+    finally:
+        profiler.disable()
+        logging.info("🔄 Serveur arrêté")
+
+def main(argv=None):
     """Point d'entrée principal de l'application."""
+    arguments = parse_arguments(argv)
+    if arguments.startup_profile:
+        startup_timer.enabled = True
+    if arguments.serve:
+        logging.info("🚀 Rob-1 V2 démarré en mode serveur")
+        return lancer_serveur(arguments)
     logging.info("🚀 Application Rob-1 V2 démarrée")
     
     # === INITIALISATION PREMIER LANCEMENT ===
     print("📋 Initialisation système...")
     
-    # 1. Initialisation configuration par défaut
-    if not initialisation_premier_lancement():
-        print("❌ Échec initialisation - L'application va continuer avec les paramètres disponibles")
+    # 1. Interface: imports légers, les modules lourds sont chargés au premier usage
+    with startup_timer.measure("import gui"):
+        from gui import creer_interface
     
-    # 2. Vérification curl (pour mode curl par défaut)
-    verifier_installation_curl()
+    # 2. Profils par défaut (tâche "profils_defaut" enregistrée par gui) et vérification
+    #    curl: en arrière-plan après affichage de la fenêtre; les profils sont garantis
+    #    avant le premier accès à APIManager
+    defer("curl", verifier_installation_curl)
     
     # 3. S'assurer que les templates API sont correctement installés
     print("📁 Vérification templates...")
@@ -254,6 +314,17 @@ def main():
     print("🔧 Configuration lanceur système...")
     check_and_create_launcher()
     
+    # 5. Endpoint et fichier métriques Prometheus (ROB1_METRICS_PORT, ROB1_METRICS_FILE)
+    if start_metrics_endpoint():
+        print("📈 Endpoint métriques actif")
+    if start_metrics_export():
+        print("📈 Export fichier métriques actif")
+    
+    # 6. Profilage à la demande (ROB1_PROFILE=1)
+    if activer_profiling():
+        print("🔬 Profilage cProfile/tracemalloc actif")
+    
+    startup_timer.mark("initialisation synchrone terminée")
     print("✅ Initialisation terminée - Lancement interface")
     
     # === LANCEMENT INTERFACE ===
@@ -264,12 +335,14 @@ def main():
         print(f"❌ Erreur interface: {e}")
         raise
     finally:
+        # Écrire les profils partiels et le dernier diff mémoire
+        profiler.disable()
         logging.info("🔄 Application terminée")
 
 if __name__ == "__main__":
     logging.info("Initialisation de l'application... (Première instance)")
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         logging.critical(f"Erreur critique : {e}")
         print("Une erreur critique est survenue. Consultez les logs pour plus de détails.")
\ No newline at end of file
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics - Registre de métriques en processus (compteurs et histogrammes)
+
+Mesure chaque étape d'un tour de conversation par provider et modèle:
+chargement profil, rendu template, construction payload, lancement du processus,
+premier octet (TTFB), durée totale, parsing, synthèse et tokens entrée/sortie.
+
+Export au format texte Prometheus:
+- Fichier réécrit atomiquement par un thread de fond toutes les ROB1_METRICS_INTERVAL
+  secondes (15 par défaut) et à la sortie, seulement si ROB1_METRICS_FILE est défini
+- Endpoint HTTP local optionnel /metrics (ROB1_METRICS_PORT)
+
+Les percentiles p50/p95/p99 sont calculés sur une fenêtre glissante des dernières
+observations et exportés dans la famille <nom>_quantile.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from api_response_parser import provider_from_profile
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW_SIZE = 1024
+
+METRICS_FILE = os.environ.get("ROB1_METRICS_FILE", "")
+METRICS_PORT = os.environ.get("ROB1_METRICS_PORT", "")
+try:
+    METRICS_INTERVAL = max(float(os.environ.get("ROB1_METRICS_INTERVAL", 15.0)), 1.0)
+except ValueError:
+    METRICS_INTERVAL = 15.0
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """Percentile par interpolation linéaire (valeurs déjà triées)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class Counter:
+    """Compteur monotone étiqueté"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histogramme étiqueté à buckets cumulés + fenêtre glissante pour les percentiles"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], lock: threading.Lock,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = WINDOW_SIZE):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = lock
+        self._window = window
+        # clé -> [compteurs par bucket, somme, total, fenêtre]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=self._window)]
+                self._series[key] = series
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+            series[3].append(value)
+
+    def summary(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """{labels: {count, sum, p50, p95, p99}} (percentiles sur la fenêtre glissante)"""
+        with self._lock:
+            items = [(key, s[1], s[2], sorted(s[3])) for key, s in self._series.items()]
+        result = {}
+        for key, total, count, window in items:
+            entry = {"count": count, "sum": total}
+            for q in QUANTILES:
+                entry[f"p{int(q * 100)}"] = _quantile(window, q)
+            result[key] = entry
+        return result
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(s[0]), s[1], s[2], sorted(s[3])) for key, s in self._series.items()]
+        items.sort(key=lambda item: item[0])
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, counts, total, count, _window in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+
+        quantile_name = f"{self.name}_quantile"
+        lines.append(f"# HELP {quantile_name} {self.documentation} (percentiles sur les {self._window} dernières observations)")
+        lines.append(f"# TYPE {quantile_name} gauge")
+        for key, _counts, _total, _count, window in items:
+            for q in QUANTILES:
+                labels = _format_labels(self.labelnames, key, ("quantile", str(q)))
+                lines.append(f"{quantile_name}{labels} {_format_value(_quantile(window, q))}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registre thread-safe des métriques de l'application"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+        self._http_server: Optional[ThreadingHTTPServer] = None
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Retourne le compteur existant ou le crée"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, labelnames, threading.Lock())
+            return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Retourne l'histogramme existant ou le crée"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames, threading.Lock(), buckets)
+            return self._metrics[name]
+
+    def render_prometheus(self) -> str:
+        """Export complet au format texte Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str) -> bool:
+        """Écrit l'export dans un fichier (remplacement atomique pour le node exporter textfile)"""
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            # Fichier temporaire propre au thread: exports concurrents en mode serveur
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            logger.warning(f"[Metrics] Écriture {path} impossible: {e}")
+            return False
+
+    def start_http_server(self, port: int, host: str = "127.0.0.1") -> bool:
+        """Sert /metrics sur un port local dans un thread démon"""
+        if self._http_server is not None:
+            return True
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"[Metrics] Endpoint HTTP {host}:{port} indisponible: {e}")
+            return False
+        threading.Thread(target=self._http_server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"[Metrics] Endpoint Prometheus: http://{host}:{port}/metrics")
+        return True
+
+    def stop_http_server(self) -> None:
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+
+# Registre global et métriques de l'application
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "rob1_stage_duration_seconds",
+    "Durée des étapes d'un tour de conversation",
+    ("stage", "provider", "model")
+)
+TOKENS = registry.counter(
+    "rob1_tokens_total",
+    "Tokens consommés (direction=in|out)",
+    ("direction", "provider", "model")
+)
+REQUESTS = registry.counter(
+    "rob1_requests_total",
+    "Requêtes API par méthode et statut",
+    ("provider", "model", "method", "status")
+)
+RESPONSE_BYTES = registry.counter(
+    "rob1_response_bytes_total",
+    "Octets reçus des APIs",
+    ("provider", "model")
+)
+COST = registry.counter(
+    "rob1_cost_usd_total",
+    "Coût estimé des appels (prix du catalogue de modèles)",
+    ("provider", "model")
+)
+
+
+def profile_labels(profile: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """(provider, model) d'un profil V2 pour l'étiquetage"""
+    if not profile:
+        return "unknown", ""
+    values = profile.get('chat', {}).get('values', {})
+    return provider_from_profile(profile), str(values.get('llm_model', ''))
+
+
+def observe_stage(stage: str, seconds: float, provider: str = "", model: str = "") -> None:
+    """Enregistre la durée d'une étape"""
+    STAGE_DURATION.observe(seconds, stage=stage, provider=provider, model=model)
+
+
+@contextmanager
+def stage_timer(stage: str, provider: str = "", model: str = "") -> Iterator[None]:
+    """Chronomètre un bloc (histogramme + span de trace): with stage_timer("parse", provider, model): ..."""
+    start = time.perf_counter()
+    try:
+        with tracer.span(stage, provider=provider, model=model):
+            yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage, provider=provider, model=model)
+
+
+def record_tokens(usage: Optional[Dict[str, int]], provider: str = "", model: str = "") -> None:
+    """Ajoute l'usage normalisé {input_tokens, output_tokens} aux compteurs"""
+    if not usage:
+        return
+    if usage.get("input_tokens"):
+        TOKENS.inc(usage["input_tokens"], direction="in", provider=provider, model=model)
+    if usage.get("output_tokens"):
+        TOKENS.inc(usage["output_tokens"], direction="out", provider=provider, model=model)
+
+
+def record_cost(cost_usd: Optional[float], provider: str = "", model: str = "") -> None:
+    """Ajoute le coût estimé d'un appel (None si les prix du modèle sont inconnus)"""
+    if cost_usd:
+        COST.inc(cost_usd, provider=provider, model=model)
+
+
+def record_stream(result: Any, provider: str = "", model: str = "") -> None:
+    """Durées de lancement/TTFB et volume d'un StreamedResult (stream_parser), en métriques et en spans"""
+    started_ns = getattr(result, "started_ns", None)
+    for stage, seconds in (("spawn", getattr(result, "spawn_seconds", None)),
+                           ("ttfb", getattr(result, "ttfb_seconds", None)),
+                           ("process", getattr(result, "total_seconds", None))):
+        if seconds is None:
+            continue
+        if stage != "process":
+            observe_stage(stage, seconds, provider, model)
+        if started_ns is not None:
+            tracer.record_span(stage, started_ns, started_ns + int(seconds * 1e9))
+    extractor = getattr(result, "extractor", None)
+    if extractor is not None and extractor.bytes_received:
+        RESPONSE_BYTES.inc(extractor.bytes_received, provider=provider, model=model)
+
+
+def export_metrics() -> None:
+    """Réécrit le fichier Prometheus configuré (ROB1_METRICS_FILE)"""
+    if METRICS_FILE:
+        registry.write_prometheus_file(METRICS_FILE)
+
+
+_export_thread: Optional[threading.Thread] = None
+
+
+def start_metrics_export() -> bool:
+    """Réécrit ROB1_METRICS_FILE toutes les METRICS_INTERVAL secondes et à la sortie (jamais par requête)"""
+    global _export_thread
+    if not METRICS_FILE:
+        return False
+    if _export_thread is not None:
+        return True
+    stop = threading.Event()
+
+    def _run():
+        while not stop.wait(METRICS_INTERVAL):
+            export_metrics()
+
+    def _final_export():
+        stop.set()
+        export_metrics()
+
+    _export_thread = threading.Thread(target=_run, name="metrics-export", daemon=True)
+    _export_thread.start()
+    atexit.register(_final_export)
+    logger.info(f"[Metrics] Export {METRICS_FILE} toutes les {METRICS_INTERVAL:g} s")
+    return True
+
+
+def start_metrics_endpoint() -> bool:
+    """Démarre l'endpoint HTTP si ROB1_METRICS_PORT est défini"""
+    if not METRICS_PORT:
+        return False
+    try:
+        port = int(METRICS_PORT)
+    except ValueError:
+        logger.warning(f"[Metrics] ROB1_METRICS_PORT invalide: {METRICS_PORT}")
+        return False
+    return registry.start_http_server(port)
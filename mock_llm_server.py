@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mock LLM Server - Serveur local émulant les endpoints des dix providers
+
+Endpoints émulés (routage par suffixe de chemin, l'hôte est indifférent):
+- Gemini:  POST .../models/{model}:generateContent  et  :streamGenerateContent (SSE avec ?alt=sse)
+- OpenAI:  POST .../chat/completions  (aussi Mistral, Grok, DeepSeek, Kimi, Qwen, Perplexity, LMStudio)
+           POST .../responses
+- Claude:  POST .../messages
+- GET .../models (liste de modèles) et GET /__mock/stats (compteurs du serveur)
+
+Fonctionnalités:
+- Latence configurable: fixed:MS, uniform:MIN,MAX, normal:MOY,ECART, lognormal:MEDIANE,SIGMA
+- Streaming token par token (SSE) quand la requête le demande ("stream": true)
+- Injection d'erreurs: --errors 429=0.05,500=0.02 (réponses au format d'erreur du provider)
+- Mode echo: la réponse reprend le dernier message utilisateur
+
+Usage:
+    python mock_llm_server.py --port 8765 --latency lognormal:300,0.5 --errors 429=0.05 --echo
+Puis dans un profil: "chat": {"base_url": "http://127.0.0.1:8765", ...}
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+_LOREM = (
+    "Voici une réponse simulée par le serveur local de test. Elle reproduit la forme des "
+    "réponses des fournisseurs sans appel réseau ni coût. Les compteurs de tokens sont "
+    "approximés à partir du nombre de mots afin que les métriques restent cohérentes."
+).split()
+
+
+class LatencyDistribution:
+    """Distribution de latence en millisecondes"""
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v.strip()] if params else []
+        self.kind = kind.strip().lower()
+        self.values = values
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Distribution inconnue: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}[self.kind]
+        if len(values) != expected:
+            raise ValueError(f"{self.kind} attend {expected} paramètre(s): {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Tirage en secondes (jamais négatif)"""
+        v = self.values
+        if self.kind == "fixed":
+            ms = v[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(v[0], v[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(v[0], v[1])
+        else:
+            # lognormal: médiane en ms et sigma du log
+            ms = v[0] * math.exp(rng.gauss(0, v[1]))
+        return max(ms, 0.0) / 1000.0
+
+
+class MockConfig:
+    """Configuration du serveur mock (modifiable à chaud via l'attribut server.config)"""
+
+    def __init__(self, latency: str = "fixed:0", token_delay_ms: float = 0.0,
+                 errors: Optional[Dict[int, float]] = None, echo: bool = False,
+                 response_words: int = 60, seed: Optional[int] = None):
+        self.latency = LatencyDistribution(latency)
+        self.token_delay = token_delay_ms / 1000.0
+        self.errors = dict(errors or {})
+        self.echo = echo
+        self.response_words = response_words
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def draw_latency(self) -> float:
+        with self.rng_lock:
+            return self.latency.sample(self.rng)
+
+    def draw_error(self) -> Optional[int]:
+        """Code HTTP d'erreur injecté pour cette requête, ou None"""
+        if not self.errors:
+            return None
+        with self.rng_lock:
+            roll = self.rng.random()
+        cumulative = 0.0
+        for status, probability in sorted(self.errors.items()):
+            cumulative += probability
+            if roll < cumulative:
+                return status
+        return None
+
+
+def parse_errors(spec: str) -> Dict[int, float]:
+    """'429=0.05,500=0.02' -> {429: 0.05, 500: 0.02}"""
+    errors = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        status, _, probability = item.partition("=")
+        errors[int(status)] = float(probability)
+    if sum(errors.values()) > 1:
+        raise ValueError("La somme des probabilités d'erreur dépasse 1")
+    return errors
+
+
+# ---------------------------------------------------------------- Formats providers
+
+def _content_text(content: Any) -> str:
+    """Texte d'un contenu de message (chaîne ou liste de blocs)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(_content_text(part.get("text", part.get("content", "")) if isinstance(part, dict) else part)
+                        for part in content)
+    return ""
+
+
+def last_user_text(provider: str, body: Dict[str, Any]) -> str:
+    """Dernier message utilisateur de la requête selon le format du provider"""
+    if provider == "gemini":
+        for content in reversed(body.get("contents") or []):
+            if isinstance(content, dict) and content.get("role", "user") == "user":
+                return " ".join(p.get("text", "") for p in content.get("parts") or [] if isinstance(p, dict))
+        return ""
+    if provider == "openai_responses":
+        data = body.get("input", "")
+        if isinstance(data, list):
+            users = [m for m in data if isinstance(m, dict) and m.get("role") == "user"]
+            return _content_text(users[-1].get("content")) if users else ""
+        return str(data)
+    for message in reversed(body.get("messages") or []):
+        if isinstance(message, dict) and message.get("role") == "user":
+            return _content_text(message.get("content"))
+    return ""
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text.split()))
+
+
+def build_response(provider: str, model: str, text: str, prompt_tokens: int) -> Dict[str, Any]:
+    """Corps de réponse non streamée au format du provider"""
+    completion_tokens = _count_tokens(text)
+    total = prompt_tokens + completion_tokens
+    created = int(time.time())
+
+    if provider == "gemini":
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                              "totalTokenCount": total},
+            "modelVersion": model,
+        }
+    if provider == "claude":
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant", "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens},
+        }
+    if provider == "openai_responses":
+        return {
+            "id": f"resp_{uuid.uuid4().hex}", "object": "response", "created_at": created,
+            "status": "completed", "model": model,
+            "output": [{"type": "message", "id": f"msg_{uuid.uuid4().hex[:16]}", "status": "completed",
+                        "role": "assistant",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": total},
+        }
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion", "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": total},
+    }
+
+
+def stream_events(provider: str, model: str, tokens: List[str], prompt_tokens: int) -> Iterator[str]:
+    """Événements SSE (lignes 'data:' déjà formatées) au format de streaming du provider"""
+    completion_tokens = len(tokens)
+    total = prompt_tokens + completion_tokens
+
+    if provider == "gemini":
+        for i, token in enumerate(tokens):
+            chunk = {"candidates": [{"content": {"parts": [{"text": token}], "role": "model"}, "index": 0}]}
+            if i == len(tokens) - 1:
+                chunk["candidates"][0]["finishReason"] = "STOP"
+                chunk["usageMetadata"] = {"promptTokenCount": prompt_tokens,
+                                          "candidatesTokenCount": completion_tokens, "totalTokenCount": total}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        return
+
+    if provider == "claude":
+        message_id = f"msg_{uuid.uuid4().hex[:24]}"
+        yield _sse("message_start", {"type": "message_start", "message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "usage": {"input_tokens": prompt_tokens, "output_tokens": 0}}})
+        yield _sse("content_block_start", {"type": "content_block_start", "index": 0,
+                                           "content_block": {"type": "text", "text": ""}})
+        for token in tokens:
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                               "delta": {"type": "text_delta", "text": token}})
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                     "usage": {"output_tokens": completion_tokens}})
+        yield _sse("message_stop", {"type": "message_stop"})
+        return
+
+    if provider == "openai_responses":
+        response_id = f"resp_{uuid.uuid4().hex}"
+        yield _sse("response.created", {"type": "response.created",
+                                        "response": {"id": response_id, "status": "in_progress", "model": model}})
+        for token in tokens:
+            yield _sse("response.output_text.delta", {"type": "response.output_text.delta",
+                                                      "output_index": 0, "content_index": 0, "delta": token})
+        final = build_response(provider, model, "".join(tokens), prompt_tokens)
+        final["id"] = response_id
+        yield _sse("response.completed", {"type": "response.completed", "response": final})
+        return
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    for i, token in enumerate(tokens):
+        delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                 "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+    final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+             "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": total}}
+    yield f"data: {json.dumps(final, ensure_ascii=False)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def build_error(provider: str, status: int) -> Dict[str, Any]:
+    """Corps d'erreur au format du provider"""
+    messages = {429: "Rate limit exceeded (mock)", 500: "Internal server error (mock)",
+                502: "Bad gateway (mock)", 503: "Service unavailable (mock)", 529: "Overloaded (mock)"}
+    message = messages.get(status, f"Mock error {status}")
+    if provider == "gemini":
+        statuses = {429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}
+        return {"error": {"code": status, "message": message, "status": statuses.get(status, "INTERNAL")}}
+    if provider == "claude":
+        types = {429: "rate_limit_error", 529: "overloaded_error"}
+        return {"type": "error", "error": {"type": types.get(status, "api_error"), "message": message}}
+    types = {429: "rate_limit_exceeded"}
+    return {"error": {"message": message, "type": types.get(status, "server_error"), "code": status}}
+
+
+def route(path: str) -> Tuple[Optional[str], str, bool]:
+    """(provider, modèle extrait du chemin, streaming Gemini) pour un chemin POST"""
+    if ":streamGenerateContent" in path:
+        return "gemini", path.rsplit("/", 1)[-1].split(":")[0], True
+    if ":generateContent" in path:
+        return "gemini", path.rsplit("/", 1)[-1].split(":")[0], False
+    if path.endswith("/chat/completions"):
+        return "openai_chat", "", False
+    if path.endswith("/responses"):
+        return "openai_responses", "", False
+    if path.endswith("/messages"):
+        return "claude", "", False
+    return None, "", False
+
+
+# ---------------------------------------------------------------- Serveur
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread portant la configuration et les statistiques"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig):
+        super().__init__(address, MockRequestHandler)
+        self.config = config
+        self.stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.port}"
+
+    def count(self, key: str) -> None:
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockLLMServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/__mock/stats":
+            with self.server.stats_lock:
+                self._send_json(200, dict(self.server.stats))
+            return
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": "mock-model", "object": "model", "owned_by": "mock"}]})
+            return
+        self._send_json(404, {"error": {"message": f"Route inconnue: {path}"}})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        provider, model, gemini_stream = route(parsed.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        if provider is None:
+            self.server.count("404")
+            self._send_json(404, {"error": {"message": f"Route inconnue: {parsed.path}"}})
+            return
+        try:
+            body = json.loads(raw.decode("utf-8")) if raw else {}
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            self.server.count(f"{provider}:400")
+            self._send_json(400, {"error": {"message": f"JSON invalide: {e}", "type": "invalid_request_error"}})
+            return
+
+        config = self.server.config
+        time.sleep(config.draw_latency())
+
+        status = config.draw_error()
+        if status is not None:
+            self.server.count(f"{provider}:{status}")
+            headers = {"Retry-After": "1"} if status == 429 else None
+            self._send_json(status, build_error(provider, status), headers)
+            return
+
+        model = model or str(body.get("model") or "mock-model")
+        prompt = last_user_text(provider, body)
+        prompt_tokens = _count_tokens(prompt) if prompt else 1
+        if config.echo:
+            text = prompt or "(echo vide)"
+        else:
+            with config.rng_lock:
+                text = " ".join(config.rng.choice(_LOREM) for _ in range(config.response_words))
+
+        streaming = gemini_stream or bool(body.get("stream"))
+        if gemini_stream and parse_qs(parsed.query).get("alt", [""])[0] != "sse":
+            # Sans alt=sse, Gemini renvoie un tableau JSON de fragments
+            streaming = False
+            self.server.count(f"{provider}:200")
+            chunks = [build_response(provider, model, token, prompt_tokens) for token in _tokenize(text)]
+            body_bytes = json.dumps(chunks, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body_bytes)))
+            self.end_headers()
+            self.wfile.write(body_bytes)
+            return
+
+        self.server.count(f"{provider}:200")
+        if not streaming:
+            self._send_json(200, build_response(provider, model, text, prompt_tokens))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in stream_events(provider, model, _tokenize(text), prompt_tokens):
+                self.wfile.write(event.encode("utf-8"))
+                self.wfile.flush()
+                if config.token_delay:
+                    time.sleep(config.token_delay)
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.count(f"{provider}:client_disconnect")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Découpe en 'tokens' (mots avec leur espace) pour le streaming"""
+    words = text.split(" ")
+    return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **config_kwargs) -> MockLLMServer:
+    """
+    Démarre le serveur dans un thread démon (port 0 = port libre choisi par le système)
+
+    Returns:
+        MockLLMServer: server.base_url à placer dans chat.base_url, server.shutdown() pour arrêter
+    """
+    server = MockLLMServer((host, port), MockConfig(**config_kwargs))
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serveur mock des APIs LLM (tests de charge hors ligne)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:MS | uniform:MIN,MAX | normal:MOY,ECART | lognormal:MEDIANE,SIGMA")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Délai entre tokens streamés (ms)")
+    parser.add_argument("--errors", default="", help="Injection d'erreurs, ex: 429=0.05,500=0.02")
+    parser.add_argument("--echo", action="store_true", help="Répond avec le dernier message utilisateur")
+    parser.add_argument("--words", type=int, default=60, help="Longueur des réponses générées (mots)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency=args.latency, token_delay_ms=args.token_delay, errors=parse_errors(args.errors),
+                        echo=args.echo, response_words=args.words, seed=args.seed)
+    server = MockLLMServer((args.host, args.port), config)
+    print(f"🧪 Mock LLM server sur {server.base_url} (latence {args.latency}, erreurs {config.errors or 'aucune'})")
+    print(f"   Profil: \"chat\": {{\"base_url\": \"{server.base_url}\"}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Arrêt du serveur mock")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model Catalog - Catalogue des modèles par provider, chargé une fois et tenu à jour
+
+Source: templates/chat/<provider>/modeles.json
+    {
+      "models": ["gpt-4o", ...],
+      "default": "gpt-4o",
+      "defaults": {"context_window": 128000},                  # optionnel, tout le provider
+      "metadata": {                                             # optionnel, par modèle
+        "gpt-4o": {"context_window": 128000, "max_output_tokens": 16384,
+                   "input_price_per_mtok": 2.5, "output_price_per_mtok": 10.0}
+      }
+    }
+
+Les prix sont en USD par million de tokens. Les latences observées (moyenne
+mobile exponentielle des appels réussis) sont gardées en mémoire par modèle.
+Le fichier n'est relu que s'il change: événement du ConfigWatcher s'il tourne,
+sinon stat au plus une fois par CHECK_INTERVAL.
+
+    catalog = get_model_catalog()
+    names, default = catalog.models("openai")
+    catalog.context_budget("openai", "gpt-4o")                 # fenêtre - sortie max
+    catalog.estimate_cost("openai", "gpt-4o", {"input_tokens": 1200, "output_tokens": 300})
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config_watcher import add_config_listener, get_active_watcher
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join("templates", "chat")
+MODELS_FILE = "modeles.json"
+CHECK_INTERVAL = 1.0
+# Poids de la dernière mesure dans la latence moyenne observée
+LATENCY_ALPHA = 0.2
+METADATA_FIELDS = ("context_window", "max_output_tokens", "input_price_per_mtok", "output_price_per_mtok")
+
+
+class ModelCatalog:
+    """Modèles, métadonnées (contexte, sortie max, prix) et latences observées"""
+
+    def __init__(self, templates_dir: str = TEMPLATES_DIR, check_interval: float = CHECK_INTERVAL):
+        self.templates_dir = templates_dir
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        # provider -> {names, default, defaults, metadata, signature, checked_at}
+        self._providers: Dict[str, Dict[str, Any]] = {}
+        # (provider, modèle) -> {count, ewma_seconds, last_seconds, ewma_ttfb_seconds}
+        self._observed: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        add_config_listener(self._on_config_event, weak=True)
+
+    # ------------------------------------------------------------ Chargement
+
+    def _on_config_event(self, event: Dict[str, Any]) -> None:
+        if event['kind'] == 'models':
+            self.invalidate(event['name'])
+
+    def invalidate(self, provider: Optional[str] = None) -> None:
+        """Relecture au prochain accès (un provider ou tous)"""
+        with self._lock:
+            if provider is None:
+                self._providers.clear()
+            else:
+                self._providers.pop(provider.lower(), None)
+
+    def _watcher(self):
+        watcher = get_active_watcher()
+        if watcher and os.path.abspath(watcher.templates_dir) == os.path.abspath(self.templates_dir):
+            return watcher
+        return None
+
+    def _entry(self, provider: str) -> Dict[str, Any]:
+        provider = provider.lower()
+        path = os.path.join(self.templates_dir, provider, MODELS_FILE)
+        watcher = self._watcher()
+        with self._lock:
+            entry = self._providers.get(provider)
+            if entry is not None:
+                # Watcher actif: ses événements invalident l'entrée, aucun stat nécessaire
+                if watcher or time.monotonic() - entry['checked_at'] < self.check_interval:
+                    return entry
+                if self._signature(path) == entry['signature']:
+                    entry['checked_at'] = time.monotonic()
+                    return entry
+
+            signature = self._signature(path)
+            if watcher:
+                data = watcher.get_models(provider)
+            else:
+                data = self._read(path) if signature else None
+            entry = self._parse(provider, data)
+            entry['signature'] = signature
+            entry['checked_at'] = time.monotonic()
+            self._providers[provider] = entry
+            return entry
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[ModelCatalog] Lecture {path} impossible: {e}")
+            return None
+
+    @staticmethod
+    def _parse(provider: str, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        data = data if isinstance(data, dict) else {}
+        names = [str(name) for name in data.get('models', [])]
+        metadata = {}
+        for name, values in (data.get('metadata') or {}).items():
+            if isinstance(values, dict):
+                metadata[name] = {k: values[k] for k in METADATA_FIELDS if values.get(k) is not None}
+        defaults = {k: v for k, v in (data.get('defaults') or {}).items() if k in METADATA_FIELDS and v is not None}
+        logger.debug(f"[ModelCatalog] {provider}: {len(names)} modèle(s), {len(metadata)} avec métadonnées")
+        return {
+            'available': bool(data),
+            'names': names,
+            'default': data.get('default', names[0] if names else ""),
+            'description': data.get('description', ""),
+            'defaults': defaults,
+            'metadata': metadata,
+        }
+
+    # ------------------------------------------------------------ Lecture
+
+    def has_provider(self, provider: str) -> bool:
+        """modeles.json présent et lisible pour ce provider"""
+        return self._entry(provider)['available']
+
+    def models(self, provider: str) -> Tuple[List[str], str]:
+        """(noms des modèles, modèle par défaut) du provider"""
+        entry = self._entry(provider)
+        return list(entry['names']), entry['default']
+
+    def get(self, provider: str, model: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées d'un modèle (champs absents = inconnus) et latence observée"""
+        entry = self._entry(provider)
+        if model not in entry['names'] and model not in entry['metadata']:
+            return None
+        info = {'provider': provider.lower(), 'name': model}
+        info.update(entry['defaults'])
+        info.update(entry['metadata'].get(model, {}))
+        info['observed'] = self.observed(provider, model)
+        return info
+
+    def context_budget(self, provider: str, model: str, reserve_output: bool = True) -> Optional[int]:
+        """Tokens disponibles pour le prompt (fenêtre moins la sortie max), None si inconnu"""
+        info = self.get(provider, model)
+        if not info or not info.get('context_window'):
+            return None
+        budget = int(info['context_window'])
+        if reserve_output and info.get('max_output_tokens'):
+            budget -= int(info['max_output_tokens'])
+        return max(budget, 0)
+
+    def estimate_cost(self, provider: str, model: str, usage: Optional[Dict[str, int]]) -> Optional[float]:
+        """Coût en USD d'un usage normalisé {input_tokens, output_tokens}, None si prix inconnus"""
+        if not usage:
+            return None
+        info = self.get(provider, model)
+        if not info or 'input_price_per_mtok' not in info or 'output_price_per_mtok' not in info:
+            return None
+        return ((usage.get('input_tokens') or 0) * info['input_price_per_mtok']
+                + (usage.get('output_tokens') or 0) * info['output_price_per_mtok']) / 1_000_000
+
+    # ------------------------------------------------------------ Latences observées
+
+    def record_latency(self, provider: str, model: str, seconds: float, ttfb_seconds: Optional[float] = None) -> None:
+        """Ajoute la durée d'un appel réussi à la moyenne du modèle"""
+        key = (provider.lower(), model)
+        with self._lock:
+            observed = self._observed.get(key)
+            if observed is None:
+                observed = {'count': 0, 'ewma_seconds': seconds, 'last_seconds': seconds,
+                            'ewma_ttfb_seconds': ttfb_seconds}
+                self._observed[key] = observed
+            else:
+                observed['ewma_seconds'] += LATENCY_ALPHA * (seconds - observed['ewma_seconds'])
+                observed['last_seconds'] = seconds
+                if ttfb_seconds is not None:
+                    previous = observed['ewma_ttfb_seconds']
+                    observed['ewma_ttfb_seconds'] = (ttfb_seconds if previous is None
+                                                     else previous + LATENCY_ALPHA * (ttfb_seconds - previous))
+            observed['count'] += 1
+
+    def observed(self, provider: str, model: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            observed = self._observed.get((provider.lower(), model))
+            return dict(observed) if observed else None
+
+    def describe(self, provider: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Catalogue complet (ou d'un provider) pour l'API et les outils"""
+        if provider is None:
+            try:
+                providers = sorted(n for n in os.listdir(self.templates_dir)
+                                   if os.path.isdir(os.path.join(self.templates_dir, n)))
+            except OSError:
+                providers = []
+        else:
+            providers = [provider.lower()]
+        result = []
+        for name in providers:
+            entry = self._entry(name)
+            for model in entry['names']:
+                info = self.get(name, model)
+                info['default'] = model == entry['default']
+                result.append(info)
+        return result
+
+
+_catalog: Optional[ModelCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """Catalogue partagé par tout le processus"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog()
+        return _catalog
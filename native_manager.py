@@ -12,6 +12,9 @@ Date: 2025-09-02
 Version: 1.0
 """
 
+import ast
+import hashlib
+import importlib.util
 import os
 import re
 import sys
@@ -19,104 +22,276 @@ import subprocess
 import tempfile
 import json
 import logging
-from typing import Dict, Optional, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from importlib import invalidate_caches
+from typing import Any, Dict, List, Optional, Tuple
+
+from api_response_parser import provider_from_profile
+from metrics import stage_timer, observe_stage, record_stream
+from tracing import traced
+from core.endpoints import apply_base_url, sdk_base_url_env
+from provider_registry import get_provider_registry
+from stream_parser import stream_process_output
 
 # Configuration du logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+DEPENDENCY_CACHE_FILE = os.path.join("system", "native_dependencies.json")
+PREFLIGHT_WORKERS = 3
+
+# Module importé -> package pip
+PACKAGE_MAPPINGS = {
+    "google": "google-genai",
+    "openai": "openai",
+    "anthropic": "anthropic",
+    "mistralai": "mistralai",
+}
+
+
+class MissingDependencyError(RuntimeError):
+    """Module requis par un template natif absent (installation confiée au preflight)"""
+
+
+class DependencyResolver:
+    """
+    Dépendances des templates natifs, partagées par tout le processus
+
+    - Modules importés extraits du template brut (ast), mémorisés sur disque par hash
+      du template: l'analyse n'est refaite que si le template change
+    - Présence vérifiée par importlib.util.find_spec (aucun import, aucun pip)
+    - Installations pip uniquement en arrière-plan (preflight au démarrage), en parallèle
+    """
+
+    def __init__(self, cache_file: str = DEPENDENCY_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._available: set = set()
+        self._installs: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ------------------------------------------------------------ Cache disque
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("templates", {}) if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "templates": self._entries}, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            logger.warning(f"[Dependencies] Écriture du cache impossible: {e}")
+
+    # ------------------------------------------------------------ Résolution
+
+    @staticmethod
+    def template_hash(template_string: str) -> str:
+        return hashlib.sha256(template_string.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def extract_modules(template_string: str) -> List[str]:
+        """Modules tiers importés par le template (hors bibliothèque standard)"""
+        modules = set()
+        try:
+            for node in ast.walk(ast.parse(template_string)):
+                if isinstance(node, ast.Import):
+                    modules.update(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                    modules.add(node.module)
+        except SyntaxError:
+            # Template non analysable: repli sur les lignes d'import
+            for match in re.finditer(r'^\s*(?:from\s+([A-Za-z_][\w.]*)\s+import|import\s+([A-Za-z_][\w.]*))',
+                                     template_string, re.MULTILINE):
+                modules.add(match.group(1) or match.group(2))
+        return sorted(m for m in modules if m.split('.')[0] not in sys.stdlib_module_names)
+
+    def modules_for(self, provider_name: str, template_string: str) -> List[str]:
+        key = self.template_hash(template_string)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry["modules"]
+        modules = self.extract_modules(template_string)
+        with self._lock:
+            self._entries[key] = {"provider": provider_name, "modules": modules, "resolved_at": time.time()}
+            self._save()
+        return modules
+
+    def missing_modules(self, modules: List[str]) -> List[str]:
+        missing = []
+        for module in modules:
+            if module in self._available:
+                continue
+            try:
+                found = importlib.util.find_spec(module) is not None
+            except (ImportError, ValueError):
+                found = False
+            if found:
+                self._available.add(module)
+            else:
+                missing.append(module)
+        return missing
+
+    @staticmethod
+    def package_for(module: str) -> str:
+        top_level = module.split('.')[0]
+        return PACKAGE_MAPPINGS.get(top_level, top_level)
+
+    def ensure(self, provider_name: str, template_string: str, install_timeout: float = 300.0) -> None:
+        """
+        Chemin de requête: attend une installation déjà lancée par le preflight,
+        sinon la lance en arrière-plan et signale la dépendance manquante
+        """
+        missing = self.missing_modules(self.modules_for(provider_name, template_string))
+        if not missing:
+            return
+        packages = sorted({self.package_for(m) for m in missing})
+        with self._lock:
+            pending = {p: self._installs.get(p) for p in packages}
+        if all(future is not None for future in pending.values()):
+            wait_futures(list(pending.values()), timeout=install_timeout)
+            invalidate_caches()
+            if not self.missing_modules(missing):
+                return
+        # Installations jamais lancées ou terminées en échec: relancées (celles en cours sont gardées)
+        self.install_async(packages)
+        raise MissingDependencyError(
+            f"Dépendance(s) manquante(s) pour {provider_name}: {', '.join(packages)} "
+            f"(installation lancée en arrière-plan, réessayez dans quelques instants)")
+
+    # ------------------------------------------------------------ Installation
+
+    def install_async(self, packages: List[str]) -> Dict[str, Future]:
+        """Lance pip pour chaque package absent (une seule installation par package)"""
+        futures = {}
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=PREFLIGHT_WORKERS,
+                                                    thread_name_prefix="deps-preflight")
+            for package in packages:
+                future = self._installs.get(package)
+                if future is None or (future.done() and not self._succeeded(future)):
+                    future = self._executor.submit(self._install, package)
+                    self._installs[package] = future
+                futures[package] = future
+        return futures
+
+    @staticmethod
+    def _succeeded(future: Future) -> bool:
+        return future.exception() is None and bool(future.result())
+
+    @traced("native_manager.pip_install")
+    def _install(self, package: str) -> bool:
+        logger.info(f"[Dependencies] 🔧 Installation en arrière-plan: {package}")
+        result = subprocess.run([sys.executable, "-m", "pip", "install", package],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            logger.error(f"[Dependencies] ❌ Erreur installation {package}: {result.stderr.strip()[-500:]}")
+            return False
+        logger.info(f"[Dependencies] ✅ {package} installé")
+        return True
+
+    def preflight(self, providers: Optional[List[str]] = None, templates_dir: str = "templates/chat",
+                  wait: bool = False) -> Dict[str, List[str]]:
+        """
+        Résout les templates natifs des providers et installe en parallèle les packages absents
+
+        Args:
+            providers: Providers à vérifier (défaut: tous ceux de templates_dir)
+            wait: Attendre la fin des installations
+
+        Returns:
+            {provider: packages manquants au moment du preflight}
+        """
+        if providers is None:
+            providers = sorted(os.listdir(templates_dir)) if os.path.isdir(templates_dir) else []
+        report: Dict[str, List[str]] = {}
+        for provider in providers:
+            provider_dir = os.path.join(templates_dir, provider.lower())
+            if not os.path.isdir(provider_dir):
+                continue
+            modules = set()
+            for filename in os.listdir(provider_dir):
+                if filename.startswith("native") and filename.endswith(".py"):
+                    with open(os.path.join(provider_dir, filename), 'r', encoding='utf-8') as f:
+                        modules.update(self.modules_for(provider, f.read()))
+            missing = self.missing_modules(sorted(modules))
+            if missing:
+                report[provider] = sorted({self.package_for(m) for m in missing})
+        packages = sorted({p for packages in report.values() for p in packages})
+        if packages:
+            futures = self.install_async(packages)
+            if wait:
+                for future in futures.values():
+                    future.result()
+                invalidate_caches()
+        logger.info(f"[Dependencies] Preflight: {len(providers)} provider(s), "
+                    f"{len(packages)} package(s) à installer {packages if packages else ''}")
+        return report
+
+
+dependency_resolver = DependencyResolver()
+
+
+_shared_manager: Optional["NativeManager"] = None
+_shared_manager_lock = threading.Lock()
+
+
+def get_native_manager() -> "NativeManager":
+    """NativeManager partagé par le processus (interface, service, synthèse)"""
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = NativeManager()
+        return _shared_manager
+
+
+def native_profile_providers(api_manager) -> List[str]:
+    """Providers des profils configurés en mode natif"""
+    providers = set()
+    for profile_name in api_manager.list_available_profiles():
+        profile = api_manager.load_profile(profile_name) or {}
+        if profile.get('chat', {}).get('method') == 'native':
+            providers.add(provider_from_profile(profile) if profile.get('name') else profile_name.lower())
+    return sorted(providers)
+
+
+def preflight_native_dependencies(providers: Optional[List[str]] = None, wait: bool = False) -> Dict[str, List[str]]:
+    """Preflight de démarrage (tâche d'initialisation différée)"""
+    return dependency_resolver.preflight(providers, wait=wait)
+
+
 class DynamicProviderManager:
     """
     Gestionnaire de providers basé exclusivement sur l'extraction 
     dynamique depuis les templates officiels.
+    
+    Façade du registre partagé (provider_registry): l'analyse des templates est
+    faite une fois par processus puis seulement pour les providers modifiés.
     """
     
     def __init__(self, templates_dir="templates/chat"):
         self.templates_dir = templates_dir
-        self._provider_cache = {}
-        self._scan_providers()
-    
-    def _scan_providers(self):
-        """Scanne et analyse tous les providers disponibles"""
-        if not os.path.exists(self.templates_dir):
-            logger.warning(f"Dossier templates non trouvé: {self.templates_dir}")
-            return
-        
-        for provider_name in os.listdir(self.templates_dir):
-            provider_dir = os.path.join(self.templates_dir, provider_name)
-            if os.path.isdir(provider_dir):
-                self._analyze_provider(provider_name, provider_dir)
-        
-        logger.info(f"[DynamicProviderManager] {len(self._provider_cache)} providers analysés")
-    
-    def _analyze_provider(self, provider_name, provider_dir):
-        """Analyse un provider spécifique"""
-        curl_txt = os.path.join(provider_dir, "curl.txt")
-        curl_basic_txt = os.path.join(provider_dir, "curl_basic.txt")
-        
-        provider_info = {
-            "name": provider_name,
-            "has_curl": os.path.exists(curl_txt),
-            "has_curl_basic": os.path.exists(curl_basic_txt),
-            "api_key_var": None,
-            "complete": False
-        }
-        
-        # Extraction de la variable d'environnement si les fichiers existent
-        if provider_info["has_curl"] and provider_info["has_curl_basic"]:
-            api_var = self._extract_api_key_variable(curl_txt, curl_basic_txt)
-            if api_var:
-                provider_info["api_key_var"] = api_var
-                provider_info["complete"] = True
-                logger.debug(f"[DynamicProviderManager] {provider_name} → {api_var}")
-        
-        self._provider_cache[provider_name.lower()] = provider_info
-    
-    def _extract_api_key_variable(self, curl_txt, curl_basic_txt):
-        """
-        Extrait la variable d'environnement réelle depuis curl.txt
-        en vérifiant que {{API_KEY}} existe dans curl_basic.txt
-        """
-        try:
-            # 1. Vérifier que {{API_KEY}} est présent dans curl_basic.txt
-            with open(curl_basic_txt, 'r', encoding='utf-8') as f:
-                basic_content = f.read()
-            
-            if "{{API_KEY}}" not in basic_content:
-                return None
-            
-            # 2. Extraire la vraie variable depuis curl.txt
-            with open(curl_txt, 'r', encoding='utf-8') as f:
-                curl_content = f.read()
-            
-            # 3. Patterns pour trouver les variables d'environnement
-            patterns = [
-                r'\$([A-Z_]+_API_KEY)',           # $GEMINI_API_KEY
-                r'Bearer \$([A-Z_]+_API_KEY)',    # Bearer $OPENAI_API_KEY  
-                r'Bearer \$([A-Z_]+)',            # Bearer $ANTHROPIC_API_KEY
-                r'x-goog-api-key: \$([A-Z_]+)',   # x-goog-api-key: $GEMINI_API_KEY
-                r'x-api-key: \$([A-Z_]+)',        # x-api-key: $CLAUDE_API_KEY
-                r'Authorization: Bearer \$([A-Z_]+)', # Authorization: Bearer $XAI_API_KEY
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, curl_content)
-                if matches:
-                    return matches[0]
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Erreur extraction {curl_txt}: {e}")
-            return None
+        self.registry = get_provider_registry(templates_dir)
     
     def get_api_key_variable(self, provider_name):
         """
         Retourne la variable d'environnement pour un provider
         UNIQUEMENT basée sur l'extraction des templates
         """
-        provider_info = self._provider_cache.get(provider_name.lower())
-        return provider_info["api_key_var"] if provider_info and provider_info["complete"] else None
+        return self.registry.api_key_variable(provider_name)
     
     def get_api_key_from_env(self, provider_name):
         """
@@ -128,10 +303,13 @@ class DynamicProviderManager:
         
         return os.environ.get(api_var)
     
+    def api_key_variables(self):
+        """Ensemble des variables de clé API connues (tous providers)"""
+        return self.registry.api_key_variables()
+    
     def is_provider_supported(self, provider_name):
         """Vérifie si un provider est supporté"""
-        provider_info = self._provider_cache.get(provider_name.lower())
-        return provider_info and provider_info["complete"]
+        return self.registry.is_supported(provider_name)
 
 
 class NativeManager:
@@ -145,7 +323,6 @@ class NativeManager:
         logger.info("[NativeManager] Initialisation du gestionnaire natif")
         
         self.provider_manager = DynamicProviderManager()
-        self.dependency_cache = set()  # Cache des modules installés
         
         # Vérification initiale
         self._check_python_environment()
@@ -164,7 +341,9 @@ class NativeManager:
             logger.error(f"[NativeManager] Erreur vérification environnement: {e}")
             raise
     
-    def execute_native_request(self, template_string: str, variables: Dict[str, str], provider_name: str) -> Dict[str, Any]:
+    @traced()
+    def execute_native_request(self, template_string: str, variables: Dict[str, str], provider_name: str,
+                               stream_extractor=None) -> Dict[str, Any]:
         """
         Fonction principale d'exécution des requêtes natives.
         
@@ -172,6 +351,7 @@ class NativeManager:
             template_string: Code Python template avec placeholders
             variables: Dictionnaire des variables à remplacer (LLM_MODEL, USER_PROMPT, etc.)
             provider_name: Nom du provider (gemini, openai, claude, etc.)
+            stream_extractor: StreamingJSONExtractor optionnel alimenté au fil de la sortie
             
         Returns:
             Dict contenant la réponse de l'API ou les erreurs
@@ -182,7 +362,9 @@ class NativeManager:
             "output": "réponse de l'API",
             "errors": "messages d'erreur si applicable",
             "execution_time": "native",
-            "variables": {...}  # Variables extraites si succès
+            "variables": {...},  # Variables extraites si succès
+            "extractor": extracteur streamé (si stream_extractor fourni),
+            "streamed": StreamedResult (durées spawn/TTFB/totale, si stream_extractor fourni)
         }
         """
         logger.info(f"[NativeManager] Début exécution native - Provider: {provider_name}")
@@ -192,15 +374,31 @@ class NativeManager:
             if not self.provider_manager.is_provider_supported(provider_name):
                 raise ValueError(f"Provider '{provider_name}' non supporté ou incomplet")
             
-            # Étape 2: Préparation du template
-            prepared_code = self._prepare_template(template_string, variables, provider_name)
+            model = variables.get('LLM_MODEL', '')
+
+            # Étape 2: Clé de cette requête (transmise au seul processus enfant)
+            api_key_var, api_key = self._resolve_api_key(variables, provider_name)
+            
+            # Étape 3: Préparation du template
+            with stage_timer("template_render", provider_name, model):
+                # Redirection optionnelle (chat.base_url): URLs en dur du template, avant la
+                # substitution (le prompt et l'historique ne sont jamais réécrits) + variables des SDK
+                base_url = variables.get('BASE_URL', '')
+                prepared_code = self._prepare_template(apply_base_url(template_string, base_url),
+                                                       variables, provider_name)
             logger.debug(f"[NativeManager] Template préparé - {len(prepared_code)} caractères")
             
-            # Étape 3: Installation des dépendances si nécessaire
-            self._install_dependencies(provider_name, prepared_code)
+            # Étape 4: Dépendances (installées par le preflight en arrière-plan, jamais ici)
+            with stage_timer("dependencies", provider_name, model):
+                self._check_dependencies(provider_name, template_string)
             
-            # Étape 4: Exécution sécurisée
-            result = self._execute_safely(prepared_code)
+            # Étape 5: Exécution sécurisée
+            result = self._execute_safely(prepared_code, stream_extractor=stream_extractor,
+                                          env_overrides=sdk_base_url_env(base_url),
+                                          credentials={api_key_var: api_key})
+            if "streamed" in result:
+                record_stream(result["streamed"], provider_name, model)
+                observe_stage("request", result["streamed"].total_seconds, provider_name, model)
             
             # Vérifier le code de retour pour déterminer le statut réel
             if result["returncode"] == 0:
@@ -210,7 +408,9 @@ class NativeManager:
                     "output": result["stdout"],
                     "errors": result["stderr"] if result["stderr"] else None,
                     "execution_time": "native",
-                    "variables": variables
+                    "variables": variables,
+                    "extractor": stream_extractor,
+                    "streamed": result.get("streamed")
                 }
             else:
                 logger.error(f"[NativeManager] ❌ Exécution native échouée - Code retour: {result['returncode']}")
@@ -219,7 +419,8 @@ class NativeManager:
                     "output": result["stdout"] if result["stdout"] else None,
                     "errors": result["stderr"] if result["stderr"] else f"Process exited with code {result['returncode']}",
                     "execution_time": "native",
-                    "variables": variables
+                    "variables": variables,
+                    "streamed": result.get("streamed")
                 }
             
         except Exception as e:
@@ -232,6 +433,29 @@ class NativeManager:
                 "variables": variables
             }
     
+    def _resolve_api_key(self, variables: Dict[str, str], provider_name: str) -> Tuple[str, str]:
+        """
+        Clé API de la requête, sans modifier os.environ (requêtes concurrentes isolées)
+        
+        Returns:
+            (variable d'environnement attendue par le template, clé: profil V2 puis environnement)
+        """
+        api_key_var = self.provider_manager.get_api_key_variable(provider_name)
+        if not api_key_var:
+            raise ValueError(f"Variable API non trouvée pour provider '{provider_name}'")
+        
+        api_key = variables.get('API_KEY')
+        if api_key:
+            logger.debug("[NativeManager] Clé API fournie par le profil V2")
+        else:
+            api_key = os.environ.get(api_key_var)
+            if api_key:
+                logger.debug(f"[NativeManager] Clé API depuis environnement: {api_key_var}")
+        
+        if not api_key:
+            raise ValueError(f"Clé API non trouvée - ni dans profil ni dans variable d'environnement {api_key_var}")
+        return api_key_var, api_key
+    
     def _prepare_template(self, template_string: str, variables: Dict[str, str], provider_name: str) -> str:
         """
         Prépare le template en remplaçant les placeholders et injectant la clé API.
@@ -246,32 +470,11 @@ class NativeManager:
         """
         logger.debug(f"[NativeManager] Préparation template pour {provider_name}")
         
-        # 1. Extraction de la variable d'environnement
+        # 1. Variable d'environnement lue par le template (la clé est fournie à l'exécution)
         api_key_var = self.provider_manager.get_api_key_variable(provider_name)
         if not api_key_var:
             raise ValueError(f"Variable API non trouvée pour provider '{provider_name}'")
         
-        # 2. Gestion intelligente de la clé API (SOLID - sans modifier le template)
-        api_key = None
-        
-        # 2a. D'abord chercher dans les variables injectées (profil V2)
-        if 'API_KEY' in variables and variables['API_KEY']:
-            api_key = variables['API_KEY']
-            logger.debug(f"[NativeManager] Clé API injectée depuis profil V2: {api_key[:10]}...")
-            
-            # SOLUTION SOLID: Injecter dans l'environnement pour que le template fonctionne normalement
-            os.environ[api_key_var] = api_key
-            logger.debug(f"[NativeManager] Clé API injectée dans {api_key_var} pour le template")
-            
-        else:
-            # 2b. Fallback vers variable d'environnement existante
-            api_key = os.environ.get(api_key_var)
-            if api_key:
-                logger.debug(f"[NativeManager] Clé API depuis environnement: {api_key_var}")
-        
-        if not api_key:
-            raise ValueError(f"Clé API non trouvée - ni dans profil ni dans variable d'environnement {api_key_var}")
-        
         # 3. Ajout de l'en-tête UTF-8 si absent
         prepared_code = template_string
         if "# -*- coding: utf-8 -*-" not in prepared_code:
@@ -312,11 +515,14 @@ if not api_key:
                 prepared_code = api_injection + prepared_code
         
         # 5. Remplacement des placeholders (RÈGLE: ne remplace que si trouvé)
+        #    Seuls les noms sont journalisés: les valeurs (prompt, API_KEY) jamais
+        replaced = []
         for placeholder, value in variables.items():
             placeholder_pattern = f"{{{{{placeholder}}}}}"
             if placeholder_pattern in prepared_code:
                 prepared_code = prepared_code.replace(placeholder_pattern, str(value))
-                logger.debug(f"[NativeManager] Remplacé {placeholder_pattern} → {str(value)[:50]}...")
+                replaced.append(placeholder)
+        logger.debug(f"[NativeManager] Placeholders remplacés: {', '.join(replaced) or 'aucun'}")
         
         # 6. Validation syntaxique
         try:
@@ -327,96 +533,32 @@ if not api_key:
         
         return prepared_code
     
-    def _install_dependencies(self, provider_name: str, code: str):
+    def _check_dependencies(self, provider_name: str, template_string: str):
         """
-        Installe automatiquement les dépendances requises selon le provider.
+        Vérifie les dépendances du template (cache disque + find_spec, sans pip)
         
         Args:
             provider_name: Nom du provider
-            code: Code à analyser pour les imports
+            template_string: Template brut (avant remplacement: le prompt n'est jamais analysé)
         """
         logger.debug(f"[NativeManager] Vérification dépendances pour {provider_name}")
-        
-        # Mapping des dépendances par provider
-        provider_dependencies = {
-            "gemini": ["google-genai"],
-            "openai": ["openai"],
-            "claude": ["anthropic"],
-            "mistral": ["mistralai"],
-            # Autres providers ajoutés automatiquement
-        }
-        
-        # Extraire les imports du code
-        import_patterns = [
-            r'from\s+([a-zA-Z_][a-zA-Z0-9_.]*)',
-            r'import\s+([a-zA-Z_][a-zA-Z0-9_.]*)'
-        ]
-        
-        required_modules = set()
-        for pattern in import_patterns:
-            matches = re.findall(pattern, code)
-            for match in matches:
-                main_module = match.split('.')[0]
-                required_modules.add(main_module)
-        
-        # Installation des modules manquants
-        for module in required_modules:
-            if module not in self.dependency_cache and module not in sys.stdlib_module_names:
-                try:
-                    __import__(module)
-                    self.dependency_cache.add(module)
-                    logger.debug(f"[NativeManager] Module {module} déjà disponible")
-                except ImportError:
-                    self._install_module(module, provider_dependencies.get(provider_name, []))
+        dependency_resolver.ensure(provider_name, template_string)
     
-    def _install_module(self, module_name: str, provider_packages: list):
-        """
-        Installe un module via pip.
-        
-        Args:
-            module_name: Nom du module à installer
-            provider_packages: Liste des packages recommandés pour ce provider
-        """
-        # Déterminer le package à installer
-        package_to_install = module_name
-        
-        # Mappings spéciaux
-        special_mappings = {
-            "google": "google-genai",
-            "openai": "openai", 
-            "anthropic": "anthropic",
-            "mistralai": "mistralai"
-        }
-        
-        if module_name in special_mappings:
-            package_to_install = special_mappings[module_name]
-        elif provider_packages and module_name in str(provider_packages):
-            package_to_install = provider_packages[0]  # Premier package recommandé
-        
-        logger.info(f"[NativeManager] 🔧 Installation automatique: {package_to_install}")
-        
-        try:
-            result = subprocess.run([
-                sys.executable, "-m", "pip", "install", package_to_install
-            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            if result.returncode != 0:
-                raise subprocess.CalledProcessError(result.returncode, result.args, result.stderr)
-            
-            self.dependency_cache.add(module_name)
-            logger.info(f"[NativeManager] ✅ Module {package_to_install} installé")
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"[NativeManager] ❌ Erreur installation {package_to_install}: {e}")
-            raise RuntimeError(f"Impossible d'installer {package_to_install}")
-    
-    def _execute_safely(self, code: str, timeout: int = 30) -> Dict[str, str]:
+    @traced()
+    def _execute_safely(self, code: str, timeout: int = 30, stream_extractor=None,
+                        env_overrides: Optional[Dict[str, str]] = None,
+                        credentials: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         Exécute le code Python de manière sécurisée dans un subprocess.
         
         Args:
             code: Code Python à exécuter
             timeout: Timeout en secondes
+            stream_extractor: Extracteur incrémental; la sortie est alors lue par blocs
+                              et n'est conservée que sous la limite de l'extracteur
+            env_overrides: Variables ajoutées à l'environnement du processus enfant
+            credentials: Clé(s) API de cette requête; les autres clés de providers
+                         héritées du parent sont retirées de l'environnement enfant
             
         Returns:
             Dict avec stdout, stderr, returncode
@@ -429,10 +571,31 @@ if not api_key:
                 temp_file.write(code)
                 temp_file_path = temp_file.name
             
-            # Préparer l'environnement avec encodage UTF-8
+            # Préparer l'environnement avec encodage UTF-8 (copie propre à la requête)
             env_copy = os.environ.copy()
             env_copy['PYTHONIOENCODING'] = 'utf-8'
             env_copy['PYTHONUTF8'] = '1'
+            if env_overrides:
+                env_copy.update(env_overrides)
+            if credentials:
+                for api_key_var in self.provider_manager.api_key_variables():
+                    env_copy.pop(api_key_var, None)
+                env_copy.update(credentials)
+
+            if stream_extractor is not None:
+                streamed = stream_process_output([sys.executable, temp_file_path], stream_extractor,
+                                                 env=env_copy, timeout=timeout)
+                os.unlink(temp_file_path)
+                if streamed.timed_out:
+                    raise subprocess.TimeoutExpired([sys.executable, temp_file_path], timeout)
+                logger.debug(f"[NativeManager] Exécution streamée terminée - Code retour: {streamed.returncode}, "
+                             f"{stream_extractor.bytes_received} octets")
+                return {
+                    "stdout": streamed.stdout.strip(),
+                    "stderr": streamed.stderr.strip(),
+                    "returncode": streamed.returncode,
+                    "streamed": streamed
+                }
 
             # Exécution dans un subprocess isolé avec gestion UTF-8 améliorée
             result = subprocess.run(
@@ -8,8 +8,15 @@ import os
 import json
 import time
 import tempfile
+import itertools
+import logging
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# Compteur global (itertools.count est atomique sous le GIL)
+_payload_sequence = itertools.count(1)
+
 class PayloadManager:
     """Gestionnaire de fichiers payload JSON temporaires par profil API"""
     
@@ -25,7 +32,7 @@ class PayloadManager:
         self.temp_dir = Path(workspace_dir) / "conversation_api" / api_profile.lower() / "temp"
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         
-        print(f"[PayloadManager] Dossier temporaire pour {api_profile}: {self.temp_dir}")
+        logger.debug(f"[PayloadManager] Dossier temporaire pour {api_profile}: {self.temp_dir}")
     
     def create_payload_file(self, payload_data, prefix="payload"):
         """
@@ -38,9 +45,9 @@ class PayloadManager:
         Returns:
             str: Chemin vers le fichier créé
         """
-        # Générer nom unique avec timestamp
-        timestamp = int(time.time() * 1000)  # millisecondes pour unicité
-        filename = f"{prefix}_{timestamp}.json"
+        # Générer nom unique: timestamp + PID + compteur (requêtes concurrentes dans la même milliseconde)
+        timestamp = int(time.time() * 1000)
+        filename = f"{prefix}_{timestamp}_{os.getpid()}_{next(_payload_sequence)}.json"
         filepath = self.temp_dir / filename
         
         try:
@@ -51,11 +58,11 @@ class PayloadManager:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(json_content)
             
-            print(f"[PayloadManager] Fichier créé: {filepath} ({len(json_content)} chars)")
+            logger.debug(f"[PayloadManager] Fichier créé: {filepath} ({len(json_content)} chars)")
             return str(filepath)
             
         except Exception as e:
-            print(f"[PayloadManager] ERREUR création fichier {filepath}: {e}")
+            logger.error(f"[PayloadManager] ERREUR création fichier {filepath}: {e}")
             raise
     
     def cleanup_payload_file(self, filepath):
@@ -68,12 +75,12 @@ class PayloadManager:
         try:
             if os.path.exists(filepath):
                 os.remove(filepath)
-                print(f"[PayloadManager] Fichier supprimé: {filepath}")
+                logger.debug(f"[PayloadManager] Fichier supprimé: {filepath}")
             else:
-                print(f"[PayloadManager] Fichier déjà absent: {filepath}")
+                logger.debug(f"[PayloadManager] Fichier déjà absent: {filepath}")
                 
         except Exception as e:
-            print(f"[PayloadManager] ERREUR suppression {filepath}: {e}")
+            logger.error(f"[PayloadManager] ERREUR suppression {filepath}: {e}")
     
     def cleanup_old_files(self, max_age_seconds=3600):
         """
@@ -92,13 +99,13 @@ class PayloadManager:
                 if file_age > max_age_seconds:
                     file_path.unlink()
                     cleaned_count += 1
-                    print(f"[PayloadManager] Ancien fichier supprimé: {file_path}")
+                    logger.debug(f"[PayloadManager] Ancien fichier supprimé: {file_path}")
             
             if cleaned_count > 0:
-                print(f"[PayloadManager] Nettoyage: {cleaned_count} anciens fichiers supprimés")
+                logger.debug(f"[PayloadManager] Nettoyage: {cleaned_count} anciens fichiers supprimés")
                 
         except Exception as e:
-            print(f"[PayloadManager] ERREUR nettoyage: {e}")
+            logger.error(f"[PayloadManager] ERREUR nettoyage: {e}")
 
 def extract_json_from_curl(curl_command):
     """
@@ -121,7 +128,7 @@ def extract_json_from_curl(curl_command):
             quote_char = d_start_match.group(1)
             start_pos = d_start_match.end() - 1  # Position du guillemet ouvrant
             
-            print(f"[PayloadManager] Recherche JSON entre guillemets '{quote_char}'")
+            logger.debug(f"[PayloadManager] Recherche JSON entre guillemets '{quote_char}'")
             
             # NOUVELLE APPROCHE: Chercher depuis la fin
             # Le guillemet de fermeture est le dernier guillemet de ce type dans la commande
@@ -135,13 +142,13 @@ def extract_json_from_curl(curl_command):
                     break
             
             if json_end == -1:
-                print(f"[PayloadManager] Pas de guillemet de fermeture trouvé")
+                logger.debug(f"[PayloadManager] Pas de guillemet de fermeture trouvé")
                 return curl_command, None
             
             # Extraire le JSON complet
             json_content = curl_command[json_start:json_end]
             
-            print(f"[PayloadManager] JSON extrait: de position {json_start} à {json_end} ({len(json_content)} chars)")
+            logger.debug(f"[PayloadManager] JSON extrait: de position {json_start} à {json_end} ({len(json_content)} chars)")
             
             # Déséchapper selon le type de guillemets
             if quote_char == '"':
@@ -152,32 +159,42 @@ def extract_json_from_curl(curl_command):
                 json_content = json_content.replace('\\t', '\t')
                 json_content = json_content.replace('\\r', '\r')
             
-            print(f"[PayloadManager] JSON après désérialisation: {len(json_content)} chars")
+            logger.debug(f"[PayloadManager] JSON après désérialisation: {len(json_content)} chars")
             
             # Parser le JSON avec gestion robuste des erreurs
             try:
                 json_data = json.loads(json_content)
             except json.JSONDecodeError as json_err:
-                print(f"[PayloadManager] Erreur JSON parsing: {json_err}")
-                print(f"[PayloadManager] Contenu problématique: {repr(json_content[:200])}")
+                logger.warning(f"[PayloadManager] Erreur JSON parsing: {json_err}")
+                logger.debug(f"[PayloadManager] Contenu problématique: {repr(json_content[:200])}")
                 
                 # Tentative de nettoyage des caractères de contrôle
                 import re
                 json_content_clean = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', json_content)
                 json_data = json.loads(json_content_clean)
-                print(f"[PayloadManager] JSON nettoyé et parsé avec succès")
+                logger.debug(f"[PayloadManager] JSON nettoyé et parsé avec succès")
             
             # Extraire la commande de base (sans -d)
             base_command = curl_command[:d_start_match.start()].strip()
             
-            print(f"[PayloadManager] JSON extrait avec succès")
+            logger.debug(f"[PayloadManager] JSON extrait avec succès")
             return base_command, json_data
             
     except Exception as e:
-        print(f"[PayloadManager] ERREUR extraction JSON: {e}")
+        logger.error(f"[PayloadManager] ERREUR extraction JSON: {e}")
     
     return curl_command, None
 
+def attach_payload_file(base_command, payload_file):
+    """
+    Ajoute -d @fichier à la commande curl sans le -d inline
+
+    La continuation de ligne finale laissée par extract_json_from_curl est retirée:
+    sinon "\\ -d" devient un argument unique " -d" pour le shell (curl: URL malformée)
+    """
+    command = base_command.rstrip().rstrip('\\').rstrip()
+    return f'{command} -d @"{payload_file}"'
+
 # Instance globale pour faciliter l'utilisation
 _payload_managers = {}
 
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling - Profilage à la demande du pipeline de requêtes (cProfile + tracemalloc)
+
+Activation:
+- Variable d'environnement ROB1_PROFILE=1 au lancement
+- Ou menu Config > Profiling pendant l'exécution
+
+Options (environnement):
+- ROB1_PROFILE_EVERY: nombre d'appels agrégés par fichier .pstats (défaut 1 = un fichier par requête)
+- ROB1_PROFILE_DIR: dossier de sortie (défaut "profiling", à côté de application.log)
+- ROB1_TRACEMALLOC_INTERVAL: période en secondes des snapshots mémoire (défaut 300)
+
+Désactivé, un appel décoré par @profiled ne coûte qu'un test booléen.
+Les appels imbriqués (synthèse pendant soumettreQuestionAPI) sont inclus dans le profil englobant,
+y compris ceux exécutés dans un thread de travail lancé via profiler.for_worker() (appel API hors
+du thread Tk): leur profil est fusionné dans le fichier .pstats de l'appel.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import threading
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("ROB1_PROFILE_DIR", "profiling")
+TRACEMALLOC_FRAMES = 25
+TOP_ALLOCATIONS = 25
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+class RequestProfiler:
+    """Profilage cProfile par nom d'appel et snapshots tracemalloc périodiques"""
+
+    def __init__(self, output_dir: str = PROFILE_DIR):
+        self.output_dir = output_dir
+        self.enabled = False
+        self.every = 1
+        self.tracemalloc_interval = 300
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # nom -> [Profile agrégé, appels accumulés, profils des threads de travail]
+        self._aggregated: Dict[str, list] = {}
+        self._sequence = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._previous_snapshot = None
+
+    # ------------------------------------------------------------ Contrôle
+
+    def enable(self, every: int = 1, tracemalloc_interval: int = 300) -> None:
+        """Active cProfile (dump tous les `every` appels) et les snapshots mémoire"""
+        with self._lock:
+            if self.enabled:
+                return
+            self.every = max(1, every)
+            self.tracemalloc_interval = max(1, tracemalloc_interval)
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.enabled = True
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._previous_snapshot = self._take_snapshot()
+        self._stop_event.clear()
+        self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="tracemalloc-snapshots",
+                                                 daemon=True)
+        self._snapshot_thread.start()
+        logger.info(f"[Profiling] Activé - dump tous les {self.every} appel(s), "
+                    f"snapshot mémoire toutes les {self.tracemalloc_interval}s dans {self.output_dir}/")
+
+    def disable(self) -> None:
+        """Désactive le profilage: profils partiels et dernier diff mémoire écrits"""
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            pending = list(self._aggregated.items())
+            self._aggregated.clear()
+
+        for name, (profile, calls, extras) in pending:
+            if calls:
+                self._dump(profile, name, calls, extras)
+
+        self._stop_event.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=5)
+            self._snapshot_thread = None
+        if tracemalloc.is_tracing():
+            self.write_memory_report()
+            tracemalloc.stop()
+        self._previous_snapshot = None
+        logger.info("[Profiling] Désactivé")
+
+    # ------------------------------------------------------------ cProfile
+
+    def run(self, name: str, func: Callable, *args, **kwargs):
+        """Exécute func sous cProfile (sans profilage imbriqué dans le même thread)"""
+        if getattr(self._local, "active", False):
+            return func(*args, **kwargs)
+
+        with self._lock:
+            if self.every > 1:
+                entry = self._aggregated.setdefault(name, [cProfile.Profile(), 0, []])
+                profile, extras = entry[0], entry[2]
+            else:
+                entry, profile, extras = None, cProfile.Profile(), []
+
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Un autre outil de profilage est déjà actif (débogueur, sys.monitoring)
+            logger.warning(f"[Profiling] cProfile indisponible pour {name}: {e}")
+            return func(*args, **kwargs)
+
+        self._local.active = True
+        self._local.extras = extras
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+            self._local.extras = None
+            self._after_call(name, profile, entry, extras)
+
+    def for_worker(self, func: Callable) -> Callable:
+        """
+        À appeler dans le thread d'un appel profilé: func, exécutée dans un autre thread,
+        y est profilée et son profil est fusionné dans celui de l'appel en cours
+        (func inchangée hors appel profilé)
+        """
+        extras = getattr(self._local, "extras", None)
+        if extras is None:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                logger.warning(f"[Profiling] cProfile indisponible dans {threading.current_thread().name}: {e}")
+                return func(*args, **kwargs)
+            self._local.active = True
+            self._local.extras = extras
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._local.active = False
+                self._local.extras = None
+                extras.append(profile)
+        return wrapper
+
+    def _after_call(self, name: str, profile: cProfile.Profile, entry: Optional[list],
+                    extras: List[cProfile.Profile]) -> None:
+        if entry is None:
+            self._dump(profile, name, 1, extras)
+            return
+        with self._lock:
+            entry[1] += 1
+            if entry[1] < self.every:
+                return
+            calls = entry[1]
+            self._aggregated[name] = [cProfile.Profile(), 0, []]
+        self._dump(profile, name, calls, extras)
+
+    def _dump(self, profile: cProfile.Profile, name: str, calls: int,
+              extras: Sequence[cProfile.Profile] = ()) -> None:
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.output_dir, f"{name}_{timestamp}_{sequence:04d}_x{calls}.pstats")
+        try:
+            if extras:
+                # Profils des threads de travail fusionnés dans celui de l'appel
+                stats = pstats.Stats(profile)
+                for extra in extras:
+                    stats.add(extra)
+                stats.dump_stats(path)
+            else:
+                profile.dump_stats(path)
+            logger.info(f"[Profiling] {path} ({calls} appel(s))")
+        except (OSError, TypeError) as e:
+            logger.warning(f"[Profiling] Écriture {path} impossible: {e}")
+
+    # ------------------------------------------------------------ tracemalloc
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop_event.wait(self.tracemalloc_interval):
+            self.write_memory_report()
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def write_memory_report(self) -> Optional[str]:
+        """Écrit le top des allocations et le diff depuis le snapshot précédent"""
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = self._take_snapshot()
+        previous, self._previous_snapshot = self._previous_snapshot, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [f"# Snapshot tracemalloc {datetime.now().isoformat(timespec='seconds')}",
+                 f"# Mémoire tracée: {current / 1024:.1f} KiB (pic {peak / 1024:.1f} KiB)", ""]
+        if previous is not None:
+            lines.append(f"## Top {TOP_ALLOCATIONS} variations depuis le snapshot précédent")
+            for stat in snapshot.compare_to(previous, "lineno")[:TOP_ALLOCATIONS]:
+                lines.append(str(stat))
+            lines.append("")
+        lines.append(f"## Top {TOP_ALLOCATIONS} allocations")
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            lines.append(str(stat))
+
+        path = os.path.join(self.output_dir, f"tracemalloc_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return path
+        except OSError as e:
+            logger.warning(f"[Profiling] Écriture {path} impossible: {e}")
+            return None
+
+
+# Profileur global de l'application
+profiler = RequestProfiler()
+
+
+def profiled(name: Optional[str] = None) -> Callable:
+    """
+    Décorateur: profile la fonction quand le profilage est actif
+    Désactivé, le surcoût se limite à la lecture de profiler.enabled
+    """
+    def decorator(func: Callable) -> Callable:
+        profile_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            return profiler.run(profile_name, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable_from_environment() -> bool:
+    """Active le profilage si ROB1_PROFILE est positionné (appelé au démarrage)"""
+    if os.environ.get("ROB1_PROFILE", "0") in ("0", "false", "False", ""):
+        return False
+    profiler.enable(every=_env_int("ROB1_PROFILE_EVERY", 1),
+                    tracemalloc_interval=_env_int("ROB1_TRACEMALLOC_INTERVAL", 300))
+    return True
+
+
+def set_profiling(enabled: bool) -> None:
+    """Bascule depuis l'interface (menu Config)"""
+    if enabled:
+        profiler.enable(every=_env_int("ROB1_PROFILE_EVERY", 1),
+                        tracemalloc_interval=_env_int("ROB1_TRACEMALLOC_INTERVAL", 300))
+    else:
+        profiler.disable()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Provider Registry - Registre des providers de templates/chat, unique par processus
+
+Construit une seule fois: pour chaque provider, variable de clé API extraite de
+curl.txt (si curl_basic.txt contient {{API_KEY}}), templates présents et hash
+de leur contenu.
+
+Surveillance peu coûteuse: au plus une fois par CHECK_INTERVAL, un stat du
+dossier templates/chat, de chaque dossier provider et de ses fichiers suivis;
+seul le provider dont une signature a changé est réanalysé. invalidate() permet
+à un watcher externe (inotify) de forcer la réanalyse d'un provider.
+
+    registry = get_provider_registry()
+    registry.api_key_variable("openai")   # "OPENAI_API_KEY"
+    registry.get("gemini")["templates"]    # {"curl.txt": "sha256...", ...}
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join("templates", "chat")
+CHECK_INTERVAL = 1.0
+
+# Motifs de la variable de clé dans curl.txt (ex: Bearer $OPENAI_API_KEY)
+API_KEY_PATTERNS = [
+    r'\$([A-Z_]+_API_KEY)',
+    r'Bearer \$([A-Z_]+_API_KEY)',
+    r'Bearer \$([A-Z_]+)',
+    r'x-goog-api-key: \$([A-Z_]+)',
+    r'x-api-key: \$([A-Z_]+)',
+    r'Authorization: Bearer \$([A-Z_]+)',
+]
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def _is_tracked(filename: str) -> bool:
+    return filename.endswith(".txt") or (filename.startswith("native") and filename.endswith(".py"))
+
+
+def extract_api_key_variable(curl_content: str, curl_basic_content: str) -> Optional[str]:
+    """Variable d'environnement de la clé API, si le template basic utilise {{API_KEY}}"""
+    if "{{API_KEY}}" not in curl_basic_content:
+        return None
+    for pattern in API_KEY_PATTERNS:
+        matches = re.findall(pattern, curl_content)
+        if matches:
+            return matches[0]
+    return None
+
+
+class ProviderRegistry:
+    """Métadonnées des providers, réanalysées seulement quand leurs fichiers changent"""
+
+    def __init__(self, templates_dir: str = TEMPLATES_DIR, check_interval: float = CHECK_INTERVAL):
+        self.templates_dir = templates_dir
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._providers: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Signature] = {}
+        self._root_mtime: Optional[int] = None
+        self._last_check = 0.0
+        self._listeners: List[Callable[[str, str], None]] = []
+        self.refresh(force=True)
+
+    # ------------------------------------------------------------ Lecture
+
+    def get(self, provider_name: str) -> Optional[Dict[str, Any]]:
+        self._maybe_refresh()
+        with self._lock:
+            info = self._providers.get(provider_name.lower())
+            return dict(info) if info else None
+
+    def providers(self) -> List[str]:
+        self._maybe_refresh()
+        with self._lock:
+            return sorted(self._providers)
+
+    def api_key_variable(self, provider_name: str) -> Optional[str]:
+        info = self.get(provider_name)
+        return info["api_key_var"] if info and info["complete"] else None
+
+    def api_key_variables(self) -> Set[str]:
+        self._maybe_refresh()
+        with self._lock:
+            return {info["api_key_var"] for info in self._providers.values() if info["api_key_var"]}
+
+    def is_supported(self, provider_name: str) -> bool:
+        info = self.get(provider_name)
+        return bool(info and info["complete"])
+
+    # ------------------------------------------------------------ Surveillance
+
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """callback(provider, événement) avec événement = added, changed ou removed"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def invalidate(self, provider_name: Optional[str] = None) -> None:
+        """Force la réanalyse d'un provider (ou de tout le dossier) au prochain accès"""
+        with self._lock:
+            if provider_name is None:
+                self._root_mtime = None
+                self._signatures.clear()
+            else:
+                self._signatures.pop(provider_name.lower(), None)
+            self._last_check = 0.0
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh()
+
+    def _signature(self, provider_dir: str) -> Signature:
+        entries = []
+        try:
+            with os.scandir(provider_dir) as iterator:
+                for entry in iterator:
+                    if entry.is_file() and _is_tracked(entry.name):
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            pass
+        return tuple(sorted(entries))
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """
+        Compare les signatures (stat) et réanalyse les providers modifiés
+
+        Returns:
+            Providers ajoutés, modifiés ou supprimés
+        """
+        events: List[Tuple[str, str]] = []
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                root_mtime = os.stat(self.templates_dir).st_mtime_ns
+            except OSError:
+                if self._providers:
+                    events = [(name, "removed") for name in self._providers]
+                    self._providers.clear()
+                    self._signatures.clear()
+                root_mtime = None
+                if not force and not events:
+                    return []
+
+            if force or root_mtime != self._root_mtime:
+                # Ajout ou suppression de dossiers provider
+                names = set()
+                if root_mtime is not None:
+                    names = {n.lower() for n in os.listdir(self.templates_dir)
+                             if os.path.isdir(os.path.join(self.templates_dir, n))}
+                for removed in set(self._providers) - names:
+                    del self._providers[removed]
+                    self._signatures.pop(removed, None)
+                    events.append((removed, "removed"))
+                self._root_mtime = root_mtime
+            else:
+                names = set(self._providers)
+
+            for name in sorted(names):
+                provider_dir = os.path.join(self.templates_dir, name)
+                signature = self._signature(provider_dir)
+                if not force and self._signatures.get(name) == signature:
+                    continue
+                existed = name in self._providers
+                self._providers[name] = self._analyze(name, provider_dir)
+                self._signatures[name] = signature
+                events.append((name, "changed" if existed else "added"))
+            listeners = list(self._listeners)
+
+        if events:
+            logger.info(f"[ProviderRegistry] {len(events)} provider(s) analysé(s): "
+                        f"{', '.join(f'{n} ({e})' for n, e in events)}")
+        for name, event in events:
+            for callback in listeners:
+                try:
+                    callback(name, event)
+                except Exception as e:
+                    logger.warning(f"[ProviderRegistry] Listener en échec pour {name}: {e}")
+        return [name for name, _ in events]
+
+    def _analyze(self, provider_name: str, provider_dir: str) -> Dict[str, Any]:
+        contents: Dict[str, str] = {}
+        for filename in os.listdir(provider_dir):
+            if _is_tracked(filename):
+                try:
+                    with open(os.path.join(provider_dir, filename), 'r', encoding='utf-8') as f:
+                        contents[filename] = f.read()
+                except (OSError, UnicodeDecodeError) as e:
+                    logger.error(f"[ProviderRegistry] Lecture {provider_name}/{filename} impossible: {e}")
+
+        api_key_var = None
+        if "curl.txt" in contents and "curl_basic.txt" in contents:
+            api_key_var = extract_api_key_variable(contents["curl.txt"], contents["curl_basic.txt"])
+        if api_key_var:
+            logger.debug(f"[ProviderRegistry] {provider_name} → {api_key_var}")
+        return {
+            "name": provider_name,
+            "dir": provider_dir,
+            "has_curl": "curl.txt" in contents,
+            "has_curl_basic": "curl_basic.txt" in contents,
+            "has_native": any(name.startswith("native") for name in contents),
+            "api_key_var": api_key_var,
+            "complete": api_key_var is not None,
+            "templates": {name: hashlib.sha256(text.encode('utf-8')).hexdigest()
+                          for name, text in sorted(contents.items())},
+        }
+
+
+_registries: Dict[str, ProviderRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_provider_registry(templates_dir: str = TEMPLATES_DIR) -> ProviderRegistry:
+    """Registre partagé par tout le processus (un par dossier de templates)"""
+    key = os.path.abspath(templates_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ProviderRegistry(templates_dir)
+            _registries[key] = registry
+        return registry
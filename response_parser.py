@@ -2,123 +2,293 @@
 """
 Module d'extraction générique des réponses API - Phase 2
 Gère l'extraction du contenu textuel depuis les réponses JSON des différentes APIs
+
+Optimisations:
+- Les response_path sont compilés une seule fois en fonctions d'accès (cache LRU)
+- Aucun log par étape : le diagnostic détaillé n'est produit qu'en cas d'échec et en DEBUG
+- Décodeur JSON rapide optionnel (orjson, puis ujson) avec repli sur json standard
 """
 
 import json
 import logging
-from typing import Any, List, Union, Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Décodeur JSON rapide optionnel
+try:
+    import orjson as _fast_json
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson as _fast_json
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        _fast_json = None
+        JSON_BACKEND = "json"
+
+# Sentinelle pour distinguer "chemin introuvable" d'une valeur JSON null
+_MISSING = object()
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Décode un document JSON avec le backend le plus rapide disponible
+
+    Args:
+        data: Document JSON (str ou bytes)
+
+    Returns:
+        Any: Structure Python décodée
 
-def parse_response(json_data: Union[str, dict], response_path: List[Union[str, int]]) -> Optional[str]:
+    Raises:
+        json.JSONDecodeError: Si le document est invalide (quel que soit le backend)
+    """
+    if _fast_json is not None:
+        try:
+            return _fast_json.loads(data)
+        except ValueError:
+            # Rejouer avec json standard pour une erreur homogène (et les cas tolérés: NaN...)
+            pass
+    return json.loads(data)
+
+
+def compile_response_path(response_path: List[Union[str, int]]) -> Callable[[Any], Any]:
+    """
+    Compile un response_path en fonction d'accès réutilisable
+
+    Args:
+        response_path: Liste des clés/indices, ex: ["choices", 0, "message", "content"]
+
+    Returns:
+        Callable: accessor(data) -> valeur trouvée ou _MISSING
+    """
+    try:
+        return _compile_path(tuple(response_path or ()))
+    except TypeError:
+        # Élément non hashable dans le chemin: compilation sans cache
+        return _compile_path.__wrapped__(tuple(response_path or ()))
+
+
+@lru_cache(maxsize=128)
+def _compile_path(steps: Tuple[Union[str, int], ...]) -> Callable[[Any], Any]:
+    """Construit la fonction d'accès pour un chemin (mise en cache par chemin)"""
+
+    def accessor(data: Any) -> Any:
+        current = data
+        for key in steps:
+            # Une chaîne est indexable par entier mais n'est pas un nœud du chemin
+            if type(current) is str:
+                return _MISSING
+            try:
+                current = current[key]
+            except (KeyError, IndexError, TypeError):
+                return _MISSING
+        return current
+
+    return accessor
+
+
+def _describe_failure(data: Any, response_path: List[Union[str, int]]) -> str:
+    """Reconstitue l'étape d'échec (appelé uniquement en DEBUG)"""
+    current = data
+    for i, key in enumerate(response_path):
+        if isinstance(current, dict) and key in current:
+            current = current[key]
+        elif isinstance(current, list) and isinstance(key, int) and -len(current) <= key < len(current):
+            current = current[key]
+        else:
+            if isinstance(current, dict):
+                available = list(current.keys())
+            elif isinstance(current, list):
+                available = f"Liste de {len(current)} éléments"
+            else:
+                available = type(current).__name__
+            return f"étape {i+1}: clé '{key}' non trouvée (structure disponible: {available})"
+    return f"résultat final n'est pas du texte: {type(current).__name__}"
+
+
+def parse_response(json_data: Union[str, bytes, dict], response_path: List[Union[str, int]]) -> Optional[str]:
     """
     Extrait le texte de réponse depuis une structure JSON en utilisant un chemin de navigation
-    
+
     Args:
-        json_data: Données JSON (string ou dict) de la réponse API
+        json_data: Données JSON (string, bytes ou dict) de la réponse API
         response_path: Liste des clés/indices pour naviguer dans la structure JSON
                       Ex: ["candidates", 0, "content", "parts", 0, "text"]
-    
+
     Returns:
         str: Texte extrait de la réponse ou None si extraction échoue
     """
-    
     try:
-        # Conversion string JSON -> dict si nécessaire
-        if isinstance(json_data, str):
-            data = json.loads(json_data)
-        else:
-            data = json_data
-            
-        print(f"[ResponseParser] Navigation avec path: {response_path}")
-        
-        # Navigation dans la structure JSON
-        current = data
-        for i, key in enumerate(response_path):
-            print(f"[ResponseParser] Étape {i+1}: accès à '{key}' dans {type(current).__name__}")
-            
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            elif isinstance(current, list) and isinstance(key, int) and 0 <= key < len(current):
-                current = current[key]
-            else:
-                print(f"[ResponseParser] ❌ Échec navigation à l'étape {i+1}: clé '{key}' non trouvée")
-                print(f"[ResponseParser] Structure disponible: {list(current.keys()) if isinstance(current, dict) else f'Liste de {len(current)} éléments' if isinstance(current, list) else type(current).__name__}")
-                return None
-                
-        # Vérification que le résultat final est du texte
-        if isinstance(current, str):
-            print(f"[ResponseParser] ✅ Texte extrait avec succès ({len(current)} chars)")
-            return current
-        else:
-            print(f"[ResponseParser] ❌ Résultat final n'est pas du texte: {type(current).__name__}")
-            return None
-            
+        data = loads_json(json_data) if isinstance(json_data, (str, bytes)) else json_data
     except json.JSONDecodeError as e:
-        print(f"[ResponseParser] ❌ Erreur parsing JSON: {e}")
+        logger.debug(f"[ResponseParser] Erreur parsing JSON: {e}")
         return None
-    except Exception as e:
-        print(f"[ResponseParser] ❌ Erreur extraction: {e}")
+
+    current = compile_response_path(response_path)(data)
+    if type(current) is str:
+        return current
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"[ResponseParser] Échec extraction avec path {response_path}: "
+                     f"{_describe_failure(data, response_path)}")
+    return None
+
+
+def extract_usage(data: Any) -> Optional[Dict[str, int]]:
+    """
+    Normalise les compteurs de tokens d'une réponse API
+
+    Formats reconnus:
+    - usage.prompt_tokens / completion_tokens (OpenAI et compatibles)
+    - usage.input_tokens / output_tokens (Claude, OpenAI responses, Qwen)
+    - usageMetadata.promptTokenCount / candidatesTokenCount (Gemini)
+
+    Returns:
+        dict: {"input_tokens", "output_tokens", "total_tokens"} ou None
+    """
+    if not isinstance(data, dict):
+        return None
+
+    usage = data.get("usage")
+    if isinstance(usage, dict):
+        input_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+        output_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+        total_tokens = usage.get("total_tokens")
+    else:
+        usage = data.get("usageMetadata")
+        if not isinstance(usage, dict):
+            return None
+        input_tokens = usage.get("promptTokenCount")
+        output_tokens = usage.get("candidatesTokenCount")
+        total_tokens = usage.get("totalTokenCount")
+
+    input_tokens = input_tokens if isinstance(input_tokens, int) else 0
+    output_tokens = output_tokens if isinstance(output_tokens, int) else 0
+    if not isinstance(total_tokens, int):
+        total_tokens = input_tokens + output_tokens
+
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": total_tokens
+    }
+
+
+def extract_finish_reason(data: Any) -> Optional[str]:
+    """
+    Extrait la raison de fin de génération (stop, length, max_tokens...)
+
+    Returns:
+        str: Raison de fin telle que renvoyée par l'API ou None
+    """
+    if not isinstance(data, dict):
         return None
 
+    choices = data.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        return choices[0].get("finish_reason")
+
+    candidates = data.get("candidates")
+    if isinstance(candidates, list) and candidates and isinstance(candidates[0], dict):
+        return candidates[0].get("finishReason")
+
+    if "stop_reason" in data:
+        return data["stop_reason"]
+
+    output = data.get("output")
+    if isinstance(output, dict):
+        return output.get("finish_reason")
+
+    # OpenAI responses API: status + incomplete_details
+    incomplete = data.get("incomplete_details")
+    if isinstance(incomplete, dict) and incomplete.get("reason"):
+        return incomplete["reason"]
+    return data.get("status") if isinstance(data.get("status"), str) else None
+
+
+def extract_error(data: Any) -> Optional[str]:
+    """
+    Extrait le message d'erreur renvoyé par le provider
+
+    Returns:
+        str: Message d'erreur formaté ou None si la réponse n'est pas une erreur
+    """
+    if not isinstance(data, dict) or "error" not in data:
+        return None
+
+    error_obj = data["error"]
+    if isinstance(error_obj, dict):
+        message = error_obj.get("message", "Erreur inconnue")
+        details = [str(error_obj[k]) for k in ("type", "status", "code") if error_obj.get(k)]
+        return f"{message} ({', '.join(details)})" if details else message
+    if error_obj:
+        return str(error_obj)
+    return None
+
+
 def validate_response_structure(json_data: Union[str, dict], response_path: List[Union[str, int]]) -> dict:
     """
     Valide la structure d'une réponse et retourne des informations de diagnostic
-    
+
     Args:
         json_data: Données JSON de la réponse API
         response_path: Chemin de navigation attendu
-    
+
     Returns:
         dict: Informations de validation (success, error, structure_info)
     """
-    
+
     result = {
         "success": False,
         "error": None,
         "structure_info": {},
         "extracted_text": None
     }
-    
+
     try:
-        if isinstance(json_data, str):
-            data = json.loads(json_data)
+        if isinstance(json_data, (str, bytes)):
+            data = loads_json(json_data)
         else:
             data = json_data
-            
+
         # Analyse de la structure racine
         if isinstance(data, dict):
             result["structure_info"]["root_keys"] = list(data.keys())
         elif isinstance(data, list):
             result["structure_info"]["root_type"] = f"Liste de {len(data)} éléments"
-        
+
         # Tentative d'extraction
         extracted = parse_response(data, response_path)
         if extracted:
             result["success"] = True
             result["extracted_text"] = extracted[:100] + "..." if len(extracted) > 100 else extracted
         else:
-            result["error"] = "Extraction échouée avec le response_path fourni"
-            
+            result["error"] = f"Extraction échouée avec le response_path fourni ({_describe_failure(data, response_path)})"
+
     except Exception as e:
         result["error"] = str(e)
-    
+
     return result
 
 def debug_json_structure(json_data: Union[str, dict], max_depth: int = 3) -> dict:
     """
     Analyse et affiche la structure d'un JSON pour aider au debugging
-    
+
     Args:
         json_data: Données JSON à analyser
         max_depth: Profondeur maximale d'analyse
-        
+
     Returns:
         dict: Structure analysée
     """
-    
+
     def analyze_structure(obj, depth=0):
         if depth > max_depth:
             return f"[Profondeur {max_depth} atteinte]"
-            
+
         if isinstance(obj, dict):
             return {key: analyze_structure(value, depth + 1) for key, value in obj.items()}
         elif isinstance(obj, list):
@@ -130,13 +300,13 @@ def debug_json_structure(json_data: Union[str, dict], max_depth: int = 3) -> dic
                 return [analyze_structure(obj[0], depth + 1), f"... +{len(obj)-1} éléments"]
         else:
             return f"{type(obj).__name__}: {str(obj)[:50]}{'...' if len(str(obj)) > 50 else ''}"
-    
+
     try:
-        if isinstance(json_data, str):
-            data = json.loads(json_data)
+        if isinstance(json_data, (str, bytes)):
+            data = loads_json(json_data)
         else:
             data = json_data
-            
+
         return analyze_structure(data)
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup - Démarrage rapide de l'application
+
+- lazy_import(): module chargé au premier accès d'attribut (importlib.util.LazyLoader)
+- LazyInstance: objet global (APIManager, ConfigManager) créé au premier usage
+- Initialisation différée: tâches enregistrées par defer(), exécutées dans un thread
+  dès que la fenêtre est affichée; ensure(nom) exécute ou attend une tâche quand
+  un appelant en a besoin avant (ex: profils par défaut avant de lister les profils)
+- Mesure: main.py --startup-profile (ou ROB1_STARTUP_PROFILE=1) affiche les temps
+  d'import et d'initialisation et le délai jusqu'à l'affichage de la fenêtre
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Référence de temps: startup est le premier module importé par main.py
+PROCESS_START = time.perf_counter()
+STARTUP_TARGET_MS = 300
+
+
+class StartupTimer:
+    """Chronologie du démarrage: blocs mesurés et instants remarquables"""
+
+    def __init__(self):
+        self.enabled = os.environ.get("ROB1_STARTUP_PROFILE", "0") not in ("0", "false", "False", "")
+        self._lock = threading.Lock()
+        # (libellé, début ms depuis PROCESS_START, durée ms ou None pour un instant, thread)
+        self.events: List[Tuple[str, float, Optional[float], str]] = []
+
+    @contextmanager
+    def measure(self, label: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._add(label, (start - PROCESS_START) * 1000, (end - start) * 1000)
+
+    def mark(self, label: str) -> float:
+        """Enregistre un instant; retourne les millisecondes écoulées depuis le lancement"""
+        elapsed = (time.perf_counter() - PROCESS_START) * 1000
+        self._add(label, elapsed, None)
+        return elapsed
+
+    def _add(self, label: str, start_ms: float, duration_ms: Optional[float]) -> None:
+        with self._lock:
+            self.events.append((label, start_ms, duration_ms, threading.current_thread().name))
+
+    def elapsed(self, label: str) -> Optional[float]:
+        with self._lock:
+            for name, start, duration, _ in self.events:
+                if name == label:
+                    return start + (duration or 0.0)
+        return None
+
+    def report(self) -> str:
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event[1])
+        lines = ["[Startup] Chronologie du démarrage (ms depuis le lancement)",
+                 f"  {'début':>8} {'durée':>8}  {'thread':<14} étape"]
+        for label, start, duration, thread in events:
+            duration_text = f"{duration:8.1f}" if duration is not None else f"{'•':>8}"
+            lines.append(f"  {start:8.1f} {duration_text}  {thread[:14]:<14} {label}")
+        window = self.elapsed("fenêtre affichée")
+        if window is not None:
+            verdict = "✅" if window <= STARTUP_TARGET_MS else "⚠️"
+            lines.append(f"  {verdict} Fenêtre affichée en {window:.0f} ms (objectif {STARTUP_TARGET_MS} ms)")
+        return "\n".join(lines)
+
+
+timer = StartupTimer()
+
+
+def lazy_import(name: str):
+    """
+    Module chargé au premier accès d'attribut
+
+    Returns:
+        Le module (proxy paresseux) ou None si le module n'est pas installé
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or spec.loader is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyInstance:
+    """Proxy créant l'instance au premier accès d'attribut (création unique, thread-safe)"""
+
+    def __init__(self, factory: Callable[[], Any], label: str):
+        self._factory = factory
+        self._label = label
+        self._lock = threading.Lock()
+        self._created = False
+        self._instance = None
+
+    def get(self) -> Any:
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    with timer.measure(f"création {self._label}"):
+                        self._instance = self._factory()
+                    self._created = True
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        instance = self.get()
+        if instance is None:
+            raise AttributeError(f"{self._label} indisponible (échec d'initialisation)")
+        return getattr(instance, name)
+
+    def __bool__(self) -> bool:
+        return self.get() is not None
+
+
+class DeferredInit:
+    """Tâches d'initialisation ordonnées, exécutées en arrière-plan ou à la demande"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Callable[[], Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._done: Dict[str, bool] = {}
+        self._registry_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.on_complete: List[Callable[[], None]] = []
+
+    def defer(self, name: str, func: Callable[[], Any]) -> None:
+        """Enregistre une tâche (ignorée si le nom existe déjà)"""
+        with self._registry_lock:
+            if name in self._tasks:
+                return
+            self._tasks[name] = func
+            self._locks[name] = threading.Lock()
+            self._done[name] = False
+            started = self._thread is not None
+        if started:
+            # Enregistrée après le lancement: exécutée directement en arrière-plan
+            threading.Thread(target=self.ensure, args=(name,), name="startup-init", daemon=True).start()
+
+    def ensure(self, name: str) -> bool:
+        """Exécute la tâche si elle n'a pas encore tourné, sinon attend sa fin"""
+        with self._registry_lock:
+            func = self._tasks.get(name)
+            lock = self._locks.get(name)
+        if func is None:
+            return False
+        with lock:
+            if self._done[name]:
+                return True
+            try:
+                with timer.measure(f"init {name}"):
+                    func()
+            except Exception as e:
+                logger.error(f"[Startup] Échec de la tâche d'initialisation '{name}': {e}")
+            finally:
+                self._done[name] = True
+        return True
+
+    def start(self) -> None:
+        """Lance les tâches enregistrées dans un thread démon (une seule fois)"""
+        with self._registry_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run_all, name="startup-init", daemon=True)
+        self._thread.start()
+
+    def _run_all(self) -> None:
+        index = 0
+        while True:
+            with self._registry_lock:
+                names = list(self._tasks)
+            if index >= len(names):
+                break
+            self.ensure(names[index])
+            index += 1
+        for callback in self.on_complete:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"[Startup] Callback de fin d'initialisation: {e}")
+
+
+deferred = DeferredInit()
+
+
+def defer(name: str, func: Callable[[], Any]) -> None:
+    deferred.defer(name, func)
+
+
+def ensure(name: str) -> bool:
+    return deferred.ensure(name)
+
+
+def _print_report() -> None:
+    report = timer.report()
+    print(report)
+    logger.info(report)
+
+
+def window_shown() -> None:
+    """Appelé par l'interface quand la fenêtre principale est affichée"""
+    elapsed = timer.mark("fenêtre affichée")
+    logger.info(f"[Startup] Fenêtre affichée après {elapsed:.0f} ms")
+    if timer.enabled:
+        deferred.on_complete.append(_print_report)
+    deferred.start()
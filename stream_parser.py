@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stream Parser - Extraction JSON incrémentale des réponses API volumineuses
+
+Consomme la sortie d'un processus (curl ou script natif) par blocs d'octets et
+extrait la cible du response_path au fil de l'eau, sans bufferiser le corps
+complet ni construire l'arbre JSON:
+- Décodage UTF-8 incrémental (remplacement des octets invalides)
+- Seuls le texte ciblé et quelques petits sous-arbres (usage, erreur, raison de fin)
+  sont conservés
+- Le corps brut n'est gardé que jusqu'à max_raw_bytes pour le repli sur le parsing
+  complet (format inattendu); une sortie qui n'est pas du JSON (texte brut des
+  templates natifs) est gardée en entier
+"""
+
+import codecs
+import re
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from response_parser import loads_json
+
+# Sous-arbres capturés par défaut: usage, erreurs et raisons de fin des dix providers
+DEFAULT_CAPTURE_PATHS = [
+    ["error"],
+    ["usage"],
+    ["usageMetadata"],
+    ["stop_reason"],
+    ["status"],
+    ["incomplete_details"],
+    ["choices", 0, "finish_reason"],
+    ["candidates", 0, "finishReason"],
+    ["output", "finish_reason"],
+]
+
+DEFAULT_MAX_RAW_BYTES = 1024 * 1024
+DEFAULT_MAX_CAPTURE_CHARS = 64 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = frozenset(' \t\n\r')
+_LITERAL_CHARS = frozenset('0123456789+-.eEtrufalsn')
+_SIMPLE_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+# Modes du lexer
+_STRUCT, _STRING, _LITERAL, _DONE, _ERROR = range(5)
+# Nature de la chaîne en cours
+_KEY, _TARGET, _SKIP = range(3)
+
+
+class StreamingJSONExtractor:
+    """
+    Extracteur JSON incrémental piloté par chemins
+
+    Usage:
+        extractor = StreamingJSONExtractor([["choices", 0, "message", "content"]], on_text=print)
+        for chunk in stream: extractor.feed(chunk)
+        extractor.close()
+        extractor.text  # texte extrait ou None
+    """
+
+    def __init__(self, target_paths: Iterable[List[Union[str, int]]],
+                 capture_paths: Optional[Iterable[List[Union[str, int]]]] = None,
+                 on_text: Optional[Callable[[str], None]] = None,
+                 max_raw_bytes: int = DEFAULT_MAX_RAW_BYTES,
+                 max_capture_chars: int = DEFAULT_MAX_CAPTURE_CHARS):
+        """
+        Args:
+            target_paths: Chemins candidats vers le texte (le premier rencontré l'emporte)
+            capture_paths: Petits sous-arbres à conserver (usage, erreur...)
+            on_text: Callback appelé avec chaque fragment de texte dès sa réception
+            max_raw_bytes: Taille maximale du corps brut conservé pour le repli
+            max_capture_chars: Taille maximale d'un sous-arbre capturé
+        """
+        self._targets = {tuple(p) for p in target_paths if p}
+        self._captures = {tuple(p) for p in (DEFAULT_CAPTURE_PATHS if capture_paths is None else capture_paths) if p}
+        self._on_text = on_text
+        self._max_raw_bytes = max_raw_bytes
+        self._max_capture_chars = max_capture_chars
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._carry = ""
+
+        # État syntaxique
+        self._mode = _STRUCT
+        self._expect = 'value'
+        self._stack: List[str] = []          # 'o' (objet) ou 'a' (tableau)
+        self._path: List[Union[str, int, None]] = []
+        self._str_kind = _SKIP
+        self._key_parts: List[str] = []
+
+        # Résultats
+        self._text_parts: List[str] = []
+        self.text_path: Optional[Tuple[Union[str, int], ...]] = None
+        self.text_complete = False
+        self.captured: Dict[Tuple[Union[str, int], ...], Any] = {}
+        self.error: Optional[str] = None
+        self.bytes_received = 0
+        self.first_byte_at: Optional[float] = None
+        self.first_text_at: Optional[float] = None
+
+        # Capture en cours
+        self._capture_path: Optional[Tuple[Union[str, int], ...]] = None
+        self._capture_depth = 0
+        self._capture_parts: List[str] = []
+        self._capture_size = 0
+        self._capture_start = 0
+
+        # Corps brut borné pour le repli
+        self._raw_parts: Optional[List[bytes]] = []
+
+    # ------------------------------------------------------------------ API
+
+    def feed(self, data: bytes) -> None:
+        """Consomme un bloc d'octets"""
+        if not data:
+            return
+        if self.first_byte_at is None:
+            self.first_byte_at = time.perf_counter()
+        self.bytes_received += len(data)
+        self._process(self._decoder.decode(data))
+        if self._raw_parts is not None:
+            self._raw_parts.append(data)
+            # Sortie non JSON (texte brut natif): conservée en entier pour le repli
+            if self.bytes_received > self._max_raw_bytes and self._mode != _ERROR:
+                self._raw_parts = None
+
+    def close(self) -> None:
+        """Termine le flux (vide le décodeur et valide la fin du document)"""
+        self._process(self._decoder.decode(b'', final=True), final=True)
+        if self._mode not in (_DONE, _ERROR):
+            if self._mode == _LITERAL and not self._stack:
+                self._mode = _DONE
+            elif self.bytes_received == 0:
+                self._fail("Réponse vide")
+            else:
+                self._fail("Document JSON incomplet")
+
+    @property
+    def text(self) -> Optional[str]:
+        """Texte extrait (None si aucune cible rencontrée)"""
+        if self.text_path is None:
+            return None
+        return "".join(self._text_parts)
+
+    def raw_bytes(self) -> Optional[bytes]:
+        """Corps brut complet (sous max_raw_bytes, ou sans limite si la sortie n'est pas du JSON), sinon None"""
+        if self._raw_parts is None:
+            return None
+        return b"".join(self._raw_parts)
+
+    def skeleton(self) -> Dict[str, Any]:
+        """
+        Document minimal reconstruit: sous-arbres capturés + texte à son chemin
+        Utilisable directement par les parseurs provider (api_response_parser)
+        """
+        document: Dict[str, Any] = {}
+        for path, value in self.captured.items():
+            _set_path(document, path, value)
+        if self.text_complete and self.text_path is not None:
+            _set_path(document, self.text_path, self.text)
+        return document
+
+    # ------------------------------------------------------------ Internes
+
+    def _fail(self, message: str) -> None:
+        if self._raw_parts is None:
+            message += f" (corps de {self.bytes_received} octets non conservé au-delà de {self._max_raw_bytes})"
+        self.error = message
+        self._mode = _ERROR
+        self._capture_path = None
+
+    def _emit(self, piece: str) -> None:
+        if self._str_kind == _KEY:
+            self._key_parts.append(piece)
+        elif self._str_kind == _TARGET:
+            if self.first_text_at is None:
+                self.first_text_at = time.perf_counter()
+            self._text_parts.append(piece)
+            if self._on_text is not None:
+                self._on_text(piece)
+
+    def _start_value(self) -> None:
+        """Début d'une valeur au chemin courant: capture éventuelle"""
+        if self._capture_path is None and self._captures:
+            path = tuple(self._path)
+            if path in self._captures:
+                self._capture_path = path
+                self._capture_depth = len(self._path)
+                self._capture_parts = []
+                self._capture_size = 0
+
+    def _value_done(self, text: str, end: int) -> None:
+        """Fin d'une valeur: clôture éventuelle de capture puis attente suivante"""
+        if self._capture_path is not None and len(self._path) == self._capture_depth:
+            self._capture_parts.append(text[self._capture_start:end])
+            try:
+                self.captured[self._capture_path] = loads_json("".join(self._capture_parts))
+            except ValueError:
+                pass
+            self._capture_path = None
+            self._capture_parts = []
+        self._expect = 'comma_or_end' if self._stack else 'done'
+        if not self._stack:
+            self._mode = _DONE
+
+    def _process(self, text: str, final: bool = False) -> None:
+        if self._carry:
+            text = self._carry + text
+            self._carry = ""
+        if self._mode in (_DONE, _ERROR) or not text:
+            return
+
+        n = len(text)
+        i = 0
+        self._capture_start = 0
+
+        while i < n:
+            mode = self._mode
+
+            if mode == _STRING:
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    if self._str_kind != _SKIP:
+                        self._emit(text[i:])
+                    i = n
+                    break
+                j = match.start()
+                if j > i and self._str_kind != _SKIP:
+                    self._emit(text[i:j])
+                if text[j] == '"':
+                    i = j + 1
+                    self._end_string(text, i)
+                    continue
+                # Séquence d'échappement (éventuellement coupée entre deux blocs)
+                consumed, char = _read_escape(text, j, final)
+                if consumed == 0:
+                    self._carry = text[j:]
+                    n = j
+                    break
+                if self._str_kind != _SKIP:
+                    self._emit(char)
+                i = j + consumed
+                continue
+
+            if mode == _LITERAL:
+                j = i
+                while j < n and text[j] in _LITERAL_CHARS:
+                    j += 1
+                if j == n:
+                    i = n
+                    break
+                self._mode = _STRUCT
+                i = j
+                self._value_done(text, i)
+                continue
+
+            if mode != _STRUCT:
+                break
+
+            ch = text[i]
+            if ch in _WHITESPACE:
+                i += 1
+                continue
+
+            expect = self._expect
+            if expect in ('value', 'value_or_end'):
+                if expect == 'value_or_end' and ch == ']':
+                    i += 1
+                    self._close_container(text, i)
+                    continue
+                self._start_value()
+                if self._capture_path is not None and len(self._path) == self._capture_depth and not self._capture_parts:
+                    self._capture_start = i
+                if ch == '{':
+                    self._stack.append('o')
+                    self._path.append(None)
+                    self._expect = 'key_or_end'
+                elif ch == '[':
+                    self._stack.append('a')
+                    self._path.append(0)
+                    self._expect = 'value_or_end'
+                elif ch == '"':
+                    path = tuple(self._path)
+                    if self.text_path is None and path in self._targets:
+                        self._str_kind = _TARGET
+                        self.text_path = path
+                    else:
+                        self._str_kind = _SKIP
+                    self._mode = _STRING
+                elif ch in _LITERAL_CHARS:
+                    self._mode = _LITERAL
+                    continue
+                else:
+                    self._fail(f"Caractère inattendu '{ch}' (octet ~{self.bytes_received})")
+                    break
+                i += 1
+            elif expect in ('key', 'key_or_end'):
+                if ch == '"':
+                    self._str_kind = _KEY
+                    self._key_parts = []
+                    self._mode = _STRING
+                    i += 1
+                elif ch == '}' and expect == 'key_or_end':
+                    i += 1
+                    self._close_container(text, i)
+                else:
+                    self._fail(f"Clé attendue, '{ch}' trouvé")
+                    break
+            elif expect == 'colon':
+                if ch != ':':
+                    self._fail(f"':' attendu, '{ch}' trouvé")
+                    break
+                self._expect = 'value'
+                i += 1
+            elif expect == 'comma_or_end':
+                kind = self._stack[-1]
+                if ch == ',':
+                    if kind == 'o':
+                        self._expect = 'key'
+                    else:
+                        self._path[-1] += 1
+                        self._expect = 'value'
+                    i += 1
+                elif (ch == '}' and kind == 'o') or (ch == ']' and kind == 'a'):
+                    i += 1
+                    self._close_container(text, i)
+                else:
+                    self._fail(f"',' ou fin de conteneur attendu, '{ch}' trouvé")
+                    break
+            else:
+                # Contenu après la fin du document
+                self._fail(f"Contenu inattendu après la fin du JSON: '{ch}'")
+                break
+
+        # Capture en cours: conserver la portion traitée de ce bloc
+        if self._capture_path is not None:
+            self._capture_parts.append(text[self._capture_start:n])
+            self._capture_size += n - self._capture_start
+            if self._capture_size > self._max_capture_chars:
+                self._capture_path = None
+                self._capture_parts = []
+
+    def _end_string(self, text: str, end: int) -> None:
+        self._mode = _STRUCT
+        if self._str_kind == _KEY:
+            self._path[-1] = "".join(self._key_parts)
+            self._key_parts = []
+            self._expect = 'colon'
+            return
+        if self._str_kind == _TARGET:
+            self.text_complete = True
+        self._str_kind = _SKIP
+        self._value_done(text, end)
+
+    def _close_container(self, text: str, end: int) -> None:
+        self._stack.pop()
+        self._path.pop()
+        self._value_done(text, end)
+
+
+def _read_escape(text: str, j: int, final: bool) -> Tuple[int, str]:
+    """
+    Décode la séquence d'échappement commençant à text[j] == '\\'
+
+    Returns:
+        (nombre de caractères consommés, caractère décodé); (0, '') si la séquence
+        est incomplète et doit être complétée par le bloc suivant
+    """
+    n = len(text)
+    if j + 1 >= n:
+        return (2, '�') if final else (0, '')
+    c = text[j + 1]
+    if c != 'u':
+        return 2, _SIMPLE_ESCAPES.get(c, c)
+    if j + 6 > n:
+        return (n - j, '�') if final else (0, '')
+    try:
+        code = int(text[j + 2:j + 6], 16)
+    except ValueError:
+        return 6, '�'
+    if 0xD800 <= code < 0xDC00:
+        # Paire de substitution UTF-16
+        if j + 12 > n and not final:
+            return 0, ''
+        if text[j + 6:j + 8] == '\\u':
+            try:
+                low = int(text[j + 8:j + 12], 16)
+            except ValueError:
+                low = 0
+            if 0xDC00 <= low < 0xE000:
+                return 12, chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00))
+        return 6, '�'
+    return 6, chr(code)
+
+
+def _set_path(document: Any, path: Tuple[Union[str, int], ...], value: Any) -> None:
+    """Insère value au chemin donné en créant les conteneurs intermédiaires"""
+    current = document
+    for position, key in enumerate(path):
+        last = position == len(path) - 1
+        next_container = None if last else ([] if isinstance(path[position + 1], int) else {})
+        if isinstance(current, dict) and isinstance(key, str):
+            if last:
+                current[key] = value
+            else:
+                current = current.setdefault(key, next_container)
+        elif isinstance(current, list) and isinstance(key, int):
+            while len(current) <= key:
+                current.append(None)
+            if last:
+                current[key] = value
+            else:
+                if current[key] is None:
+                    current[key] = next_container
+                current = current[key]
+        else:
+            return
+
+
+def decode_output(data: bytes) -> str:
+    """Décodage de repli: UTF-8 puis cp1252 puis latin1 (comportement historique)"""
+    if not data:
+        return ""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return data.decode('cp1252', errors='replace')
+        except UnicodeDecodeError:
+            return data.decode('latin1', errors='replace')
+
+
+class StreamedResult:
+    """Résultat d'exécution streamée (compatible avec les objets résultat curl/native)"""
+
+    def __init__(self, returncode: int, stdout: str, stderr: str, extractor: StreamingJSONExtractor,
+                 timed_out: bool = False, spawn_seconds: Optional[float] = None,
+                 ttfb_seconds: Optional[float] = None, total_seconds: Optional[float] = None,
+                 started_ns: Optional[int] = None):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.extractor = extractor
+        self.timed_out = timed_out
+        # Durées: lancement du processus, premier octet reçu, exécution complète
+        self.spawn_seconds = spawn_seconds
+        self.ttfb_seconds = ttfb_seconds
+        self.total_seconds = total_seconds
+        self.started_ns = started_ns
+
+
+def stream_process_output(args: Union[str, List[str]], extractor: StreamingJSONExtractor,
+                          shell: bool = False, env: Optional[Dict[str, str]] = None,
+                          timeout: Optional[float] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> StreamedResult:
+    """
+    Exécute un processus et pousse sa sortie standard dans l'extracteur au fil de l'eau
+
+    Args:
+        args: Commande (liste, ou chaîne avec shell=True)
+        extractor: Extracteur alimenté bloc par bloc
+        shell: Exécution via le shell (commandes curl)
+        env: Environnement du processus enfant
+        timeout: Délai maximal en secondes (processus tué au-delà)
+        chunk_size: Taille de lecture
+
+    Returns:
+        StreamedResult: stdout contient le corps complet s'il est resté sous la
+        limite de l'extracteur ou s'il n'est pas du JSON (sinon chaîne vide)
+    """
+    started_ns = time.time_ns()
+    started = time.perf_counter()
+    process = subprocess.Popen(args, shell=shell, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    spawned = time.perf_counter()
+
+    # stderr drainé en parallèle pour éviter tout blocage du pipe
+    stderr_parts: List[bytes] = []
+    stderr_thread = threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    timed_out = threading.Event()
+    timer = None
+    if timeout:
+        def _kill():
+            timed_out.set()
+            process.kill()
+        timer = threading.Timer(timeout, _kill)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        read = getattr(process.stdout, 'read1', process.stdout.read)
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            extractor.feed(chunk)
+        returncode = process.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        process.stdout.close()
+
+    stderr_thread.join()
+    process.stderr.close()
+    extractor.close()
+
+    finished = time.perf_counter()
+    raw = extractor.raw_bytes()
+    stdout = decode_output(raw) if raw is not None else ""
+    stderr = decode_output(b"".join(stderr_parts))
+    ttfb = extractor.first_byte_at - started if extractor.first_byte_at is not None else None
+    return StreamedResult(returncode, stdout, stderr, extractor, timed_out.is_set(),
+                          spawn_seconds=spawned - started, ttfb_seconds=ttfb,
+                          total_seconds=finished - started, started_ns=started_ns)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stream View - Affichage des fragments streamés regroupés par image (16-33 ms)
+
+Insérer chaque fragment reçu dans un ScrolledText déclenche un calcul de mise en
+page par fragment: à quelques centaines de tokens par seconde la boucle Tk est
+saturée. StreamingTextUpdater accumule les fragments et les insère en un seul
+bloc au plus une fois par image (ROB1_UI_FRAME_MS, 25 ms par défaut, borné à
+16-33 ms):
+
+- push() est utilisable depuis n'importe quel thread (aucun appel Tk)
+- boucle root.after dans le thread Tk pendant que le producteur (appel curl/natif)
+  tourne dans un thread de travail
+- contre-pression: au plus MAX_CHARS_PER_FRAME caractères insérés par image, le
+  reste attend l'image suivante; intervalle allongé (jusqu'à 100 ms) quand une
+  insertion coûte plus d'une demi-image; un producteur d'un autre thread attend
+  au-delà de HIGH_WATERMARK caractères en attente
+- défilement automatique seulement si la vue était déjà en bas du widget
+
+    flux = StreamingTextUpdater(champ_r).start()
+    # Thread de travail (appel curl/natif): fragments mis en tampon par push()
+    extracteur = create_profile_stream_extractor(profil, on_text=flux.push)
+    ...
+    # Thread Tk: la boucle root.after affiche le tampon pendant l'attente
+    flux.finish()          # dernier flush, arrêt de la boucle
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    FRAME_MS = min(max(int(os.environ.get("ROB1_UI_FRAME_MS", 25)), 16), 33)
+except ValueError:
+    FRAME_MS = 25
+MAX_FRAME_MS = 100
+MAX_CHARS_PER_FRAME = 16 * 1024
+# Producteurs hors thread Tk suspendus au-delà, relâchés sous LOW_WATERMARK
+HIGH_WATERMARK = 256 * 1024
+LOW_WATERMARK = 64 * 1024
+# Vue considérée "en bas" (fraction visible de fin de document)
+BOTTOM_THRESHOLD = 0.999
+
+
+class StreamingTextUpdater:
+    """Tampon de fragments vidé dans un widget Text au rythme de l'affichage"""
+
+    def __init__(self, widget, frame_ms: int = FRAME_MS, max_chars_per_frame: int = MAX_CHARS_PER_FRAME,
+                 high_watermark: int = HIGH_WATERMARK):
+        self.widget = widget
+        self.base_interval = frame_ms / 1000
+        self.interval = self.base_interval
+        self.max_chars_per_frame = max_chars_per_frame
+        self.high_watermark = high_watermark
+        # Thread Tk: le seul autorisé à toucher au widget
+        self._owner = threading.get_ident()
+        self._condition = threading.Condition()
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._active = False
+        self._after_id = None
+        self._mark = f"stream_start_{id(self)}"
+        self.frames = 0
+        self.chars = 0
+        self.slow_frames = 0
+
+    # ------------------------------------------------------------ Producteurs
+
+    def push(self, piece: str) -> None:
+        """Ajoute un fragment (tout thread); attend si l'affichage est trop en retard"""
+        if not piece:
+            return
+        with self._condition:
+            self._pending.append(piece)
+            self._pending_chars += len(piece)
+            if (self._active and self._pending_chars > self.high_watermark
+                    and threading.get_ident() != self._owner):
+                self._condition.wait_for(lambda: self._pending_chars <= LOW_WATERMARK or not self._active,
+                                         timeout=1.0)
+
+    # ------------------------------------------------------------ Cycle de vie (thread Tk)
+
+    def start(self) -> "StreamingTextUpdater":
+        """Repère le début de la zone streamée et lance la boucle root.after"""
+        self.widget.mark_set(self._mark, "end-1c")
+        self.widget.mark_gravity(self._mark, "left")
+        self._active = True
+        self._schedule()
+        return self
+
+    def finish(self) -> None:
+        """Affiche tout ce qui reste et arrête la boucle"""
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        while self._pending_chars:
+            self._flush()
+        with self._condition:
+            self._active = False
+            self._condition.notify_all()
+        if self.frames:
+            logger.debug(f"[StreamView] {self.chars} caractères en {self.frames} image(s), "
+                         f"{self.slow_frames} lente(s), intervalle final {self.interval * 1000:.0f} ms")
+
+    def clear(self) -> None:
+        """Retire le texte streamé du widget (remplacé ensuite par la réponse finale)"""
+        with self._condition:
+            self._pending = []
+            self._pending_chars = 0
+        try:
+            state = str(self.widget.cget('state'))
+            if state == 'disabled':
+                self.widget.configure(state='normal')
+            self.widget.delete(self._mark, "end")
+            self.widget.mark_unset(self._mark)
+            if state == 'disabled':
+                self.widget.configure(state='disabled')
+        except Exception as e:
+            logger.debug(f"[StreamView] Zone streamée introuvable: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'frames': self.frames, 'chars': self.chars, 'slow_frames': self.slow_frames,
+                'interval_ms': round(self.interval * 1000, 1), 'pending_chars': self._pending_chars}
+
+    # ------------------------------------------------------------ Affichage
+
+    def _schedule(self) -> None:
+        if self._active:
+            self._after_id = self.widget.after(max(int(self.interval * 1000), 1), self._tick)
+
+    def _tick(self) -> None:
+        self._after_id = None
+        self._flush()
+        self._schedule()
+
+    def _take(self) -> str:
+        """Retire du tampon au plus une image de texte"""
+        with self._condition:
+            if not self._pending:
+                return ""
+            text = "".join(self._pending)
+            if len(text) > self.max_chars_per_frame:
+                self._pending = [text[self.max_chars_per_frame:]]
+                text = text[:self.max_chars_per_frame]
+            else:
+                self._pending = []
+            self._pending_chars -= len(text)
+            self._condition.notify_all()
+            return text
+
+    def _flush(self) -> None:
+        text = self._take()
+        if not text:
+            return
+        started = time.perf_counter()
+        try:
+            at_bottom = self.widget.yview()[1] >= BOTTOM_THRESHOLD
+            state = str(self.widget.cget('state'))
+            if state == 'disabled':
+                self.widget.configure(state='normal')
+            self.widget.insert("end", text)
+            if state == 'disabled':
+                self.widget.configure(state='disabled')
+            if at_bottom:
+                self.widget.see("end")
+        except Exception as e:
+            # Widget détruit (fenêtre fermée pendant la réponse): plus rien à afficher
+            logger.debug(f"[StreamView] Affichage interrompu: {e}")
+            with self._condition:
+                self._active = False
+                self._pending = []
+                self._pending_chars = 0
+                self._condition.notify_all()
+            return
+        duration = time.perf_counter() - started
+        # Intervalle adaptatif: moins d'images quand chacune coûte cher, retour à la base sinon
+        if duration > self.interval / 2:
+            self.slow_frames += 1
+            self.interval = min(self.interval * 2, MAX_FRAME_MS / 1000)
+        elif duration < self.interval / 8 and self.interval > self.base_interval:
+            self.interval = max(self.interval / 2, self.base_interval)
+        self.frames += 1
+        self.chars += len(text)
@@ -11,6 +11,13 @@ import subprocess
 import os
 import sys
 
+from api_response_parser import get_response_parser, parse_profile_response
+from tracing import traced
+from profiling import profiled
+from core.endpoints import get_base_url
+
+@profiled("api_summary_call")
+@traced("api_summary_call")
 def api_summary_call(prompt_text):
     """
     Fonction de synthèse compatible V2 avec support curl/native automatique
@@ -87,27 +94,20 @@ def _synthesis_curl(prompt_text, profil):
                 delattr(gui, 'profilAPIActuel')
         
         if resultat.returncode == 0:
-            try:
-                reponse_json = json.loads(resultat.stdout)
-                
-                # MAPPING V2: Utiliser chat.response_path
-                chat_config = profil.get('chat', {})
-                response_path = chat_config.get('response_path', [])
-                
-                print(f"[SYNTHESIS] Response path V2: {response_path}")
-                
-                # Pour l'instant, utiliser le fallback direct car les méthodes changent
-                print("[SYNTHESIS] Utilisation parsing direct Gemini")
-                if response_path == ["candidates", 0, "content", "parts", 0, "text"]:
-                    texte_reponse = reponse_json["candidates"][0]["content"]["parts"][0]["text"]
-                    print(f"[SYNTHESIS] ✅ Résumé curl extrait: {len(texte_reponse)} chars")
-                    return texte_reponse
-                else:
-                    return f"❌ Response path non supporté: {response_path}"
-                    
-            except json.JSONDecodeError as e:
-                print(f"[SYNTHESIS] Erreur JSON: {e}")
-                return f"❌ Erreur JSON synthèse curl: {e}"
+            # MAPPING V2: parseur du provider du profil + chat.response_path
+            details = parse_profile_response(resultat.stdout, profil)
+
+            if details['success']:
+                texte_reponse = details['text']
+                print(f"[SYNTHESIS] ✅ Résumé curl extrait: {len(texte_reponse)} chars "
+                      f"(usage={details['usage']}, fin={details['finish_reason']})")
+                return texte_reponse
+
+            message = get_response_parser().describe_failure(details)
+            print(f"[SYNTHESIS] Erreur parsing curl: {message}")
+            if details['json_error']:
+                return f"❌ Erreur JSON synthèse curl: {details['json_error']}"
+            return f"❌ Erreur parsing synthèse curl: {message}"
         else:
             print(f"[SYNTHESIS] Erreur curl: {resultat.stderr}")
             return "❌ Erreur API synthèse curl"
@@ -124,11 +124,11 @@ def _synthesis_native(prompt_text, profil):
         print("[SYNTHESIS] === MODE NATIVE ===")
         
         # Utiliser native_manager existant
-        from native_manager import NativeManager
+        from native_manager import get_native_manager
         from core.api_manager import APIManager
         
-        # Initialiser NativeManager
-        native_manager = NativeManager()
+        # NativeManager partagé (registre des providers et dépendances déjà résolus)
+        native_manager = get_native_manager()
         
         # Récupérer le template native
         api_manager = APIManager()
@@ -156,7 +156,8 @@ def _synthesis_native(prompt_text, profil):
             'LLM_MODEL': values_config.get('llm_model', ''),
             'API_KEY': values_config.get('api_key', ''),
             'SYSTEM_PROMPT_ROLE': custom_instructions,  # Utiliser custom_instructions
-            'SYSTEM_PROMPT_BEHAVIOR': 'Assistant de synthèse'
+            'SYSTEM_PROMPT_BEHAVIOR': 'Assistant de synthèse',
+            'BASE_URL': get_base_url(profil)
         }
         
         # Exécuter requête native
@@ -182,35 +183,21 @@ def _synthesis_native(prompt_text, profil):
         
         print(f"[SYNTHESIS] Output native: {output[:200]}...")
         
-        # Parser avec response_parser comme pour curl
-        import api_response_parser
-        
-        # Récupérer response_path V2
-        response_path = chat_config.get('response_path', [])
-        print(f"[SYNTHESIS] Response path V2: {response_path}")
-        
-        try:
-            # Parser la réponse JSON si c'est du JSON
-            import json
-            if output.strip().startswith('{'):
-                response_data = json.loads(output)
-                
-                # Utiliser l'APIResponseParser pour extraire le texte automatiquement
-                success, synthesis_text = api_response_parser.extract_text_from_api_response(response_data, 'auto')
-                
-                if success:
-                    print(f"[SYNTHESIS] ✅ Résumé native extrait: {len(synthesis_text)} chars")
-                    return synthesis_text
-                else:
-                    print(f"[SYNTHESIS] Erreur parsing: {synthesis_text}")
-                    return f"❌ Erreur parsing native: {synthesis_text}"
-            else:
-                # Réponse directe (texte brut)
-                print(f"[SYNTHESIS] Réponse directe: {output[:100]}...")
-                return output
-        except Exception as e:
-            print(f"[SYNTHESIS] Erreur parsing native: {e}")
-            return output  # Retourner la réponse brute en cas d'erreur
+        # Parser avec le registre des parseurs provider comme pour curl
+        details = parse_profile_response(output, profil)
+
+        if details['success']:
+            print(f"[SYNTHESIS] ✅ Résumé native extrait: {len(details['text'])} chars")
+            return details['text']
+
+        if details['json_error'] or not isinstance(details['data'], (dict, list)):
+            # Réponse directe (texte brut)
+            print(f"[SYNTHESIS] Réponse directe: {output[:100]}...")
+            return output
+
+        message = get_response_parser().describe_failure(details)
+        print(f"[SYNTHESIS] Erreur parsing: {message}")
+        return f"❌ Erreur parsing native: {message}"
             
     except Exception as e:
         print(f"[SYNTHESIS] Exception native: {e}")
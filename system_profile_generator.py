@@ -1,24 +1,43 @@
 """
 System Profile Generator - Génère automatiquement les profils système
 Remplace le fichier [profil]system_windows.yaml par une approche plus propre
+
+Au démarrage, le dernier profil est réutilisé tant qu'il a moins de
+ROB1_SYSTEM_PROFILE_TTL secondes (défaut 24 h) et que l'empreinte OS / Python /
+matériel est inchangée: ni appel psutil ni écriture disque dans ce cas.
 """
 
+import fnmatch
+import hashlib
 import json
 import os
 import platform
 import sys
-import psutil
 import shutil
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROFILE_PATTERN = "*_profile_*.json"
+
+try:
+    SYSTEM_PROFILE_TTL = int(os.environ.get("ROB1_SYSTEM_PROFILE_TTL", 24 * 3600))
+except ValueError:
+    SYSTEM_PROFILE_TTL = 24 * 3600
+
 class SystemProfileGenerator:
     """Générateur de profils système optimisés"""
     
     def __init__(self, app_directory: str = "."):
         self.app_directory = os.path.abspath(app_directory)
         self.logger = logging.getLogger(__name__)
+        self.last_status: Optional[str] = None
     
     def get_os_info(self) -> Dict[str, str]:
         """Récupère les informations sur le système d'exploitation"""
@@ -35,19 +54,29 @@ class SystemProfileGenerator:
             "executable": sys.executable
         }
     
+    @staticmethod
+    def _total_memory_bytes() -> int:
+        """Mémoire physique totale (sysconf sans psutil quand c'est possible)"""
+        try:
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        except (AttributeError, ValueError, OSError):
+            pass
+        if psutil is not None:
+            return psutil.virtual_memory().total
+        return 0
+
     def get_hardware_info(self) -> Dict[str, Any]:
         """Récupère les informations matérielles essentielles"""
         try:
             # Informations mémoire
-            memory = psutil.virtual_memory()
-            total_memory_gb = round(memory.total / (1024**3), 2)
+            total_memory_gb = round(self._total_memory_bytes() / (1024**3), 2)
             
             # Informations disque pour le répertoire de l'application
             disk_usage = shutil.disk_usage(self.app_directory)
             disk_free_gb = round(disk_usage.free / (1024**3), 1)
             
-            # Nombre de cœurs CPU
-            cpu_cores = psutil.cpu_count(logical=False) or psutil.cpu_count()
+            # Nombre de cœurs CPU (physiques avec psutil, logiques sinon)
+            cpu_cores = (psutil.cpu_count(logical=False) if psutil is not None else None) or os.cpu_count() or 0
             
             return {
                 "cpu_cores": cpu_cores,
@@ -90,18 +119,34 @@ class SystemProfileGenerator:
                 "key_files": []
             }
     
+    def compute_fingerprint(self) -> str:
+        """
+        Empreinte peu coûteuse de l'environnement (OS, Python, CPU logiques, mémoire totale)
+        L'espace disque libre en est exclu: il varie sans que la machine change
+        """
+        identity = {
+            "os_info": self.get_os_info(),
+            "python_info": self.get_python_info(),
+            "cpu_count": os.cpu_count(),
+            "total_memory": self._total_memory_bytes(),
+            "directory": self.app_directory,
+        }
+        encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
     def generate_system_profile(self) -> Dict[str, Any]:
         """Génère un profil système complet et optimisé"""
         return {
             "generated_at": datetime.now().isoformat(),
+            "fingerprint": self.compute_fingerprint(),
             "os_info": self.get_os_info(),
             "python_info": self.get_python_info(),
             "hardware_info": self.get_hardware_info(),
             "app_info": self.get_app_info()
         }
     
-    def save_system_profile(self, output_dir: str = None) -> bool:
-        """Sauvegarde le profil système en JSON"""
+    def save_system_profile(self, output_dir: str = None, profile_data: Optional[Dict[str, Any]] = None) -> bool:
+        """Sauvegarde le profil système en JSON (généré si profile_data n'est pas fourni)"""
         try:
             if output_dir is None:
                 output_dir = os.path.join(self.app_directory, "system", "hardware")
@@ -113,11 +158,15 @@ class SystemProfileGenerator:
             date_str = datetime.now().strftime("%Y%m%d")
             filename = f"{os_name}_profile_{date_str}.json"
             
-            profile_data = self.generate_system_profile()
+            if profile_data is None:
+                profile_data = self.generate_system_profile()
             
+            # Écriture atomique: un lecteur concurrent ne voit jamais un fichier partiel
             file_path = os.path.join(output_dir, filename)
-            with open(file_path, 'w', encoding='utf-8') as f:
+            temp_path = f"{file_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
                 json.dump(profile_data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, file_path)
             
             self.logger.info(f"Profil système sauvegardé : {file_path}")
             return True
@@ -135,15 +184,11 @@ class SystemProfileGenerator:
                 return {}
             
             # Trouver le fichier le plus récent
-            profile_files = [f for f in os.listdir(profile_dir) if f.endswith('_profile_*.json')]
+            profile_files = self._list_profile_files(profile_dir)
             if not profile_files:
                 return {}
             
-            # Trier par date dans le nom de fichier
-            profile_files.sort(reverse=True)
-            latest_file = profile_files[0]
-            
-            file_path = os.path.join(profile_dir, latest_file)
+            file_path = os.path.join(profile_dir, profile_files[0])
             with open(file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -159,14 +204,11 @@ class SystemProfileGenerator:
             if not os.path.exists(profile_dir):
                 return True
             
-            # Lister tous les profils
-            profile_files = [f for f in os.listdir(profile_dir) if f.endswith('_profile_*.json')]
+            # Lister tous les profils (du plus récent au plus ancien)
+            profile_files = self._list_profile_files(profile_dir)
             if len(profile_files) <= keep_count:
                 return True
             
-            # Trier par date (nom de fichier)
-            profile_files.sort(reverse=True)
-            
             # Supprimer les anciens
             files_to_delete = profile_files[keep_count:]
             for file_to_delete in files_to_delete:
@@ -179,6 +221,67 @@ class SystemProfileGenerator:
             self.logger.error(f"Erreur nettoyage profils système : {e}")
             return False
     
+    @staticmethod
+    def _list_profile_files(profile_dir: str) -> List[str]:
+        """Profils générés (hors profile_template.json), du plus récent au plus ancien"""
+        files = [f for f in os.listdir(profile_dir) if fnmatch.fnmatch(f, PROFILE_PATTERN)]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(profile_dir, f)), reverse=True)
+        return files
+
+    @staticmethod
+    def _comparable(profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Contenu significatif d'un profil (sans horodatage ni espace disque libre)"""
+        data = {k: v for k, v in profile.items() if k != "generated_at"}
+        data["hardware_info"] = {k: v for k, v in profile.get("hardware_info", {}).items()
+                                 if k != "disk_free_gb"}
+        return data
+
+    def ensure_system_profile(self, ttl: int = SYSTEM_PROFILE_TTL, profile_dir: str = None) -> Dict[str, Any]:
+        """
+        Retourne le profil système en ne le régénérant que si nécessaire
+
+        - Dernier profil plus récent que ttl et même empreinte: réutilisé tel quel
+        - Sinon régénéré; s'il n'a pas changé, le fichier existant est seulement
+          marqué comme vérifié (mtime), sinon un nouveau fichier est écrit
+
+        self.last_status vaut "reused", "unchanged" ou "written"
+        """
+        if profile_dir is None:
+            profile_dir = os.path.join(self.app_directory, "system", "hardware")
+
+        fingerprint = self.compute_fingerprint()
+        cached, cached_path = {}, None
+        if os.path.isdir(profile_dir):
+            profile_files = self._list_profile_files(profile_dir)
+            if profile_files:
+                cached_path = os.path.join(profile_dir, profile_files[0])
+                try:
+                    with open(cached_path, 'r', encoding='utf-8') as f:
+                        cached = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Profil système illisible, régénération : {e}")
+                    cached = {}
+
+        same_machine = bool(cached) and cached.get("fingerprint") == fingerprint
+        if same_machine and time.time() - os.path.getmtime(cached_path) < ttl:
+            self.last_status = "reused"
+            self.logger.info(f"Profil système réutilisé : {cached_path}")
+            return cached
+
+        profile = self.generate_system_profile()
+        if same_machine and self._comparable(profile) == self._comparable(cached):
+            os.utime(cached_path)
+            self.last_status = "unchanged"
+            self.logger.info(f"Profil système inchangé : {cached_path}")
+            return cached
+
+        if not self.save_system_profile(profile_dir, profile):
+            self.last_status = "error"
+            return profile
+        self.cleanup_old_profiles(profile_dir)
+        self.last_status = "written"
+        return profile
+
     def auto_generate_and_cleanup(self) -> bool:
         """Génère automatiquement et nettoie les profils (fonction de commodité)"""
         success = self.save_system_profile()
@@ -187,10 +290,15 @@ class SystemProfileGenerator:
         return success
 
 def generate_system_profile_at_startup(app_directory: str = ".") -> bool:
-    """Fonction utilitaire pour génération automatique au démarrage"""
+    """
+    Fonction utilitaire pour génération automatique au démarrage
+    Réutilise le profil en cache s'il est frais et que la machine n'a pas changé
+    (appelée en arrière-plan par l'initialisation différée de gui)
+    """
     try:
         generator = SystemProfileGenerator(app_directory)
-        return generator.auto_generate_and_cleanup()
+        generator.ensure_system_profile()
+        return generator.last_status != "error"
     except Exception as e:
         logging.error(f"Erreur génération profil système au démarrage : {e}")
         return False
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracing - Traces par requête (spans imbriqués, export JSON compatible OpenTelemetry)
+
+Chaque tour de conversation produit une trace: le span racine (soumettreQuestionAPI)
+et ses enfants (synthèse, rendu template, dépendances, sous-processus, parsing...).
+À la fin du span racine, la trace est:
+- conservée en mémoire (les N dernières, pour la vue waterfall de l'interface)
+- si ROB1_TRACES_FILE est défini (ex: traces.jsonl), ajoutée à ce fichier, une ligne
+  OTLP/JSON (resourceSpans) par trace; sérialisation et écriture dans un thread de
+  fond (file d'attente), rotation par taille et par âge comme application.log
+
+ROB1_TRACING=0 désactive le tracing (les spans deviennent des no-op).
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from logging_setup import SizeAndTimeRotatingFileHandler
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get("ROB1_TRACING", "1") not in ("0", "false", "False", "")
+TRACES_FILE = os.environ.get("ROB1_TRACES_FILE", "")
+MAX_TRACES = 50
+
+SERVICE_NAME = "rob-1"
+SCOPE_NAME = "rob1.tracing"
+
+# Codes de statut OTLP
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("rob1_current_span", default=None)
+
+
+class Span:
+    """Span d'une trace (temps en nanosecondes epoch)"""
+
+    def __init__(self, name: str, trace: "Trace", parent: Optional["Span"],
+                 attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns if self.end_ns is not None else self.start_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status_message
+                      else {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Trace:
+    """Ensemble des spans d'une requête"""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def to_otlp(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}]
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    """Attribut au format OTLP/JSON (AnyValue)"""
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class _OtlpFormatter(logging.Formatter):
+    """Une trace OTLP/JSON par ligne (sérialisée dans le thread d'écriture)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.trace.to_otlp(), ensure_ascii=False)
+
+
+class Tracer:
+    """Création des spans, propagation par contextvars et export des traces terminées"""
+
+    def __init__(self, file_path: Optional[str] = TRACES_FILE, max_traces: int = MAX_TRACES,
+                 enabled: bool = TRACING_ENABLED):
+        self.file_path = file_path
+        self.enabled = enabled
+        self._recent: deque = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+        self._export_queue: Optional[queue.SimpleQueue] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """
+        Ouvre un span enfant du span courant (ou une nouvelle trace s'il n'y en a pas)
+
+        Usage:
+            with tracer.span("parse", provider="gemini") as span:
+                ...
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else Trace()
+        span = Span(name, trace, parent, attributes)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+            if parent is None:
+                self._finish(trace)
+
+    def record_span(self, name: str, start_ns: int, end_ns: int, **attributes) -> None:
+        """Ajoute un span déjà mesuré (ex: lancement du processus, TTFB) sous le span courant"""
+        parent = _current_span.get()
+        if not self.enabled or parent is None:
+            return
+        span = Span(name, parent.trace, parent, attributes, start_ns=start_ns)
+        span.end(end_ns)
+        parent.trace.add(span)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def recent_traces(self) -> List[Trace]:
+        """Dernières traces terminées (plus récente en premier)"""
+        with self._lock:
+            return list(reversed(self._recent))
+
+    def _finish(self, trace: Trace) -> None:
+        with self._lock:
+            self._recent.append(trace)
+            if not self.file_path:
+                return
+            if self._export_queue is None:
+                self._start_export()
+            export_queue = self._export_queue
+        # Appelant: simple mise en file, le thread d'écriture sérialise et écrit
+        export_queue.put(logging.makeLogRecord({"msg": "", "trace": trace}))
+
+    def _start_export(self) -> None:
+        handler = SizeAndTimeRotatingFileHandler(self.file_path)
+        handler.setFormatter(_OtlpFormatter())
+        self._export_queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self._export_queue, handler)
+        self._listener.start()
+        atexit.register(self.close)
+        logger.info(f"[Tracing] Export des traces dans {self.file_path}")
+
+    def close(self) -> None:
+        """Écrit les traces en attente et ferme le fichier (appelé automatiquement à la sortie)"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+            self._export_queue = None
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+# Tracer global de l'application
+tracer = Tracer()
+
+
+def span(name: str, **attributes):
+    """Raccourci: with span("nom", cle=valeur): ..."""
+    return tracer.span(name, **attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Décorateur: exécute la fonction dans un span (nom de la fonction par défaut)"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Ajoute un attribut au span courant (sans effet hors trace)"""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
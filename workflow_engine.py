@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Workflow Engine - Orchestration multi-agents en graphe (DAG)
+
+Un workflow JSON (dossier workflows/, à côté de profiles/) décrit des nœuds,
+chacun exécuté par un profil (rôle, comportement et modèle surchargeables);
+les sorties des nœuds amont sont injectées dans le prompt des nœuds aval.
+
+    {
+        "name": "redaction_critique",
+        "max_parallel": 3,
+        "nodes": {
+            "brouillon": {"profile": "Gemini", "prompt": "Rédige: {{input}}"},
+            "critique":  {"profile": "OpenAI", "inputs": ["brouillon"],
+                          "role": "Relecteur exigeant", "prompt": "Critique:\\n{{brouillon}}"},
+            "fusion":    {"profile": "Claude", "inputs": ["brouillon", "critique"],
+                          "prompt": "Texte:\\n{{brouillon}}\\nCritique:\\n{{critique}}\\nRéécris."}
+        }
+    }
+
+- Les nœuds indépendants s'exécutent en parallèle (max_parallel workers)
+- Cache par nœud, clé = hash (fournisseur, méthode, modèle, rôle, comportement,
+  URL de base, template du fournisseur, prompt rendu): après modification d'un
+  nœud, seuls lui et ses descendants sont recalculés
+- Un nœud en échec marque ses descendants "skipped", les branches indépendantes continuent
+
+Usage:
+    python workflow_engine.py list
+    python workflow_engine.py run redaction_critique --input "Les caches HTTP" -o resultat.json
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from api_response_parser import provider_from_profile
+from config_watcher import get_active_watcher
+from core.endpoints import get_base_url
+from tracing import set_attribute, span
+
+logger = logging.getLogger(__name__)
+
+WORKFLOWS_DIR = "workflows"
+CACHE_DIR = os.path.join(WORKFLOWS_DIR, ".cache")
+CACHE_VERSION = 2
+TEMPLATES_DIR = os.path.join("templates", "chat")
+DEFAULT_MAX_PARALLEL = 4
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([A-Za-z0-9_\-]+)\s*\}\}')
+OVERRIDABLE_VALUES = ('role', 'behavior', 'llm_model')
+
+
+class WorkflowError(Exception):
+    """Workflow invalide (nœud inconnu, cycle, placeholder sans entrée)"""
+
+
+class WorkflowNode:
+    """Étape du workflow: un profil, un prompt et ses dépendances"""
+
+    def __init__(self, node_id: str, spec: Dict[str, Any]):
+        if not isinstance(spec, dict):
+            raise WorkflowError(f"Nœud '{node_id}': définition attendue sous forme d'objet")
+        self.node_id = node_id
+        self.profile = spec.get('profile')
+        self.prompt = spec.get('prompt')
+        self.inputs: List[str] = list(spec.get('inputs', []))
+        self.method = spec.get('method')
+        self.overrides = {key: spec[key] for key in OVERRIDABLE_VALUES if key in spec}
+
+        if not isinstance(self.profile, str) or not self.profile:
+            raise WorkflowError(f"Nœud '{node_id}': champ 'profile' requis")
+        if not isinstance(self.prompt, str) or not self.prompt.strip():
+            raise WorkflowError(f"Nœud '{node_id}': champ 'prompt' requis")
+
+    def render_prompt(self, workflow_input: str, outputs: Dict[str, str]) -> str:
+        values = dict(outputs, input=workflow_input)
+        return PLACEHOLDER_PATTERN.sub(lambda m: values.get(m.group(1), m.group(0)), self.prompt)
+
+
+class Workflow:
+    """Graphe de nœuds validé (références, placeholders, absence de cycle)"""
+
+    def __init__(self, definition: Dict[str, Any], source: str = ""):
+        self.source = source
+        self.name = definition.get('name') or os.path.splitext(os.path.basename(source))[0] or "workflow"
+        self.description = definition.get('description', '')
+        self.max_parallel = int(definition.get('max_parallel', DEFAULT_MAX_PARALLEL))
+        nodes = definition.get('nodes')
+        if not isinstance(nodes, dict) or not nodes:
+            raise WorkflowError(f"Workflow '{self.name}': champ 'nodes' requis (objet non vide)")
+        self.nodes: Dict[str, WorkflowNode] = {nid: WorkflowNode(nid, spec) for nid, spec in nodes.items()}
+        self.outputs: List[str] = list(definition.get('outputs') or self._sinks())
+        self.order = self._validate()
+
+    @classmethod
+    def load(cls, name_or_path: str, workflows_dir: str = WORKFLOWS_DIR) -> 'Workflow':
+        """Charge un workflow par chemin ou par nom (workflows/<nom>.json)"""
+        path = name_or_path
+        if not os.path.exists(path):
+            path = os.path.join(workflows_dir, name_or_path if name_or_path.endswith('.json') else f"{name_or_path}.json")
+        if not os.path.exists(path):
+            raise WorkflowError(f"Workflow introuvable: {name_or_path}")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f), source=path)
+        except json.JSONDecodeError as e:
+            raise WorkflowError(f"JSON invalide dans {path}: {e}")
+
+    def _sinks(self) -> List[str]:
+        used = {dep for node in self.nodes.values() for dep in node.inputs}
+        return [nid for nid in self.nodes if nid not in used]
+
+    def dependents(self) -> Dict[str, List[str]]:
+        children: Dict[str, List[str]] = {nid: [] for nid in self.nodes}
+        for node in self.nodes.values():
+            for dep in node.inputs:
+                children[dep].append(node.node_id)
+        return children
+
+    def _validate(self) -> List[str]:
+        """Vérifie les références et retourne un ordre topologique (Kahn)"""
+        for node in self.nodes.values():
+            for dep in node.inputs:
+                if dep not in self.nodes:
+                    raise WorkflowError(f"Nœud '{node.node_id}': entrée inconnue '{dep}'")
+            for placeholder in PLACEHOLDER_PATTERN.findall(node.prompt):
+                if placeholder != 'input' and placeholder not in node.inputs:
+                    raise WorkflowError(
+                        f"Nœud '{node.node_id}': {{{{{placeholder}}}}} doit figurer dans 'inputs'")
+        for output in self.outputs:
+            if output not in self.nodes:
+                raise WorkflowError(f"Sortie inconnue: '{output}'")
+
+        remaining = {nid: len(set(node.inputs)) for nid, node in self.nodes.items()}
+        children = self.dependents()
+        ready = [nid for nid, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            nid = ready.pop(0)
+            order.append(nid)
+            for child in dict.fromkeys(children[nid]):
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.nodes):
+            cycle = sorted(nid for nid in self.nodes if nid not in order)
+            raise WorkflowError(f"Cycle détecté entre les nœuds: {', '.join(cycle)}")
+        return order
+
+
+class NodeCache:
+    """Résultats de nœuds sur disque, un fichier JSON par hash d'entrée"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(profile: Dict[str, Any], prompt: str) -> str:
+        chat = profile.get('chat', {})
+        values = chat.get('values', {})
+        provider = provider_from_profile(profile)
+        method = chat.get('method', 'curl')
+        material = {
+            'version': CACHE_VERSION,
+            'provider': provider,
+            'method': method,
+            'llm_model': values.get('llm_model', ''),
+            'role': values.get('role', ''),
+            'behavior': values.get('behavior', ''),
+            'base_url': get_base_url(profile),
+            'template': NodeCache.template_hash(provider, method),
+            'prompt': prompt,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def template_hash(provider: str, method: str) -> str:
+        """Hash du template du fournisseur (curl ou natif); chaîne vide s'il est introuvable"""
+        filename = "native_basic.py" if method == 'native' else "curl_basic.txt"
+        watcher = get_active_watcher()
+        template = watcher.get_template(provider, filename) if watcher else None
+        if template is None:
+            try:
+                with open(os.path.join(TEMPLATES_DIR, provider, filename), 'r', encoding='utf-8') as f:
+                    template = f.read()
+            except OSError:
+                return ""
+        return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"[Workflow] Écriture du cache impossible: {e}")
+
+    def clear(self) -> int:
+        removed = 0
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, filename))
+                    removed += 1
+        return removed
+
+
+class WorkflowEngine:
+    """Exécution d'un workflow avec parallélisme borné et cache par nœud"""
+
+    def __init__(self, service=None, cache: Optional[NodeCache] = None, use_cache: bool = True,
+                 max_parallel: Optional[int] = None):
+        if service is None:
+            from chat_service import ChatService
+            service = ChatService()
+        self.service = service
+        self.cache = cache or NodeCache()
+        self.use_cache = use_cache
+        self.max_parallel = max_parallel
+
+    def _node_profile(self, node: WorkflowNode) -> Dict[str, Any]:
+        """Profil effectif du nœud (copie, surcharges appliquées)"""
+        profile = copy.deepcopy(self.service.load_profile(node.profile))
+        chat = profile.setdefault('chat', {})
+        chat.setdefault('values', {}).update(node.overrides)
+        if node.method:
+            chat['method'] = node.method
+        return profile
+
+    def _execute(self, node: WorkflowNode, profile: Dict[str, Any], prompt: str, key: str) -> Dict[str, Any]:
+        with span("workflow.node", node=node.node_id, profile=node.profile):
+            details = self.service.ask(profile, prompt)
+            set_attribute("success", details['success'])
+        if not details['success']:
+            raise RuntimeError(details['error'] or details['json_error'] or "Réponse sans texte exploitable")
+        entry = {
+            'text': details['text'],
+            'usage': details['usage'],
+            'profile': node.profile,
+            'created_at': time.time(),
+        }
+        if self.use_cache:
+            self.cache.put(key, entry)
+        return dict(entry, latency_ms=round(details.get('latency_seconds', 0.0) * 1000, 1))
+
+    def run(self, workflow: Workflow, workflow_input: str = "",
+            on_event: Optional[Callable[[str, str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Exécute le workflow
+
+        Args:
+            workflow: Workflow validé
+            workflow_input: Texte substitué à {{input}}
+            on_event: Rappel (événement, nœud, résultat) - start, cached, done, failed, skipped
+
+        Returns:
+            Dict {workflow, status, nodes: {id: {status, text, ...}}, outputs: {id: texte}, total_seconds}
+        """
+        def notify(event: str, node_id: str, result: Dict[str, Any]) -> None:
+            if on_event:
+                on_event(event, node_id, result)
+
+        start = time.perf_counter()
+        children = workflow.dependents()
+        waiting = {nid: set(node.inputs) for nid, node in workflow.nodes.items()}
+        results: Dict[str, Dict[str, Any]] = {}
+        outputs: Dict[str, str] = {}
+        ready = [nid for nid in workflow.order if not waiting[nid]]
+        max_parallel = max(1, self.max_parallel or workflow.max_parallel)
+
+        def complete(node_id: str, result: Dict[str, Any]) -> None:
+            results[node_id] = result
+            if result['status'] in ('done', 'cached'):
+                outputs[node_id] = result['text']
+            for child in children[node_id]:
+                waiting[child].discard(node_id)
+                if not waiting[child] and child not in results and child not in ready:
+                    ready.append(child)
+
+        with span("workflow.run", workflow=workflow.name, nodes=len(workflow.nodes)):
+            with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="workflow") as executor:
+                running = {}
+                while ready or running:
+                    while ready:
+                        node_id = ready.pop(0)
+                        node = workflow.nodes[node_id]
+                        failed = [dep for dep in node.inputs if results[dep]['status'] in ('failed', 'skipped')]
+                        if failed:
+                            result = {'status': 'skipped', 'error': f"Entrée en échec: {', '.join(failed)}"}
+                            notify('skipped', node_id, result)
+                            complete(node_id, result)
+                            continue
+                        try:
+                            profile = self._node_profile(node)
+                        except KeyError as e:
+                            result = {'status': 'failed', 'error': str(e.args[0])}
+                            notify('failed', node_id, result)
+                            complete(node_id, result)
+                            continue
+
+                        prompt = node.render_prompt(workflow_input, outputs)
+                        key = NodeCache.key(profile, prompt)
+                        cached = self.cache.get(key) if self.use_cache else None
+                        if cached is not None:
+                            result = dict(cached, status='cached', key=key)
+                            notify('cached', node_id, result)
+                            complete(node_id, result)
+                            continue
+                        notify('start', node_id, {'status': 'running', 'key': key})
+                        running[executor.submit(self._execute, node, profile, prompt, key)] = (node_id, key)
+
+                    if not running:
+                        break
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        node_id, key = running.pop(future)
+                        try:
+                            result = dict(future.result(), status='done', key=key)
+                        except Exception as e:
+                            logger.warning(f"[Workflow] Nœud {node_id} en échec: {e}")
+                            result = {'status': 'failed', 'error': str(e), 'key': key}
+                        notify(result['status'], node_id, result)
+                        complete(node_id, result)
+
+        statuses = {result['status'] for result in results.values()}
+        return {
+            'workflow': workflow.name,
+            'status': 'failed' if statuses & {'failed', 'skipped'} else 'success',
+            'nodes': {nid: results[nid] for nid in workflow.order},
+            'outputs': {nid: outputs[nid] for nid in workflow.outputs if nid in outputs},
+            'total_seconds': round(time.perf_counter() - start, 3),
+        }
+
+
+def list_workflows(workflows_dir: str = WORKFLOWS_DIR) -> List[str]:
+    if not os.path.isdir(workflows_dir):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(workflows_dir) if f.endswith('.json'))
+
+
+def _print_event(event: str, node_id: str, result: Dict[str, Any]) -> None:
+    icons = {'start': '▶️', 'cached': '💾', 'done': '✅', 'failed': '❌', 'skipped': '⏭️'}
+    detail = ""
+    if event == 'done':
+        detail = f" ({result.get('latency_ms', 0):.0f} ms)"
+    elif event in ('failed', 'skipped'):
+        detail = f" - {result.get('error')}"
+    print(f"[Workflow] {icons.get(event, '•')} {node_id}{detail}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Orchestration multi-agents Rob-1 (workflows DAG)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Liste les workflows de workflows/")
+
+    run_parser = sub.add_parser("run", help="Exécute un workflow")
+    run_parser.add_argument("workflow", help="Nom (workflows/<nom>.json) ou chemin du fichier")
+    run_parser.add_argument("--input", default="", help="Texte substitué à {{input}}")
+    run_parser.add_argument("--input-file", help="Lit {{input}} depuis un fichier")
+    run_parser.add_argument("--max-parallel", type=int, help="Nombre maximal de nœuds simultanés")
+    run_parser.add_argument("--no-cache", action="store_true", help="Ignore et n'alimente pas le cache")
+    run_parser.add_argument("--timeout", type=float, default=120.0, help="Délai par appel (s)")
+    run_parser.add_argument("-o", "--output", help="Écrit le résultat complet en JSON")
+
+    sub.add_parser("clear-cache", help="Vide le cache des nœuds")
+
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "list":
+        for name in list_workflows():
+            print(name)
+        return 0
+    if arguments.command == "clear-cache":
+        print(f"🧹 {NodeCache().clear()} entrée(s) supprimée(s)")
+        return 0
+
+    try:
+        workflow = Workflow.load(arguments.workflow)
+    except WorkflowError as e:
+        print(f"❌ {e}")
+        return 2
+    workflow_input = arguments.input
+    if arguments.input_file:
+        with open(arguments.input_file, 'r', encoding='utf-8') as f:
+            workflow_input = f.read()
+
+    from chat_service import ChatService
+    engine = WorkflowEngine(ChatService(timeout=arguments.timeout), use_cache=not arguments.no_cache,
+                            max_parallel=arguments.max_parallel)
+    result = engine.run(workflow, workflow_input, on_event=_print_event)
+
+    for node_id, text in result['outputs'].items():
+        print(f"\n=== {node_id} ===\n{text}")
+    print(f"\n[Workflow] {workflow.name}: {result['status']} en {result['total_seconds']:.1f} s")
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0 if result['status'] == 'success' else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())